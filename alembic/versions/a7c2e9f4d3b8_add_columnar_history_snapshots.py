@@ -0,0 +1,45 @@
+"""add_columnar_history_snapshots
+
+Revision ID: a7c2e9f4d3b8
+Revises: f6b9d4e2c8a1
+Create Date: 2026-10-19 19:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a7c2e9f4d3b8'
+down_revision: Union[str, None] = 'f6b9d4e2c8a1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Server-generated archives: compressed columnar results blob built from a calculation run.
+    # Existing rows keep their client-sent JSONB (snapshot_format 'json').
+    op.add_column('history_snapshots', sa.Column('snapshot_format', sa.String(length=20), nullable=False, server_default='json'))
+    op.add_column('history_snapshots', sa.Column('results_blob', sa.LargeBinary(), nullable=True))
+    op.add_column('history_snapshots', sa.Column('node_count', sa.Integer(), nullable=True))
+    op.add_column('history_snapshots', sa.Column('calculation_run_id', postgresql.UUID(as_uuid=True), nullable=True))
+    op.create_foreign_key(
+        'fk_history_snapshots_calculation_run_id', 'history_snapshots', 'calculation_runs',
+        ['calculation_run_id'], ['id'], ondelete='SET NULL'
+    )
+    # The blob is already compressed: skip TOAST's pglz pass
+    op.execute("ALTER TABLE history_snapshots ALTER COLUMN results_blob SET STORAGE EXTERNAL")
+    # Version numbering reads MAX(version_tag) per use case
+    op.create_index('ix_history_snapshots_use_case_id', 'history_snapshots', ['use_case_id'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_history_snapshots_use_case_id', table_name='history_snapshots')
+    op.drop_constraint('fk_history_snapshots_calculation_run_id', 'history_snapshots', type_='foreignkey')
+    op.drop_column('history_snapshots', 'calculation_run_id')
+    op.drop_column('history_snapshots', 'node_count')
+    op.drop_column('history_snapshots', 'results_blob')
+    op.drop_column('history_snapshots', 'snapshot_format')
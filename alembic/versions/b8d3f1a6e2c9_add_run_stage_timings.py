@@ -0,0 +1,30 @@
+"""add_run_stage_timings
+
+Revision ID: b8d3f1a6e2c9
+Revises: a7c2e9f4d3b8
+Create Date: 2026-10-19 20:40:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b8d3f1a6e2c9'
+down_revision: Union[str, None] = 'a7c2e9f4d3b8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Per-stage wall time, statement count and DB time of a run (app/services/stage_tracing.py)
+    op.add_column('calculation_runs', sa.Column('stage_timings', postgresql.JSONB(astext_type=sa.Text()), nullable=True))
+    op.add_column('use_case_runs', sa.Column('stage_timings', postgresql.JSONB(astext_type=sa.Text()), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('use_case_runs', 'stage_timings')
+    op.drop_column('calculation_runs', 'stage_timings')
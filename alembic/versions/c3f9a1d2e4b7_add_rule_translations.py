@@ -0,0 +1,38 @@
+"""add_rule_translations
+
+Revision ID: c3f9a1d2e4b7
+Revises: aa275d79876c
+Create Date: 2026-10-19 09:12:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c3f9a1d2e4b7'
+down_revision: Union[str, None] = 'aa275d79876c'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Persistent GenAI translation store (replaces restart-volatile in-memory cache)
+    op.create_table(
+        'rule_translations',
+        sa.Column('cache_key', sa.String(length=64), nullable=False),
+        sa.Column('schema_version', sa.String(length=20), nullable=False),
+        sa.Column('normalized_logic_en', sa.Text(), nullable=False),
+        sa.Column('predicate_json', postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+        sa.Column('created_at', sa.TIMESTAMP(), server_default=sa.text('now()'), nullable=False),
+        sa.PrimaryKeyConstraint('cache_key')
+    )
+    op.create_index('ix_rule_translations_schema_version', 'rule_translations', ['schema_version'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_rule_translations_schema_version', table_name='rule_translations')
+    op.drop_table('rule_translations')
@@ -0,0 +1,119 @@
+"""add_engine_access_indexes
+
+Revision ID: c9e4a2f7b1d3
+Revises: b8d3f1a6e2c9
+Create Date: 2026-10-19 21:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c9e4a2f7b1d3'
+down_revision: Union[str, None] = 'b8d3f1a6e2c9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Created by the Use Case 3 load scripts, not by a migration - may be absent
+USE_CASE_3_TABLE = 'fact_pnl_use_case_3'
+USE_CASE_3_MEASURES = ['pnl_daily', 'pnl_commission', 'pnl_trade']
+
+ANALYZED_TABLES = (
+    'fact_pnl_gold', 'fact_pnl_entries', 'fact_calculated_results', 'hierarchy_bridge', 'dim_hierarchy'
+)
+
+
+def _has_table(name: str) -> bool:
+    return sa.inspect(op.get_bind()).has_table(name)
+
+
+def upgrade() -> None:
+    # Legacy rollup: SUM(measures) GROUP BY cc_id -> index-only scan (supersedes ix_fact_pnl_gold_cc_id)
+    op.create_index(
+        'ix_fact_pnl_gold_cc_id_measures', 'fact_pnl_gold', ['cc_id'],
+        postgresql_include=['daily_pnl', 'mtd_pnl', 'ytd_pnl', 'pytd_pnl']
+    )
+    op.execute("DROP INDEX IF EXISTS ix_fact_pnl_gold_cc_id")
+
+    # Rollups / load_facts_for_date / backfill windows filter use_case_id + scenario
+    # [+ pnl_date] and group by category_code (supersedes ix_fact_pnl_entries_use_case_id)
+    op.create_index(
+        'ix_fact_pnl_entries_engine', 'fact_pnl_entries',
+        ['use_case_id', 'scenario', 'pnl_date', 'category_code'],
+        postgresql_include=['daily_amount', 'wtd_amount', 'ytd_amount']
+    )
+    op.execute("DROP INDEX IF EXISTS ix_fact_pnl_entries_use_case_id")
+    # scenario, pnl_date and use_case_id are correlated (one use case covers a date range per scenario)
+    op.execute("""
+        CREATE STATISTICS IF NOT EXISTS stx_fact_pnl_entries_scope (ndistinct, dependencies)
+        ON use_case_id, scenario, pnl_date FROM fact_pnl_entries
+    """)
+
+    if _has_table(USE_CASE_3_TABLE):
+        # Strategy rollup matches strategy, then product_line; Type 2B rules filter both
+        op.create_index(
+            'ix_fact_pnl_uc3_strategy', USE_CASE_3_TABLE, ['strategy', 'effective_date'],
+            postgresql_include=USE_CASE_3_MEASURES
+        )
+        op.create_index(
+            'ix_fact_pnl_uc3_product_line', USE_CASE_3_TABLE, ['product_line', 'effective_date'],
+            postgresql_include=USE_CASE_3_MEASURES
+        )
+        # Backfill date windows
+        op.create_index('ix_fact_pnl_uc3_effective_date', USE_CASE_3_TABLE, ['effective_date'])
+        # Each strategy belongs to one product line
+        op.execute(f"""
+            CREATE STATISTICS IF NOT EXISTS stx_fact_pnl_uc3_dims (ndistinct, dependencies)
+            ON strategy, product_line FROM {USE_CASE_3_TABLE}
+        """)
+
+    # run_results_select: DISTINCT ON (node_id) per run (supersede the single-column run indexes)
+    op.create_index(
+        'ix_fact_calculated_results_calc_run_node', 'fact_calculated_results', ['calculation_run_id', 'node_id']
+    )
+    op.execute("DROP INDEX IF EXISTS ix_fact_calculated_results_calc_run_id")
+    op.create_index(
+        'ix_fact_calculated_results_run_node', 'fact_calculated_results', ['run_id', 'node_id']
+    )
+    op.execute("DROP INDEX IF EXISTS ix_fact_calculated_results_run_id")
+
+    # Bridge expansion parent -> leaves without heap lookups (supersedes ix_hierarchy_bridge_parent)
+    op.create_index('ix_hierarchy_bridge_parent_leaf', 'hierarchy_bridge', ['parent_node_id', 'leaf_node_id'])
+    op.execute("DROP INDEX IF EXISTS ix_hierarchy_bridge_parent")
+
+    # load_hierarchy filters atlas_source; children lookups filter parent_node_id
+    op.create_index('ix_dim_hierarchy_atlas_parent', 'dim_hierarchy', ['atlas_source', 'parent_node_id'])
+    op.create_index('ix_dim_hierarchy_parent_node_id', 'dim_hierarchy', ['parent_node_id'])
+
+    # Fresh statistics so the planner uses the new indexes right away
+    for table in ANALYZED_TABLES + ((USE_CASE_3_TABLE,) if _has_table(USE_CASE_3_TABLE) else ()):
+        op.execute(f"ANALYZE {table}")
+
+
+def downgrade() -> None:
+    op.drop_index('ix_dim_hierarchy_parent_node_id', table_name='dim_hierarchy')
+    op.drop_index('ix_dim_hierarchy_atlas_parent', table_name='dim_hierarchy')
+
+    op.create_index('ix_hierarchy_bridge_parent', 'hierarchy_bridge', ['parent_node_id'])
+    op.drop_index('ix_hierarchy_bridge_parent_leaf', table_name='hierarchy_bridge')
+
+    op.create_index('ix_fact_calculated_results_run_id', 'fact_calculated_results', ['run_id'])
+    op.drop_index('ix_fact_calculated_results_run_node', table_name='fact_calculated_results')
+    op.create_index('ix_fact_calculated_results_calc_run_id', 'fact_calculated_results', ['calculation_run_id'])
+    op.drop_index('ix_fact_calculated_results_calc_run_node', table_name='fact_calculated_results')
+
+    if _has_table(USE_CASE_3_TABLE):
+        op.execute("DROP STATISTICS IF EXISTS stx_fact_pnl_uc3_dims")
+        op.drop_index('ix_fact_pnl_uc3_effective_date', table_name=USE_CASE_3_TABLE)
+        op.drop_index('ix_fact_pnl_uc3_product_line', table_name=USE_CASE_3_TABLE)
+        op.drop_index('ix_fact_pnl_uc3_strategy', table_name=USE_CASE_3_TABLE)
+
+    op.execute("DROP STATISTICS IF EXISTS stx_fact_pnl_entries_scope")
+    op.create_index('ix_fact_pnl_entries_use_case_id', 'fact_pnl_entries', ['use_case_id'])
+    op.drop_index('ix_fact_pnl_entries_engine', table_name='fact_pnl_entries')
+
+    op.create_index('ix_fact_pnl_gold_cc_id', 'fact_pnl_gold', ['cc_id'])
+    op.drop_index('ix_fact_pnl_gold_cc_id_measures', table_name='fact_pnl_gold')
@@ -0,0 +1,54 @@
+"""add_rule_preview_samples
+
+Revision ID: d1f5b3a8c2e4
+Revises: c9e4a2f7b1d3
+Create Date: 2026-10-19 22:10:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd1f5b3a8c2e4'
+down_revision: Union[str, None] = 'c9e4a2f7b1d3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Fact tables previewed by rule authoring (app/services/rule_preview.py)
+FACT_TABLES = ('fact_pnl_gold', 'fact_pnl_entries', 'fact_pnl_use_case_3')
+
+
+def _has_table(name: str) -> bool:
+    return sa.inspect(op.get_bind()).has_table(name)
+
+
+def upgrade() -> None:
+    # One row per sampled fact table: which sample_version is current and the data version it reflects
+    op.create_table(
+        'fact_sample_state',
+        sa.Column('table_name', sa.String(100), primary_key=True),
+        sa.Column('sample_version', sa.Integer(), nullable=False),
+        sa.Column('data_version', sa.String(100), nullable=False),
+        sa.Column('sample_rows', sa.BigInteger(), nullable=False),
+        sa.Column('total_rows', sa.BigInteger(), nullable=False),
+        sa.Column('sample_percent', sa.Float(), nullable=False),
+        sa.Column('refreshed_at', sa.TIMESTAMP(), nullable=False, server_default=sa.text('now()')),
+    )
+
+    # Row-level (Bernoulli) samples with the fact table's columns, rebuilt per data version.
+    # UNLOGGED: derived data, rebuilt after a crash.
+    for table in FACT_TABLES:
+        if not _has_table(table):
+            continue  # fact_pnl_use_case_3 is created by the load scripts; sampled on first refresh
+        op.execute(f"CREATE UNLOGGED TABLE {table}_sample (LIKE {table} INCLUDING DEFAULTS)")
+        op.execute(f"ALTER TABLE {table}_sample ADD COLUMN sample_version INTEGER NOT NULL DEFAULT 0")
+        op.create_index(f'ix_{table}_sample_version', f'{table}_sample', ['sample_version'])
+
+
+def downgrade() -> None:
+    for table in FACT_TABLES:
+        op.execute(f"DROP TABLE IF EXISTS {table}_sample")
+    op.drop_table('fact_sample_state')
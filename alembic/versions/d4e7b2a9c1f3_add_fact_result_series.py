@@ -0,0 +1,77 @@
+"""add_fact_result_series
+
+Revision ID: d4e7b2a9c1f3
+Revises: c3f9a1d2e4b7
+Create Date: 2026-10-19 14:05:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd4e7b2a9c1f3'
+down_revision: Union[str, None] = 'c3f9a1d2e4b7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Typed time-series copy of the latest COMPLETED run per (use case, PNL date).
+    # PK (use_case_id, node_id, pnl_date) serves node x date-range reads as one range scan.
+    op.create_table(
+        'fact_result_series',
+        sa.Column('use_case_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('node_id', sa.String(length=200), nullable=False),
+        sa.Column('pnl_date', sa.Date(), nullable=False),
+        sa.Column('calculation_run_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('daily', sa.Numeric(precision=18, scale=4), nullable=False, server_default='0'),
+        sa.Column('wtd', sa.Numeric(precision=18, scale=4), nullable=False, server_default='0'),
+        sa.Column('ytd', sa.Numeric(precision=18, scale=4), nullable=False, server_default='0'),
+        sa.Column('pytd', sa.Numeric(precision=18, scale=4), nullable=False, server_default='0'),
+        sa.Column('daily_variance', sa.Numeric(precision=18, scale=4), nullable=False, server_default='0'),
+        sa.Column('wtd_variance', sa.Numeric(precision=18, scale=4), nullable=False, server_default='0'),
+        sa.Column('ytd_variance', sa.Numeric(precision=18, scale=4), nullable=False, server_default='0'),
+        sa.Column('is_override', sa.Boolean(), nullable=False, server_default=sa.text('false')),
+        sa.ForeignKeyConstraint(['use_case_id'], ['use_cases.use_case_id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['calculation_run_id'], ['calculation_runs.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('use_case_id', 'node_id', 'pnl_date')
+    )
+    # Cascade deletes from calculation_runs look rows up by run
+    op.create_index('ix_fact_result_series_calculation_run_id', 'fact_result_series', ['calculation_run_id'])
+
+    # Populate from existing history (same SQL as result_series.rebuild_result_series)
+    op.execute("""
+        WITH latest_runs AS (
+            SELECT DISTINCT ON (use_case_id, pnl_date) id, use_case_id, pnl_date
+            FROM calculation_runs
+            WHERE status = 'COMPLETED'
+            ORDER BY use_case_id, pnl_date, executed_at DESC, id DESC
+        )
+        INSERT INTO fact_result_series (
+            use_case_id, node_id, pnl_date, calculation_run_id,
+            daily, wtd, ytd, pytd,
+            daily_variance, wtd_variance, ytd_variance,
+            is_override
+        )
+        SELECT
+            lr.use_case_id, r.node_id, lr.pnl_date, lr.id,
+            COALESCE((r.measure_vector->>'daily')::numeric, 0),
+            COALESCE((r.measure_vector->>'wtd')::numeric, 0),
+            COALESCE((r.measure_vector->>'ytd')::numeric, 0),
+            COALESCE((r.measure_vector->>'pytd')::numeric, 0),
+            COALESCE((r.plug_vector->>'daily')::numeric, 0),
+            COALESCE((r.plug_vector->>'wtd')::numeric, 0),
+            COALESCE((r.plug_vector->>'ytd')::numeric, 0),
+            r.is_override
+        FROM latest_runs lr
+        JOIN fact_calculated_results r ON r.calculation_run_id = lr.id
+    """)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_fact_result_series_calculation_run_id', table_name='fact_result_series')
+    op.drop_table('fact_result_series')
@@ -0,0 +1,82 @@
+"""typed_result_measure_columns
+
+Revision ID: e5a8c3f1b6d2
+Revises: d4e7b2a9c1f3
+Create Date: 2026-10-19 16:40:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5a8c3f1b6d2'
+down_revision: Union[str, None] = 'd4e7b2a9c1f3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+MEASURES = ('daily', 'mtd', 'ytd', 'pytd')
+PREFIXES = ('adjusted', 'natural', 'plug')
+
+
+def _vector_sql(prefix: str, legacy_column: str) -> str:
+    # JSONB shape of the typed columns, falling back to the legacy vector for unmigrated rows
+    pairs = ", ".join(
+        f"'{measure}', {prefix}_{measure}" for measure in MEASURES
+    ) + f", 'wtd', {prefix}_mtd"
+    return f"COALESCE({legacy_column}, CASE WHEN {prefix}_daily IS NULL THEN NULL ELSE jsonb_build_object({pairs}) END)"
+
+
+def upgrade() -> None:
+    # Typed NUMERIC measures replace the JSONB measure_vector / plug_vector
+    for prefix in PREFIXES:
+        for measure in MEASURES:
+            op.add_column(
+                'fact_calculated_results',
+                sa.Column(f'{prefix}_{measure}', sa.Numeric(precision=18, scale=4), nullable=True)
+            )
+    # New rows no longer write the JSONB vectors (migrated rows have them set to NULL)
+    op.alter_column(
+        'fact_calculated_results', 'measure_vector',
+        existing_type=postgresql.JSONB(astext_type=sa.Text()),
+        nullable=True
+    )
+
+    # Compatibility view: the pre-migration column set, vectors rebuilt from the typed columns
+    op.execute(f"""
+        CREATE OR REPLACE VIEW fact_calculated_results_v AS
+        SELECT
+            result_id,
+            run_id,
+            calculation_run_id,
+            node_id,
+            {_vector_sql('adjusted', 'measure_vector')} AS measure_vector,
+            {_vector_sql('plug', 'plug_vector')} AS plug_vector,
+            is_override,
+            is_reconciled,
+            created_at
+        FROM fact_calculated_results
+    """)
+
+
+def downgrade() -> None:
+    # Restore the JSONB vectors before dropping the typed columns
+    op.execute(f"""
+        UPDATE fact_calculated_results
+        SET measure_vector = {_vector_sql('adjusted', 'measure_vector')},
+            plug_vector = {_vector_sql('plug', 'plug_vector')}
+        WHERE measure_vector IS NULL OR (plug_vector IS NULL AND plug_daily IS NOT NULL)
+    """)
+    op.execute("UPDATE fact_calculated_results SET measure_vector = '{}'::jsonb WHERE measure_vector IS NULL")
+    op.execute("DROP VIEW IF EXISTS fact_calculated_results_v")
+    op.alter_column(
+        'fact_calculated_results', 'measure_vector',
+        existing_type=postgresql.JSONB(astext_type=sa.Text()),
+        nullable=False
+    )
+    for prefix in reversed(PREFIXES):
+        for measure in reversed(MEASURES):
+            op.drop_column('fact_calculated_results', f'{prefix}_{measure}')
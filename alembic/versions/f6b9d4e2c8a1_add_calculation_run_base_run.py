@@ -0,0 +1,121 @@
+"""add_calculation_run_base_run
+
+Revision ID: f6b9d4e2c8a1
+Revises: e5a8c3f1b6d2
+Create Date: 2026-10-19 18:20:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f6b9d4e2c8a1'
+down_revision: Union[str, None] = 'e5a8c3f1b6d2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+MEASURES = ('daily', 'mtd', 'ytd', 'pytd')
+
+
+def _vector_sql(prefix: str, legacy_column: str) -> str:
+    # Same JSONB shape as the e5a8c3f1b6d2 compatibility view
+    pairs = ", ".join(
+        f"'{measure}', r.{prefix}_{measure}" for measure in MEASURES
+    ) + f", 'wtd', r.{prefix}_mtd"
+    return f"COALESCE(r.{legacy_column}, CASE WHEN r.{prefix}_daily IS NULL THEN NULL ELSE jsonb_build_object({pairs}) END)"
+
+
+def upgrade() -> None:
+    # Delta runs store only the rows that differ from a full base run
+    op.add_column(
+        'calculation_runs',
+        sa.Column('base_run_id', postgresql.UUID(as_uuid=True), nullable=True)
+    )
+    # NO ACTION (not RESTRICT): a base and its delta runs can go in one DELETE
+    op.create_foreign_key(
+        'fk_calculation_runs_base_run_id', 'calculation_runs', 'calculation_runs',
+        ['base_run_id'], ['id']
+    )
+    op.create_index(
+        'ix_calculation_runs_base_run_id', 'calculation_runs', ['base_run_id'],
+        postgresql_where=sa.text('base_run_id IS NOT NULL')
+    )
+
+    # Compatibility view resolves delta runs: each run's rows plus the base rows it does not override
+    op.execute(f"""
+        CREATE OR REPLACE VIEW fact_calculated_results_v AS
+        SELECT
+            r.result_id,
+            r.run_id,
+            r.calculation_run_id,
+            r.node_id,
+            {_vector_sql('adjusted', 'measure_vector')} AS measure_vector,
+            {_vector_sql('plug', 'plug_vector')} AS plug_vector,
+            r.is_override,
+            r.is_reconciled,
+            r.created_at
+        FROM fact_calculated_results r
+        UNION ALL
+        SELECT
+            r.result_id,
+            r.run_id,
+            cr.id AS calculation_run_id,
+            r.node_id,
+            {_vector_sql('adjusted', 'measure_vector')} AS measure_vector,
+            {_vector_sql('plug', 'plug_vector')} AS plug_vector,
+            r.is_override,
+            r.is_reconciled,
+            r.created_at
+        FROM calculation_runs cr
+        JOIN fact_calculated_results r ON r.calculation_run_id = cr.base_run_id
+        WHERE NOT EXISTS (
+            SELECT 1 FROM fact_calculated_results d
+            WHERE d.calculation_run_id = cr.id AND d.node_id = r.node_id
+        )
+    """)
+
+
+def downgrade() -> None:
+    # Fold delta runs back into full runs before dropping the link
+    op.execute("""
+        INSERT INTO fact_calculated_results (
+            result_id, calculation_run_id, node_id, measure_vector, plug_vector,
+            adjusted_daily, adjusted_mtd, adjusted_ytd, adjusted_pytd,
+            natural_daily, natural_mtd, natural_ytd, natural_pytd,
+            plug_daily, plug_mtd, plug_ytd, plug_pytd,
+            is_override, is_reconciled
+        )
+        SELECT
+            gen_random_uuid(), cr.id, b.node_id, b.measure_vector, b.plug_vector,
+            b.adjusted_daily, b.adjusted_mtd, b.adjusted_ytd, b.adjusted_pytd,
+            b.natural_daily, b.natural_mtd, b.natural_ytd, b.natural_pytd,
+            b.plug_daily, b.plug_mtd, b.plug_ytd, b.plug_pytd,
+            b.is_override, b.is_reconciled
+        FROM calculation_runs cr
+        JOIN fact_calculated_results b ON b.calculation_run_id = cr.base_run_id
+        WHERE NOT EXISTS (
+            SELECT 1 FROM fact_calculated_results d
+            WHERE d.calculation_run_id = cr.id AND d.node_id = b.node_id
+        )
+    """)
+    op.execute(f"""
+        CREATE OR REPLACE VIEW fact_calculated_results_v AS
+        SELECT
+            r.result_id,
+            r.run_id,
+            r.calculation_run_id,
+            r.node_id,
+            {_vector_sql('adjusted', 'measure_vector')} AS measure_vector,
+            {_vector_sql('plug', 'plug_vector')} AS plug_vector,
+            r.is_override,
+            r.is_reconciled,
+            r.created_at
+        FROM fact_calculated_results r
+    """)
+    op.drop_index('ix_calculation_runs_base_run_id', table_name='calculation_runs')
+    op.drop_constraint('fk_calculation_runs_base_run_id', 'calculation_runs', type_='foreignkey')
+    op.drop_column('calculation_runs', 'base_run_id')
@@ -1,33 +1,24 @@
 """
 FastAPI dependencies for Finance-Insight
-"""
 
-from sqlalchemy import create_engine
-from sqlalchemy.orm import Session, sessionmaker
+All helpers delegate to app.database so that routes, the orchestrator and
+scripts share one engine and one connection pool.
+"""
 
-from app.database import get_database_url
+from sqlalchemy.orm import Session
 
-# Create engine and session factory
-_engine = None
-_SessionLocal = None
+from app.database import SessionLocal, engine
+from app.database import get_db as _get_db
 
 
 def get_db_engine():
-    """Get or create database engine."""
-    global _engine
-    if _engine is None:
-        db_url = get_database_url()
-        _engine = create_engine(db_url, pool_pre_ping=True)
-    return _engine
+    """Get the shared database engine."""
+    return engine
 
 
 def get_session_factory():
-    """Get or create session factory."""
-    global _SessionLocal
-    if _SessionLocal is None:
-        engine = get_db_engine()
-        _SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-    return _SessionLocal
+    """Get the shared session factory."""
+    return SessionLocal
 
 
 def get_db() -> Session:
@@ -35,10 +26,4 @@ def get_db() -> Session:
     Dependency for getting database session.
     Used in FastAPI route dependencies.
     """
-    SessionLocal = get_session_factory()
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
+    yield from _get_db()
@@ -4,13 +4,14 @@ Provides administrative functions for metadata management and use case deletion.
 """
 
 from pathlib import Path
-from typing import Dict
+from typing import Dict, Optional
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, Header, HTTPException
 from fastapi.responses import FileResponse, JSONResponse
 from sqlalchemy.orm import Session
 
+from app import profiling
 from app.api.dependencies import get_db
 from app.models import (
     CalculationRun,
@@ -153,3 +154,99 @@ def delete_use_case(use_case_id: UUID, db: Session = Depends(get_db)):
         "message": f"Use case '{use_case.name}' and all related data deleted successfully"
     }
 
+
+
+@router.get("/pool-stats")
+def get_pool_stats():
+    """
+    Connection pool metrics for the shared engine.
+    
+    Returns:
+        JSON response with pool size, checked-out/overflow connections,
+        cumulative checkouts, waits (pool exhausted) and checkout timeouts
+    """
+    from app.database import get_async_pool_metrics, get_pool_metrics
+    return {
+        "status": "success",
+        "pool": get_pool_metrics(),
+        "async_pool": get_async_pool_metrics()
+    }
+
+
+@router.get("/index-advisor/{use_case_id}")
+def get_index_advice(
+    use_case_id: UUID,
+    large_table_rows: Optional[int] = None,
+    db: Session = Depends(get_db)
+):
+    """
+    EXPLAIN the statements a calculation of this use case issues and report
+    sequential scans over large tables (plans only, nothing is executed).
+    
+    Args:
+        use_case_id: Use case UUID
+        large_table_rows: Minimum table size for a reported Seq Scan
+                          (default: INDEX_ADVISOR_LARGE_TABLE_ROWS)
+    
+    Returns:
+        Findings (large sequential scans), missing engine indexes and per-statement plan summaries
+    """
+    from app.services import index_advisor
+    
+    use_case = db.query(UseCase).filter(UseCase.use_case_id == use_case_id).first()
+    if not use_case:
+        raise HTTPException(status_code=404, detail=f"Use case '{use_case_id}' not found")
+    
+    try:
+        report = index_advisor.advise(
+            db, use_case_id,
+            large_table_rows if large_table_rows is not None else index_advisor.LARGE_TABLE_ROWS
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"status": "success", **report}
+
+
+def require_profile_token(x_profile_token: Optional[str] = Header(None)):
+    """Profile reports contain SQL statements: require PROFILE_TOKEN to read them."""
+    if not profiling.token_matches(x_profile_token):
+        raise HTTPException(
+            status_code=403,
+            detail="Profiling is disabled or X-Profile-Token is invalid"
+        )
+
+
+@router.get("/profiles", dependencies=[Depends(require_profile_token)])
+def list_profiles():
+    """
+    Stored request profiles (this worker process), newest first.
+    
+    Returns:
+        JSON response with one summary (path, duration, samples, SQL count) per report
+    """
+    reports = profiling.list_reports()
+    return {
+        "status": "success",
+        "profiles": reports,
+        "total": len(reports)
+    }
+
+
+@router.get("/profiles/{profile_id}", dependencies=[Depends(require_profile_token)])
+def get_profile(profile_id: str):
+    """
+    Full request profile: top functions, collapsed stacks and the SQL statement log.
+    
+    Args:
+        profile_id: ID from the X-Profile-Id response header or /profiles
+    
+    Returns:
+        Profile report
+    """
+    report = profiling.get_report(profile_id)
+    if report is None:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Profile '{profile_id}' not found (reports are kept in memory per worker)"
+        )
+    return report
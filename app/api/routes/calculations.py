@@ -3,6 +3,7 @@ Calculation API routes for Finance-Insight
 Provides endpoints for triggering calculations and retrieving results.
 """
 
+import asyncio
 import io
 import logging
 import os
@@ -19,17 +20,15 @@ load_dotenv(dotenv_path=env_path)
 
 import pandas as pd
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from fastapi.responses import StreamingResponse
-from sqlalchemy import and_
+from sqlalchemy import func
 from sqlalchemy.orm import Session, joinedload
-from openpyxl import load_workbook
-from openpyxl.styles import Font, PatternFill, Alignment
-from openpyxl.utils import get_column_letter
 
 from app.api.dependencies import get_db
 from decimal import Decimal
 
-from app.api.schemas import CalculationResponse, ResultsResponse, ResultsNode
+from app.api.schemas import BackfillRequest, BatchCalculationRequest, CalculationResponse, ResultsResponse, ResultsNode
 from app.models import DimHierarchy, UseCase, UseCaseRun, FactCalculatedResult, MetadataRule, CalculationRun, CalculationRun
 # Try to import BusinessRule if it exists
 try:
@@ -38,10 +37,11 @@ try:
 except ImportError:
     HAS_BUSINESS_RULE = False
     BusinessRule = None
+from app.engine.engine_log import engine_trace
 from app.services.calculator import calculate_use_case
+from app.services.result_store import run_results_select
 from pydantic import BaseModel
 from typing import List, Dict, Any
-from app.engine.translator import translate_natural_language_to_json
 
 logger = logging.getLogger(__name__)
 
@@ -53,6 +53,7 @@ def trigger_calculation(
     use_case_id: UUID,
     version_tag: Optional[str] = None,
     triggered_by: str = "system",
+    trace: Optional[bool] = None,
     db: Session = Depends(get_db)
 ):
     """
@@ -67,6 +68,7 @@ def trigger_calculation(
         use_case_id: Use case UUID
         version_tag: Optional version tag (e.g., "Nov_Actuals_v1")
         triggered_by: User ID who triggered the calculation
+        trace: Log every per-node / per-rule engine event for this run (default: ENGINE_TRACE settings)
         db: Database session
     
     Returns:
@@ -83,12 +85,13 @@ def trigger_calculation(
     try:
         # Execute calculation
         logger.info(f"[API] Successfully invoking calculate_use_case for use case {use_case_id}")
-        result = calculate_use_case(
-            use_case_id=use_case_id,
-            session=db,
-            triggered_by=triggered_by,
-            version_tag=version_tag
-        )
+        with engine_trace(trace):
+            result = calculate_use_case(
+                use_case_id=use_case_id,
+                session=db,
+                triggered_by=triggered_by,
+                version_tag=version_tag
+            )
         logger.info(f"[API] Successfully completed calculate_use_case for use case {use_case_id}")
         
         # PHASE 2A: Invalidate cache after calculation run
@@ -152,8 +155,281 @@ def trigger_calculation(
         raise HTTPException(status_code=500, detail=f"Calculation failed: {str(e)}")
 
 
+@router.post("/calculations/batch")
+def run_batch_calculation(
+    request: BatchCalculationRequest,
+    db: Session = Depends(get_db)
+):
+    """
+    End-of-day batch: calculate several (use case, PNL date) snapshots in one pass.
+    
+    Each source fact table is scanned once for all jobs reading it, natural
+    rollups run across a process pool, and all results are persisted in one
+    bulk insert. Failed jobs are reported individually.
+    
+    Args:
+        request: Jobs, triggered_by and optional worker count
+        db: Database session
+    
+    Returns:
+        Batch report with per-job status and timings (see batch_scheduler.run_batch)
+    """
+    from app.services.batch_scheduler import BatchJob, run_batch
+    from app.services.rollup_cache import invalidate_cache
+    
+    jobs = [BatchJob(job.use_case_id, job.pnl_date, job.run_name) for job in request.jobs]
+    try:
+        report = run_batch(jobs, db, triggered_by=request.triggered_by, max_workers=request.max_workers)
+    except Exception as e:
+        logger.error(f"[API] Batch calculation failed: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"Batch calculation failed: {str(e)}")
+    
+    # PHASE 2A: New calculation runs mean natural values may have changed
+    for use_case_id in {job.use_case_id for job in jobs}:
+        invalidate_cache(use_case_id)
+    
+    return report
+
+
+@router.post("/use-cases/{use_case_id}/backfill")
+def run_backfill_calculation(
+    use_case_id: UUID,
+    request: BackfillRequest,
+    db: Session = Depends(get_db)
+):
+    """
+    Historical backfill: snapshot runs for every P&L date in a date range.
+    
+    Hierarchy and rules are resolved once, facts are streamed in date order and
+    every window of dates is committed as a checkpoint. An interrupted backfill
+    is continued by passing its backfill_id as resume_backfill_id.
+    
+    Args:
+        use_case_id: Use case UUID
+        request: Date range, triggered_by and checkpoint options
+        db: Database session
+    
+    Returns:
+        Backfill report (see backfill.run_backfill)
+    """
+    from app.services.backfill import run_backfill
+    from app.services.rollup_cache import invalidate_cache
+    
+    try:
+        report = run_backfill(
+            use_case_id, request.start_date, request.end_date, db,
+            triggered_by=request.triggered_by,
+            resume_backfill_id=request.resume_backfill_id,
+            window_days=request.window_days
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"[API] Backfill failed for use case {use_case_id}: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"Backfill failed: {str(e)}")
+    
+    if report['dates_completed']:
+        invalidate_cache(use_case_id)
+    
+    return report
+
+
+def load_results_context(
+    db: Session,
+    use_case_id: UUID,
+    run_id: Optional[UUID] = None,
+    force_recalculate: bool = False
+) -> Dict[str, Any]:
+    """
+    Load everything get_calculation_results reads from the database (sync path).
+    
+    Args:
+        db: Database session
+        use_case_id: Use case UUID
+        run_id: Optional run ID (defaults to most recent)
+        force_recalculate: If True, bypass hierarchy/rules caches
+    
+    Returns:
+        Context dictionary consumed by build_calculation_results
+        (same keys as load_results_context_async)
+    """
+    from app.engine.waterfall import load_hierarchy
+    from app.services.hierarchy_cache import get_cached_hierarchy, set_cached_hierarchy
+    from app.services.rules_cache import get_cached_rules, set_cached_rules
+    
+    use_case = db.query(UseCase).filter(UseCase.use_case_id == use_case_id).first()
+    
+    # Get run (most recent if not specified)
+    # Try CalculationRun first (new system), then fall back to UseCaseRun (legacy)
+    run = None
+    run_id_to_use = None
+    
+    if run_id:
+        calc_run = db.query(CalculationRun).filter(
+            CalculationRun.use_case_id == use_case_id,
+            CalculationRun.id == run_id
+        ).first()
+        use_case_run = None if calc_run else db.query(UseCaseRun).filter(
+            UseCaseRun.use_case_id == use_case_id,
+            UseCaseRun.run_id == run_id
+        ).first()
+    else:
+        calc_run = db.query(CalculationRun).filter(
+            CalculationRun.use_case_id == use_case_id
+        ).order_by(CalculationRun.executed_at.desc()).first()
+        use_case_run = None if calc_run else db.query(UseCaseRun).filter(
+            UseCaseRun.use_case_id == use_case_id
+        ).order_by(UseCaseRun.run_timestamp.desc()).first()
+    
+    if calc_run:
+        run, run_id_to_use = calc_run, calc_run.id
+    elif use_case_run:
+        run, run_id_to_use = use_case_run, use_case_run.run_id
+    
+    # PHASE 2C FIX 2: Load hierarchy with caching support
+    hierarchy = get_cached_hierarchy(use_case_id, force_reload=force_recalculate)
+    if hierarchy is None:
+        hierarchy = load_hierarchy(db, use_case_id)
+        set_cached_hierarchy(use_case_id, *hierarchy)
+    
+    # CRITICAL FIX: Load calculation results in a single query, preventing N+1 queries
+    results = []
+    if run_id_to_use:
+        results = db.execute(run_results_select(run_id_to_use)).scalars().all()
+    
+    # PHASE 2C FIX 1: Load rules with caching support
+    # Phase 5.9: Use explicit column selection to ensure Math rule fields are loaded
+    rules_data = get_cached_rules(use_case_id, force_reload=force_recalculate)
+    if rules_data is None:
+        rules_data = db.query(
+            MetadataRule.node_id,
+            MetadataRule.rule_id,
+            MetadataRule.logic_en,
+            MetadataRule.sql_where,
+            MetadataRule.rule_type,         # Critical: Math rule type
+            MetadataRule.rule_expression,   # Critical: Math rule formula
+            MetadataRule.rule_dependencies, # Critical: Math rule dependencies
+            MetadataRule.measure_name      # Phase 5.9: Measure name for display (e.g., 'pnl_commission', 'pnl_trade')
+        ).filter(
+            MetadataRule.use_case_id == use_case_id
+        ).all()
+        set_cached_rules(use_case_id, rules_data)
+    
+    # Path arrays for AG-Grid tree data
+    path_dict = {}
+    if use_case:
+        try:
+            from app.services.async_reads import HIERARCHY_PATH_QUERY
+            path_results = db.execute(
+                HIERARCHY_PATH_QUERY,
+                {"structure_id": use_case.atlas_structure_id}
+            ).fetchall()
+            path_dict = {row[0]: row[1] for row in path_results}
+        except Exception as e:
+            logger.warning(f"Failed to build path arrays: {e}")
+            path_dict = {}
+    
+    # Most recent rule modification (is_outdated check)
+    latest_rule_modified_at = db.query(func.max(MetadataRule.last_modified_at)).filter(
+        MetadataRule.use_case_id == use_case_id
+    ).scalar()
+    
+    return {
+        "use_case": use_case,
+        "run": run,
+        "run_id": run_id_to_use,
+        "hierarchy": hierarchy,
+        "results": results,
+        "rules_data": rules_data,
+        "path_dict": path_dict,
+        "latest_rule_modified_at": latest_rule_modified_at,
+    }
+
+
+async def load_results_context_async(
+    use_case_id: UUID,
+    run_id: Optional[UUID] = None,
+    force_recalculate: bool = False
+) -> Dict[str, Any]:
+    """
+    Async variant of load_results_context: independent reads run concurrently.
+    
+    Round 1 (asyncio.gather): use case, CalculationRun + legacy UseCaseRun candidates,
+    hierarchy and rules (cache misses only), path CTE and latest rule timestamp.
+    Round 2: calculated results of the resolved run.
+    
+    Args:
+        use_case_id: Use case UUID
+        run_id: Optional run ID (defaults to most recent)
+        force_recalculate: If True, bypass hierarchy/rules caches
+    
+    Returns:
+        Context dictionary consumed by build_calculation_results
+    """
+    from app.engine.waterfall import index_hierarchy
+    from app.services import async_reads
+    from app.services.hierarchy_cache import get_cached_hierarchy, set_cached_hierarchy
+    from app.services.rules_cache import get_cached_rules, set_cached_rules
+    
+    hierarchy = get_cached_hierarchy(use_case_id, force_reload=force_recalculate)
+    rules_data = get_cached_rules(use_case_id, force_reload=force_recalculate)
+    
+    if run_id:
+        calc_run_read = async_reads.get_calculation_run(run_id, use_case_id)
+        use_case_run_read = async_reads.get_use_case_run(run_id, use_case_id)
+    else:
+        calc_run_read = async_reads.get_latest_calculation_run(use_case_id)
+        use_case_run_read = async_reads.get_latest_use_case_run(use_case_id)
+    
+    (
+        use_case,
+        calc_run,
+        use_case_run,
+        hierarchy_nodes,
+        loaded_rules,
+        path_dict,
+        latest_rule_modified_at,
+    ) = await asyncio.gather(
+        async_reads.get_use_case(use_case_id),
+        calc_run_read,
+        use_case_run_read,
+        async_reads.resolved() if hierarchy is not None else async_reads.get_use_case_hierarchy_nodes(use_case_id),
+        async_reads.resolved(rules_data) if rules_data is not None else async_reads.get_rules_data(use_case_id),
+        async_reads.get_use_case_hierarchy_paths(use_case_id),
+        async_reads.get_latest_rule_modified_at(use_case_id),
+    )
+    
+    if hierarchy is None:
+        hierarchy = index_hierarchy(hierarchy_nodes)
+        if use_case:
+            set_cached_hierarchy(use_case_id, *hierarchy)
+    if rules_data is None:
+        rules_data = loaded_rules
+        set_cached_rules(use_case_id, rules_data)
+    
+    run = None
+    run_id_to_use = None
+    if calc_run:
+        run, run_id_to_use = calc_run, calc_run.id
+    elif use_case_run:
+        run, run_id_to_use = use_case_run, use_case_run.run_id
+    
+    results = await async_reads.get_run_results(run_id_to_use) if run_id_to_use else []
+    
+    return {
+        "use_case": use_case,
+        "run": run,
+        "run_id": run_id_to_use,
+        "hierarchy": hierarchy,
+        "results": results,
+        "rules_data": rules_data,
+        "path_dict": path_dict,
+        "latest_rule_modified_at": latest_rule_modified_at,
+    }
+
+
 @router.get("/use-cases/{use_case_id}/results", response_model=ResultsResponse)
-def get_calculation_results(
+async def get_calculation_results(
     use_case_id: UUID,
     run_id: Optional[UUID] = None,
     force_recalculate: bool = False,
@@ -172,82 +448,62 @@ def get_calculation_results(
     PHASE 2A: Added caching support. Natural rollup results are cached for 30 seconds.
     Use force_recalculate=true to bypass cache.
     
+    The read fan-out (use case, run, hierarchy, results, rules, paths) runs on the
+    async read layer; only the rollup/tree build runs in a worker thread.
+    
+    Args:
+        use_case_id: Use case UUID
+        run_id: Optional run ID (defaults to most recent)
+        force_recalculate: If True, bypass cache and recalculate natural rollups
+        db: Database session (used by the rollup services)
+    
+    Returns:
+        ResultsResponse with hierarchy tree and calculation results
+    """
+    context = await load_results_context_async(use_case_id, run_id, force_recalculate)
+    return await run_in_threadpool(
+        build_calculation_results, use_case_id, run_id, force_recalculate, db, context
+    )
+
+
+def build_calculation_results(
+    use_case_id: UUID,
+    run_id: Optional[UUID] = None,
+    force_recalculate: bool = False,
+    db: Session = None,
+    context: Optional[Dict[str, Any]] = None
+) -> ResultsResponse:
+    """
+    Build the results response (sync). Loads its own context when none is given,
+    so sync callers (e.g. the reconciliation export) can use it directly.
+    
     Args:
         use_case_id: Use case UUID
         run_id: Optional run ID (defaults to most recent)
         force_recalculate: If True, bypass cache and recalculate natural rollups
         db: Database session
+        context: Output of load_results_context / load_results_context_async
     
     Returns:
         ResultsResponse with hierarchy tree and calculation results
     """
+    if context is None:
+        context = load_results_context(db, use_case_id, run_id, force_recalculate)
+    
     # Validate use case exists
-    use_case = db.query(UseCase).filter(UseCase.use_case_id == use_case_id).first()
+    use_case = context["use_case"]
     if not use_case:
         raise HTTPException(
             status_code=404,
             detail=f"Use case '{use_case_id}' not found"
         )
     
-    # Get run (most recent if not specified)
-    # Try CalculationRun first (new system), then fall back to UseCaseRun (legacy)
-    run = None
-    run_id_to_use = None
-    
-    if run_id:
-        # Try CalculationRun first
-        calc_run = db.query(CalculationRun).filter(
-            CalculationRun.use_case_id == use_case_id,
-            CalculationRun.id == run_id
-        ).first()
-        
-        if calc_run:
-            run = calc_run
-            run_id_to_use = calc_run.id
-        else:
-            # Fall back to UseCaseRun
-            use_case_run = db.query(UseCaseRun).filter(
-                UseCaseRun.use_case_id == use_case_id,
-                UseCaseRun.run_id == run_id
-            ).first()
-            if use_case_run:
-                run = use_case_run
-                run_id_to_use = use_case_run.run_id
-    else:
-        # Get most recent - try CalculationRun first
-        calc_run = db.query(CalculationRun).filter(
-            CalculationRun.use_case_id == use_case_id
-        ).order_by(CalculationRun.executed_at.desc()).first()
-        
-        if calc_run:
-            run = calc_run
-            run_id_to_use = calc_run.id
-        else:
-            # Fall back to UseCaseRun
-            use_case_run = db.query(UseCaseRun).filter(
-                UseCaseRun.use_case_id == use_case_id
-            ).order_by(UseCaseRun.run_timestamp.desc()).first()
-            if use_case_run:
-                run = use_case_run
-                run_id_to_use = use_case_run.run_id
+    run = context["run"]
+    run_id_to_use = context["run_id"]
     
     # CRITICAL FIX: Always load hierarchy and calculate natural values, even if no run exists
     # This ensures Tab 3 shows data from unified_pnl_service (same as Tab 2) even without saved results
-    # PHASE 2C FIX 2: Load hierarchy with caching support
-    from app.engine.waterfall import load_hierarchy
-    from app.services.hierarchy_cache import get_cached_hierarchy, set_cached_hierarchy
-    
-    # Check cache first
-    cached_hierarchy = get_cached_hierarchy(use_case_id, force_reload=force_recalculate)
-    
-    if cached_hierarchy is not None:
-        hierarchy_dict, children_dict, leaf_nodes = cached_hierarchy
-    else:
-        # Cache miss or expired - load from database
-        hierarchy_dict, children_dict, leaf_nodes = load_hierarchy(db, use_case_id)
-        
-        # Cache the results
-        set_cached_hierarchy(use_case_id, hierarchy_dict, children_dict, leaf_nodes)
+    hierarchy_dict, children_dict, leaf_nodes = context["hierarchy"]
     
     if not hierarchy_dict:
         raise HTTPException(
@@ -266,26 +522,7 @@ def get_calculation_results(
     hierarchy_nodes = list(hierarchy_dict.values())
     logger.info(f"[Results] Successfully loaded hierarchy: {len(hierarchy_nodes)} nodes for use case {use_case_id}")
     
-    # CRITICAL FIX: Load calculation results with eager loading using outerjoin
-    # This ensures rules are loaded efficiently in a single query, preventing N+1 queries
-    results = []
-    if run_id_to_use:
-        # Use outerjoin to eagerly load rules, preventing N+1 queries
-        results = (
-            db.query(FactCalculatedResult)
-            .outerjoin(
-                MetadataRule,
-                and_(
-                    FactCalculatedResult.node_id == MetadataRule.node_id,
-                    MetadataRule.use_case_id == use_case_id
-                )
-            )
-            .filter(
-                (FactCalculatedResult.run_id == run_id_to_use) |
-                (FactCalculatedResult.calculation_run_id == run_id_to_use)
-            )
-            .all()
-        )
+    results = context["results"]
     
     # If no results found, it might be because the calculation hasn't saved results yet
     # or the run_id doesn't match. Let's check if we have any results at all for this use case
@@ -303,31 +540,8 @@ def get_calculation_results(
                 f"Results have run_id={[r.run_id for r in all_results]} and calculation_run_id={[r.calculation_run_id for r in all_results]}"
             )
     
-    # PHASE 2C FIX 1: Load rules with caching support
-    # Phase 5.9: Use explicit column selection to ensure Math rule fields are loaded
-    # SQLAlchemy ORM might not load all columns, so we explicitly select what we need
-    from app.services.rules_cache import get_cached_rules, set_cached_rules
-    
-    # Check cache first
-    rules_data = get_cached_rules(use_case_id, force_reload=force_recalculate)
-    
-    if rules_data is None:
-        # Cache miss or expired - load from database
-        rules_data = db.query(
-            MetadataRule.node_id,
-            MetadataRule.rule_id,
-            MetadataRule.logic_en,
-            MetadataRule.sql_where,
-            MetadataRule.rule_type,         # Critical: Math rule type
-            MetadataRule.rule_expression,   # Critical: Math rule formula
-            MetadataRule.rule_dependencies, # Critical: Math rule dependencies
-            MetadataRule.measure_name      # Phase 5.9: Measure name for display (e.g., 'pnl_commission', 'pnl_trade')
-        ).filter(
-            MetadataRule.use_case_id == use_case_id
-        ).all()
-        
-        # Cache the results
-        set_cached_rules(use_case_id, rules_data)
+    # PHASE 2C FIX 1: Rules come from the rules cache or the context loader
+    rules_data = context["rules_data"]
     
     # Build lookup dictionary using explicit column values (not ORM objects)
     # This ensures all fields are accessible, avoiding lazy loading issues
@@ -421,7 +635,7 @@ def get_calculation_results(
     # which return per-node dictionaries, exactly what we need for natural_results
     from app.services.unified_pnl_service import _calculate_strategy_rollup, _calculate_legacy_rollup
     
-    use_case_obj = db.query(UseCase).filter(UseCase.use_case_id == use_case_id).first()
+    use_case_obj = use_case
     
     # Use the same rollup logic as get_unified_pnl (which Tab 2 uses)
     natural_results = {}
@@ -573,46 +787,8 @@ def get_calculation_results(
                 'is_reconciled': True,
             }
     
-    # Build path arrays using SQL CTE (same as discovery endpoint)
-    from sqlalchemy import text
-    path_dict = {}
-    try:
-        path_query = text("""
-            WITH RECURSIVE node_paths AS (
-                -- Base case: root nodes
-                SELECT 
-                    node_id,
-                    node_name,
-                    parent_node_id,
-                    ARRAY[node_name] as path
-                FROM dim_hierarchy
-                WHERE parent_node_id IS NULL
-                    AND atlas_source = :structure_id
-                
-                UNION ALL
-                
-                -- Recursive case: children
-                SELECT 
-                    h.node_id,
-                    h.node_name,
-                    h.parent_node_id,
-                    np.path || h.node_name
-                FROM dim_hierarchy h
-                INNER JOIN node_paths np ON h.parent_node_id = np.node_id
-                WHERE h.atlas_source = :structure_id
-            )
-            SELECT node_id, path FROM node_paths
-        """)
-        
-        path_results = db.execute(
-            path_query,
-            {"structure_id": use_case.atlas_structure_id}
-        ).fetchall()
-        
-        path_dict = {row[0]: row[1] for row in path_results}
-    except Exception as e:
-        logger.warning(f"Failed to build path arrays: {e}")
-        path_dict = {}
+    # Path arrays from the recursive CTE (same as discovery endpoint), loaded with the context
+    path_dict = context["path_dict"]
     
     # Build tree structure with sanitization
     def build_results_tree(node_id: str) -> ResultsNode:
@@ -804,12 +980,10 @@ def get_calculation_results(
     is_outdated = False
     if run_timestamp:
         try:
-            # Get the most recent rule modification time
-            latest_rule = db.query(MetadataRule).filter(
-                MetadataRule.use_case_id == use_case_id
-            ).order_by(MetadataRule.last_modified_at.desc()).first()
+            # Most recent rule modification time (loaded with the context)
+            latest_rule_modified_at = context["latest_rule_modified_at"]
             
-            if latest_rule and latest_rule.last_modified_at:
+            if latest_rule_modified_at:
                 # Fix for Timestamp Race Condition
                 # If run_time is within 2 seconds of rule_update_time, consider it VALID.
                 from datetime import datetime, timezone
@@ -817,10 +991,10 @@ def get_calculation_results(
                 # Ensure both timestamps are timezone-aware for comparison
                 if run_timestamp.tzinfo is None:
                     run_timestamp = run_timestamp.replace(tzinfo=timezone.utc)
-                if latest_rule.last_modified_at.tzinfo is None:
-                    rule_time = latest_rule.last_modified_at.replace(tzinfo=timezone.utc)
+                if latest_rule_modified_at.tzinfo is None:
+                    rule_time = latest_rule_modified_at.replace(tzinfo=timezone.utc)
                 else:
-                    rule_time = latest_rule.last_modified_at
+                    rule_time = latest_rule_modified_at
                 
                 time_diff = (rule_time - run_timestamp).total_seconds()
                 
@@ -953,7 +1127,7 @@ def export_reconciliation_excel(
     """
     # Reuse get_calculation_results to get the hierarchy with all data
     # This ensures we get natural values, adjusted values, and rules correctly
-    results_response = get_calculation_results(use_case_id, run_id, db)
+    results_response = build_calculation_results(use_case_id, run_id, db=db)
     
     if not results_response.hierarchy or len(results_response.hierarchy) == 0:
         raise HTTPException(
@@ -986,6 +1160,10 @@ def export_reconciliation_excel(
     ]
     df = df[column_order]
     
+    # openpyxl is only needed here, so import it lazily (keeps startup fast)
+    from openpyxl.styles import Font, PatternFill, Alignment
+    from openpyxl.utils import get_column_letter
+    
     # Create Excel file in memory
     excel_buffer = io.BytesIO()
     
@@ -1379,8 +1557,10 @@ def get_execution_plan(
 
 class ArchiveSnapshotRequest(BaseModel):
     snapshot_name: str
-    rules_snapshot: List[Dict[str, Any]]
-    results_snapshot: List[Dict[str, Any]]
+    calculation_run_id: Optional[UUID] = None  # Run to archive (default: latest COMPLETED run)
+    # Legacy client-built payloads; when results_snapshot is sent it is stored as-is (JSONB)
+    rules_snapshot: Optional[List[Dict[str, Any]]] = None
+    results_snapshot: Optional[List[Dict[str, Any]]] = None
     notes: Optional[str] = None
     version_tag: Optional[str] = None
     created_by: str = "system"
@@ -1395,15 +1575,20 @@ def archive_snapshot(
     """
     Lock and archive a snapshot of current rules and results.
     
+    The snapshot is built on the server from a calculation run: results are
+    stored as a compressed columnar blob, rules as JSONB (see
+    app/services/snapshot_archive.py).
+    
     Args:
         use_case_id: Use case UUID
-        request: Request body with snapshot_name, rules_snapshot, results_snapshot, notes, created_by
+        request: Request body with snapshot_name, optional calculation_run_id, notes, created_by
         db: Database session
     
     Returns:
         Snapshot ID
     """
     from app.models import HistorySnapshot
+    from app.services.snapshot_archive import build_snapshot, next_version_tag, rules_snapshot_for
     
     # Validate use case exists
     use_case = db.query(UseCase).filter(UseCase.use_case_id == use_case_id).first()
@@ -1413,37 +1598,30 @@ def archive_snapshot(
             detail=f"Use case '{use_case_id}' not found"
         )
     
-    # Determine version number
-    existing_snapshots = db.query(HistorySnapshot).filter(
-        HistorySnapshot.use_case_id == use_case_id
-    ).order_by(HistorySnapshot.snapshot_date.desc()).all()
-    
-    if not existing_snapshots:
-        version_tag = "v1.0"
+    if request.results_snapshot is not None:
+        # Legacy client-built archive
+        snapshot = HistorySnapshot(
+            use_case_id=use_case_id,
+            snapshot_name=request.snapshot_name,
+            created_by=request.created_by,
+            rules_snapshot=request.rules_snapshot if request.rules_snapshot is not None else rules_snapshot_for(db, use_case_id),
+            results_snapshot=request.results_snapshot,
+            node_count=len(request.results_snapshot),
+            notes=request.notes,
+            version_tag=request.version_tag or next_version_tag(db, use_case_id)
+        )
+        db.add(snapshot)
     else:
-        # Extract version number from latest snapshot
-        latest_version = existing_snapshots[0].version_tag or "v1.0"
         try:
-            # Extract version number (e.g., "v1.0" -> 1.0)
-            version_num = float(latest_version.replace('v', ''))
-            new_version_num = version_num + 0.1
-            version_tag = f"v{new_version_num:.1f}"
-        except (ValueError, AttributeError):
-            # Fallback if version format is unexpected
-            version_tag = f"v{len(existing_snapshots) + 1}.0"
-    
-    # Create snapshot
-    snapshot = HistorySnapshot(
-        use_case_id=use_case_id,
-        snapshot_name=request.snapshot_name,
-        created_by=request.created_by,
-        rules_snapshot=request.rules_snapshot,
-        results_snapshot=request.results_snapshot,
-        notes=request.notes,
-        version_tag=version_tag
-    )
+            snapshot = build_snapshot(
+                db, use_case_id, request.snapshot_name, request.created_by,
+                calculation_run_id=request.calculation_run_id,
+                notes=request.notes,
+                version_tag=request.version_tag
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=404, detail=str(e))
     
-    db.add(snapshot)
     db.commit()
     db.refresh(snapshot)
     
@@ -1451,6 +1629,54 @@ def archive_snapshot(
         "snapshot_id": str(snapshot.snapshot_id),
         "snapshot_name": snapshot.snapshot_name,
         "snapshot_date": snapshot.snapshot_date.isoformat(),
-        "version_tag": snapshot.version_tag
+        "version_tag": snapshot.version_tag,
+        "snapshot_format": snapshot.snapshot_format,
+        "calculation_run_id": str(snapshot.calculation_run_id) if snapshot.calculation_run_id else None,
+        "node_count": snapshot.node_count,
+        "size_bytes": len(snapshot.results_blob) if snapshot.results_blob is not None else None
+    }
+
+
+@router.get("/use-cases/{use_case_id}/archive/{snapshot_id}")
+def get_archived_snapshot(
+    use_case_id: UUID,
+    snapshot_id: UUID,
+    db: Session = Depends(get_db)
+):
+    """
+    Restore an archived snapshot (rules and per-node results).
+    
+    Args:
+        use_case_id: Use case UUID
+        snapshot_id: Snapshot UUID
+        db: Database session
+    
+    Returns:
+        Snapshot metadata, rules and results
+    """
+    from app.models import HistorySnapshot
+    from app.services.snapshot_archive import snapshot_results
+    
+    snapshot = db.query(HistorySnapshot).filter(
+        HistorySnapshot.snapshot_id == snapshot_id,
+        HistorySnapshot.use_case_id == use_case_id
+    ).first()
+    if not snapshot:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Snapshot '{snapshot_id}' not found for use case '{use_case_id}'"
+        )
+    
+    return {
+        "snapshot_id": str(snapshot.snapshot_id),
+        "snapshot_name": snapshot.snapshot_name,
+        "snapshot_date": snapshot.snapshot_date.isoformat(),
+        "version_tag": snapshot.version_tag,
+        "snapshot_format": snapshot.snapshot_format,
+        "calculation_run_id": str(snapshot.calculation_run_id) if snapshot.calculation_run_id else None,
+        "created_by": snapshot.created_by,
+        "notes": snapshot.notes,
+        "rules": snapshot.rules_snapshot or [],
+        "results": snapshot_results(snapshot)
     }
 
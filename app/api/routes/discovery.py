@@ -6,14 +6,18 @@ Provides hierarchy with natural values for discovery view.
 from typing import Dict, List, Optional
 from uuid import UUID
 from decimal import Decimal
+import asyncio
 import logging
 
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import Response
 from sqlalchemy.orm import Session
 
 from app.api.dependencies import get_db
 from app.api.schemas import DiscoveryResponse, HierarchyNode, ReconciliationData
 from app.engine.waterfall import calculate_natural_rollup, load_facts, load_facts_from_entries, load_hierarchy, load_facts_from_use_case_3
+from app.services.discovery_render import build_tree, discovery_payload, discovery_response
 from app.services.fact_service import load_facts_for_use_case, load_facts_gold_for_structure, verify_reconciliation
 from app.services.unified_pnl_service import get_unified_pnl, _calculate_legacy_rollup, _calculate_strategy_rollup, _calculate_legacy_rollup, _calculate_strategy_rollup
 from app.models import UseCase
@@ -231,12 +235,17 @@ def build_tree_structure(
     node_id: str,
     include_pytd: bool = False,
     parent_attributes: Dict = None,
-    path_dict: Dict = None
+    path_dict: Dict = None,
+    node_attributes: Dict = None
 ) -> HierarchyNode:
     """
     Recursively build tree structure from hierarchy with multi-dimensional attributes and path array.
     Uses path_dict from SQL CTE for accurate path arrays.
     
+    Model-based reference for the discovery tree: the endpoints render with
+    app.services.discovery_render.build_tree (iterative, no per-node model
+    validation), which scripts/verify_discovery_render.py checks against this.
+    
     Args:
         hierarchy_dict: Dictionary mapping node_id -> node data
         children_dict: Dictionary mapping parent_node_id -> list of children
@@ -245,6 +254,8 @@ def build_tree_structure(
         include_pytd: Whether to include PYTD measure
         parent_attributes: Attributes from parent node (for inheritance)
         path_dict: Dictionary mapping node_id -> path array from SQL CTE
+        node_attributes: Precomputed node_id -> attributes (attribute_cache); derived
+                         per node from parent_attributes when absent
     
     Returns:
         HierarchyNode with children, attributes, and path array
@@ -288,8 +299,10 @@ def build_tree_structure(
         # Fallback: build path from node_name
         current_path = [node.node_name]
     
-    # Extract attributes for this node
-    attrs = get_node_attributes(node.node_id, node.node_name, parent_attributes)
+    # Extract attributes for this node (read from the structure's attribute cache when provided)
+    attrs = node_attributes.get(node_id) if node_attributes else None
+    if attrs is None:
+        attrs = get_node_attributes(node.node_id, node.node_name, parent_attributes)
     
     # Build children recursively (pass attributes and path_dict for inheritance)
     # Filter out any child_id that's not in hierarchy_dict (e.g., TRADE or STERLING_RULE nodes)
@@ -302,7 +315,8 @@ def build_tree_structure(
         if child_id.startswith('TRADE_') or child_id.startswith('STERLING_RULE'):
             continue
         child_node = build_tree_structure(
-            hierarchy_dict, children_dict, natural_results, child_id, include_pytd, attrs, path_dict
+            hierarchy_dict, children_dict, natural_results, child_id, include_pytd, attrs, path_dict,
+            node_attributes
         )
         children.append(child_node)
     
@@ -333,8 +347,43 @@ def build_tree_structure(
     return HierarchyNode(**node_data)
 
 
+async def load_discovery_context_async(
+    structure_id: str,
+    report_id: Optional[UUID] = None,
+    use_case_id: Optional[UUID] = None
+) -> Dict:
+    """
+    Fetch the discovery view's independent reads concurrently (async read layer):
+    hierarchy nodes, path CTE, report registration and the use case lookup.
+    
+    Args:
+        structure_id: Atlas structure identifier
+        report_id: Optional report registration ID
+        use_case_id: Optional use case UUID (otherwise looked up by structure_id)
+    
+    Returns:
+        Context dictionary consumed by build_discovery_view
+    """
+    from app.services import async_reads
+    
+    hierarchy_nodes, path_dict, report_config, use_case, use_case_count = await asyncio.gather(
+        async_reads.get_hierarchy_nodes(structure_id),
+        async_reads.get_hierarchy_paths(structure_id),
+        async_reads.get_report_registration(report_id) if report_id else async_reads.resolved(),
+        async_reads.get_use_case(use_case_id) if use_case_id else async_reads.get_use_case_for_structure(structure_id),
+        async_reads.resolved() if use_case_id else async_reads.count_use_cases_for_structure(structure_id),
+    )
+    return {
+        "hierarchy_nodes": hierarchy_nodes,
+        "path_dict": path_dict,
+        "report_config": report_config,
+        "use_case": use_case,
+        "use_case_count": use_case_count,
+    }
+
+
 @router.get("/discovery", response_model=DiscoveryResponse)
-def get_discovery_view(
+async def get_discovery_view(
     structure_id: str,
     report_id: Optional[UUID] = None,
     use_case_id: Optional[UUID] = None,
@@ -350,14 +399,47 @@ def get_discovery_view(
     If report_id is provided, filters measures and dimensions based on ReportRegistration configuration.
     This ensures Tab 1 configuration drives what's displayed in Tabs 2 and 3.
     
+    Independent reads are fetched concurrently on the async read layer; the
+    rollup and tree build run in a worker thread (build_discovery_view). The
+    response is encoded directly (app/services/discovery_render.py); the
+    response_model documents its schema.
+    
     Args:
         structure_id: Atlas structure identifier
         report_id: Optional report registration ID (for filtering measures/dimensions)
-        db: Database session
+        use_case_id: Optional use case UUID (preferred over structure_id lookup)
+        db: Database session (used for fact loading and hierarchy repair)
     
     Returns:
         DiscoveryResponse with hierarchy tree and natural values
     """
+    context = await load_discovery_context_async(structure_id, report_id, use_case_id)
+    return await run_in_threadpool(
+        build_discovery_view, structure_id, report_id, use_case_id, db, context
+    )
+
+
+def build_discovery_view(
+    structure_id: str,
+    report_id: Optional[UUID] = None,
+    use_case_id: Optional[UUID] = None,
+    db: Session = None,
+    context: Optional[Dict] = None
+) -> Response:
+    """
+    Build the discovery response (sync).
+    
+    Args:
+        structure_id: Atlas structure identifier
+        report_id: Optional report registration ID (for filtering measures/dimensions)
+        use_case_id: Optional use case UUID
+        db: Database session
+        context: Prefetched reads from load_discovery_context_async. If None (or once
+            the hierarchy had to be repaired), the same reads run on db.
+    
+    Returns:
+        JSON Response in the DiscoveryResponse schema (hierarchy tree and natural values)
+    """
     import logging
     logger = logging.getLogger(__name__)
     
@@ -376,16 +458,22 @@ def get_discovery_view(
         from sqlalchemy import text
         
         # Load hierarchy by structure_id (NO JOIN with rules - pure Phase 1 functionality)
-        hierarchy_nodes = db.query(DimHierarchy).filter(
-            DimHierarchy.atlas_source == structure_id
-        ).all()
+        if context is not None:
+            hierarchy_nodes = context["hierarchy_nodes"]
+        else:
+            hierarchy_nodes = db.query(DimHierarchy).filter(
+                DimHierarchy.atlas_source == structure_id
+            ).all()
 
         # Load report registration if report_id provided (for filtering)
         report_config = None
         if report_id:
-            report_config = db.query(ReportRegistration).filter(
-                ReportRegistration.report_id == report_id
-            ).first()
+            if context is not None:
+                report_config = context["report_config"]
+            else:
+                report_config = db.query(ReportRegistration).filter(
+                    ReportRegistration.report_id == report_id
+                ).first()
             if not report_config:
                 raise HTTPException(
                     status_code=404,
@@ -442,7 +530,8 @@ def get_discovery_view(
                     db.commit()
                     logger.info(f"Discovery: Created missing ROOT node for structure_id: {structure_id}")
                 
-                # Reload hierarchy to include the ROOT node
+                # Reload hierarchy to include the ROOT node (prefetched reads are now stale)
+                context = None
                 hierarchy_nodes = db.query(DimHierarchy).filter(
                     DimHierarchy.atlas_source == structure_id
                 ).all()
@@ -462,6 +551,7 @@ def get_discovery_view(
             # CRITICAL: Reload hierarchy_nodes from database after template creation
             # This ensures we have the actual persisted nodes, not just in-memory objects
             db.commit()  # Ensure any pending changes are committed
+            context = None  # Prefetched reads are stale after template creation
             hierarchy_nodes = db.query(DimHierarchy).filter(
                 DimHierarchy.atlas_source == structure_id
             ).all()
@@ -489,54 +579,31 @@ def get_discovery_view(
         
         # Build path arrays using SQL CTE (recursive)
         # This creates a path array for each node: ["Global Trading P&L", "Americas", "Cash Equities", ...]
-        try:
-            path_query = text("""
-            WITH RECURSIVE node_paths AS (
-                -- Base case: root nodes
-                SELECT 
-                    node_id,
-                    node_name,
-                    ARRAY[node_name]::text[] as path
-                FROM dim_hierarchy
-                WHERE atlas_source = :structure_id AND parent_node_id IS NULL
-                
-                UNION ALL
-                
-                -- Recursive case: children
-                SELECT 
-                    h.node_id,
-                    h.node_name,
-                    np.path || h.node_name
-                FROM dim_hierarchy h
-                INNER JOIN node_paths np ON h.parent_node_id = np.node_id
-                WHERE h.atlas_source = :structure_id
-            )
-            SELECT node_id, path FROM node_paths
-            """)
-            
-            path_results = db.execute(path_query, {"structure_id": structure_id}).fetchall()
-            # Build path_dict: key is node_id (string), value is path array of node_names
-            path_dict = {}
-            for row in path_results:
-                node_id_key = str(row[0])  # node_id as string key
-                path_array = list(row[1]) if row[1] else []  # Path array of node_names
-                path_dict[node_id_key] = path_array
-            
-            # Debug: Log first 5 paths to verify they use node_name, not node_id
-            print(f"=== Path CTE Verification (first 5) ===")
-            for i, (node_id_key, path_array) in enumerate(list(path_dict.items())[:5]):
-                print(f"  {i+1}. node_id={node_id_key}, path={path_array}")
-        except Exception as e:
-            # Fallback: build paths recursively in Python if CTE fails
-            print(f"CTE path building failed, using Python fallback: {e}")
-            path_dict = {}
+        if context is not None:
+            path_dict = context["path_dict"]
+        else:
+            try:
+                from app.services.async_reads import HIERARCHY_PATH_QUERY
+                path_results = db.execute(HIERARCHY_PATH_QUERY, {"structure_id": structure_id}).fetchall()
+                # Build path_dict: key is node_id (string), value is path array of node_names
+                path_dict = {}
+                for row in path_results:
+                    node_id_key = str(row[0])  # node_id as string key
+                    path_array = list(row[1]) if row[1] else []  # Path array of node_names
+                    path_dict[node_id_key] = path_array
+            except Exception as e:
+                # Fallback: build paths recursively in Python if CTE fails
+                print(f"CTE path building failed, using Python fallback: {e}")
+                path_dict = {}
+        
+        # Debug: Log first 5 paths to verify they use node_name, not node_id
+        print(f"=== Path CTE Verification (first 5) ===")
+        for i, (node_id_key, path_array) in enumerate(list(path_dict.items())[:5]):
+            print(f"  {i+1}. node_id={node_id_key}, path={path_array}")
         
         # FIRST: Ensure ROOT exists and is loaded before filtering
-        # Check if ROOT exists in DB for this structure
-        root_check = db.query(DimHierarchy).filter(
-            DimHierarchy.atlas_source == structure_id,
-            DimHierarchy.node_id == 'ROOT'
-        ).first()
+        # ROOT for this structure is part of the loaded hierarchy (same atlas_source filter)
+        root_check = next((node for node in hierarchy_nodes if node.node_id == 'ROOT'), None)
         
         # Also check if ROOT exists globally (might need to update atlas_source)
         if not root_check:
@@ -619,6 +686,7 @@ def get_discovery_view(
         # Check if we should use calculated results (if use_case_id is provided via report_id or structure lookup)
         # For now, we'll check if there's a use case with this structure_id that has calculated results
         from app.models import UseCase, CalculationRun, FactCalculatedResult, FactPnlEntries
+        from app.services.result_store import run_results_select
         from sqlalchemy import desc
         
         use_case = None
@@ -629,9 +697,12 @@ def get_discovery_view(
         try:
             if use_case_id:
                 # CRITICAL: If use_case_id is provided, use it directly (most reliable)
-                use_case = db.query(UseCase).filter(
-                    UseCase.use_case_id == use_case_id
-                ).first()
+                if context is not None:
+                    use_case = context["use_case"]
+                else:
+                    use_case = db.query(UseCase).filter(
+                        UseCase.use_case_id == use_case_id
+                    ).first()
                 if use_case:
                     logger.info(f"Discovery: Using provided use_case_id {use_case_id} - '{use_case.name}' (structure_id: {use_case.atlas_structure_id})")
                     # Verify structure_id matches
@@ -642,16 +713,22 @@ def get_discovery_view(
                     use_case = None
             else:
                 # Fallback: lookup by structure_id (may return wrong use case if multiple share structure_id)
-                use_case = db.query(UseCase).filter(
-                    UseCase.atlas_structure_id == structure_id
-                ).first()
+                if context is not None:
+                    use_case = context["use_case"]
+                else:
+                    use_case = db.query(UseCase).filter(
+                        UseCase.atlas_structure_id == structure_id
+                    ).first()
                 
                 if use_case:
                     logger.info(f"Discovery: Found use case '{use_case.name}' (ID: {use_case.use_case_id}) for structure_id: {structure_id}")
                     # Check if multiple use cases share this structure_id
-                    use_case_count = db.query(UseCase).filter(
-                        UseCase.atlas_structure_id == structure_id
-                    ).count()
+                    if context is not None:
+                        use_case_count = context["use_case_count"]
+                    else:
+                        use_case_count = db.query(UseCase).filter(
+                            UseCase.atlas_structure_id == structure_id
+                        ).count()
                     if use_case_count > 1:
                         logger.warning(f"Discovery: WARNING - {use_case_count} use cases share structure_id '{structure_id}'. Using first one: '{use_case.name}'. Consider passing use_case_id explicitly.")
                 else:
@@ -911,10 +988,9 @@ def get_discovery_view(
                 
                 if latest_run:
                     # Load calculated results for this run
-                    calculated_results = db.query(FactCalculatedResult).filter(
-                        (FactCalculatedResult.calculation_run_id == latest_run.calculation_run_id) |
-                        (FactCalculatedResult.run_id == latest_run.calculation_run_id)
-                    ).all()
+                    calculated_results = db.execute(
+                        run_results_select(latest_run.calculation_run_id)
+                    ).scalars().all()
                     
                     # Build dictionary: node_id -> {daily, mtd, ytd} from measure_vector
                     # measure_vector uses keys: 'daily', 'mtd' (or 'wtd'), 'ytd'
@@ -1099,20 +1175,23 @@ def get_discovery_view(
                 else:
                     print(f"[API] [WARNING] ROOT node {root_id} not found in natural_results!")
         
+        # Node attributes are derived once per structure version, then only read
+        from app.services.attribute_cache import get_node_attributes_for_structure
+        node_attributes = get_node_attributes_for_structure(structure_id, hierarchy_dict, children_dict, root_nodes)
+        
         # Build tree structure for ALL root nodes (support multiple roots)
-        root_node_trees = []
-        for root_id in root_nodes:
-            root_node = build_tree_structure(
-                hierarchy_dict, children_dict, natural_results, root_id, include_pytd=False, parent_attributes=None, path_dict=path_dict
-            )
-            root_node_trees.append(root_node)
+        # Iterative build of plain dicts, encoded without per-node model validation
+        root_node_trees = build_tree(
+            hierarchy_dict, children_dict, natural_results, root_nodes,
+            path_dict=path_dict, node_attributes=node_attributes, include_pytd=False
+        )
         
         logger.info(f"Discovery: Built {len(root_node_trees)} root node tree(s)")
         
         # CRITICAL: Verify the ROOT node has the correct unified_pnl_service total
         if use_case_id and baseline_pnl:
             for root_node in root_node_trees:
-                root_daily = Decimal(str(root_node.daily_pnl)) if root_node.daily_pnl else Decimal('0')
+                root_daily = Decimal(str(root_node['daily_pnl'])) if root_node['daily_pnl'] else Decimal('0')
                 expected_daily = baseline_pnl['daily_pnl']
                 if abs(root_daily - expected_daily) > Decimal('0.01'):
                     logger.warning(
@@ -1211,18 +1290,19 @@ def get_discovery_view(
         print(f"[API] Building response...")
         if root_node_trees:
             first_root = root_node_trees[0]
-            print(f"[API] First ROOT node: {first_root.node_name} (ID: {first_root.node_id})")
-            print(f"[API] First ROOT daily_pnl: {first_root.daily_pnl}")
+            print(f"[API] First ROOT node: {first_root['node_name']} (ID: {first_root['node_id']})")
+            print(f"[API] First ROOT daily_pnl: {first_root['daily_pnl']}")
             if reconciliation_data:
                 print(f"[API] Reconciliation fact_table_sum['daily']: {reconciliation_data.fact_table_sum.get('daily')}")
         
-        response = DiscoveryResponse(
+        # Same schema as DiscoveryResponse, encoded straight to JSON bytes
+        response = discovery_response(discovery_payload(
             structure_id=structure_id,
             hierarchy=root_node_trees,  # Return all root nodes, not just the first one
-            reconciliation=reconciliation_data,
+            reconciliation=reconciliation_data.model_dump() if reconciliation_data else None,
             debug_info=debug_info  # Include debug information for data sanity verification
-        )
-        logger.info(f"Discovery: Response built successfully, hierarchy has {len(response.hierarchy)} root nodes")
+        ))
+        logger.info(f"Discovery: Response built successfully, hierarchy has {len(root_node_trees)} root nodes")
         print(f"[API] Response built and returning. ROOT node daily_pnl should be: {baseline_pnl['daily_pnl'] if baseline_pnl else 'N/A'}")
         print(f"[API] {'='*70}\n")
         return response
@@ -16,6 +16,7 @@ from app.api.schemas import (
     BulkRuleDeleteRequest,
     BulkRuleResponse,
     RuleCreate,
+    RuleGenAIBatchRequest,
     RuleGenAIRequest,
     RuleGenAIResponse,
     RulePreviewRequest,
@@ -25,7 +26,7 @@ from app.api.schemas import (
 )
 from app.engine.translator import translate_rule
 from app.models import DimHierarchy, MetadataRule, UseCase
-from app.services.rules import create_manual_rule, preview_rule_impact
+from app.services.rules import bulk_upsert_rules, create_manual_rule, preview_rule_impact
 
 logger = logging.getLogger(__name__)
 
@@ -280,21 +281,32 @@ def preview_rule(
     Preview the impact of a rule by counting affected rows.
     
     This endpoint allows users to see how many rows in the appropriate fact table
-    would be affected by a SQL WHERE clause before saving the rule.
+    would be affected by a SQL WHERE clause before saving the rule, and the sum of
+    the rule's measure over them.
     
     The table is determined by:
     - If use_case_id is provided: Uses use_case.input_table_name (e.g., 'fact_pnl_use_case_3')
     - Otherwise: Defaults to 'fact_pnl_gold'
     
+    Large tables are answered from a sample (is_exact=false, with 95% bounds).
+    With refine_exact=true the exact answer is computed in the background;
+    repeating the preview returns it once ready (refining=false, is_exact=true).
+    
     Args:
-        request: RulePreviewRequest with sql_where and optional use_case_id
+        request: RulePreviewRequest with sql_where, optional use_case_id, measure_name and refine_exact
         db: Database session
     
     Returns:
-        RulePreviewResponse with affected row count and percentage
+        RulePreviewResponse with affected row count, percentage and measure impact
     """
     try:
-        return preview_rule_impact(request.sql_where, db, use_case_id=request.use_case_id)
+        return preview_rule_impact(
+            request.sql_where,
+            db,
+            use_case_id=request.use_case_id,
+            measure_name=request.measure_name,
+            refine_exact=request.refine_exact
+        )
     except ValueError as e:
         logger.error(f"Validation error previewing rule: {e}")
         raise HTTPException(status_code=400, detail=str(e))
@@ -411,6 +423,57 @@ def translate_genai_rule(
         )
 
 
+@router.post("/use-cases/{use_case_id}/rules/genai/batch", response_model=List[RuleGenAIResponse])
+def translate_genai_rules_batch(
+    use_case_id: UUID,
+    request: RuleGenAIBatchRequest,
+    db: Session = Depends(get_db)
+):
+    """
+    Translate several natural language rules in one call (GenAI batch mode).
+    
+    Distinct rules are resolved from the translation store where possible; the
+    rest are packed several-per-prompt and sent with bounded concurrency.
+    Like the single-rule endpoint, nothing is saved to the database.
+    
+    Args:
+        use_case_id: Use case UUID
+        request: RuleGenAIBatchRequest with the rules to translate
+        db: Database session (for validation, not used for translation)
+    
+    Returns:
+        List of RuleGenAIResponse, one per requested item (same order)
+    """
+    use_case = db.query(UseCase).filter(UseCase.use_case_id == use_case_id).first()
+    if not use_case:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Use case '{use_case_id}' not found"
+        )
+    
+    table_name = use_case.input_table_name or 'fact_pnl_gold'
+    
+    from app.engine.translation_service import translate_rules_batch
+    try:
+        outcomes = translate_rules_batch([item.logic_en for item in request.items], table_name=table_name)
+    except Exception as e:
+        logger.error(f"Unexpected error in batch GenAI translation: {e}", exc_info=True)
+        outcomes = [(None, None, [f"Unexpected error: {str(e)}"], False)] * len(request.items)
+    
+    return [
+        RuleGenAIResponse(
+            node_id=item.node_id,
+            logic_en=item.logic_en,
+            predicate_json=predicate_json,
+            sql_where=sql_where,
+            translation_successful=translation_successful,
+            errors=errors,
+            preview_available=translation_successful and sql_where is not None
+        )
+        for item, (predicate_json, sql_where, errors, translation_successful) in zip(request.items, outcomes)
+    ]
+
+
 @router.post("/use-cases/{use_case_id}/rules/bulk", response_model=BulkRuleResponse)
 def bulk_create_rules(
     use_case_id: UUID,
@@ -420,6 +483,9 @@ def bulk_create_rules(
     """
     Create or update rules for multiple nodes simultaneously (batch save).
     
+    The rule definition is resolved once (a single translation for GenAI rules)
+    and applied to every node with one INSERT ... ON CONFLICT DO UPDATE.
+    
     Args:
         use_case_id: Use case UUID
         request: BulkRuleCreateRequest with node_ids and rule configuration
@@ -437,151 +503,7 @@ def bulk_create_rules(
                 detail=f"Use case '{use_case_id}' not found"
             )
         
-        created_rules = []
-        errors = []
-        success_count = 0
-        failed_count = 0
-        
-        # Process each node
-        for node_id in request.node_ids:
-            try:
-                # Create RuleCreate object for this node
-                # Phase 5.7: Include math rule fields if provided
-                rule_data = RuleCreate(
-                    node_id=node_id,
-                    last_modified_by=request.last_modified_by,
-                    conditions=request.conditions,
-                    logic_en=request.logic_en,
-                    rule_type=request.rule_type,
-                    rule_expression=request.rule_expression,
-                    rule_dependencies=request.rule_dependencies,
-                    sql_where=request.sql_where
-                )
-                
-                # Create rule using existing logic
-                if rule_data.rule_type == 'NODE_ARITHMETIC' and rule_data.rule_expression:
-                    # Phase 5.7: Math rule mode (Type 3)
-                    existing_rule = db.query(MetadataRule).filter(
-                        MetadataRule.use_case_id == use_case_id,
-                        MetadataRule.node_id == node_id
-                    ).first()
-                    
-                    if existing_rule:
-                        existing_rule.rule_type = rule_data.rule_type
-                        existing_rule.rule_expression = rule_data.rule_expression
-                        existing_rule.rule_dependencies = rule_data.rule_dependencies
-                        existing_rule.last_modified_by = rule_data.last_modified_by
-                        existing_rule.sql_where = None
-                        existing_rule.predicate_json = None
-                        db.commit()
-                        db.refresh(existing_rule)
-                        rule = existing_rule
-                    else:
-                        rule = MetadataRule(
-                            use_case_id=use_case_id,
-                            node_id=node_id,
-                            rule_type=rule_data.rule_type,
-                            rule_expression=rule_data.rule_expression,
-                            rule_dependencies=rule_data.rule_dependencies,
-                            last_modified_by=rule_data.last_modified_by
-                        )
-                        db.add(rule)
-                        db.commit()
-                        db.refresh(rule)
-                elif rule_data.conditions:
-                    rule = create_manual_rule(use_case_id, rule_data, db)
-                elif rule_data.logic_en:
-                    # Get use case to determine table name for column mapping
-                    use_case = db.query(UseCase).filter(UseCase.use_case_id == use_case_id).first()
-                    if not use_case:
-                        errors.append(f"Use case '{use_case_id}' not found")
-                        failed_count += 1
-                        continue
-                    
-                    table_name = use_case.input_table_name or 'fact_pnl_gold'
-                    
-                    # Translate and create
-                    predicate_json, sql_where, translation_errors, translation_successful = translate_rule(
-                        rule_data.logic_en,
-                        use_cache=True,
-                        table_name=table_name
-                    )
-                    
-                    if not translation_successful:
-                        errors.append(f"Node {node_id}: Translation failed: {'; '.join(translation_errors)}")
-                        failed_count += 1
-                        continue
-                    
-                    # Check if rule exists
-                    existing_rule = db.query(MetadataRule).filter(
-                        MetadataRule.use_case_id == use_case_id,
-                        MetadataRule.node_id == node_id
-                    ).first()
-                    
-                    if existing_rule:
-                        existing_rule.predicate_json = predicate_json
-                        existing_rule.sql_where = sql_where
-                        existing_rule.logic_en = rule_data.logic_en
-                        existing_rule.last_modified_by = rule_data.last_modified_by
-                        db.commit()
-                        db.refresh(existing_rule)
-                        rule = existing_rule
-                    else:
-                        rule = MetadataRule(
-                            use_case_id=use_case_id,
-                            node_id=node_id,
-                            predicate_json=predicate_json,
-                            sql_where=sql_where,
-                            logic_en=rule_data.logic_en,
-                            last_modified_by=rule_data.last_modified_by
-                        )
-                        db.add(rule)
-                        db.commit()
-                        db.refresh(rule)
-                else:
-                    errors.append(f"Node {node_id}: Must provide either 'conditions' or 'logic_en'")
-                    failed_count += 1
-                    continue
-                
-                # Get node name for response
-                node = db.query(DimHierarchy).filter(DimHierarchy.node_id == rule.node_id).first()
-                node_name = node.node_name if node else None
-                
-                created_rules.append(RuleResponse(
-                    rule_id=rule.rule_id,
-                    use_case_id=rule.use_case_id,
-                    node_id=rule.node_id,
-                    node_name=node_name,
-                    logic_en=rule.logic_en if rule.logic_en else None,
-                    predicate_json=rule.predicate_json if rule.predicate_json else None,
-                    sql_where=rule.sql_where if rule.sql_where else None,
-                    last_modified_by=rule.last_modified_by,
-                    created_at=rule.created_at.isoformat(),
-                    last_modified_at=rule.last_modified_at.isoformat(),
-                    # Phase 5.7: Math Engine fields - explicitly map from database model
-                    rule_type=rule.rule_type if rule.rule_type else None,
-                    rule_expression=rule.rule_expression if rule.rule_expression else None,
-                    measure_name=rule.measure_name if rule.measure_name else None,
-                    rule_dependencies=rule.rule_dependencies if rule.rule_dependencies else None
-                ))
-                success_count += 1
-                
-            except Exception as e:
-                logger.error(f"Error creating rule for node {node_id}: {e}")
-                errors.append(f"Node {node_id}: {str(e)}")
-                failed_count += 1
-        
-        # PHASE 2C FIX 1: Invalidate rules cache after bulk create
-        from app.services.rules_cache import invalidate_cache
-        invalidate_cache(use_case_id)
-        logger.info(f"[Rules] Invalidated rules cache for use case {use_case_id} after bulk create")
-        
-        return BulkRuleResponse(
-            success_count=success_count,
-            failed_count=failed_count,
-            errors=errors,
-            created_rules=created_rules
-        )
+        return bulk_upsert_rules(use_case_id, request, db)
         
     except HTTPException:
         raise
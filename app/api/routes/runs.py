@@ -2,26 +2,31 @@
 Runs API routes for Finance-Insight
 Provides date-anchored run selection for UI.
 Step 4.2: Supports "Trial Analysis" by allowing users to select runs by PNL_DATE.
+
+All endpoints are pure reads served by the async read layer (asyncpg), so they
+do not occupy a threadpool slot while waiting on PostgreSQL.
 """
 
-from datetime import date
+import asyncio
+from datetime import date, timedelta
+from decimal import Decimal
 from typing import List, Optional
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, HTTPException, Query
 
-from app.api.dependencies import get_db
-from app.models import CalculationRun, UseCase
+from app.services import async_reads
 
 router = APIRouter(prefix="/api/v1", tags=["runs"])
 
+# Upper bound on nodes per time-series request (each node is one key range)
+MAX_TIMESERIES_NODES = 200
+
 
 @router.get("/runs")
-def get_runs(
+async def get_runs(
     pnl_date: Optional[date] = Query(None, description="P&L date (COB date)"),
     use_case_id: Optional[UUID] = Query(None, description="Use case UUID"),
-    db: Session = Depends(get_db)
 ):
     """
     Get calculation runs for UI date selection.
@@ -34,7 +39,6 @@ def get_runs(
     Args:
         pnl_date: Optional P&L date filter (required if use_case_id is provided)
         use_case_id: Optional use case UUID filter (required if pnl_date is provided)
-        db: Database session
     
     Returns:
         List of calculation runs with metadata:
@@ -54,36 +58,20 @@ def get_runs(
             "total": 2
         }
     """
-    query = db.query(CalculationRun)
-    
-    # Build query filters
-    if pnl_date and use_case_id:
-        # Both filters provided - get runs for specific date and use case
-        query = query.filter(
-            CalculationRun.pnl_date == pnl_date,
-            CalculationRun.use_case_id == use_case_id
-        )
-    elif pnl_date:
-        # Only date provided - get all runs for that date
-        query = query.filter(CalculationRun.pnl_date == pnl_date)
-    elif use_case_id:
-        # Only use case provided - get all runs for that use case
-        query = query.filter(CalculationRun.use_case_id == use_case_id)
-    else:
-        # No filters - return all runs (with limit for performance)
-        query = query.limit(100)
-    
-    # Order by execution time (most recent first)
-    runs = query.order_by(CalculationRun.executed_at.desc()).all()
-    
-    # Validate use case exists if provided
+    # Run lookup and use case validation are independent - run them concurrently
     if use_case_id:
-        use_case = db.query(UseCase).filter(UseCase.use_case_id == use_case_id).first()
+        runs, use_case = await asyncio.gather(
+            async_reads.list_calculation_runs(pnl_date, use_case_id),
+            async_reads.get_use_case(use_case_id),
+        )
         if not use_case:
             raise HTTPException(
                 status_code=404,
                 detail=f"Use case '{use_case_id}' not found"
             )
+    else:
+        # Most recent first; no filters -> limited to 100 runs for performance
+        runs = await async_reads.list_calculation_runs(pnl_date, use_case_id)
     
     # Format response
     runs_data = []
@@ -110,18 +98,21 @@ def get_runs(
 
 
 @router.get("/runs/{run_id}")
-def get_run_details(run_id: UUID, db: Session = Depends(get_db)):
+async def get_run_details(run_id: UUID):
     """
     Get detailed information about a specific calculation run.
     
     Args:
         run_id: Calculation run UUID
-        db: Database session
     
     Returns:
-        Run details with associated results count
+        Run details with associated results count and per-stage timings
     """
-    run = db.query(CalculationRun).filter(CalculationRun.id == run_id).first()
+    # Run row and results count are fetched concurrently
+    run, results_count = await asyncio.gather(
+        async_reads.get_calculation_run(run_id),
+        async_reads.count_run_results(run_id),
+    )
     
     if not run:
         raise HTTPException(
@@ -129,12 +120,6 @@ def get_run_details(run_id: UUID, db: Session = Depends(get_db)):
             detail=f"Calculation run '{run_id}' not found"
         )
     
-    # Get results count
-    from app.models import FactCalculatedResult
-    results_count = db.query(FactCalculatedResult).filter(
-        FactCalculatedResult.calculation_run_id == run_id
-    ).count()
-    
     return {
         "id": str(run.id),
         "pnl_date": run.pnl_date.isoformat(),
@@ -144,14 +129,117 @@ def get_run_details(run_id: UUID, db: Session = Depends(get_db)):
         "status": run.status,
         "triggered_by": run.triggered_by,
         "duration_ms": run.calculation_duration_ms,
-        "results_count": results_count
+        "results_count": results_count,
+        # Per-stage ms / queries / db_ms / rows (None for runs before stage tracing)
+        "stage_timings": run.stage_timings
+    }
+
+
+@router.get("/runs/{run_a}/diff/{run_b}")
+async def get_run_diff(
+    run_a: UUID,
+    run_b: UUID,
+    threshold: Decimal = Query(Decimal('0'), ge=0, description="Minimum absolute delta for a node to be returned"),
+    top_n: Optional[int] = Query(None, ge=1, le=10000, description="Return the N largest changes only"),
+    measure: Optional[str] = Query(None, description="Filter/rank on one adjusted measure: daily, mtd, ytd, pytd"),
+):
+    """
+    Compare two calculation runs node by node (Trial Analysis).
+    
+    The diff is computed in the database (one join over both runs' results),
+    so only changed nodes are transferred: measure and plug deltas, nodes
+    present in one run only and changed override flags. Rules of the use case
+    edited between the two runs are listed as changed rules.
+    
+    Args:
+        run_a: Baseline run ID
+        run_b: Comparison run ID (deltas are run_b - run_a)
+        threshold: Minimum absolute delta
+        top_n: Optional limit (largest absolute delta first)
+        measure: Optional adjusted measure to filter and rank on
+            (default: largest delta over all adjusted and plug measures)
+    
+    Returns:
+        {
+            "run_a": {...}, "run_b": {...},
+            "changed_nodes": 3,       # total matching nodes (before top_n)
+            "nodes": [
+                {
+                    "node_id": "NODE_5", "node_name": "...", "status": "changed",
+                    "adjusted": {"run_a": {...}, "run_b": {...}, "delta": {"daily": 1250.0, ...}},
+                    "plug": {...},
+                    "is_override": {"run_a": false, "run_b": true},
+                    "override_changed": true,
+                    "max_abs_delta": 1250.0
+                },
+                ...
+            ],
+            "rules_changed": [{rule_id, node_id, rule_type, logic_en, last_modified_by, last_modified_at}]
+        }
+    """
+    from app.models import RESULT_MEASURES
+    from app.services.run_diff import format_diff_row
+    
+    if measure and measure not in RESULT_MEASURES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid measure '{measure}'. Valid measures: {list(RESULT_MEASURES)}"
+        )
+    
+    run_a_row, run_b_row, diff_rows = await asyncio.gather(
+        async_reads.get_calculation_run(run_a),
+        async_reads.get_calculation_run(run_b),
+        async_reads.get_run_diff(run_a, run_b, threshold, top_n, measure),
+    )
+    for run_id, run in ((run_a, run_a_row), (run_b, run_b_row)):
+        if not run:
+            raise HTTPException(
+                status_code=404,
+                detail=f"Calculation run '{run_id}' not found"
+            )
+    
+    # Rule edits between the two runs (same use case only)
+    rules_changed = []
+    if run_a_row.use_case_id == run_b_row.use_case_id:
+        earlier, later = sorted((run_a_row.executed_at, run_b_row.executed_at))
+        rules = await async_reads.get_rules_modified_between(run_a_row.use_case_id, earlier, later)
+        rules_changed = [
+            {
+                "rule_id": rule.rule_id,
+                "node_id": rule.node_id,
+                "rule_type": rule.rule_type,
+                "logic_en": rule.logic_en,
+                "last_modified_by": rule.last_modified_by,
+                "last_modified_at": rule.last_modified_at.isoformat() if rule.last_modified_at else None,
+            }
+            for rule in rules
+        ]
+    
+    def run_summary(run):
+        return {
+            "id": str(run.id),
+            "use_case_id": str(run.use_case_id),
+            "pnl_date": run.pnl_date.isoformat(),
+            "run_name": run.run_name,
+            "executed_at": run.executed_at.isoformat(),
+            "status": run.status,
+        }
+    
+    return {
+        "run_a": run_summary(run_a_row),
+        "run_b": run_summary(run_b_row),
+        "threshold": float(threshold),
+        "top_n": top_n,
+        "measure": measure,
+        "changed_nodes": diff_rows[0].changed_total if diff_rows else 0,
+        "nodes": [format_diff_row(row) for row in diff_rows],
+        "rules_changed": rules_changed,
     }
 
 
 @router.get("/runs/latest/defaults")
-def get_latest_defaults(
+async def get_latest_defaults(
     use_case_id: Optional[UUID] = Query(None, description="Use case UUID (optional)"),
-    db: Session = Depends(get_db)
 ):
     """
     Get the latest PNL date and run_id for defaulting on app load.
@@ -159,7 +247,6 @@ def get_latest_defaults(
     
     Args:
         use_case_id: Optional use case UUID filter
-        db: Database session
     
     Returns:
         {
@@ -169,18 +256,10 @@ def get_latest_defaults(
             "use_case_id": "uuid" (if filtered)
         }
     """
-    from sqlalchemy import func
-    
-    # Build query
-    query = db.query(CalculationRun)
-    
-    if use_case_id:
-        query = query.filter(CalculationRun.use_case_id == use_case_id)
+    # MAX(pnl_date) + latest run for that date in a single ordered query
+    latest_run = await async_reads.get_latest_run_by_pnl_date(use_case_id)
     
-    # Get MAX(pnl_date)
-    max_date_result = query.with_entities(func.max(CalculationRun.pnl_date)).scalar()
-    
-    if not max_date_result:
+    if not latest_run or not latest_run.pnl_date:
         # No runs found - return null
         return {
             "pnl_date": None,
@@ -189,21 +268,8 @@ def get_latest_defaults(
             "use_case_id": str(use_case_id) if use_case_id else None
         }
     
-    # Get latest run for that date
-    latest_run = query.filter(
-        CalculationRun.pnl_date == max_date_result
-    ).order_by(CalculationRun.executed_at.desc()).first()
-    
-    if not latest_run:
-        return {
-            "pnl_date": max_date_result.isoformat(),
-            "run_id": None,
-            "run_name": None,
-            "use_case_id": str(use_case_id) if use_case_id else None
-        }
-    
     return {
-        "pnl_date": max_date_result.isoformat(),
+        "pnl_date": latest_run.pnl_date.isoformat(),
         "run_id": str(latest_run.id),
         "run_name": latest_run.run_name,
         "executed_at": latest_run.executed_at.isoformat(),
@@ -211,3 +277,93 @@ def get_latest_defaults(
     }
 
 
+@router.get("/use-cases/{use_case_id}/timeseries")
+async def get_result_timeseries(
+    use_case_id: UUID,
+    node_id: List[str] = Query(..., description="Node IDs (repeatable)"),
+    start_date: Optional[date] = Query(None, description="First P&L date (default: end_date - 90 days)"),
+    end_date: Optional[date] = Query(None, description="Last P&L date (default: today)"),
+    measure: List[str] = Query(["daily"], description="Measures: daily, wtd, ytd, pytd (repeatable)"),
+    include_variance: bool = Query(False, description="Include ACTUAL - PRIOR variance per point"),
+):
+    """
+    Time series of calculated results for a node set over a date range.
+    
+    Served from fact_result_series (latest COMPLETED run per PNL date, typed
+    numeric columns), so trend charts and variance-over-time do not load or
+    parse any run's JSONB result set.
+    
+    Args:
+        use_case_id: Use case UUID
+        node_id: Node IDs to return
+        start_date: First P&L date (inclusive)
+        end_date: Last P&L date (inclusive)
+        measure: Measures to return per point
+        include_variance: Also return the variance of each requested measure
+    
+    Returns:
+        {
+            "use_case_id": "uuid",
+            "start_date": "2025-10-01",
+            "end_date": "2025-12-30",
+            "measures": ["daily"],
+            "series": [
+                {
+                    "node_id": "NODE_1",
+                    "points": [
+                        {"pnl_date": "2025-10-01", "calculation_run_id": "uuid", "daily": 1250.5},
+                        ...
+                    ]
+                },
+                ...
+            ]
+        }
+    """
+    from app.services.result_series import SERIES_MEASURES
+    
+    invalid = [m for m in measure if m not in SERIES_MEASURES]
+    if invalid:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid measure(s) {invalid}. Valid measures: {list(SERIES_MEASURES)}"
+        )
+    if len(node_id) > MAX_TIMESERIES_NODES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {MAX_TIMESERIES_NODES} node_id values per request"
+        )
+    
+    end_date = end_date or date.today()
+    start_date = start_date or end_date - timedelta(days=90)
+    if start_date > end_date:
+        raise HTTPException(status_code=400, detail="start_date must not be after end_date")
+    
+    rows, use_case = await asyncio.gather(
+        async_reads.get_result_series(use_case_id, node_id, start_date, end_date),
+        async_reads.get_use_case(use_case_id),
+    )
+    if not use_case:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Use case '{use_case_id}' not found"
+        )
+    
+    # pytd has no variance column (plug_vector pytd is always 0)
+    variance_columns = [f"{m}_variance" for m in measure if m != 'pytd'] if include_variance else []
+    points_by_node = {node: [] for node in dict.fromkeys(node_id)}
+    for row in rows:
+        point = {
+            "pnl_date": row.pnl_date.isoformat(),
+            "calculation_run_id": str(row.calculation_run_id),
+        }
+        for column in (*measure, *variance_columns):
+            point[column] = float(getattr(row, column))
+        points_by_node[row.node_id].append(point)
+    
+    return {
+        "use_case_id": str(use_case_id),
+        "start_date": start_date.isoformat(),
+        "end_date": end_date.isoformat(),
+        "measures": measure,
+        "series": [{"node_id": node, "points": points} for node, points in points_by_node.items()],
+    }
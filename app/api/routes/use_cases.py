@@ -9,6 +9,7 @@ from uuid import UUID
 
 import pandas as pd
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from fastapi.responses import StreamingResponse
 from sqlalchemy import text
 from sqlalchemy.orm import Session
@@ -229,14 +230,14 @@ def update_use_case(
 
 
 @router.get("/use-cases/{use_case_id}/hierarchy")
-def get_use_case_hierarchy(
+async def get_use_case_hierarchy(
     use_case_id: UUID,
     db: Session = Depends(get_db)
 ):
     """
     Get hierarchy for a use case by automatically using its atlas_structure_id.
     This endpoint returns the base Atlas structure even if no calculation_run exists.
-    If a calculation run exists, uses calculated results; otherwise uses natural rollups.
+    Values are natural rollups (calculated results are served by /results).
     
     Args:
         use_case_id: Use case UUID
@@ -244,7 +245,10 @@ def get_use_case_hierarchy(
     Returns:
         DiscoveryResponse with hierarchy tree (same format as /api/v1/discovery)
     """
-    use_case = db.query(UseCase).filter(UseCase.use_case_id == use_case_id).first()
+    from app.api.routes.discovery import build_discovery_view, load_discovery_context_async
+    from app.services import async_reads
+    
+    use_case = await async_reads.get_use_case(use_case_id)
     
     if not use_case:
         raise HTTPException(
@@ -252,35 +256,11 @@ def get_use_case_hierarchy(
             detail=f"Use case '{use_case_id}' not found"
         )
     
-    # Check if there's a latest calculation run with results
-    from app.models import CalculationRun, FactCalculatedResult
-    from sqlalchemy import desc
-    
-    latest_run = db.query(CalculationRun).filter(
-        CalculationRun.use_case_id == use_case_id
-    ).order_by(desc(CalculationRun.executed_at)).first()
-    
-    # If we have calculated results, use them; otherwise use discovery endpoint (natural rollups)
-    if latest_run:
-        # Check if results exist for this run
-        results_count = db.query(FactCalculatedResult).filter(
-            (FactCalculatedResult.calculation_run_id == latest_run.calculation_run_id) |
-            (FactCalculatedResult.run_id == latest_run.calculation_run_id)
-        ).count()
-        
-        if results_count > 0:
-            # Use calculated results - delegate to discovery endpoint but it will use natural rollups
-            # The discovery endpoint always uses natural rollups, so we'll use it as-is
-            # (The calculated results are shown in the /results endpoint, not /hierarchy)
-            pass
-    
-    # Always return the base Atlas structure via discovery endpoint
+    # Always return the base Atlas structure via the discovery view
     # This ensures the hierarchy is always visible even without calculation runs
-    from app.api.routes.discovery import get_discovery_view
-    return get_discovery_view(
-        structure_id=use_case.atlas_structure_id,
-        report_id=None,
-        db=db
+    context = await load_discovery_context_async(use_case.atlas_structure_id)
+    return await run_in_threadpool(
+        build_discovery_view, use_case.atlas_structure_id, None, None, db, context
     )
 
 
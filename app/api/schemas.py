@@ -2,6 +2,8 @@
 Pydantic schemas for Finance-Insight API
 """
 
+from datetime import date
+from decimal import Decimal
 from typing import Any, Dict, List, Optional, Union
 from uuid import UUID
 
@@ -257,12 +259,16 @@ class RulePreviewRequest(BaseModel):
     """Request schema for previewing rule impact."""
     sql_where: str = Field(..., description="SQL WHERE clause to preview")
     use_case_id: Optional[UUID] = Field(None, description="Use case ID to determine which fact table to query")
+    measure_name: Optional[str] = Field(None, description="Measure whose impact is summed (default: the table's daily measure)")
+    refine_exact: bool = Field(False, description="Compute the exact answer in the background when the preview is sampled")
     
     class Config:
         json_schema_extra = {
             "example": {
                 "sql_where": "book_id NOT IN ('B01', 'B02')",
-                "use_case_id": "b90f1708-4087-4117-9820-9226ed1115bb"
+                "use_case_id": "b90f1708-4087-4117-9820-9226ed1115bb",
+                "measure_name": "daily_pnl",
+                "refine_exact": False
             }
         }
 
@@ -272,13 +278,33 @@ class RulePreviewResponse(BaseModel):
     affected_rows: int = Field(..., description="Number of rows in the fact table that match the rule")
     total_rows: int = Field(..., description="Total rows in the fact table")
     percentage: float = Field(..., description="Percentage of rows affected")
+    is_exact: bool = Field(True, description="False when estimated from the table sample")
+    affected_rows_low: Optional[int] = Field(None, description="95% lower bound of affected_rows")
+    affected_rows_high: Optional[int] = Field(None, description="95% upper bound of affected_rows")
+    measure_column: Optional[str] = Field(None, description="Measure column summed over the affected rows")
+    measure_sum: Optional[Decimal] = Field(None, description="Sum of the measure over the affected rows")
+    measure_sum_low: Optional[Decimal] = Field(None, description="95% lower bound of measure_sum")
+    measure_sum_high: Optional[Decimal] = Field(None, description="95% upper bound of measure_sum")
+    sample_rows: Optional[int] = Field(None, description="Sample size the estimate is based on")
+    sample_stale: bool = Field(False, description="Sample predates the latest data change (being rebuilt)")
+    refining: bool = Field(False, description="Exact answer is being computed; repeat the preview to get it")
     
     class Config:
         json_schema_extra = {
             "example": {
                 "affected_rows": 150,
                 "total_rows": 1000,
-                "percentage": 15.0
+                "percentage": 15.0,
+                "is_exact": True,
+                "affected_rows_low": 150,
+                "affected_rows_high": 150,
+                "measure_column": "daily_pnl",
+                "measure_sum": "12500.00",
+                "measure_sum_low": "12500.00",
+                "measure_sum_high": "12500.00",
+                "sample_rows": None,
+                "sample_stale": False,
+                "refining": False
             }
         }
 
@@ -409,6 +435,20 @@ class RuleGenAIResponse(BaseModel):
         }
 
 
+class RuleGenAIBatchRequest(BaseModel):
+    """Request schema for batch GenAI translation (several rules, packed prompts)."""
+    items: List[RuleGenAIRequest] = Field(..., min_items=1, description="Rules to translate")
+    
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "items": [
+                    {"node_id": "AMER_CASH_NY", "logic_en": "Exclude books B01 and B02", "last_modified_by": "user123"},
+                    {"node_id": "EMEA_CASH_LDN", "logic_en": "Only strategy CORE", "last_modified_by": "user123"}
+                ]
+            }
+        }
+
 # ============================================================================
 # Phase 2: Calculation Engine Schemas
 # ============================================================================
@@ -442,6 +482,49 @@ class CalculationResponse(BaseModel):
         }
 
 
+class BatchCalculationJob(BaseModel):
+    """One (use case, PNL date) snapshot in a batch run."""
+    use_case_id: UUID = Field(..., description="Use case ID")
+    pnl_date: date = Field(..., description="P&L date (COB date)")
+    run_name: Optional[str] = Field(None, description="Optional run name")
+
+
+class BatchCalculationRequest(BaseModel):
+    """Request schema for the end-of-day batch calculation endpoint."""
+    jobs: List[BatchCalculationJob] = Field(..., min_items=1, description="Snapshots to calculate")
+    triggered_by: str = Field("system", description="User ID who triggered the batch")
+    max_workers: Optional[int] = Field(None, ge=1, description="Rollup worker processes (default: BATCH_MAX_WORKERS)")
+    
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "jobs": [
+                    {"use_case_id": "123e4567-e89b-12d3-a456-426614174001", "pnl_date": "2025-12-24"},
+                    {"use_case_id": "123e4567-e89b-12d3-a456-426614174002", "pnl_date": "2025-12-24"}
+                ],
+                "triggered_by": "cob_scheduler"
+            }
+        }
+
+
+class BackfillRequest(BaseModel):
+    """Request schema for the historical backfill endpoint."""
+    start_date: date = Field(..., description="First P&L date (inclusive)")
+    end_date: date = Field(..., description="Last P&L date (inclusive)")
+    triggered_by: str = Field("system", description="User ID who triggered the backfill")
+    resume_backfill_id: Optional[str] = Field(None, description="backfill_id of an interrupted backfill to resume")
+    window_days: Optional[int] = Field(None, ge=1, description="Dates committed per checkpoint (default: BACKFILL_WINDOW_DAYS)")
+    
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "start_date": "2025-01-01",
+                "end_date": "2025-12-31",
+                "triggered_by": "user123"
+            }
+        }
+
+
 class ResultsNode(BaseModel):
     """Hierarchy node with calculation results (natural, adjusted, plug)."""
     node_id: str
@@ -0,0 +1,119 @@
+"""
+Low-overhead structured logging for engine hot loops.
+
+Rollups, rule loops and waterfall aggregation used to print banners and emit a
+formatted log line per node, so the cost of a run grew with log volume even when
+nobody read the lines. EngineLog replaces per-node lines with:
+
+- event(): a counted structured event; formatted and logged only in trace mode
+- sampled(): a repetitive but notable event (e.g. missing mapping): the first
+  ENGINE_LOG_SAMPLE occurrences per run are logged, the rest only counted
+- summary(): one line per run with the caller's totals and the event counts
+
+Formatting is lazy: fields are passed as logging arguments and rendered only
+when a record is actually emitted, so default-mode runs do no per-node string
+formatting.
+
+Trace mode (every event logged at INFO) is switched per run:
+- engine_trace() context manager around a run (e.g. ?trace=true on
+  POST /use-cases/{id}/calculate)
+- ENGINE_TRACE_USE_CASES: comma-separated use case IDs always traced
+- ENGINE_TRACE=true: trace every run (development only)
+
+Environment:
+    ENGINE_TRACE               Trace all runs (default: false)
+    ENGINE_TRACE_USE_CASES     Use case IDs to trace (default: none)
+    ENGINE_LOG_SAMPLE          Sampled events logged per run and event (default: 3)
+"""
+
+import logging
+import os
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, Optional
+
+ENGINE_TRACE = os.getenv("ENGINE_TRACE", "false").lower() == "true"
+ENGINE_TRACE_USE_CASES = frozenset(
+    value.strip().lower() for value in os.getenv("ENGINE_TRACE_USE_CASES", "").split(",") if value.strip()
+)
+ENGINE_LOG_SAMPLE = int(os.getenv("ENGINE_LOG_SAMPLE", "3"))
+
+_trace_override: ContextVar[Optional[bool]] = ContextVar("engine_trace", default=None)
+
+
+@contextmanager
+def engine_trace(enabled: Optional[bool] = True) -> Iterator[None]:
+    """Enable (or force off) trace mode for engine runs started in this context (None: defaults)."""
+    token = _trace_override.set(enabled)
+    try:
+        yield
+    finally:
+        _trace_override.reset(token)
+
+
+def trace_enabled(use_case_id: Any = None) -> bool:
+    """Whether a run for use_case_id should log every engine event."""
+    override = _trace_override.get()
+    if override is not None:
+        return override
+    if ENGINE_TRACE:
+        return True
+    return use_case_id is not None and str(use_case_id).lower() in ENGINE_TRACE_USE_CASES
+
+
+class _Fields:
+    """Renders key=value pairs only when the log record is formatted."""
+
+    __slots__ = ('fields',)
+
+    def __init__(self, fields: Dict[str, Any]):
+        self.fields = fields
+
+    def __str__(self) -> str:
+        return " ".join(f"{key}={value}" for key, value in self.fields.items())
+
+
+class EngineLog:
+    """
+    Per-run event log for one engine function.
+
+    Args:
+        logger: Module logger the lines are emitted on
+        tag: Line prefix without brackets (e.g. 'Legacy Path')
+        use_case_id: Run's use case (selects trace mode via ENGINE_TRACE_USE_CASES)
+        trace: Force trace mode on / off (default: trace_enabled(use_case_id))
+    """
+
+    def __init__(self, logger: logging.Logger, tag: str, use_case_id: Any = None, trace: Optional[bool] = None):
+        self.logger = logger
+        self.tag = tag
+        self.trace = trace_enabled(use_case_id) if trace is None else trace
+        self.counts: Counter = Counter()
+        self._sampled: set = set()
+
+    def event(self, name: str, **fields):
+        """Count a per-node event; logged only in trace mode."""
+        self.counts[name] += 1
+        if self.trace:
+            self.logger.info("[%s] %s %s", self.tag, name, _Fields(fields))
+
+    def sampled(self, name: str, level: int = logging.WARNING, **fields):
+        """Count a repetitive event; the first ENGINE_LOG_SAMPLE per run are logged."""
+        self.counts[name] += 1
+        self._sampled.add(name)
+        if self.trace or self.counts[name] <= ENGINE_LOG_SAMPLE:
+            self.logger.log(level, "[%s] %s %s", self.tag, name, _Fields(fields))
+
+    def summary(self, message: str = "summary", **fields):
+        """One line with the run's totals, event counts and suppressed sample counts."""
+        if self.counts:
+            fields['events'] = dict(self.counts)
+        suppressed = {
+            name: self.counts[name] - ENGINE_LOG_SAMPLE
+            for name in self._sampled
+            if not self.trace and self.counts[name] > ENGINE_LOG_SAMPLE
+        }
+        if suppressed:
+            fields['suppressed'] = suppressed
+        self.logger.info("[%s] %s %s", self.tag, message, _Fields(fields))
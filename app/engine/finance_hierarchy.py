@@ -3,6 +3,7 @@ Realistic Finance Domain Hierarchy Generator
 Creates hierarchy following: Region → Product → Desk → Strategy → Cost Center
 """
 
+from functools import lru_cache
 from typing import Dict, List, Optional, Tuple
 
 
@@ -41,54 +42,127 @@ STRATEGIES = {
 }
 
 
-def parse_cost_center_id(cc_id: str) -> Dict[str, Optional[str]]:
+ATTRIBUTE_KEYS = ('region', 'product', 'desk', 'strategy')
+
+# Dimension -> {key: display name}, in match priority order
+_DIMENSIONS = (
+    ('region', REGIONS),
+    ('product', PRODUCTS),
+    ('desk', DESKS),
+    ('strategy', STRATEGIES),
+)
+
+
+class TokenMatcher:
     """
-    Parse cost center ID to extract attributes.
-    Format: CC_{REGION}_{PRODUCT}_{DESK}_{NUMBER}
-    Example: CC_AMER_CASH_EQUITIES_HIGH_TOUCH_001
-    
-    Returns dict with region, product, desk, strategy
+    Aho-Corasick automaton over a fixed set of patterns.
+
+    One pass over the text reports every pattern occurring in it as a
+    substring (the same answer as `pattern in text` for each pattern).
     """
+
+    def __init__(self, patterns: Dict[str, List[Tuple[int, int]]]):
+        # patterns: pattern -> payloads reported when it occurs
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[Tuple[int, int]]] = [[]]
+        for pattern, payloads in patterns.items():
+            state = 0
+            for char in pattern:
+                if char not in self._goto[state]:
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append([])
+                    self._goto[state][char] = len(self._goto) - 1
+                state = self._goto[state][char]
+            self._out[state].extend(payloads)
+
+        # Breadth-first failure links; outputs of the fallback state are merged in
+        queue = list(self._goto[0].values())
+        for state in queue:
+            for char, child in self._goto[state].items():
+                queue.append(child)
+                if state:
+                    fallback = self._fail[state]
+                    while fallback and char not in self._goto[fallback]:
+                        fallback = self._fail[fallback]
+                    self._fail[child] = self._goto[fallback].get(char, 0)
+                self._out[child] = self._out[child] + self._out[self._fail[child]]
+
+    def find(self, text: str) -> List[Tuple[int, int]]:
+        """Payloads of all patterns occurring in text (with repeats)."""
+        found = []
+        state = 0
+        goto, fail, out = self._goto, self._fail, self._out
+        for char in text:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if out[state]:
+                found.extend(out[state])
+        return found
+
+
+def _build_matchers() -> Tuple[TokenMatcher, TokenMatcher]:
+    """Matchers for node ids (dimension keys) and node names (display names)."""
+    key_patterns: Dict[str, List[Tuple[int, int]]] = {}
+    name_patterns: Dict[str, List[Tuple[int, int]]] = {}
+    for dimension, (_, values) in enumerate(_DIMENSIONS):
+        for priority, (key, name) in enumerate(values.items()):
+            key_patterns.setdefault(key, []).append((dimension, priority))
+            name_patterns.setdefault(name, []).append((dimension, priority))
+    return TokenMatcher(key_patterns), TokenMatcher(name_patterns)
+
+
+_KEY_MATCHER, _NAME_MATCHER = _build_matchers()
+_DIMENSION_KEYS = tuple(tuple(values.keys()) for _, values in _DIMENSIONS)
+
+
+@lru_cache(maxsize=65536)
+def _parse_cost_center_id(cc_id: str) -> Tuple[Optional[str], ...]:
     if not cc_id.startswith('CC_'):
-        return {'region': None, 'product': None, 'desk': None, 'strategy': None}
+        return (None, None, None, None)
     
     parts = cc_id.replace('CC_', '').split('_')
+    tokens = set(parts)
     
-    # Try to extract attributes
-    region = None
-    product = None
-    desk = None
-    strategy = None
-    
-    # Check for known regions
-    for reg in REGIONS.keys():
-        if reg in parts:
-            region = reg
-            break
+    # First known key (in dictionary order) present as a token
+    region = next((reg for reg in REGIONS if reg in tokens), None)
+    product = next((prod for prod in PRODUCTS if prod in tokens), None)
+    desk = next((d for d in DESKS if d in tokens), None)
     
-    # Check for known products
-    for prod in PRODUCTS.keys():
-        if prod in parts:
-            product = prod
-            break
+    # Strategy is typically the combination
+    strategy = '_'.join(parts[:-1]) if len(parts) >= 3 else None  # Everything except the number
     
-    # Check for known desks
-    for d in DESKS.keys():
-        if d in parts:
-            desk = d
-            break
+    return (region, product, desk, strategy)
+
+
+def parse_cost_center_id(cc_id: str) -> Dict[str, Optional[str]]:
+    """
+    Parse cost center ID to extract attributes.
+    Format: CC_{REGION}_{PRODUCT}_{DESK}_{NUMBER}
+    Example: CC_AMER_CASH_EQUITIES_HIGH_TOUCH_001
     
-    # Strategy is typically the combination
-    if len(parts) >= 3:
-        strategy_parts = parts[:-1]  # Everything except the number
-        strategy = '_'.join(strategy_parts)
+    Parses are memoized per cc_id.
     
-    return {
-        'region': region,
-        'product': product,
-        'desk': desk,
-        'strategy': strategy
-    }
+    Returns dict with region, product, desk, strategy
+    """
+    return dict(zip(ATTRIBUTE_KEYS, _parse_cost_center_id(cc_id)))
+
+
+@lru_cache(maxsize=65536)
+def _own_attributes(node_id: str, node_name: str) -> Tuple[Optional[str], ...]:
+    """Attributes a node carries itself (before inheritance), memoized per (id, name)."""
+    # For each dimension the first key (in dictionary order) whose key occurs in the
+    # node id or whose display name occurs in the node name
+    best = [None, None, None, None]
+    for dimension, priority in _KEY_MATCHER.find(node_id.upper()) + _NAME_MATCHER.find(node_name or ''):
+        if best[dimension] is None or priority < best[dimension]:
+            best[dimension] = priority
+    return tuple(
+        _DIMENSION_KEYS[dimension][priority] if priority is not None else None
+        for dimension, priority in enumerate(best)
+    )
 
 
 def get_node_attributes(node_id: str, node_name: str, parent_attributes: Optional[Dict] = None) -> Dict[str, Optional[str]]:
@@ -107,43 +181,44 @@ def get_node_attributes(node_id: str, node_name: str, parent_attributes: Optiona
     if node_id.startswith('CC_'):
         return parse_cost_center_id(node_id)
     
-    # Check if node_id matches known patterns
-    attrs = {'region': None, 'product': None, 'desk': None, 'strategy': None}
-    
-    # Check for regions
-    for reg_key, reg_name in REGIONS.items():
-        if reg_key in node_id.upper() or reg_name in node_name:
-            attrs['region'] = reg_key
-            break
-    
-    # Check for products
-    for prod_key, prod_name in PRODUCTS.items():
-        if prod_key in node_id.upper() or prod_name in node_name:
-            attrs['product'] = prod_key
-            break
-    
-    # Check for desks
-    for desk_key, desk_name in DESKS.items():
-        if desk_key in node_id.upper() or desk_name in node_name:
-            attrs['desk'] = desk_key
-            break
-    
-    # Check for strategies
-    for strat_key, strat_name in STRATEGIES.items():
-        if strat_key in node_id.upper() or strat_name in node_name:
-            attrs['strategy'] = strat_key
-            break
+    attrs = dict(zip(ATTRIBUTE_KEYS, _own_attributes(node_id, node_name)))
     
     # Inherit from parent if not found
     if parent_attributes:
-        if not attrs['region'] and parent_attributes.get('region'):
-            attrs['region'] = parent_attributes['region']
-        if not attrs['product'] and parent_attributes.get('product'):
-            attrs['product'] = parent_attributes['product']
-        if not attrs['desk'] and parent_attributes.get('desk'):
-            attrs['desk'] = parent_attributes['desk']
-        if not attrs['strategy'] and parent_attributes.get('strategy'):
-            attrs['strategy'] = parent_attributes['strategy']
+        for key in ATTRIBUTE_KEYS:
+            if not attrs[key] and parent_attributes.get(key):
+                attrs[key] = parent_attributes[key]
     
     return attrs
 
+
+def derive_hierarchy_attributes(
+    hierarchy_dict: Dict,
+    children_dict: Dict[str, List[str]],
+    root_ids: List[str]
+) -> Dict[str, Dict[str, Optional[str]]]:
+    """
+    Attributes of every node reachable from root_ids, in one top-down pass.
+    
+    Same result as calling get_node_attributes down the tree with each
+    parent's attributes; inheritance is resolved parent-first, iteratively.
+    
+    Args:
+        hierarchy_dict: Dictionary mapping node_id -> node (node_id, node_name)
+        children_dict: Dictionary mapping parent_node_id -> list of children node_ids
+        root_ids: Root node ids (no parent attributes)
+    
+    Returns:
+        Dictionary mapping node_id -> {region, product, desk, strategy}
+    """
+    attributes: Dict[str, Dict[str, Optional[str]]] = {}
+    stack = [(root_id, None) for root_id in reversed(root_ids)]
+    while stack:
+        node_id, parent_attributes = stack.pop()
+        node = hierarchy_dict.get(node_id)
+        if node is None or node_id in attributes:
+            continue
+        attrs = get_node_attributes(node.node_id, node.node_name, parent_attributes)
+        attributes[node_id] = attrs
+        stack.extend((child_id, attrs) for child_id in children_dict.get(node_id, ()))
+    return attributes
@@ -8,6 +8,8 @@ import logging
 import time
 from typing import Any, Dict, Optional
 
+from app.metrics import record_cache
+
 logger = logging.getLogger(__name__)
 
 # In-memory cache (in production, use Redis or similar)
@@ -20,7 +22,7 @@ CACHE_TTL_SECONDS = 30 * 24 * 60 * 60
 def _normalize_logic_en(logic_en: str) -> str:
     """
     Normalize natural language input for cache key generation.
-    Removes extra whitespace and converts to lowercase.
+    Removes extra whitespace; case is kept ('EQUITY' and 'equity' are different values).
     
     Args:
         logic_en: Natural language description
@@ -28,7 +30,7 @@ def _normalize_logic_en(logic_en: str) -> str:
     Returns:
         Normalized string
     """
-    return ' '.join(logic_en.lower().split())
+    return ' '.join(logic_en.split())
 
 
 def _generate_cache_key(logic_en: str) -> str:
@@ -59,6 +61,7 @@ def get_cached_translation(logic_en: str) -> Optional[Dict[str, Any]]:
     cached_entry = _translation_cache.get(cache_key)
     
     if not cached_entry:
+        record_cache('translation', 'miss')
         return None
     
     # Check if cache entry is expired
@@ -66,9 +69,11 @@ def get_cached_translation(logic_en: str) -> Optional[Dict[str, Any]]:
     if current_time - cached_entry['timestamp'] > CACHE_TTL_SECONDS:
         # Remove expired entry
         del _translation_cache[cache_key]
+        record_cache('translation', 'miss')
         logger.debug(f"Cache entry expired for: {logic_en}")
         return None
     
+    record_cache('translation', 'hit')
     logger.debug(f"Cache hit for: {logic_en}")
     return {
         'predicate_json': cached_entry['predicate_json'],
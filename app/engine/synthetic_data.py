@@ -0,0 +1,403 @@
+"""
+Scalable synthetic dataset generator for load and benchmark runs.
+
+mock_data builds ~1,000 fact rows one Python dict at a time; this module
+reproduces production-scale shapes (10M+ fact rows, 100k-node hierarchies) on
+a laptop:
+
+- Deterministic: every array comes from numpy Generators seeded from
+  SyntheticConfig.seed (fact chunks use the seed sequence (seed, schema,
+  chunk)), so the same config - including chunk_size - always yields the same
+  dataset.
+- Vectorized: hierarchy, bridge and fact columns are numpy arrays; fact rows
+  are produced in fixed-size chunks and never exist as Python objects.
+- Loaded with PostgreSQL COPY (text format over STDIN) through the raw DBAPI
+  connection, one chunk at a time; the COPY text is built column-wise with
+  numpy string operations instead of per-row formatting.
+
+Covered schemas (SyntheticConfig.schemas): 'gold' (fact_pnl_gold), 'entries'
+(fact_pnl_entries, ACTUAL and PRIOR rows) and 'uc3' (fact_pnl_use_case_3).
+Facts land on leaf nodes and on a configurable share of hybrid parents
+(parents with direct rows, Phase 5.8). Each schema gets its own use case over
+the shared synthetic hierarchy, with FILTER rules on a configurable share of
+nodes.
+"""
+
+import io
+import logging
+import time
+from dataclasses import dataclass
+from datetime import date
+from typing import Dict, Iterator, List, Optional, Tuple
+from uuid import UUID, uuid5, NAMESPACE_URL
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.models import MetadataRule, UseCase, UseCaseStatus
+
+logger = logging.getLogger(__name__)
+
+SCHEMA_TABLES = {
+    'gold': 'fact_pnl_gold',
+    'entries': 'fact_pnl_entries',
+    'uc3': 'fact_pnl_use_case_3',
+}
+
+# Dimension cardinalities of the non-hierarchy columns
+ACCOUNTS = [f"ACC_{i:03d}" for i in range(1, 51)]
+BOOKS = [f"BOOK_{i:02d}" for i in range(1, 41)]
+STRATEGIES = [f"STRAT_{i:02d}" for i in range(1, 21)]
+PROCESSES = [f"PROC_{i:02d}" for i in range(1, 11)]
+
+_HEX_PAIRS = np.array([f"{i:02x}".encode() for i in range(256)], dtype='S2')
+
+
+@dataclass
+class SyntheticConfig:
+    """Shape of a synthetic dataset."""
+    seed: int = 42
+    node_count: int = 1_000
+    max_depth: int = 6
+    fan_out: int = 8
+    hybrid_fraction: float = 0.05  # Share of parent nodes that also carry direct fact rows
+    rule_density: float = 0.02  # Share of nodes with a FILTER rule (per use case)
+    fact_rows: int = 100_000  # Per schema
+    business_days: int = 20
+    end_date: date = date(2024, 12, 31)
+    chunk_size: int = 500_000
+    structure_id: str = "SYNTH_ATLAS_v1"
+    node_prefix: str = "SYN_"
+    schemas: Tuple[str, ...] = ('gold', 'entries', 'uc3')
+
+
+def generate_hierarchy_frame(config: SyntheticConfig) -> pd.DataFrame:
+    """
+    Generate a ragged hierarchy level by level.
+
+    Each level draws its children's parents from the previous level with skewed
+    random weights, so fan-out varies and some parents stop early (leaves above
+    max_depth). Levels grow by up to fan_out per parent until node_count is
+    reached; the last level takes all remaining nodes.
+
+    Returns:
+        DataFrame (node_index, parent_index, depth, is_leaf, node_id,
+        parent_node_id, node_name), parents before children
+    """
+    rng = np.random.default_rng([config.seed, 0])
+    parent_index = [np.array([-1])]
+    depths = [np.array([0])]
+    frontier = np.array([0])
+    next_index = 1
+    for depth in range(1, config.max_depth + 1):
+        remaining = config.node_count - next_index
+        if remaining <= 0 or frontier.size == 0:
+            break
+        size = remaining if depth == config.max_depth else min(remaining, frontier.size * config.fan_out)
+        weights = rng.random(frontier.size) ** 3
+        children = np.sort(rng.choice(frontier, size=size, p=weights / weights.sum()))
+        parent_index.append(children)
+        depths.append(np.full(size, depth))
+        frontier = np.arange(next_index, next_index + size)
+        next_index += size
+
+    parents = np.concatenate(parent_index)
+    node_index = np.arange(parents.size)
+    child_counts = np.bincount(parents[parents >= 0], minlength=parents.size)
+    node_ids = np.array([f"{config.node_prefix}{i:07d}" for i in node_index], dtype=object)
+    node_ids[0] = f"{config.node_prefix}ROOT"
+    return pd.DataFrame({
+        'node_index': node_index,
+        'parent_index': parents,
+        'depth': np.concatenate(depths),
+        'is_leaf': child_counts == 0,
+        'node_id': node_ids,
+        'parent_node_id': np.where(parents >= 0, node_ids[np.maximum(parents, 0)], None),
+        'node_name': np.array([f"Synthetic Node {i}" for i in node_index], dtype=object),
+    })
+
+
+def generate_bridge_frame(hierarchy: pd.DataFrame) -> pd.DataFrame:
+    """
+    Parent-to-leaf bridge rows (every ancestor of every leaf), walking the
+    parent array one level per step.
+    """
+    parents = hierarchy['parent_index'].to_numpy()
+    depths = hierarchy['depth'].to_numpy()
+    node_ids = hierarchy['node_id'].to_numpy()
+    leaves = hierarchy.index[hierarchy['is_leaf']].to_numpy()
+
+    frames = []
+    ancestors = parents[leaves]
+    current_leaves = leaves
+    while current_leaves.size:
+        has_parent = ancestors >= 0
+        current_leaves, ancestors = current_leaves[has_parent], ancestors[has_parent]
+        if not current_leaves.size:
+            break
+        frames.append(pd.DataFrame({
+            'parent_node_id': node_ids[ancestors],
+            'leaf_node_id': node_ids[current_leaves],
+            'path_length': depths[current_leaves] - depths[ancestors],
+        }))
+        ancestors = parents[ancestors]
+    if not frames:
+        return pd.DataFrame(columns=['parent_node_id', 'leaf_node_id', 'path_length'])
+    return pd.concat(frames, ignore_index=True)
+
+
+def fact_target_nodes(config: SyntheticConfig, hierarchy: pd.DataFrame) -> np.ndarray:
+    """Node IDs that receive fact rows: all leaves plus the hybrid parents."""
+    rng = np.random.default_rng([config.seed, 1])
+    parents = hierarchy.loc[~hierarchy['is_leaf'] & (hierarchy['depth'] > 0), 'node_id'].to_numpy()
+    hybrid_count = int(round(parents.size * config.hybrid_fraction))
+    hybrids = rng.choice(parents, size=hybrid_count, replace=False) if hybrid_count else parents[:0]
+    return np.concatenate([hierarchy.loc[hierarchy['is_leaf'], 'node_id'].to_numpy(), hybrids])
+
+
+def business_dates(config: SyntheticConfig) -> np.ndarray:
+    """ISO date strings of the last business_days weekdays up to end_date."""
+    dates = pd.bdate_range(end=config.end_date, periods=config.business_days)
+    return np.array(dates.strftime('%Y-%m-%d'), dtype=object)
+
+
+def random_uuids(rng: np.random.Generator, count: int) -> np.ndarray:
+    """Version-4 UUIDs as 32-character hex strings (accepted by PostgreSQL uuid input)."""
+    raw = rng.integers(0, 256, size=(count, 16), dtype=np.uint8)
+    raw[:, 6] = (raw[:, 6] & 0x0F) | 0x40
+    raw[:, 8] = (raw[:, 8] & 0x3F) | 0x80
+    return _HEX_PAIRS[raw].view('S32').ravel().astype(str)
+
+
+def _measures(rng: np.random.Generator, count: int) -> Dict[str, np.ndarray]:
+    daily = rng.normal(0, 25_000, count)
+    return {
+        'daily': daily.round(2),
+        'wtd': (daily * rng.uniform(1, 5, count)).round(2),
+        'ytd': (daily * rng.uniform(20, 250, count)).round(2),
+        'pytd': (daily * rng.uniform(15, 240, count)).round(2),
+    }
+
+
+def generate_fact_chunks(
+    config: SyntheticConfig,
+    schema: str,
+    target_nodes: np.ndarray,
+    use_case_id: Optional[UUID] = None
+) -> Iterator[pd.DataFrame]:
+    """
+    Yield fact rows for one schema in chunks of config.chunk_size.
+
+    Args:
+        config: Dataset configuration
+        schema: 'gold', 'entries' or 'uc3'
+        target_nodes: Node IDs facts are attached to (fact_target_nodes)
+        use_case_id: Use case of the rows (required for 'entries')
+
+    Yields:
+        DataFrames whose columns match the COPY column list of the schema table
+    """
+    dates = business_dates(config)
+    schema_offset = list(SCHEMA_TABLES).index(schema) + 1
+    for chunk_index, start in enumerate(range(0, config.fact_rows, config.chunk_size)):
+        count = min(config.chunk_size, config.fact_rows - start)
+        rng = np.random.default_rng([config.seed, 100 * schema_offset, chunk_index])
+        nodes = target_nodes[rng.integers(0, target_nodes.size, count)]
+        pnl_dates = dates[rng.integers(0, dates.size, count)]
+        measures = _measures(rng, count)
+
+        if schema == 'gold':
+            yield pd.DataFrame({
+                'fact_id': random_uuids(rng, count),
+                'account_id': np.array(ACCOUNTS, dtype=object)[rng.integers(0, len(ACCOUNTS), count)],
+                'cc_id': nodes,
+                'book_id': np.array(BOOKS, dtype=object)[rng.integers(0, len(BOOKS), count)],
+                'strategy_id': np.array(STRATEGIES, dtype=object)[rng.integers(0, len(STRATEGIES), count)],
+                'trade_date': pnl_dates,
+                'daily_pnl': measures['daily'],
+                'mtd_pnl': measures['wtd'],
+                'ytd_pnl': measures['ytd'],
+                'pytd_pnl': measures['pytd'],
+            })
+        elif schema == 'entries':
+            yield pd.DataFrame({
+                'id': random_uuids(rng, count),
+                'use_case_id': str(use_case_id),
+                'pnl_date': pnl_dates,
+                'category_code': nodes,
+                'amount': measures['daily'],
+                'daily_amount': measures['daily'],
+                'wtd_amount': measures['wtd'],
+                'ytd_amount': measures['ytd'],
+                'scenario': np.where(rng.random(count) < 0.5, 'ACTUAL', 'PRIOR'),
+            })
+        elif schema == 'uc3':
+            commission = (measures['daily'] * rng.uniform(0, 0.2, count)).round(2)
+            yield pd.DataFrame({
+                'entry_id': random_uuids(rng, count),
+                'effective_date': pnl_dates,
+                'cost_center': nodes,
+                'division': 'SYNTH',
+                'business_area': 'Synthetic',
+                'product_line': 'Synthetic',
+                'strategy': nodes,
+                'process_1': np.array(PROCESSES, dtype=object)[rng.integers(0, len(PROCESSES), count)],
+                'process_2': np.array(PROCESSES, dtype=object)[rng.integers(0, len(PROCESSES), count)],
+                'book': np.array(BOOKS, dtype=object)[rng.integers(0, len(BOOKS), count)],
+                'pnl_daily': measures['daily'],
+                'pnl_commission': commission,
+                'pnl_trade': (measures['daily'] - commission).round(2),
+            })
+        else:
+            raise ValueError(f"Unknown schema '{schema}' (expected one of {list(SCHEMA_TABLES)})")
+
+
+def synthetic_use_case_id(config: SyntheticConfig, schema: str) -> UUID:
+    """Stable use case ID per (structure, schema), so reloads replace the same use case."""
+    return uuid5(NAMESPACE_URL, f"finance-insight/synthetic/{config.structure_id}/{schema}")
+
+
+def rule_rows(config: SyntheticConfig, hierarchy: pd.DataFrame, schema: str, use_case_id: UUID) -> List[Dict]:
+    """FILTER rules on rule_density of the nodes, with a WHERE clause for the schema's table."""
+    rng = np.random.default_rng([config.seed, 2, list(SCHEMA_TABLES).index(schema)])
+    count = int(round(len(hierarchy) * config.rule_density))
+    if not count:
+        return []
+    nodes = rng.choice(hierarchy['node_id'].to_numpy()[1:], size=min(count, len(hierarchy) - 1), replace=False)
+    rules = []
+    for node_id, value in zip(nodes, rng.integers(0, len(BOOKS), nodes.size)):
+        if schema == 'gold':
+            sql_where = f"book_id = '{BOOKS[value]}'"
+        elif schema == 'entries':
+            sql_where = f"category_code = '{node_id}' AND scenario = 'ACTUAL'"
+        else:
+            sql_where = f"book = '{BOOKS[value]}'"
+        rules.append({
+            'use_case_id': use_case_id,
+            'node_id': node_id,
+            'sql_where': sql_where,
+            'logic_en': f"Synthetic filter: {sql_where}",
+            'last_modified_by': 'synthetic_data',
+            'rule_type': 'FILTER',
+            'measure_name': 'daily_pnl',
+        })
+    return rules
+
+
+def _text_column(values: np.ndarray) -> List[str]:
+    # COPY text format fields; measures as exact cents ("1234567e-2"), formatted by numpy
+    if values.dtype.kind == 'f':
+        return np.strings.add(np.round(values * 100).astype(np.int64).astype(np.str_), 'e-2').tolist()
+    if values.dtype.kind == 'b':
+        return np.where(values, 't', 'f').tolist()
+    if values.dtype == object:
+        nulls = pd.isna(values).tolist()
+        return ['\\N' if null else str(value) for value, null in zip(values.tolist(), nulls)]
+    return values.astype(np.str_).tolist()
+
+
+def copy_frame(cursor, table: str, frame: pd.DataFrame) -> int:
+    """
+    COPY a DataFrame into a table (text format over STDIN).
+
+    Values are generated (no tabs, newlines or backslashes), so fields are not escaped.
+    """
+    columns = [_text_column(frame[name].to_numpy()) for name in frame.columns]
+    buffer = io.StringIO()
+    buffer.write('\n'.join(map('\t'.join, zip(*columns))))
+    buffer.write('\n')
+    buffer.seek(0)
+    cursor.copy_expert(f"COPY {table} ({', '.join(frame.columns)}) FROM STDIN", buffer)
+    return len(frame)
+
+
+def clear_synthetic_dataset(session: Session, config: SyntheticConfig) -> None:
+    """Delete a previously loaded dataset of the same structure (caller commits)."""
+    params = {'structure_id': config.structure_id, 'node_pattern': f"{config.node_prefix}%"}
+    session.execute(text("DELETE FROM use_cases WHERE atlas_structure_id = :structure_id"), params)
+    session.execute(text("DELETE FROM fact_pnl_gold WHERE cc_id LIKE :node_pattern"), params)
+    session.execute(text("DELETE FROM fact_pnl_use_case_3 WHERE strategy LIKE :node_pattern"), params)
+    session.execute(text("DELETE FROM hierarchy_bridge WHERE structure_id = :structure_id"), params)
+    session.execute(text("DELETE FROM dim_hierarchy WHERE atlas_source = :structure_id"), params)
+
+
+def load_synthetic_dataset(session: Session, config: SyntheticConfig, clear_existing: bool = True) -> Dict:
+    """
+    Generate and COPY a synthetic dataset into PostgreSQL.
+
+    Args:
+        session: SQLAlchemy session (PostgreSQL / psycopg2)
+        config: Dataset configuration
+        clear_existing: Delete a previous dataset of the same structure first
+
+    Returns:
+        Summary: counts per table, use case IDs per schema and timings (seconds)
+    """
+    timings = {}
+    start = time.perf_counter()
+    hierarchy = generate_hierarchy_frame(config)
+    bridge = generate_bridge_frame(hierarchy)
+    targets = fact_target_nodes(config, hierarchy)
+    timings['generate_hierarchy'] = round(time.perf_counter() - start, 3)
+
+    if clear_existing:
+        clear_synthetic_dataset(session, config)
+
+    summary = {
+        'hierarchy_nodes': len(hierarchy),
+        'leaf_nodes': int(hierarchy['is_leaf'].sum()),
+        'hybrid_parents': int(targets.size - hierarchy['is_leaf'].sum()),
+        'max_depth': int(hierarchy['depth'].max()),
+        'bridge_entries': len(bridge),
+        'fact_rows': {},
+        'rules': {},
+        'use_cases': {},
+    }
+
+    # Use cases and rules through the ORM (small); hierarchy and facts through COPY
+    start = time.perf_counter()
+    cursor = session.connection().connection.cursor()
+    try:
+        copy_frame(cursor, 'dim_hierarchy', hierarchy[['node_id', 'parent_node_id', 'node_name', 'depth', 'is_leaf']].assign(
+            atlas_source=config.structure_id
+        ))
+        copy_frame(cursor, 'hierarchy_bridge', bridge.assign(
+            bridge_id=random_uuids(np.random.default_rng([config.seed, 3]), len(bridge)),
+            structure_id=config.structure_id,
+        ))
+        timings['load_hierarchy'] = round(time.perf_counter() - start, 3)
+
+        for schema in config.schemas:
+            table = SCHEMA_TABLES[schema]
+            use_case_id = synthetic_use_case_id(config, schema)
+            session.add(UseCase(
+                use_case_id=use_case_id,
+                name=f"Synthetic {schema} ({config.structure_id})",
+                description=f"Synthetic dataset: seed {config.seed}, {config.fact_rows} rows, {len(hierarchy)} nodes",
+                owner_id='synthetic_data',
+                atlas_structure_id=config.structure_id,
+                status=UseCaseStatus.ACTIVE,
+                input_table_name=table,
+            ))
+            session.flush()
+            rules = rule_rows(config, hierarchy, schema, use_case_id)
+            session.bulk_insert_mappings(MetadataRule, rules)
+
+            start = time.perf_counter()
+            loaded = 0
+            for chunk in generate_fact_chunks(config, schema, targets, use_case_id):
+                loaded += copy_frame(cursor, table, chunk)
+                logger.info(f"[Synthetic] {table}: {loaded}/{config.fact_rows} rows")
+            timings[f"load_{schema}"] = round(time.perf_counter() - start, 3)
+            summary['fact_rows'][table] = loaded
+            summary['rules'][schema] = len(rules)
+            summary['use_cases'][schema] = str(use_case_id)
+    finally:
+        cursor.close()
+
+    session.commit()
+    summary['timings_s'] = timings
+    logger.info(f"[Synthetic] Loaded dataset {config.structure_id}: {summary}")
+    return summary
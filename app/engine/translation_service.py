@@ -0,0 +1,623 @@
+"""
+Translation Service - Batched, coalesced and persisted GenAI rule translation.
+
+Builds on the three-stage pipeline in translator.py (NL -> JSON -> Validate -> SQL)
+and removes serial LLM latency from bulk rule authoring:
+
+1. Persistent store: successful predicates are written to `rule_translations`,
+   keyed by normalized logic_en + TRANSLATION_SCHEMA_VERSION, so they survive
+   restarts and are shared across workers.
+2. Request coalescing: concurrent translations of the same logic_en share a
+   single model call (leader/follower futures).
+3. Batch API: misses are packed several-per-prompt and sent with bounded
+   concurrency (asyncio.Semaphore + worker threads).
+
+Offline testing: set GENAI_MODEL=stub (or pass model=StubTranslationModel())
+and no network call is ever made.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from app.engine.translator import (
+    ALLOWED_FIELDS,
+    GENAI_SUPPORTED_OPERATORS,
+    SYSTEM_INSTRUCTION,
+    QuotaExceededError,
+    initialize_gemini,
+    is_quota_error,
+    retry_on_quota,
+    validate_json_predicate,
+)
+from app.metrics import timed_genai_call
+
+logger = logging.getLogger(__name__)
+
+# Key normalization format (2: case-preserving; 1 lowercased logic_en)
+KEY_FORMAT_VERSION = 2
+
+# Changes whenever the prompt, the field/operator whitelist or the key format
+# changes, which automatically invalidates every persisted translation from an
+# older version.
+TRANSLATION_SCHEMA_VERSION = hashlib.md5(f"{KEY_FORMAT_VERSION}:{SYSTEM_INSTRUCTION}".encode()).hexdigest()[:12]
+
+# Batch tuning (overridable via environment)
+DEFAULT_BATCH_SIZE = int(os.getenv("GENAI_BATCH_SIZE", "8"))
+DEFAULT_MAX_CONCURRENCY = int(os.getenv("GENAI_MAX_CONCURRENCY", "4"))
+
+# Marker used to recognise packed prompts (also parsed by StubTranslationModel)
+BATCH_MARKER = "Filters:"
+
+BATCH_INSTRUCTION = f"""Translate EACH numbered filter to JSON: {{'conditions': [{{'field': str, 'operator': str, 'value': any}}], 'conjunction': 'AND'}}
+
+Fields: {', '.join(ALLOWED_FIELDS)}
+Operators: {', '.join(GENAI_SUPPORTED_OPERATORS)}
+Return a JSON array with exactly one object per filter, in the same order.
+JSON only, no markdown."""
+
+# Result tuple: (predicate_json, errors)
+PredicateResult = Tuple[Optional[Dict[str, Any]], List[str]]
+
+
+# ============================================================================
+# Keys
+# ============================================================================
+
+def normalize_logic_en(logic_en: str) -> str:
+    """
+    Normalize natural language input (collapsed whitespace).
+
+    Case is kept: values such as 'EQUITY' vs 'equity' translate to different
+    predicates and must not share a cache entry.
+    """
+    return ' '.join(logic_en.split())
+
+
+def translation_key(logic_en: str) -> str:
+    """
+    Persistent cache key for a natural language rule.
+
+    Args:
+        logic_en: Natural language description
+
+    Returns:
+        sha256 hex digest of schema_version + normalized logic_en
+    """
+    payload = f"{TRANSLATION_SCHEMA_VERSION}:{normalize_logic_en(logic_en)}"
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+# ============================================================================
+# Persistent store (rule_translations)
+# ============================================================================
+
+def load_persisted_translation(logic_en: str) -> Optional[Dict[str, Any]]:
+    """
+    Look up a predicate in the persistent translation store.
+
+    Failures (DB down, table not migrated yet) are logged and treated as a miss
+    so translation never depends on the store being available.
+
+    Args:
+        logic_en: Natural language description
+
+    Returns:
+        predicate_json or None
+    """
+    found = load_persisted_translations([logic_en])
+    return found.get(translation_key(logic_en))
+
+
+def load_persisted_translations(logic_ens: List[str]) -> Dict[str, Dict[str, Any]]:
+    """
+    Bulk lookup in the persistent translation store (one query).
+
+    Args:
+        logic_ens: Natural language descriptions
+
+    Returns:
+        Dictionary mapping translation_key -> predicate_json for hits
+    """
+    keys = list({translation_key(logic_en) for logic_en in logic_ens})
+    if not keys:
+        return {}
+
+    try:
+        from app.database import SessionLocal
+        from app.models import RuleTranslation
+
+        session = SessionLocal()
+        try:
+            rows = session.query(RuleTranslation.cache_key, RuleTranslation.predicate_json).filter(
+                RuleTranslation.cache_key.in_(keys)
+            ).all()
+            return {row.cache_key: row.predicate_json for row in rows}
+        finally:
+            session.close()
+    except Exception as e:
+        logger.warning(f"[Translation Store] Lookup skipped: {e}")
+        return {}
+
+
+def persist_translations(entries: List[Tuple[str, Dict[str, Any]]]) -> int:
+    """
+    Write successful translations to the persistent store (one statement).
+
+    Args:
+        entries: List of (logic_en, predicate_json)
+
+    Returns:
+        Number of entries submitted (0 on failure)
+    """
+    if not entries:
+        return 0
+
+    rows = {}
+    for logic_en, predicate_json in entries:
+        key = translation_key(logic_en)
+        rows[key] = {
+            'cache_key': key,
+            'schema_version': TRANSLATION_SCHEMA_VERSION,
+            'normalized_logic_en': normalize_logic_en(logic_en),
+            'predicate_json': predicate_json,
+        }
+
+    try:
+        from sqlalchemy.dialects.postgresql import insert as pg_insert
+        from app.database import SessionLocal
+        from app.models import RuleTranslation
+
+        session = SessionLocal()
+        try:
+            stmt = pg_insert(RuleTranslation.__table__).values(list(rows.values()))
+            session.execute(stmt.on_conflict_do_nothing(index_elements=['cache_key']))
+            session.commit()
+        finally:
+            session.close()
+        return len(rows)
+    except Exception as e:
+        logger.warning(f"[Translation Store] Persist skipped: {e}")
+        return 0
+
+
+# ============================================================================
+# Request coalescing
+# ============================================================================
+
+_inflight: Dict[str, Future] = {}
+_inflight_lock = threading.Lock()
+
+
+def _claim(key: str) -> Tuple[Future, bool]:
+    """
+    Claim a translation key.
+
+    Returns:
+        Tuple of (future, is_leader). Only the leader performs the model call;
+        followers wait on the shared future.
+    """
+    with _inflight_lock:
+        future = _inflight.get(key)
+        if future is not None:
+            return future, False
+        future = Future()
+        _inflight[key] = future
+        return future, True
+
+
+def _release(key: str, future: Future, result: Optional[PredicateResult] = None,
+             error: Optional[BaseException] = None) -> None:
+    """Resolve a claimed key and remove it from the in-flight registry."""
+    with _inflight_lock:
+        _inflight.pop(key, None)
+    if error is not None:
+        future.set_exception(error)
+    else:
+        future.set_result(result)
+
+
+def coalesced_translate(logic_en: str, translate_fn: Callable[[], PredicateResult]) -> PredicateResult:
+    """
+    Run translate_fn once per logic_en across concurrent callers.
+
+    Args:
+        logic_en: Natural language description
+        translate_fn: Zero-arg callable performing the actual model call
+
+    Returns:
+        (predicate_json, errors) shared by every concurrent caller
+    """
+    key = translation_key(logic_en)
+    future, is_leader = _claim(key)
+    if not is_leader:
+        logger.info(f"[Translation] Coalesced with in-flight translation: {logic_en}")
+        return future.result()
+
+    try:
+        result = translate_fn()
+    except BaseException as e:
+        _release(key, future, error=e)
+        raise
+    _release(key, future, result=result)
+    return result
+
+
+# ============================================================================
+# Models
+# ============================================================================
+
+class StubTranslationModel:
+    """
+    Offline stand-in for the Gemini GenerativeModel.
+
+    Implements the same `generate_content(prompt, generation_config)` surface and
+    understands both single and packed (batch) prompts. By default it applies a
+    small keyword parser ("exclude book B01 and B02" -> book_id not_in [...]);
+    pass `responses` ({normalized logic_en: predicate dict}) for exact control.
+
+    `calls` counts model invocations so tests can assert batching/coalescing.
+    """
+
+    FIELD_KEYWORDS = {
+        'book': 'book_id',
+        'strategy': 'strategy_id',
+        'account': 'account_id',
+        'cost center': 'cc_id',
+        'cc': 'cc_id',
+    }
+
+    class _Response:
+        def __init__(self, text: str):
+            self.text = text
+
+    def __init__(self, responses: Optional[Dict[str, Dict[str, Any]]] = None):
+        self.responses = {normalize_logic_en(k): v for k, v in (responses or {}).items()}
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def generate_content(self, prompt: str, generation_config: Optional[Dict[str, Any]] = None):
+        with self._lock:
+            self.calls += 1
+
+        if BATCH_MARKER in prompt:
+            body = prompt.split(BATCH_MARKER, 1)[1]
+            items = [
+                re.sub(r'^\d+\.\s*', '', line.strip())
+                for line in body.strip().splitlines()
+                if re.match(r'^\s*\d+\.', line)
+            ]
+            return self._Response(json.dumps([self._predicate_for(item) for item in items]))
+
+        logic_en = prompt.strip().split('\n\n')[-1]
+        return self._Response(json.dumps(self._predicate_for(logic_en)))
+
+    def _predicate_for(self, logic_en: str) -> Dict[str, Any]:
+        normalized = normalize_logic_en(logic_en)
+        if normalized in self.responses:
+            return self.responses[normalized]
+
+        lowered = normalized.lower()
+        negate = any(word in lowered.split() for word in ('exclude', 'not', 'except', 'without'))
+        field = None
+        for keyword, column in self.FIELD_KEYWORDS.items():
+            if re.search(rf'\b{re.escape(keyword)}s?\b', lowered):
+                field = column
+                break
+        if field is None:
+            return {'error': f"Stub model could not identify a field in: {logic_en}"}
+
+        values = re.findall(r'\b[A-Z][A-Z0-9_]+\b', logic_en)
+        values = [v for v in values if v.lower() not in ('and', 'or')] or [logic_en.split()[-1]]
+        if len(values) == 1:
+            operator = 'not_equals' if negate else 'equals'
+            value: Any = values[0]
+        else:
+            operator = 'not_in' if negate else 'in'
+            value = values
+        return {
+            'conditions': [{'field': field, 'operator': operator, 'value': value}],
+            'conjunction': 'AND'
+        }
+
+
+def get_translation_model():
+    """
+    Get the model used for translation.
+
+    Returns a StubTranslationModel when GENAI_MODEL=stub (offline / CI),
+    otherwise the configured Gemini model.
+    """
+    if os.getenv('GENAI_MODEL', '').lower() == 'stub':
+        return StubTranslationModel()
+    return initialize_gemini()
+
+
+def _strip_markdown(response_text: str) -> str:
+    """Remove ```json fences if the model added them."""
+    response_text = response_text.strip()
+    if response_text.startswith("```"):
+        response_text = response_text.split("```")[1]
+        if response_text.startswith("json"):
+            response_text = response_text[4:]
+        response_text = response_text.strip()
+    return response_text
+
+
+def _check_predicate(predicate_json: Any) -> PredicateResult:
+    """Structural + schema validation of a single model-produced predicate."""
+    if not isinstance(predicate_json, dict):
+        return None, ["Response item is not a JSON object"]
+    if 'error' in predicate_json:
+        return None, [str(predicate_json['error'])]
+    if not isinstance(predicate_json.get('conditions'), list):
+        return None, ["Response missing 'conditions' list"]
+    validation_errors = validate_json_predicate(predicate_json)
+    if validation_errors:
+        return None, validation_errors
+    return predicate_json, []
+
+
+@retry_on_quota
+def _call_model_batch(model, logic_ens: List[str]) -> List[PredicateResult]:
+    """
+    Translate several rules with one packed prompt.
+
+    Args:
+        model: Object exposing generate_content()
+        logic_ens: Natural language descriptions (one prompt line each)
+
+    Returns:
+        One (predicate_json, errors) per input, in order
+
+    Raises:
+        QuotaExceededError: On rate limiting (retried by retry_on_quota)
+        ValueError: If the response cannot be aligned with the inputs
+    """
+    numbered = "\n".join(f"{idx + 1}. {' '.join(text.split())}" for idx, text in enumerate(logic_ens))
+    prompt = f"""{BATCH_INSTRUCTION}
+
+{BATCH_MARKER}
+{numbered}"""
+
+    try:
+        response = timed_genai_call(
+            "batch_translate",
+            model.generate_content,
+            prompt,
+            generation_config={
+                "temperature": 0.1,
+                "max_output_tokens": 400 * len(logic_ens),
+            }
+        )
+    except Exception as e:
+        if is_quota_error(e):
+            raise QuotaExceededError(f"Gemini API quota exceeded: {str(e)}") from e
+        raise
+
+    parsed = json.loads(_strip_markdown(response.text))
+    if not isinstance(parsed, list) or len(parsed) != len(logic_ens):
+        raise ValueError(
+            f"Batch response has {len(parsed) if isinstance(parsed, list) else 'no'} items, "
+            f"expected {len(logic_ens)}"
+        )
+    return [_check_predicate(item) for item in parsed]
+
+
+def _translate_single(model, logic_en: str) -> PredicateResult:
+    """Fallback: translate one rule with the standard single-rule prompt."""
+    from app.engine.translator import translate_natural_language_to_json
+    predicate_json, errors = translate_natural_language_to_json(logic_en, None, None, model=model)
+    if errors or not predicate_json:
+        return None, errors or ["Failed to generate JSON predicate from natural language"]
+    return _check_predicate(predicate_json)
+
+
+def _translate_chunk(model, logic_ens: List[str]) -> List[PredicateResult]:
+    """
+    Translate a chunk with one packed prompt, falling back to per-rule calls
+    if the batch response cannot be parsed/aligned.
+    """
+    if len(logic_ens) > 1:
+        try:
+            return _call_model_batch(model, logic_ens)
+        except QuotaExceededError:
+            raise
+        except Exception as e:
+            logger.warning(f"[Translation] Batch of {len(logic_ens)} failed ({e}); falling back to single calls")
+    return [_translate_single(model, logic_en) for logic_en in logic_ens]
+
+
+# ============================================================================
+# Batch API
+# ============================================================================
+
+async def translate_predicates_async(
+    logic_ens: List[str],
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+    model=None,
+    use_store: bool = True
+) -> Dict[str, PredicateResult]:
+    """
+    Translate many natural language rules to JSON predicates.
+
+    Process:
+    1. De-duplicate by normalized text
+    2. Resolve hits from the in-memory cache, then the persistent store (one query)
+    3. Claim remaining keys (concurrent callers wait on the same futures)
+    4. Pack claimed misses `batch_size` per prompt, at most `max_concurrency` prompts in flight
+    5. Persist successes in one statement
+
+    Args:
+        logic_ens: Natural language descriptions (duplicates allowed)
+        batch_size: Rules per prompt
+        max_concurrency: Concurrent model calls
+        model: Optional model override (e.g. StubTranslationModel)
+        use_store: Read/write the in-memory and persistent caches
+
+    Returns:
+        Dictionary mapping normalized logic_en -> (predicate_json, errors)
+    """
+    from app.engine.rule_cache import cache_translation, get_cached_translation
+
+    unique: Dict[str, str] = {}
+    for logic_en in logic_ens:
+        unique.setdefault(normalize_logic_en(logic_en), logic_en)
+
+    results: Dict[str, PredicateResult] = {}
+    pending = list(unique.items())
+
+    if use_store:
+        remaining = []
+        for normalized, logic_en in pending:
+            cached = get_cached_translation(logic_en)
+            if cached and cached.get('predicate_json'):
+                results[normalized] = (cached['predicate_json'], [])
+            else:
+                remaining.append((normalized, logic_en))
+
+        persisted = load_persisted_translations([logic_en for _, logic_en in remaining]) if remaining else {}
+        pending = []
+        for normalized, logic_en in remaining:
+            predicate_json = persisted.get(translation_key(logic_en))
+            if predicate_json:
+                results[normalized] = (predicate_json, [])
+                cache_translation(logic_en, predicate_json, None)
+            else:
+                pending.append((normalized, logic_en))
+
+    if not pending:
+        return results
+
+    # Resolve the model before claiming keys: a missing API key / SDK must not
+    # leave claimed futures unresolved for concurrent callers
+    if model is None:
+        model = get_translation_model()
+
+    # Claim keys: we translate what we lead, and wait for what others already lead
+    owned: List[Tuple[str, str, Future]] = []
+    followed: List[Tuple[str, Future]] = []
+    for normalized, logic_en in pending:
+        future, is_leader = _claim(translation_key(logic_en))
+        if is_leader:
+            owned.append((normalized, logic_en, future))
+        else:
+            followed.append((normalized, future))
+
+    if owned:
+        try:
+            semaphore = asyncio.Semaphore(max(1, max_concurrency))
+            chunks = [owned[i:i + max(1, batch_size)] for i in range(0, len(owned), max(1, batch_size))]
+
+            async def run_chunk(chunk):
+                async with semaphore:
+                    return await asyncio.to_thread(_translate_chunk, model, [logic_en for _, logic_en, _ in chunk])
+
+            chunk_outcomes = await asyncio.gather(*(run_chunk(chunk) for chunk in chunks), return_exceptions=True)
+
+            to_persist = []
+            for chunk, outcome in zip(chunks, chunk_outcomes):
+                for idx, (normalized, logic_en, future) in enumerate(chunk):
+                    key = translation_key(logic_en)
+                    if isinstance(outcome, BaseException):
+                        message = (
+                            "Gemini API quota exceeded. Please wait a few minutes and try again."
+                            if isinstance(outcome, QuotaExceededError) or is_quota_error(outcome)
+                            else f"Gemini API error: {str(outcome)}"
+                        )
+                        result = (None, [message])
+                    else:
+                        result = outcome[idx]
+
+                    results[normalized] = result
+                    _release(key, future, result=result)
+                    if result[0] and use_store:
+                        to_persist.append((logic_en, result[0]))
+                        cache_translation(logic_en, result[0], None)
+        except BaseException as e:
+            # Fail every key we still own (e.g. cancellation) so followers do not hang
+            for _, logic_en, future in owned:
+                if not future.done():
+                    _release(translation_key(logic_en), future, error=e)
+            raise
+
+        if to_persist:
+            await asyncio.to_thread(persist_translations, to_persist)
+
+        logger.info(
+            f"[Translation] Translated {len(owned)} rule(s) in {len(chunks)} prompt(s) "
+            f"(batch_size={batch_size}, concurrency={max_concurrency})"
+        )
+
+    for normalized, future in followed:
+        results[normalized] = await asyncio.wrap_future(future)
+
+    return results
+
+
+async def translate_rules_async(
+    logic_ens: List[str],
+    table_name: str = 'fact_pnl_gold',
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+    model=None
+) -> List[Tuple[Optional[Dict[str, Any]], Optional[str], List[str], bool]]:
+    """
+    Batch version of translator.translate_rule.
+
+    Args:
+        logic_ens: Natural language descriptions
+        table_name: Target table name for column mapping
+        batch_size: Rules per prompt
+        max_concurrency: Concurrent model calls
+        model: Optional model override
+
+    Returns:
+        One (predicate_json, sql_where, errors, translation_successful) per input, in order
+    """
+    from app.services.rules import convert_json_to_sql
+
+    predicates = await translate_predicates_async(
+        logic_ens, batch_size=batch_size, max_concurrency=max_concurrency, model=model
+    )
+
+    outputs = []
+    for logic_en in logic_ens:
+        predicate_json, errors = predicates[normalize_logic_en(logic_en)]
+        if not predicate_json:
+            outputs.append((None, None, list(errors), False))
+            continue
+        try:
+            sql_where = convert_json_to_sql(predicate_json, table_name)
+        except Exception as e:
+            outputs.append((predicate_json, None, [f"Failed to convert JSON to SQL: {str(e)}"], False))
+            continue
+        outputs.append((predicate_json, sql_where, [], True))
+    return outputs
+
+
+def translate_rules_batch(
+    logic_ens: List[str],
+    table_name: str = 'fact_pnl_gold',
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+    model=None
+) -> List[Tuple[Optional[Dict[str, Any]], Optional[str], List[str], bool]]:
+    """
+    Synchronous entry point for translate_rules_async (for sync routes/scripts).
+    Must not be called from a thread that already runs an event loop.
+    """
+    return asyncio.run(translate_rules_async(
+        logic_ens,
+        table_name=table_name,
+        batch_size=batch_size,
+        max_concurrency=max_concurrency,
+        model=model
+    ))
@@ -11,6 +11,7 @@ This three-stage approach prevents AI "hallucination" by validating fields
 before SQL generation. All intermediate steps are stored for auditability.
 """
 
+import importlib.util
 import json
 import logging
 import os
@@ -22,14 +23,15 @@ from dotenv import load_dotenv
 # Ensure .env is loaded before checking GEMINI_API_KEY
 load_dotenv()
 
+# The Gemini SDK (grpc/protobuf) is expensive to import, so only probe for it here.
+# The module itself is imported on first use by _get_genai().
 try:
-    import google.generativeai as genai
-    GEMINI_AVAILABLE = True
-except ImportError:
+    GEMINI_AVAILABLE = importlib.util.find_spec("google.generativeai") is not None
+except (ImportError, ValueError):
     GEMINI_AVAILABLE = False
-    genai = None
-    logger = logging.getLogger(__name__)
-    logger.warning("google.generativeai not installed. GenAI features will be disabled.")
+if not GEMINI_AVAILABLE:
+    logging.getLogger(__name__).warning("google.generativeai not installed. GenAI features will be disabled.")
+genai = None
 
 try:
     from tenacity import (
@@ -47,6 +49,8 @@ except ImportError:
 
 from pydantic import ValidationError
 
+from app.metrics import record_genai_retry, timed_genai_call
+
 logger = logging.getLogger(__name__)
 
 # Fact table schema (for validation and prompt engineering)
@@ -105,7 +109,8 @@ if TENACITY_AVAILABLE:
         stop=stop_after_attempt(3),
         wait=wait_exponential(multiplier=1, min=4, max=10),  # 4s, then 10s (as specified)
         retry=retry_if_exception_type((QuotaExceededError, Exception)),
-        reraise=True
+        reraise=True,
+        before_sleep=record_genai_retry,
     )
 else:
     # Fallback: basic retry decorator
@@ -117,6 +122,7 @@ else:
                     return func(*args, **kwargs)
                 except Exception as e:
                     if is_quota_error(e) and attempt < 2:
+                        record_genai_retry()
                         wait_time = 4 if attempt == 0 else 10
                         logger.warning(f"Quota error (attempt {attempt + 1}/3). Waiting {wait_time}s...")
                         time.sleep(wait_time)
@@ -126,6 +132,20 @@ else:
         return wrapper
 
 
+def _get_genai():
+    """
+    Import google.generativeai on first use (lazy, keeps application startup fast).
+    
+    Returns:
+        The google.generativeai module
+    """
+    global genai
+    if genai is None:
+        import google.generativeai as _genai
+        genai = _genai
+    return genai
+
+
 def initialize_gemini():
     """
     Initialize Google Gemini Pro client (using gemini-pro-latest).
@@ -148,6 +168,7 @@ def initialize_gemini():
             "GEMINI_API_KEY environment variable is not set. "
             "Please set it to your Google Gemini API key."
         )
+    genai = _get_genai()
     genai.configure(api_key=api_key)
     
     # Note: system_instruction parameter not available in google-generativeai 0.3.0
@@ -195,7 +216,9 @@ Translate this natural language filter to JSON predicate:
 
 {test_prompt}"""
         
-        response = model.generate_content(
+        response = timed_genai_call(
+            "smoke_test",
+            model.generate_content,
             full_prompt,
             generation_config={
                 "temperature": 0.1,
@@ -220,7 +243,8 @@ Translate this natural language filter to JSON predicate:
 def translate_natural_language_to_json(
     logic_en: str,
     fact_schema: Optional[Dict[str, Any]] = None,
-    comparison_context: Optional[Dict[str, str]] = None
+    comparison_context: Optional[Dict[str, str]] = None,
+    model=None
 ) -> Tuple[Dict[str, Any], List[str]]:
     """
     Stage 1: Translate natural language to structured JSON predicate using Gemini Pro.
@@ -231,6 +255,7 @@ def translate_natural_language_to_json(
     Args:
         logic_en: Natural language description (e.g., "Exclude all EMEA OTC trades")
         fact_schema: Optional fact table schema (defaults to FACT_TABLE_SCHEMA)
+        model: Optional model override (e.g. StubTranslationModel for offline runs)
     
     Returns:
         Tuple of (predicate_json, errors)
@@ -249,8 +274,10 @@ def translate_natural_language_to_json(
         fact_schema = FACT_TABLE_SCHEMA
     
     try:
-        # Initialize Gemini model
-        model = initialize_gemini()
+        # Initialize Gemini model (GENAI_MODEL=stub selects the offline stub)
+        if model is None:
+            from app.engine.translation_service import get_translation_model
+            model = get_translation_model()
         
         # Step 4.3: Use comparison context if provided
         system_instruction = SYSTEM_INSTRUCTION
@@ -268,7 +295,9 @@ Translate this natural language filter to JSON predicate:
 {logic_en}"""
         
         # Call Gemini Pro
-        response = model.generate_content(
+        response = timed_genai_call(
+            "translate",
+            model.generate_content,
             full_prompt,
             generation_config={
                 "temperature": 0.1,  # Low temperature for consistent output
@@ -412,17 +441,44 @@ def translate_rule(
     """
     errors = []
     
-    # Check cache first (if enabled)
-    if use_cache:
-        from app.engine.rule_cache import get_cached_translation
+    # Comparison prompts differ from the standard prompt, so they bypass the shared caches
+    use_store = use_cache and not comparison_context
+    
+    # Check cache first (if enabled): in-memory, then persistent store.
+    # Only the predicate is cached; SQL is re-derived for the requested table.
+    predicate_json = None
+    if use_store:
+        from app.engine.rule_cache import cache_translation, get_cached_translation
+        from app.engine.translation_service import load_persisted_translation
         cached_result = get_cached_translation(logic_en)
-        if cached_result:
+        if cached_result and cached_result.get('predicate_json'):
             logger.info(f"Using cached translation for: {logic_en}")
-            return cached_result['predicate_json'], cached_result['sql_where'], [], True
+            predicate_json = cached_result['predicate_json']
+        else:
+            predicate_json = load_persisted_translation(logic_en)
+            if predicate_json:
+                logger.info(f"Using persisted translation for: {logic_en}")
+                cache_translation(logic_en, predicate_json, None)
+    
+    if predicate_json:
+        try:
+            from app.services.rules import convert_json_to_sql
+            return predicate_json, convert_json_to_sql(predicate_json, table_name), [], True
+        except Exception as e:
+            errors.append(f"Failed to convert JSON to SQL: {str(e)}")
+            return predicate_json, None, errors, False
     
     # Stage 1: Natural Language → JSON Predicate (Gemini)
     try:
-        predicate_json, translation_errors = translate_natural_language_to_json(logic_en, None, comparison_context)
+        if use_store:
+            # Concurrent identical translations share one model call
+            from app.engine.translation_service import coalesced_translate
+            predicate_json, translation_errors = coalesced_translate(
+                logic_en,
+                lambda: translate_natural_language_to_json(logic_en, None, comparison_context)
+            )
+        else:
+            predicate_json, translation_errors = translate_natural_language_to_json(logic_en, None, comparison_context)
         if translation_errors:
             errors.extend(translation_errors)
             return None, None, errors, False
@@ -450,10 +506,11 @@ def translate_rule(
         errors.append(f"Failed to convert JSON to SQL: {str(e)}")
         return predicate_json, None, errors, False
     
-    # Cache successful translation
-    if use_cache:
-        from app.engine.rule_cache import cache_translation
+    # Cache successful translation (in-memory + persistent store)
+    if use_store:
+        from app.engine.translation_service import persist_translations
         cache_translation(logic_en, predicate_json, sql_where)
+        persist_translations([(logic_en, predicate_json)])
     
     logger.info(f"Successfully translated rule: {logic_en} → {sql_where}")
     return predicate_json, sql_where, [], True
@@ -496,7 +553,9 @@ Example format: "This execution will exclude 2 internal books and normalize Stra
 
 Summary:"""
         
-        response = model.generate_content(
+        response = timed_genai_call(
+            "rules_summary",
+            model.generate_content,
             prompt,
             generation_config={
                 "temperature": 0.3,
@@ -2,82 +2,249 @@
 Phase 5.5: Type 2B (FILTER_ARITHMETIC) Rule Processor
 
 Handles execution of rules that combine multiple independent queries with arithmetic operators.
+
+Queries are evaluated with boolean masks over one immutable fact frame
+(Type2BQueryEngine): each distinct filter is evaluated once per run, filter
+combinations are ANDed from cached masks, and identical (filters, measure,
+aggregation) queries are computed once across all Type 2B rules of the run.
 """
 
 from decimal import Decimal
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Tuple
+import numpy as np
 import pandas as pd
 import logging
 
 logger = logging.getLogger(__name__)
 
 
-def apply_filter_to_dataframe(df: pd.DataFrame, filter_def: Dict[str, Any]) -> pd.DataFrame:
+def build_filter_mask(df: pd.DataFrame, filter_def: Dict[str, Any]) -> np.ndarray:
     """
-    Apply a single filter condition to a DataFrame.
+    Evaluate a single filter condition as a boolean mask over the DataFrame rows.
+    
+    Same semantics as apply_filter_to_dataframe; unknown fields and unsupported
+    operators select no rows.
     
     Args:
         df: Input DataFrame
         filter_def: Filter definition with 'field', 'operator', 'value'/'values'
     
     Returns:
-        Filtered DataFrame
+        Boolean numpy array of length len(df)
     """
     field = filter_def.get('field')
     operator = filter_def.get('operator')
     
     if field not in df.columns:
         logger.warning(f"Filter field '{field}' not found in DataFrame columns: {list(df.columns)}")
-        return pd.DataFrame()  # Return empty DataFrame if field doesn't exist
+        return np.zeros(len(df), dtype=bool)
     
-    if operator == '=':
-        value = filter_def.get('value')
-        return df[df[field] == value]
+    column = df[field]
     
+    if operator == '=':
+        mask = column == filter_def.get('value')
     elif operator == '!=':
-        value = filter_def.get('value')
-        return df[df[field] != value]
-    
+        mask = column != filter_def.get('value')
     elif operator == 'IN':
-        values = filter_def.get('values', [])
-        return df[df[field].isin(values)]
-    
+        mask = column.isin(filter_def.get('values', []))
     elif operator == 'NOT IN':
-        values = filter_def.get('values', [])
-        return df[~df[field].isin(values)]
-    
+        mask = ~column.isin(filter_def.get('values', []))
     elif operator == '>':
-        value = filter_def.get('value')
-        return df[df[field] > value]
-    
+        mask = column > filter_def.get('value')
     elif operator == '<':
-        value = filter_def.get('value')
-        return df[df[field] < value]
-    
+        mask = column < filter_def.get('value')
     elif operator == '>=':
-        value = filter_def.get('value')
-        return df[df[field] >= value]
-    
+        mask = column >= filter_def.get('value')
     elif operator == '<=':
-        value = filter_def.get('value')
-        return df[df[field] <= value]
-    
+        mask = column <= filter_def.get('value')
     elif operator == 'LIKE':
-        value = filter_def.get('value')
-        return df[df[field].str.contains(value, case=False, na=False)]
-    
+        mask = column.str.contains(filter_def.get('value'), case=False, na=False)
     elif operator == 'IS NULL':
-        return df[df[field].isna()]
-    
+        mask = column.isna()
     elif operator == 'IS NOT NULL':
-        return df[df[field].notna()]
-    
+        mask = column.notna()
     else:
         logger.warning(f"Unsupported filter operator: {operator}")
-        return pd.DataFrame()
+        return np.zeros(len(df), dtype=bool)
+    
+    return mask.to_numpy(dtype=bool)
+
+
+def _hashable(value: Any) -> Any:
+    """Hashable, type-preserving form of a filter value (lists -> sorted tuples)."""
+    if isinstance(value, (list, tuple, set)):
+        return tuple(sorted((_hashable(v) for v in value), key=repr))
+    if isinstance(value, dict):
+        return tuple(sorted((k, _hashable(v)) for k, v in value.items()))
+    return (type(value).__name__, value)
+
+
+def filter_key(filter_def: Dict[str, Any]) -> Tuple:
+    """
+    Canonical cache key for a filter definition.
+    IN / NOT IN value lists are order-insensitive.
+    """
+    return (
+        filter_def.get('field'),
+        filter_def.get('operator'),
+        _hashable(filter_def.get('value')),
+        _hashable(filter_def.get('values')),
+    )
+
+
+class Type2BQueryEngine:
+    """
+    Run-scoped Type 2B query executor over one immutable fact DataFrame.
+    
+    - Per-filter masks are memoized and combined with bitwise AND
+      (filter order does not matter, so combinations are memoized as sets).
+    - Query results are memoized by (filters, measure column, aggregation),
+      so identical queries across rules are computed once.
+    - The fact frame is never copied or filtered into new DataFrames; only the
+      selected values of the measure column are materialized for aggregation.
+    
+    Create one engine per calculation run and pass it to execute_type_2b_rule /
+    apply_rule_override for every Type 2B rule of that run.
+    """
+    
+    def __init__(self, df: pd.DataFrame):
+        self.df = df
+        self._filter_masks: Dict[Tuple, np.ndarray] = {}
+        self._combined_masks: Dict[frozenset, np.ndarray] = {}
+        self._query_results: Dict[Tuple, Decimal] = {}
+        self.stats = {
+            "filters_evaluated": 0,
+            "filter_mask_hits": 0,
+            "queries_evaluated": 0,
+            "query_hits": 0,
+        }
+    
+    def filter_mask(self, filter_def: Dict[str, Any]) -> np.ndarray:
+        """Memoized boolean mask for one filter."""
+        key = filter_key(filter_def)
+        mask = self._filter_masks.get(key)
+        if mask is None:
+            mask = build_filter_mask(self.df, filter_def)
+            self._filter_masks[key] = mask
+            self.stats["filters_evaluated"] += 1
+        else:
+            self.stats["filter_mask_hits"] += 1
+        return mask
+    
+    def combined_mask(self, filters: List[Dict[str, Any]]) -> Optional[np.ndarray]:
+        """
+        AND of all filter masks (memoized per filter set).
+        
+        Returns:
+            Boolean mask, or None when there are no filters (all rows)
+        """
+        if not filters:
+            return None
+        keys = frozenset(filter_key(f) for f in filters)
+        mask = self._combined_masks.get(keys)
+        if mask is None:
+            masks = [self.filter_mask(f) for f in filters]
+            mask = masks[0] if len(masks) == 1 else np.logical_and.reduce(masks)
+            self._combined_masks[keys] = mask
+        return mask
+    
+    def execute(self, query_def: Dict[str, Any], table_name: str) -> Decimal:
+        """
+        Execute a single Type 2B query (memoized).
+        
+        Args:
+            query_def: Query definition with 'query_id', 'measure', 'aggregation', 'filters'
+            table_name: Table name for measure column mapping
+        
+        Returns:
+            Aggregated result as Decimal
+        """
+        from app.engine.waterfall import get_measure_column_name
+        
+        measure_name = query_def.get('measure', 'daily_pnl')
+        aggregation = query_def.get('aggregation', 'SUM')
+        filters = query_def.get('filters', []) or []
+        
+        # Map measure name to actual column name
+        measure_column = get_measure_column_name(measure_name, table_name)
+        
+        if measure_column not in self.df.columns:
+            logger.warning(f"Measure column '{measure_column}' not found in DataFrame. Available: {list(self.df.columns)}")
+            return Decimal('0')
+        
+        key = (frozenset(filter_key(f) for f in filters), measure_column, aggregation)
+        cached = self._query_results.get(key)
+        if cached is not None:
+            self.stats["query_hits"] += 1
+            return cached
+        
+        result = self._aggregate(self.combined_mask(filters), measure_column, aggregation, query_def)
+        self._query_results[key] = result
+        self.stats["queries_evaluated"] += 1
+        return result
+    
+    def execute_rule(self, rule: Any, table_name: str) -> Decimal:
+        """Execute a whole Type 2B rule on this engine (see execute_type_2b_rule)."""
+        return execute_type_2b_rule(self.df, rule, table_name, engine=self)
+    
+    def _aggregate(
+        self,
+        mask: Optional[np.ndarray],
+        measure_column: str,
+        aggregation: str,
+        query_def: Dict[str, Any]
+    ) -> Decimal:
+        column = self.df[measure_column]
+        if mask is not None:
+            if not mask.any():
+                logger.debug(f"Query {query_def.get('query_id')} returned empty after filters: {query_def.get('filters')}")
+                return Decimal('0')
+            column = column[mask]
+        elif column.empty:
+            return Decimal('0')
+        
+        # Apply aggregation
+        if aggregation == 'SUM':
+            result = column.sum()
+        elif aggregation == 'AVG':
+            result = column.mean()
+        elif aggregation == 'COUNT':
+            result = Decimal(len(column))
+        elif aggregation == 'MAX':
+            result = column.max()
+        elif aggregation == 'MIN':
+            result = column.min()
+        else:
+            logger.warning(f"Unsupported aggregation: {aggregation}, defaulting to SUM")
+            result = column.sum()
+        
+        # Ensure result is Decimal
+        if pd.isna(result):
+            return Decimal('0')
+        
+        return Decimal(str(result))
 
 
-def execute_single_query(df: pd.DataFrame, query_def: Dict[str, Any], table_name: str) -> Decimal:
+def apply_filter_to_dataframe(df: pd.DataFrame, filter_def: Dict[str, Any]) -> pd.DataFrame:
+    """
+    Apply a single filter condition to a DataFrame.
+    
+    Args:
+        df: Input DataFrame
+        filter_def: Filter definition with 'field', 'operator', 'value'/'values'
+    
+    Returns:
+        Filtered DataFrame (a new frame; prefer build_filter_mask in hot paths)
+    """
+    return df[build_filter_mask(df, filter_def)]
+
+
+def execute_single_query(
+    df: pd.DataFrame,
+    query_def: Dict[str, Any],
+    table_name: str,
+    engine: Optional[Type2BQueryEngine] = None
+) -> Decimal:
     """
     Execute a single query from Type 2B rule.
     
@@ -85,52 +252,14 @@ def execute_single_query(df: pd.DataFrame, query_def: Dict[str, Any], table_name
         df: Input DataFrame with fact data
         query_def: Query definition with 'query_id', 'measure', 'aggregation', 'filters'
         table_name: Table name for measure column mapping
+        engine: Optional run-scoped Type2BQueryEngine over df (shares masks/results)
     
     Returns:
         Aggregated result as Decimal
     """
-    from app.engine.waterfall import get_measure_column_name
-    
-    # Get measure and aggregation
-    measure_name = query_def.get('measure', 'daily_pnl')
-    aggregation = query_def.get('aggregation', 'SUM')
-    filters = query_def.get('filters', [])
-    
-    # Map measure name to actual column name
-    measure_column = get_measure_column_name(measure_name, table_name)
-    
-    if measure_column not in df.columns:
-        logger.warning(f"Measure column '{measure_column}' not found in DataFrame. Available: {list(df.columns)}")
-        return Decimal('0')
-    
-    # Apply all filters sequentially
-    filtered_df = df.copy()
-    for filter_def in filters:
-        filtered_df = apply_filter_to_dataframe(filtered_df, filter_def)
-        if filtered_df.empty:
-            logger.debug(f"Query {query_def.get('query_id')} returned empty after filter: {filter_def}")
-            return Decimal('0')
-    
-    # Apply aggregation
-    if aggregation == 'SUM':
-        result = filtered_df[measure_column].sum()
-    elif aggregation == 'AVG':
-        result = filtered_df[measure_column].mean()
-    elif aggregation == 'COUNT':
-        result = Decimal(len(filtered_df))
-    elif aggregation == 'MAX':
-        result = filtered_df[measure_column].max()
-    elif aggregation == 'MIN':
-        result = filtered_df[measure_column].min()
-    else:
-        logger.warning(f"Unsupported aggregation: {aggregation}, defaulting to SUM")
-        result = filtered_df[measure_column].sum()
-    
-    # Ensure result is Decimal
-    if pd.isna(result):
-        return Decimal('0')
-    
-    return Decimal(str(result))
+    if engine is None:
+        engine = Type2BQueryEngine(df)
+    return engine.execute(query_def, table_name)
 
 
 def evaluate_operand(operand: Dict[str, Any], query_results: Dict[str, Decimal]) -> Decimal:
@@ -223,7 +352,8 @@ def evaluate_expression(expression: Dict[str, Any], query_results: Dict[str, Dec
 def execute_type_2b_rule(
     df: pd.DataFrame,
     rule: Any,
-    table_name: str = 'fact_pnl_use_case_3'
+    table_name: str = 'fact_pnl_use_case_3',
+    engine: Optional[Type2BQueryEngine] = None
 ) -> Decimal:
     """
     Execute a Type 2B (FILTER_ARITHMETIC) rule.
@@ -234,10 +364,15 @@ def execute_type_2b_rule(
         df: Input DataFrame with fact data
         rule: MetadataRule object with predicate_json containing queries and expression
         table_name: Table name for measure column mapping
+        engine: Optional run-scoped Type2BQueryEngine over df; pass the same engine
+            for every Type 2B rule of a run so filters/queries are evaluated once
     
     Returns:
         Final calculated result as Decimal
     """
+    if engine is None:
+        engine = Type2BQueryEngine(df)
+    
     if not rule.predicate_json:
         logger.warning(f"Type 2B rule {rule.node_id} has no predicate_json")
         return Decimal('0')
@@ -271,7 +406,7 @@ def execute_type_2b_rule(
             continue
         
         try:
-            result = execute_single_query(df, query_def, table_name)
+            result = engine.execute(query_def, table_name)
             query_results[query_id] = result
             logger.debug(f"Type 2B query {query_id}: {result}")
         except Exception as e:
@@ -0,0 +1,607 @@
+"""
+Type 2B (FILTER_ARITHMETIC) SQL pushdown backend.
+
+Compiles predicate_json v2.0 rules into a single SQL statement: every distinct
+query becomes a conditional aggregate (SUM(col) FILTER (WHERE ...)) in one scan of
+the fact table, and every rule's arithmetic expression is evaluated over those
+aggregates in the outer SELECT. The result semantics follow the in-memory
+Type2BQueryEngine:
+
+- filter fields and measures name columns of the in-memory fact frame, not of
+  the fact table. Frames come in two shapes (frame_shape): FRAME_ROWS from
+  facts_frame_from_rows (orchestrator, batch scheduler) and FRAME_MODEL from the
+  ORM loaders in app.engine.waterfall (calculate_waterfall). FRAME_COLUMNS maps
+  each frame column of each shape to the SQL expression it was loaded from (e.g.
+  rows: Use Case 3 category_code -> strategy, gold daily_amount -> daily_pnl;
+  model: Use Case 3 daily_pnl -> pnl_daily; constant scenario/currency, NULL
+  amounts -> 0)
+- rules whose filter fields or measures have no mapped frame column, and frames
+  of unknown shape, are never pushed down
+- empty filter result -> 0 (COALESCE)
+- unsupported operator -> selects no rows
+- measure without a frame column, or unknown query_id -> 0
+- division by zero -> the whole rule evaluates to 0
+
+scripts/verify_type2b_backends.py checks that both backends agree on a rule set.
+
+The planner (plan_type2b_backend) decides per run whether Type 2B rules are pushed
+down or evaluated in memory:
+
+    TYPE2B_BACKEND            auto | sql | memory (default: auto)
+    TYPE2B_PUSHDOWN_MIN_ROWS  In-memory fact rows from which pushdown wins (default: 100000)
+"""
+
+import json
+import logging
+import os
+import re
+from decimal import Decimal
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from uuid import UUID
+
+import pandas as pd
+from sqlalchemy import Numeric, String, and_, case, false, func, literal, null, or_, select, true
+from sqlalchemy.orm import Session
+
+from app.engine.type2b_processor import Type2BQueryEngine, filter_key
+from app.models import FactPnlEntries, FactPnlGold, FactPnlUseCase3
+
+logger = logging.getLogger(__name__)
+
+TYPE2B_BACKEND = os.getenv("TYPE2B_BACKEND", "auto").lower()
+TYPE2B_PUSHDOWN_MIN_ROWS = int(os.getenv("TYPE2B_PUSHDOWN_MIN_ROWS", "100000"))
+
+FACT_TABLES = {
+    'fact_pnl_gold': FactPnlGold.__table__,
+    'fact_pnl_entries': FactPnlEntries.__table__,
+    'fact_pnl_use_case_3': FactPnlUseCase3.__table__,
+}
+
+ZERO = literal(Decimal('0'), Numeric)
+
+
+def _amount(column_name: str):
+    """Frame amount column: NULL loads as 0."""
+    return lambda table: func.coalesce(table.c[column_name], ZERO)
+
+
+def _column(column_name: str):
+    """Frame column loaded as-is."""
+    return lambda table: table.c[column_name]
+
+
+def _constant(value: str):
+    return lambda table: literal(value, String)
+
+
+def _zero(table):
+    return ZERO
+
+
+def _currency(table):
+    """COALESCE(currency, 'USD') as in FACT_SELECT_COLUMNS; 'USD' if the table has no currency column."""
+    if 'currency' in table.c:
+        return func.coalesce(table.c['currency'], literal('USD', String))
+    return literal('USD', String)
+
+
+FRAME_ROWS = 'fact_rows'    # orchestrator.facts_frame_from_rows (FACT_SELECT_COLUMNS)
+FRAME_MODEL = 'fact_model'  # waterfall.load_facts / load_facts_from_entries / load_facts_from_use_case_3
+
+# Frame shape -> table -> frame column -> SQL expression over the fact table
+FRAME_COLUMNS = {
+    # Mirrors FACT_SELECT_COLUMNS and facts_frame_from_rows in app.services.orchestrator
+    FRAME_ROWS: {
+        'fact_pnl_use_case_3': {
+            'category_code': _column('strategy'),
+            'daily_amount': _amount('pnl_daily'),
+            'wtd_amount': _zero,
+            'ytd_amount': _zero,
+            'scenario': _constant('ACTUAL'),
+            'currency': _constant('USD'),
+            'pnl_daily': _amount('pnl_daily'),
+            'pnl_commission': _amount('pnl_commission'),
+            'pnl_trade': _amount('pnl_trade'),
+            'daily_pnl': _amount('pnl_daily'),
+            'mtd_pnl': _zero,
+            'ytd_pnl': _zero,
+            'pytd_pnl': _zero,
+        },
+        'fact_pnl_entries': {
+            'category_code': _column('category_code'),
+            'daily_amount': _amount('daily_amount'),
+            'wtd_amount': _amount('wtd_amount'),
+            'ytd_amount': _amount('ytd_amount'),
+            'scenario': _column('scenario'),
+            'currency': _currency,
+        },
+        'fact_pnl_gold': {
+            'category_code': _column('cc_id'),
+            'daily_amount': _amount('daily_pnl'),
+            'wtd_amount': _amount('mtd_pnl'),
+            'ytd_amount': _amount('ytd_pnl'),
+            'scenario': _constant('ACTUAL'),
+            'currency': _constant('USD'),
+        },
+    },
+    # Mirrors the ORM loaders in app.engine.waterfall (used by calculate_waterfall)
+    FRAME_MODEL: {
+        'fact_pnl_use_case_3': {
+            'entry_id': _column('entry_id'),
+            'effective_date': _column('effective_date'),
+            'cost_center': _column('cost_center'),
+            'division': _column('division'),
+            'business_area': _column('business_area'),
+            'product_line': _column('product_line'),
+            'strategy': _column('strategy'),
+            'process_1': _column('process_1'),
+            'process_2': _column('process_2'),
+            'book': _column('book'),
+            'pnl_daily': _amount('pnl_daily'),
+            'pnl_commission': _amount('pnl_commission'),
+            'pnl_trade': _amount('pnl_trade'),
+            'daily_pnl': _amount('pnl_daily'),
+            'mtd_pnl': _zero,
+            'ytd_pnl': _zero,
+            'pytd_pnl': _zero,
+        },
+        'fact_pnl_entries': {
+            'fact_id': _column('id'),
+            'category_code': _column('category_code'),
+            'pnl_date': _column('pnl_date'),
+            'use_case_id': _column('use_case_id'),
+            'scenario': _column('scenario'),
+            'daily_amount': _amount('daily_amount'),
+            'wtd_amount': _amount('wtd_amount'),
+            'ytd_amount': _amount('ytd_amount'),
+            'daily_pnl': _amount('daily_amount'),
+            'mtd_pnl': _amount('wtd_amount'),
+            'ytd_pnl': _amount('ytd_amount'),
+            'pytd_pnl': _zero,
+        },
+        'fact_pnl_gold': {
+            'fact_id': _column('fact_id'),
+            'account_id': _column('account_id'),
+            'cc_id': _column('cc_id'),
+            'book_id': _column('book_id'),
+            'strategy_id': _column('strategy_id'),
+            'trade_date': _column('trade_date'),
+            'daily_pnl': _amount('daily_pnl'),
+            'mtd_pnl': _amount('mtd_pnl'),
+            'ytd_pnl': _amount('ytd_pnl'),
+            'pytd_pnl': _amount('pytd_pnl'),
+        },
+    },
+}
+
+# Frame columns without a SQL counterpart (filters on them stay in memory)
+UNMAPPED_FRAME_COLUMNS = {
+    FRAME_ROWS: {'fact_id'},  # always None
+    FRAME_MODEL: set(),
+}
+
+
+def frame_shape(facts_df: Optional[pd.DataFrame], table_name: str) -> Optional[str]:
+    """
+    Shape of an in-memory fact frame loaded from table_name.
+
+    Returns:
+        FRAME_ROWS or FRAME_MODEL, or None if the frame's columns match neither
+        (e.g. an empty frame, or a gold frame used for a fact_pnl_entries use case)
+    """
+    if facts_df is None:
+        return None
+    columns = set(facts_df.columns)
+    for shape, tables in FRAME_COLUMNS.items():
+        mapping = tables.get(table_name)
+        if mapping is not None and columns == set(mapping) | UNMAPPED_FRAME_COLUMNS[shape]:
+            return shape
+    return None
+
+
+def frame_column(table_name: str, name: Optional[str], shape: str = FRAME_ROWS):
+    """SQL expression for a fact frame column, or None if the frame has no such column."""
+    build = FRAME_COLUMNS.get(shape, {}).get(table_name, {}).get(name)
+    return build(FACT_TABLES[table_name]) if build is not None else None
+
+
+# pandas LIKE uses str.contains (regex); only plain substrings translate exactly to ILIKE
+_REGEX_METACHARS = re.compile(r"[.^$*+?{}\[\]\\|()]")
+
+
+def type2b_scope(
+    table_name: str,
+    use_case_id: Optional[UUID] = None,
+    scenario: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Row scope of the in-memory fact frame, expressed as column equality filters.
+
+    Only fact_pnl_entries is scoped (by use case and, if given, scenario); the
+    gold and Use Case 3 tables are loaded in full.
+
+    Args:
+        table_name: Fact table name
+        use_case_id: Use case UUID
+        scenario: Optional scenario ('ACTUAL' / 'PRIOR')
+
+    Returns:
+        Dictionary column_name -> value
+    """
+    if table_name != 'fact_pnl_entries':
+        return {}
+    scope: Dict[str, Any] = {}
+    if use_case_id:
+        scope['use_case_id'] = use_case_id
+    if scenario:
+        scope['scenario'] = scenario
+    return scope
+
+
+def can_push_down(rule: Any, table_name: str, shape: str = FRAME_ROWS) -> bool:
+    """
+    True if the rule's predicate translates exactly to SQL for a frame of the given shape.
+
+    Rules that fall back to memory: wrong/missing predicate version, a filter field
+    or measure that is not a SQL-mapped column of the frame, LIKE with regex
+    metacharacters or a NULL pattern, LIKE on a non-text column, unknown table.
+    """
+    from app.engine.waterfall import get_measure_column_name
+
+    predicate = getattr(rule, 'predicate_json', None)
+    if table_name not in FRAME_COLUMNS.get(shape, {}) or not predicate or predicate.get('version') != '2.0':
+        return False
+    if not predicate.get('queries') or not predicate.get('expression'):
+        return False
+    for query_def in predicate.get('queries', []):
+        measure = get_measure_column_name(query_def.get('measure', 'daily_pnl'), table_name)
+        if frame_column(table_name, measure, shape) is None:
+            return False
+        for filter_def in query_def.get('filters', []) or []:
+            column = frame_column(table_name, filter_def.get('field'), shape)
+            if column is None:
+                # In memory the filter selects no rows; SQL would have to guess a column
+                return False
+            if filter_def.get('operator') != 'LIKE':
+                continue
+            value = filter_def.get('value')
+            if not isinstance(value, str) or _REGEX_METACHARS.search(value):
+                return False
+            if not isinstance(column.type, String):
+                return False
+    return True
+
+
+def _filter_condition(table_name: str, filter_def: Dict[str, Any], shape: str = FRAME_ROWS):
+    """SQL condition for one filter (NULL handling matches pandas boolean masks)."""
+    column = frame_column(table_name, filter_def.get('field'), shape)
+    if column is None:
+        logger.warning(f"[Type2B SQL] Filter field '{filter_def.get('field')}' not in the {table_name} fact frame")
+        return false()
+
+    operator = filter_def.get('operator')
+    value = filter_def.get('value')
+    values = filter_def.get('values', []) or []
+
+    if operator == '=':
+        return false() if value is None else column == value
+    if operator == '!=':
+        # pandas: NULL != x is True
+        return true() if value is None else column.is_distinct_from(value)
+    if operator == 'IN':
+        return column.in_(values)
+    if operator == 'NOT IN':
+        # pandas: ~isin() keeps NULL rows
+        return or_(column.not_in(values), column.is_(None))
+    if operator == '>':
+        return column > value
+    if operator == '<':
+        return column < value
+    if operator == '>=':
+        return column >= value
+    if operator == '<=':
+        return column <= value
+    if operator == 'LIKE':
+        escaped = value.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+        return column.ilike(f"%{escaped}%", escape='\\')
+    if operator == 'IS NULL':
+        return column.is_(None)
+    if operator == 'IS NOT NULL':
+        return column.isnot(None)
+
+    logger.warning(f"[Type2B SQL] Unsupported filter operator: {operator}")
+    return false()
+
+
+def _query_aggregate(query_def: Dict[str, Any], table_name: str, shape: str = FRAME_ROWS):
+    """Conditional aggregate for one query: AGG(measure) FILTER (WHERE filters)."""
+    from app.engine.waterfall import get_measure_column_name
+
+    measure_name = get_measure_column_name(query_def.get('measure', 'daily_pnl'), table_name)
+    measure_column = frame_column(table_name, measure_name, shape)
+    if measure_column is None:
+        logger.warning(f"[Type2B SQL] Measure '{query_def.get('measure')}' has no column in the {table_name} fact frame")
+        return ZERO
+
+    filters = query_def.get('filters', []) or []
+    conditions = [_filter_condition(table_name, f, shape) for f in filters]
+    condition = and_(*conditions) if conditions else None
+
+    aggregation = query_def.get('aggregation', 'SUM')
+    if aggregation == 'COUNT':
+        aggregate = func.count()
+    elif aggregation == 'AVG':
+        aggregate = func.avg(measure_column)
+    elif aggregation == 'MAX':
+        aggregate = func.max(measure_column)
+    elif aggregation == 'MIN':
+        aggregate = func.min(measure_column)
+    else:
+        if aggregation != 'SUM':
+            logger.warning(f"[Type2B SQL] Unsupported aggregation: {aggregation}, defaulting to SUM")
+        aggregate = func.sum(measure_column)
+
+    if condition is not None:
+        aggregate = aggregate.filter(condition)
+    return func.coalesce(aggregate, ZERO)
+
+
+def _query_key(query_def: Dict[str, Any], table_name: str) -> Tuple:
+    """Dedupe key: same (filters, measure column, aggregation) as the in-memory engine."""
+    from app.engine.waterfall import get_measure_column_name
+    return (
+        frozenset(filter_key(f) for f in query_def.get('filters', []) or []),
+        get_measure_column_name(query_def.get('measure', 'daily_pnl'), table_name),
+        query_def.get('aggregation', 'SUM'),
+    )
+
+
+def _expression_sql(expression: Dict[str, Any], query_columns: Dict[str, Any]):
+    """Arithmetic over query aggregates; division by zero yields NULL (rule -> 0)."""
+    operator = expression.get('operator')
+    operands = expression.get('operands', [])
+    if len(operands) < 2:
+        logger.warning(f"[Type2B SQL] Expression requires at least 2 operands, got {len(operands)}")
+        return ZERO
+
+    values = [_operand_sql(op, query_columns) for op in operands]
+    result = values[0]
+    if operator == '+':
+        for v in values[1:]:
+            result = result + v
+    elif operator == '-':
+        for v in values[1:]:
+            result = result - v
+    elif operator == '*':
+        for v in values[1:]:
+            result = result * v
+    elif operator == '/':
+        for v in values[1:]:
+            result = case((v == 0, null()), else_=result / v)
+    else:
+        logger.warning(f"[Type2B SQL] Unsupported operator: {operator}")
+        return ZERO
+    return result
+
+
+def _operand_sql(operand: Dict[str, Any], query_columns: Dict[str, Any]):
+    operand_type = operand.get('type')
+    if operand_type == 'query':
+        column = query_columns.get(operand.get('query_id'))
+        if column is None:
+            logger.warning(f"[Type2B SQL] Query ID '{operand.get('query_id')}' not found in query results")
+            return ZERO
+        return column
+    if operand_type == 'constant':
+        return literal(Decimal(str(operand.get('value', 0))), Numeric)
+    if operand_type == 'expression' and operand.get('expression'):
+        return _expression_sql(operand['expression'], query_columns)
+    logger.warning(f"[Type2B SQL] Unknown operand type: {operand_type}")
+    return ZERO
+
+
+def compile_type_2b_rules(
+    rules: Iterable[Any],
+    table_name: str,
+    scope: Optional[Dict[str, Any]] = None,
+    shape: str = FRAME_ROWS
+):
+    """
+    Compile Type 2B rules into ONE statement (one scan of the fact table).
+
+    Identical queries across rules share one conditional aggregate column.
+
+    Args:
+        rules: MetadataRule objects (must satisfy can_push_down)
+        table_name: Fact table name
+        scope: Column equality filters (see type2b_scope)
+        shape: Shape of the in-memory frame the results must match (see frame_shape)
+
+    Returns:
+        Tuple (select statement, list of node_ids in result column order)
+    """
+    table = FACT_TABLES[table_name]
+    aggregates: Dict[Tuple, str] = {}
+    inner_columns = []
+    rule_query_columns: List[Tuple[Any, Dict[str, str]]] = []
+
+    for rule in rules:
+        column_names: Dict[str, str] = {}
+        for query_def in rule.predicate_json.get('queries', []):
+            query_id = query_def.get('query_id')
+            if not query_id:
+                continue
+            key = _query_key(query_def, table_name)
+            if key not in aggregates:
+                aggregates[key] = f"q{len(aggregates)}"
+                inner_columns.append(_query_aggregate(query_def, table_name, shape).label(aggregates[key]))
+            column_names[query_id] = aggregates[key]
+        rule_query_columns.append((rule, column_names))
+
+    # COUNT(*) keeps the inner query an aggregate (one row) even if every query
+    # column is a constant (e.g. measures without a frame column)
+    inner = select(func.count().label("fact_rows"), *inner_columns).select_from(table)
+    for column_name, value in (scope or {}).items():
+        inner = inner.where(table.c[column_name] == value)
+    queries = inner.subquery("type2b_queries")
+
+    node_ids = []
+    outer_columns = []
+    for index, (rule, column_names) in enumerate(rule_query_columns):
+        query_columns = {query_id: queries.c[name] for query_id, name in column_names.items()}
+        expression = _expression_sql(rule.predicate_json['expression'], query_columns)
+        outer_columns.append(func.coalesce(expression, ZERO).label(f"r{index}"))
+        node_ids.append(rule.node_id)
+
+    return select(*outer_columns).select_from(queries), node_ids
+
+
+def compile_type_2b_rule(
+    rule: Any,
+    table_name: str,
+    scope: Optional[Dict[str, Any]] = None,
+    shape: str = FRAME_ROWS
+):
+    """Single-rule statement (e.g. for EXPLAIN or debugging)."""
+    statement, _ = compile_type_2b_rules([rule], table_name, scope, shape)
+    return statement
+
+
+def _execute_rules(
+    session: Session,
+    rules: List[Any],
+    table_name: str,
+    scope: Optional[Dict[str, Any]] = None,
+    shape: str = FRAME_ROWS
+) -> List[Decimal]:
+    """Results of rules (in order) from one statement."""
+    statement, _ = compile_type_2b_rules(rules, table_name, scope, shape)
+    row = session.execute(statement).one()
+    return [Decimal(str(value)) if value is not None else Decimal('0') for value in row]
+
+
+def execute_type_2b_rules_sql(
+    session: Session,
+    rules: List[Any],
+    table_name: str,
+    scope: Optional[Dict[str, Any]] = None,
+    shape: str = FRAME_ROWS
+) -> Dict[str, Decimal]:
+    """
+    Execute Type 2B rules in the database with one statement.
+
+    Results match an in-memory frame of the given shape (see frame_shape).
+
+    Returns:
+        Dictionary node_id -> result (Decimal)
+    """
+    if not rules:
+        return {}
+    return {rule.node_id: value for rule, value in zip(rules, _execute_rules(session, rules, table_name, scope, shape))}
+
+
+def predicate_key(rule: Any) -> str:
+    """
+    Canonical form of a rule's predicate_json.
+
+    A Type 2B result depends only on the predicate (for a given table and scope),
+    so rules of different use cases sharing a frame also share results.
+    """
+    return json.dumps(rule.predicate_json, sort_keys=True, default=str)
+
+
+def plan_type2b_backend(fact_rows: Optional[int], pushdown_rules: int, memory_rules: int) -> str:
+    """
+    Choose the Type 2B backend for a run.
+
+    Args:
+        fact_rows: Rows in the in-memory fact frame (None if no frame is loaded)
+        pushdown_rules: Type 2B rules that can be pushed down
+        memory_rules: Type 2B rules that must run in memory regardless
+
+    Returns:
+        'sql' or 'memory'
+    """
+    if pushdown_rules == 0:
+        return 'memory'
+    if TYPE2B_BACKEND in ('sql', 'memory'):
+        return TYPE2B_BACKEND
+    if fact_rows is None:
+        # Frame not loaded: pushdown avoids loading the fact table at all
+        return 'sql'
+    if memory_rules >= pushdown_rules:
+        # The frame is scanned in memory anyway; shared masks make the rest cheap
+        return 'memory'
+    return 'sql' if fact_rows >= TYPE2B_PUSHDOWN_MIN_ROWS else 'memory'
+
+
+class Type2BPushdownEngine:
+    """
+    Run-scoped Type 2B executor that evaluated its rules in the database up front.
+    Results are keyed by predicate_key. Rules that were not pushed down (or
+    unknown rules) use an in-memory Type2BQueryEngine over the fact frame.
+    """
+
+    def __init__(self, facts_df: Optional[pd.DataFrame], results: Dict[str, Decimal]):
+        self.facts_df = facts_df
+        self.results = results
+        self._memory_engine: Optional[Type2BQueryEngine] = None
+
+    def execute_rule(self, rule: Any, table_name: str) -> Decimal:
+        key = predicate_key(rule)
+        if key in self.results:
+            return self.results[key]
+        if self._memory_engine is None:
+            self._memory_engine = Type2BQueryEngine(self.facts_df if self.facts_df is not None else pd.DataFrame())
+        return self._memory_engine.execute_rule(rule, table_name)
+
+
+def create_type2b_engine(
+    session: Session,
+    facts_df: Optional[pd.DataFrame],
+    rules: Iterable[Any],
+    table_name: str,
+    scope: Optional[Dict[str, Any]] = None,
+    shape: Optional[str] = None
+):
+    """
+    Plan and prepare the Type 2B backend for a run.
+
+    Args:
+        session: SQLAlchemy session
+        facts_df: In-memory fact frame of the run (None if not loaded)
+        rules: All rules of the run, or of every run sharing facts_df
+            (non-Type 2B rules are ignored)
+        table_name: Fact table name
+        scope: Row scope of facts_df (see type2b_scope)
+        shape: Shape of facts_df (default: detected by frame_shape; FRAME_ROWS if
+            no frame is loaded). Frames of unknown shape are never pushed down.
+
+    Returns:
+        Type2BPushdownEngine or Type2BQueryEngine (both expose execute_rule(rule, table_name))
+    """
+    type2b_rules = [r for r in rules if (r.rule_type or 'FILTER') == 'FILTER_ARITHMETIC']
+    if shape is None:
+        shape = frame_shape(facts_df, table_name) if facts_df is not None else FRAME_ROWS
+    eligible = [r for r in type2b_rules if shape is not None and can_push_down(r, table_name, shape)]
+    # Identical predicates (e.g. from several use cases on one frame) are evaluated once
+    distinct = {predicate_key(r): r for r in eligible}
+    pushdown = list(distinct.values())
+    fact_rows = len(facts_df) if facts_df is not None else None
+
+    backend = plan_type2b_backend(fact_rows, len(pushdown), len(type2b_rules) - len(eligible))
+    logger.info(
+        f"[Type2B] Backend={backend} for {len(type2b_rules)} rules "
+        f"({len(eligible)} pushdown-eligible, fact_rows={fact_rows}, table={table_name}, frame={shape})"
+    )
+
+    if backend == 'sql':
+        try:
+            # SAVEPOINT: a failing statement must not poison the caller's transaction
+            with session.begin_nested():
+                values = _execute_rules(session, pushdown, table_name, scope, shape)
+            return Type2BPushdownEngine(facts_df, dict(zip(distinct, values)))
+        except Exception as e:
+            logger.warning(f"[Type2B] Pushdown failed, falling back to in-memory execution: {e}")
+
+    return Type2BQueryEngine(facts_df if facts_df is not None else pd.DataFrame())
@@ -1,28 +1,140 @@
 """
 Mathematical Validation for Finance-Insight
 Ensures mathematical integrity: every P&L dollar is accounted for.
+
+Full validation is cheap enough to run after every calculation:
+- Fact totals and distinct fact keys come from aggregate / SELECT DISTINCT
+  queries instead of loading the fact table into pandas.
+- Every rule is re-executed in one batched scan (one conditional aggregate per
+  rule) and compared with the override values of the run.
+- Cycle and reachability checks walk the already loaded hierarchy iteratively.
 """
 
+import logging
+import re
+import time
 from collections import defaultdict
 from decimal import Decimal
-from typing import Dict, List, Optional
+from typing import Dict, Iterable, List, Optional, Set, Tuple
 from uuid import UUID
 
 import pandas as pd
+from sqlalchemy import text
 from sqlalchemy.orm import Session
 
 from app.models import DimHierarchy, FactCalculatedResult, FactPnlGold, MetadataRule, UseCase
-from app.engine.waterfall import load_facts, load_hierarchy
+from app.engine.waterfall import (
+    DANGEROUS_SQL_PATTERNS,
+    FACT_MEASURE_COLUMNS,
+    get_measure_column_name,
+    load_hierarchy,
+)
+
+logger = logging.getLogger(__name__)
+
+MEASURES = ['daily', 'mtd', 'ytd', 'pytd']
+
+# Fact table -> column matched against leaf node_ids by calculate_natural_rollup
+FACT_KEY_COLUMNS = {
+    'fact_pnl_gold': 'cc_id',
+    'fact_pnl_entries': 'category_code',
+}
+
+_IDENTIFIER = re.compile(r'^[A-Za-z_][A-Za-z0-9_]*$')
+
+
+def _zero_measures() -> Dict[str, Decimal]:
+    return {measure: Decimal('0') for measure in MEASURES}
+
+
+def _fact_sums(facts_df: pd.DataFrame) -> Dict[str, Decimal]:
+    """Measure totals of an already loaded fact frame."""
+    return {
+        'daily': facts_df['daily_pnl'].sum() if not facts_df.empty else Decimal('0'),
+        'mtd': facts_df['mtd_pnl'].sum() if not facts_df.empty else Decimal('0'),
+        'ytd': facts_df['ytd_pnl'].sum() if not facts_df.empty else Decimal('0'),
+        'pytd': facts_df['pytd_pnl'].sum() if not facts_df.empty else Decimal('0'),
+    }
 
 
-def validate_root_reconciliation(results: Dict, facts_df: pd.DataFrame, tolerance: Decimal = Decimal('0.01')) -> Dict:
+def calculated_fact_table(use_case: Optional[UseCase]) -> str:
+    """
+    Fact table calculate_waterfall loads for the natural rollup of a use case.
+
+    Args:
+        use_case: UseCase object (None = legacy fact_pnl_gold)
+
+    Returns:
+        Table name
+    """
+    if use_case and use_case.input_table_name == 'fact_pnl_use_case_3':
+        return 'fact_pnl_use_case_3'
+    return 'fact_pnl_gold'
+
+
+def load_fact_totals(session: Session, table_name: str = 'fact_pnl_gold', use_case_id: Optional[UUID] = None) -> Dict[str, Decimal]:
+    """
+    Measure totals of a fact table in one aggregate query.
+
+    Args:
+        session: SQLAlchemy session
+        table_name: Fact table name (see FACT_MEASURE_COLUMNS)
+        use_case_id: Row scope for fact_pnl_entries
+
+    Returns:
+        Dictionary {daily, mtd, ytd, pytd} -> Decimal
+    """
+    columns = FACT_MEASURE_COLUMNS.get(table_name, FACT_MEASURE_COLUMNS['fact_pnl_gold'])
+    select_list = ', '.join(
+        f"COALESCE(SUM({column}), 0)" if column else "0" for column in columns
+    )
+    sql = f"SELECT {select_list} FROM {table_name}"
+    params = {}
+    if table_name == 'fact_pnl_entries' and use_case_id:
+        sql += " WHERE use_case_id = :use_case_id"
+        params['use_case_id'] = use_case_id
+
+    row = session.execute(text(sql), params).fetchone()
+    return {measure: Decimal(str(row[i] or 0)) for i, measure in enumerate(MEASURES)}
+
+
+def load_fact_keys(session: Session, table_name: str = 'fact_pnl_gold', use_case_id: Optional[UUID] = None) -> Optional[Set[str]]:
+    """
+    Distinct leaf-mapping keys of a fact table (SELECT DISTINCT, no row transfer).
+
+    Args:
+        session: SQLAlchemy session
+        table_name: Fact table name
+        use_case_id: Row scope for fact_pnl_entries
+
+    Returns:
+        Set of keys, or None if the table has no leaf-mapping column
+    """
+    key_column = FACT_KEY_COLUMNS.get(table_name)
+    if key_column is None:
+        return None
+    sql = f"SELECT DISTINCT {key_column} FROM {table_name}"
+    params = {}
+    if table_name == 'fact_pnl_entries' and use_case_id:
+        sql += " WHERE use_case_id = :use_case_id"
+        params['use_case_id'] = use_case_id
+    return {row[0] for row in session.execute(text(sql), params) if row[0] is not None}
+
+
+def validate_root_reconciliation(
+    results: Dict,
+    facts_df: Optional[pd.DataFrame],
+    tolerance: Decimal = Decimal('0.01'),
+    fact_sums: Optional[Dict[str, Decimal]] = None
+) -> Dict:
     """
     Validate that root node's natural rollup equals sum of all fact rows.
     
     Args:
         results: Results dictionary from calculate_waterfall (contains natural_results)
-        facts_df: DataFrame with all fact rows
+        facts_df: DataFrame with all fact rows (ignored if fact_sums is given)
         tolerance: Tolerance for rounding errors (default: 0.01)
+        fact_sums: Precomputed fact totals (see load_fact_totals)
     
     Returns:
         Dictionary: {measure: {expected: Decimal, actual: Decimal, difference: Decimal, passed: bool}}
@@ -31,12 +143,7 @@ def validate_root_reconciliation(results: Dict, facts_df: pd.DataFrame, toleranc
     root_results = natural_results.get('ROOT', {})
     
     # Calculate expected values (sum of all fact rows)
-    expected = {
-        'daily': facts_df['daily_pnl'].sum() if not facts_df.empty else Decimal('0'),
-        'mtd': facts_df['mtd_pnl'].sum() if not facts_df.empty else Decimal('0'),
-        'ytd': facts_df['ytd_pnl'].sum() if not facts_df.empty else Decimal('0'),
-        'pytd': facts_df['pytd_pnl'].sum() if not facts_df.empty else Decimal('0'),
-    }
+    expected = fact_sums if fact_sums is not None else _fact_sums(facts_df)
     
     # Get actual values from root node
     actual = {
@@ -110,24 +217,24 @@ def validate_plug_sum(results: Dict, tolerance: Decimal = Decimal('0.01')) -> Di
     return validation_results
 
 
-def validate_hierarchy_integrity(session: Session, use_case_id: Optional[UUID] = None) -> Dict:
+def check_hierarchy_structure(hierarchy_dict: Dict, children_dict: Dict) -> Dict:
     """
-    Validate hierarchy structure integrity.
+    Single root, cycle and reachability checks on a loaded hierarchy.
+    
+    Uses an explicit stack (no recursion), so deep hierarchies cannot hit the
+    interpreter recursion limit.
     
     Args:
-        session: SQLAlchemy session
-        use_case_id: Optional use case ID to filter hierarchy
+        hierarchy_dict: Dictionary mapping node_id -> node data
+        children_dict: Dictionary mapping parent_node_id -> list of children node_ids
     
     Returns:
-        Dictionary with validation results
+        Dictionary with single_root / no_cycles / all_reachable results
     """
-    hierarchy_dict, children_dict, leaf_nodes = load_hierarchy(session, use_case_id)
-    
     results = {
         'single_root': {'passed': False, 'details': ''},
         'no_cycles': {'passed': False, 'details': ''},
         'all_reachable': {'passed': False, 'details': ''},
-        'leaf_mappings': {'passed': False, 'details': ''},
     }
     
     # Check 1: Single root node
@@ -137,45 +244,84 @@ def validate_hierarchy_integrity(session: Session, use_case_id: Optional[UUID] =
         results['single_root']['details'] = f'Single root node: {root_nodes[0]}'
     else:
         results['single_root']['details'] = f'Found {len(root_nodes)} root nodes: {root_nodes}'
+        return results
+    
+    # Check 2: No cycles (iterative DFS; 1 = on the current path, 2 = finished)
+    root_id = root_nodes[0]
+    state = {root_id: 1}
+    stack = [(root_id, iter(children_dict.get(root_id, [])))]
+    cycle_edge = None
+    
+    while stack:
+        node_id, children = stack[-1]
+        child_id = next(children, None)
+        if child_id is None:
+            state[node_id] = 2
+            stack.pop()
+            continue
+        child_state = state.get(child_id)
+        if child_state is None:
+            state[child_id] = 1
+            stack.append((child_id, iter(children_dict.get(child_id, []))))
+        elif child_state == 1:
+            cycle_edge = (node_id, child_id)
+            break
+    
+    results['no_cycles']['passed'] = cycle_edge is None
+    if cycle_edge is None:
+        results['no_cycles']['details'] = 'No cycles found'
+    else:
+        results['no_cycles']['details'] = f'Cycle detected in hierarchy ({cycle_edge[0]} -> {cycle_edge[1]})'
+        return results
+    
+    # Check 3: All nodes reachable from root
+    unreachable = set(hierarchy_dict.keys()) - set(state.keys())
+    results['all_reachable']['passed'] = not unreachable
+    if not unreachable:
+        results['all_reachable']['details'] = f'All {len(hierarchy_dict)} nodes reachable from root'
+    else:
+        results['all_reachable']['details'] = f'Unreachable nodes: {unreachable}'
     
-    # Check 2: No cycles (using DFS)
-    if results['single_root']['passed']:
-        root_id = root_nodes[0]
-        visited = set()
-        rec_stack = set()
-        cycle_found = False
-        
-        def has_cycle(node_id):
-            visited.add(node_id)
-            rec_stack.add(node_id)
-            
-            for child_id in children_dict.get(node_id, []):
-                if child_id not in visited:
-                    if has_cycle(child_id):
-                        return True
-                elif child_id in rec_stack:
-                    return True
-            
-            rec_stack.remove(node_id)
-            return False
-        
-        cycle_found = has_cycle(root_id)
-        results['no_cycles']['passed'] = not cycle_found
-        results['no_cycles']['details'] = 'No cycles found' if not cycle_found else 'Cycle detected in hierarchy'
-        
-        # Check 3: All nodes reachable from root
-        if not cycle_found:
-            all_reachable = len(visited) == len(hierarchy_dict)
-            results['all_reachable']['passed'] = all_reachable
-            if all_reachable:
-                results['all_reachable']['details'] = f'All {len(hierarchy_dict)} nodes reachable from root'
-            else:
-                unreachable = set(hierarchy_dict.keys()) - visited
-                results['all_reachable']['details'] = f'Unreachable nodes: {unreachable}'
+    return results
+
+
+def validate_hierarchy_integrity(
+    session: Session,
+    use_case_id: Optional[UUID] = None,
+    hierarchy: Optional[Tuple[Dict, Dict, List]] = None,
+    fact_keys: Optional[Set[str]] = None,
+    fact_table: Optional[str] = None
+) -> Dict:
+    """
+    Validate hierarchy structure integrity.
+    
+    Args:
+        session: SQLAlchemy session
+        use_case_id: Optional use case ID to filter hierarchy
+        hierarchy: Already loaded (hierarchy_dict, children_dict, leaf_nodes); loaded if None
+        fact_keys: Distinct fact keys mapped to leaves; queried with SELECT DISTINCT if None
+        fact_table: Fact table of the calculation (default: fact_pnl_gold)
+    
+    Returns:
+        Dictionary with validation results
+    """
+    if hierarchy is None:
+        hierarchy = load_hierarchy(session, use_case_id)
+    hierarchy_dict, children_dict, leaf_nodes = hierarchy
+    
+    results = check_hierarchy_structure(hierarchy_dict, children_dict)
+    results['leaf_mappings'] = {'passed': False, 'details': ''}
     
     # Check 4: Leaf nodes have valid fact mappings
-    facts_df = load_facts(session)
-    all_cc_ids = set(facts_df['cc_id'].unique()) if not facts_df.empty else set()
+    fact_table = fact_table or 'fact_pnl_gold'
+    if fact_keys is None:
+        fact_keys = load_fact_keys(session, fact_table, use_case_id)
+    if fact_keys is None:
+        results['leaf_mappings']['passed'] = True
+        results['leaf_mappings']['details'] = f'Not applicable: {fact_table} has no leaf-mapping column'
+        return results
+    
+    all_cc_ids = set(fact_keys)
     all_leaf_node_ids = set(leaf_nodes)
     
     unmapped_cc_ids = all_cc_ids - all_leaf_node_ids
@@ -195,7 +341,209 @@ def validate_hierarchy_integrity(session: Session, use_case_id: Optional[UUID] =
     return results
 
 
-def validate_rule_application(results: Dict, rules_dict: Dict[str, MetadataRule], session: Session) -> Dict:
+def _filter_rule_columns(rule: MetadataRule, table_name: str) -> List[Optional[str]]:
+    """Columns apply_rule_override sums into daily/mtd/ytd/pytd for a SQL rule."""
+    target_column = get_measure_column_name(rule.measure_name or 'daily_pnl', table_name)
+    columns = list(FACT_MEASURE_COLUMNS.get(table_name, FACT_MEASURE_COLUMNS['fact_pnl_gold']))
+    columns[0] = target_column
+    return columns
+
+
+def _is_executable_where(sql_where: Optional[str]) -> bool:
+    """Same guard as apply_rule_override: rules failing it evaluate to zero."""
+    if not sql_where or not sql_where.strip():
+        return False
+    sql_where_upper = sql_where.upper()
+    return not any(pattern in sql_where_upper for pattern in DANGEROUS_SQL_PATTERNS)
+
+
+def _execute_filter_aggregates(
+    session: Session,
+    aggregates: List[Tuple[str, str]],
+    table_name: str
+) -> Dict[Tuple[str, str], Decimal]:
+    """
+    SUM(column) FILTER (WHERE sql_where) for every (sql_where, column) pair in one scan.
+    
+    Args:
+        session: SQLAlchemy session
+        aggregates: Distinct (sql_where, column) pairs
+        table_name: Fact table name
+    
+    Returns:
+        Dictionary (sql_where, column) -> Decimal
+    """
+    select_list = ',\n    '.join(
+        f"COALESCE(SUM({column}) FILTER (WHERE {sql_where}), 0) AS a{i}"
+        for i, (sql_where, column) in enumerate(aggregates)
+    )
+    with session.begin_nested():
+        row = session.execute(text(f"SELECT\n    {select_list}\nFROM {table_name}")).fetchone()
+    return {aggregate: Decimal(str(row[i] or 0)) for i, aggregate in enumerate(aggregates)}
+
+
+def reexecute_filter_rules(session: Session, rules: Iterable[MetadataRule], table_name: str) -> Dict[str, Dict[str, Decimal]]:
+    """
+    Re-execute SQL (sql_where) rules in a single batched scan of the fact table.
+    
+    Mirrors apply_rule_override: same target/measure columns, and rules without a
+    usable sql_where (or whose clause fails) evaluate to zero. If the batched
+    statement fails, rules are retried one statement each so a single broken
+    clause only zeroes its own rule.
+    
+    Args:
+        session: SQLAlchemy session
+        rules: Rules to re-execute (non Type 2B)
+        table_name: Fact table the rules run against
+    
+    Returns:
+        Dictionary mapping node_id -> {daily, mtd, ytd, pytd}
+    """
+    rule_aggregates: Dict[str, List[Optional[Tuple[str, str]]]] = {}
+    aggregates: Dict[Tuple[str, str], None] = {}  # ordered, de-duplicated
+    expected: Dict[str, Dict[str, Decimal]] = {}
+    
+    for rule in rules:
+        sql_where = rule.sql_where.strip() if rule.sql_where else None
+        columns = _filter_rule_columns(rule, table_name)
+        if not _is_executable_where(sql_where) or not all(c is None or _IDENTIFIER.match(c) for c in columns):
+            expected[rule.node_id] = _zero_measures()
+            continue
+        keys = [(sql_where, column) if column else None for column in columns]
+        rule_aggregates[rule.node_id] = keys
+        for key in keys:
+            if key is not None:
+                aggregates[key] = None
+    
+    if not aggregates:
+        return expected
+    
+    aggregate_list = list(aggregates)
+    try:
+        values = _execute_filter_aggregates(session, aggregate_list, table_name)
+    except Exception as e:
+        logger.warning(f"[Validation] Batched rule re-execution failed, retrying per rule: {e}")
+        values = {}
+        for sql_where in dict.fromkeys(sql_where for sql_where, _ in aggregate_list):
+            group = [key for key in aggregate_list if key[0] == sql_where]
+            try:
+                values.update(_execute_filter_aggregates(session, group, table_name))
+            except Exception as rule_error:
+                logger.warning(f"[Validation] Rule clause failed ({sql_where!r}): {rule_error}")
+    
+    for node_id, keys in rule_aggregates.items():
+        if any(key is not None and key not in values for key in keys):
+            # apply_rule_override returns zeros when the rule's SQL fails
+            expected[node_id] = _zero_measures()
+            continue
+        expected[node_id] = {
+            measure: values[key] if key is not None else Decimal('0')
+            for measure, key in zip(MEASURES, keys)
+        }
+    return expected
+
+
+def reexecute_type_2b_rules(
+    session: Session,
+    rules: List[MetadataRule],
+    table_name: str,
+    use_case_id: Optional[UUID] = None,
+    facts_df: Optional[pd.DataFrame] = None,
+    frame_shape: Optional[str] = None
+) -> Dict[str, Dict[str, Decimal]]:
+    """
+    Re-execute Type 2B (FILTER_ARITHMETIC) rules with the run-level Type 2B engine.
+    
+    Without a loaded fact frame only rules that push down for the frame the run
+    used (frame_shape) are re-executed (one SQL statement); the others are left
+    out of the comparison. Without frame_shape nothing is re-executed.
+    
+    Args:
+        session: SQLAlchemy session
+        rules: Type 2B rules
+        table_name: Fact table the rules run against
+        use_case_id: Use case ID (row scope for fact_pnl_entries)
+        facts_df: Fact frame of the run, if loaded
+        frame_shape: Shape of the run's fact frame (type2b_sql.FRAME_ROWS / FRAME_MODEL),
+            None if it has no SQL equivalent
+    
+    Returns:
+        Dictionary mapping node_id -> {daily, mtd, ytd, pytd}
+    """
+    from app.engine.type2b_sql import (
+        can_push_down,
+        create_type2b_engine,
+        execute_type_2b_rules_sql,
+        type2b_scope,
+    )
+    
+    if not rules:
+        return {}
+    scope = type2b_scope(table_name, use_case_id)
+    
+    if facts_df is not None:
+        engine = create_type2b_engine(session, facts_df, rules, table_name, scope)
+        values = {rule.node_id: engine.execute_rule(rule, table_name) for rule in rules}
+    else:
+        pushdown = [rule for rule in rules if frame_shape and can_push_down(rule, table_name, frame_shape)]
+        if len(pushdown) < len(rules):
+            logger.info(f"[Validation] {len(rules) - len(pushdown)} Type 2B rules not re-executed (need in-memory facts)")
+        try:
+            with session.begin_nested():
+                values = execute_type_2b_rules_sql(session, pushdown, table_name, scope, frame_shape) if pushdown else {}
+        except Exception as e:
+            logger.warning(f"[Validation] Type 2B re-execution failed: {e}")
+            return {}
+    
+    expected = {}
+    for node_id, value in values.items():
+        expected[node_id] = _zero_measures()
+        expected[node_id]['daily'] = Decimal(str(value))
+    return expected
+
+
+def reexecute_rules(
+    session: Session,
+    rules_dict: Dict[str, MetadataRule],
+    table_name: str,
+    use_case_id: Optional[UUID] = None,
+    facts_df: Optional[pd.DataFrame] = None,
+    frame_shape: Optional[str] = None
+) -> Dict[str, Dict[str, Decimal]]:
+    """
+    Expected override values for every rule (batched re-execution).
+    
+    Args:
+        session: SQLAlchemy session
+        rules_dict: Dictionary mapping node_id -> rule object
+        table_name: Fact table the rules run against
+        use_case_id: Use case ID
+        facts_df: Fact frame of the run, if loaded
+        frame_shape: Shape of the run's fact frame (see reexecute_type_2b_rules)
+    
+    Returns:
+        Dictionary mapping node_id -> {daily, mtd, ytd, pytd} (rules that could not
+        be re-executed are absent)
+    """
+    type2b_rules = [r for r in rules_dict.values() if (r.rule_type or 'FILTER') == 'FILTER_ARITHMETIC']
+    sql_rules = [r for r in rules_dict.values() if (r.rule_type or 'FILTER') != 'FILTER_ARITHMETIC']
+    
+    expected = reexecute_filter_rules(session, sql_rules, table_name)
+    expected.update(reexecute_type_2b_rules(session, type2b_rules, table_name, use_case_id, facts_df, frame_shape))
+    return expected
+
+
+def validate_rule_application(
+    results: Dict,
+    rules_dict: Dict[str, MetadataRule],
+    session: Session,
+    table_name: str = 'fact_pnl_gold',
+    use_case_id: Optional[UUID] = None,
+    facts_df: Optional[pd.DataFrame] = None,
+    reexecute: bool = True,
+    tolerance: Decimal = Decimal('0.01'),
+    frame_shape: Optional[str] = None
+) -> Dict:
     """
     Validate that rules are applied correctly.
     
@@ -203,6 +551,12 @@ def validate_rule_application(results: Dict, rules_dict: Dict[str, MetadataRule]
         results: Results dictionary from calculate_waterfall
         rules_dict: Dictionary mapping node_id -> rule object
         session: SQLAlchemy session (for re-executing rules)
+        table_name: Fact table the rules run against
+        use_case_id: Use case ID
+        facts_df: Fact frame of the run, if loaded (used for in-memory Type 2B rules)
+        reexecute: Re-execute rules and compare override values (batched, see reexecute_rules)
+        tolerance: Tolerance for rounding errors (default: 0.01)
+        frame_shape: Shape of the run's fact frame (see reexecute_type_2b_rules)
     
     Returns:
         Dictionary with validation results
@@ -233,9 +587,28 @@ def validate_rule_application(results: Dict, rules_dict: Dict[str, MetadataRule]
         validation_results['override_flags']['details'] = '; '.join(details)
     
     # Check 2: Override values match rule execution results
-    # (This would require re-executing rules, which is expensive - skip for now or make optional)
-    validation_results['override_values']['passed'] = True  # Placeholder
-    validation_results['override_values']['details'] = 'Override value validation skipped (requires rule re-execution)'
+    if not reexecute or not rules_dict:
+        validation_results['override_values']['passed'] = True
+        validation_results['override_values']['details'] = 'Override value validation skipped'
+    else:
+        expected = reexecute_rules(session, rules_dict, table_name, use_case_id, facts_df, frame_shape)
+        mismatches = []
+        for node_id, expected_values in expected.items():
+            actual_values = final_results.get(node_id, {})
+            for measure in MEASURES:
+                actual = Decimal(str(actual_values.get(measure, 0)))
+                if abs(actual - expected_values[measure]) > tolerance:
+                    mismatches.append(f'{node_id}.{measure}: expected {expected_values[measure]}, got {actual}')
+        
+        skipped = len(rules_dict) - len(expected)
+        validation_results['override_values']['passed'] = not mismatches
+        if not mismatches:
+            details = f'All {len(expected)} re-executed rules match their override values'
+        else:
+            details = f'{len(mismatches)} override values differ: {mismatches[:10]}'
+        if skipped:
+            details += f' ({skipped} rules not re-executed)'
+        validation_results['override_values']['details'] = details
     
     # Check 3: Plugs calculated only for override nodes
     nodes_with_plugs = set(plug_results.keys())
@@ -255,28 +628,31 @@ def validate_rule_application(results: Dict, rules_dict: Dict[str, MetadataRule]
     return validation_results
 
 
-def validate_completeness(facts_df: pd.DataFrame, hierarchy_dict: Dict, results: Dict, tolerance: Decimal = Decimal('0.01')) -> Dict:
+def validate_completeness(
+    facts_df: Optional[pd.DataFrame],
+    hierarchy_dict: Dict,
+    results: Dict,
+    tolerance: Decimal = Decimal('0.01'),
+    fact_sums: Optional[Dict[str, Decimal]] = None
+) -> Dict:
     """
     The "Orphan" Check - CRITICAL
     Validate that SUM(fact_pnl_gold) equals SUM(leaf_nodes in report).
     If delta exists, assign to NODE_ORPHAN.
     
     Args:
-        facts_df: DataFrame with all fact rows
+        facts_df: DataFrame with all fact rows (ignored if fact_sums is given)
         hierarchy_dict: Dictionary mapping node_id -> node data
         results: Results dictionary from calculate_waterfall
         tolerance: Tolerance for rounding errors
+        fact_sums: Precomputed fact totals (see load_fact_totals)
     
     Returns:
         Dictionary with validation results and orphan assignment details
     """
     # Calculate sum of all facts
-    fact_sums = {
-        'daily': facts_df['daily_pnl'].sum() if not facts_df.empty else Decimal('0'),
-        'mtd': facts_df['mtd_pnl'].sum() if not facts_df.empty else Decimal('0'),
-        'ytd': facts_df['ytd_pnl'].sum() if not facts_df.empty else Decimal('0'),
-        'pytd': facts_df['pytd_pnl'].sum() if not facts_df.empty else Decimal('0'),
-    }
+    if fact_sums is None:
+        fact_sums = _fact_sums(facts_df)
     
     # Calculate sum of leaf nodes (from natural results)
     natural_results = results.get('natural_results', {})
@@ -329,35 +705,74 @@ def validate_completeness(facts_df: pd.DataFrame, hierarchy_dict: Dict, results:
     return validation_result
 
 
-def run_full_validation(use_case_id: UUID, session: Session, waterfall_results: Optional[Dict] = None) -> Dict:
+def run_full_validation(
+    use_case_id: UUID,
+    session: Session,
+    waterfall_results: Optional[Dict] = None,
+    facts_df: Optional[pd.DataFrame] = None,
+    check_override_values: bool = True
+) -> Dict:
     """
     Run all validation checks and generate comprehensive report.
     
+    Facts are not reloaded: totals and distinct keys are computed in SQL (or from
+    facts_df when the caller still has the run's frame), the hierarchy is loaded
+    once and shared, and all rules are re-executed in a batched scan.
+    
     Args:
         use_case_id: Use case ID
         session: SQLAlchemy session
         waterfall_results: Optional pre-calculated waterfall results
+        facts_df: Optional fact frame the calculation ran on
+        check_override_values: Re-execute rules to validate override values
     
     Returns:
         Dictionary with all validation results
     """
+    from app.engine.type2b_sql import FRAME_MODEL
     from app.engine.waterfall import calculate_waterfall, load_rules
     
+    start_time = time.time()
+    
     # Load data if waterfall_results not provided
     if waterfall_results is None:
         waterfall_results = calculate_waterfall(use_case_id, session)
     
-    facts_df = load_facts(session)
-    hierarchy_dict, _, _ = load_hierarchy(session, use_case_id)
+    use_case = session.query(UseCase).filter(UseCase.use_case_id == use_case_id).first()
+    fact_table = calculated_fact_table(use_case)
+    rule_table = (use_case.input_table_name if use_case and use_case.input_table_name else 'fact_pnl_gold')
+    # calculate_waterfall evaluates rules over the ORM-loaded frame of fact_table; a
+    # fact_pnl_entries use case runs over the gold frame, which has no SQL equivalent
+    frame_shape = FRAME_MODEL if rule_table == fact_table else None
+    
+    hierarchy = load_hierarchy(session, use_case_id)
+    hierarchy_dict = hierarchy[0]
     rules_dict = load_rules(session, use_case_id)
     
+    if facts_df is not None:
+        fact_sums = _fact_sums(facts_df)
+        key_column = FACT_KEY_COLUMNS.get(fact_table)
+        fact_keys = (
+            set(facts_df[key_column].dropna().unique())
+            if key_column and key_column in facts_df.columns else None
+        )
+    else:
+        fact_sums = load_fact_totals(session, fact_table, use_case_id)
+        fact_keys = load_fact_keys(session, fact_table, use_case_id)
+    
     # Run all validations
     validations = {
-        'root_reconciliation': validate_root_reconciliation(waterfall_results, facts_df),
+        'root_reconciliation': validate_root_reconciliation(waterfall_results, facts_df, fact_sums=fact_sums),
         'plug_sum': validate_plug_sum(waterfall_results),
-        'hierarchy_integrity': validate_hierarchy_integrity(session, use_case_id),
-        'rule_application': validate_rule_application(waterfall_results, rules_dict, session),
-        'completeness': validate_completeness(facts_df, hierarchy_dict, waterfall_results),
+        'hierarchy_integrity': validate_hierarchy_integrity(
+            session, use_case_id, hierarchy=hierarchy, fact_keys=fact_keys, fact_table=fact_table
+        ),
+        'rule_application': validate_rule_application(
+            waterfall_results, rules_dict, session,
+            table_name=rule_table, use_case_id=use_case_id, facts_df=facts_df, reexecute=check_override_values,
+            frame_shape=frame_shape
+        ),
+        'completeness': validate_completeness(facts_df, hierarchy_dict, waterfall_results, fact_sums=fact_sums),
     }
     
     # Determine overall status
@@ -374,9 +789,13 @@ def run_full_validation(use_case_id: UUID, session: Session, waterfall_results:
                         if not value['passed']:
                             all_passed = False
     
+    duration_ms = int((time.time() - start_time) * 1000)
+    logger.info(f"[Validation] Use case {use_case_id}: {'PASSED' if all_passed else 'FAILED'} in {duration_ms}ms")
+    
     return {
         'use_case_id': str(use_case_id),
         'overall_status': 'PASSED' if all_passed else 'FAILED',
+        'duration_ms': duration_ms,
         'validations': validations,
         'summary': {
             'total_checks': len(validations),
@@ -14,6 +14,7 @@ import pandas as pd
 from sqlalchemy import text
 from sqlalchemy.orm import Session
 
+from app.engine.engine_log import EngineLog
 from app.models import (
     DimHierarchy,
     FactCalculatedResult,
@@ -27,6 +28,10 @@ from app.models import (
 )
 
 
+# Rejected in rule sql_where clauses before they are embedded in a query
+DANGEROUS_SQL_PATTERNS = [';', '--', '/*', '*/', 'DROP', 'DELETE', 'UPDATE', 'INSERT', 'ALTER', 'CREATE', 'TRUNCATE']
+
+
 def load_hierarchy(session: Session, use_case_id: Optional[UUID] = None) -> Tuple[Dict, Dict, List]:
     """
     Load hierarchy from dim_hierarchy table.
@@ -51,6 +56,19 @@ def load_hierarchy(session: Session, use_case_id: Optional[UUID] = None) -> Tupl
     
     nodes = query.all()
     
+    return index_hierarchy(nodes)
+
+
+def index_hierarchy(nodes: List[DimHierarchy]) -> Tuple[Dict, Dict, List]:
+    """
+    Build the hierarchy lookup structures from loaded dim_hierarchy rows.
+    
+    Args:
+        nodes: DimHierarchy rows (from a sync or async session)
+    
+    Returns:
+        Same tuple as load_hierarchy: (node_dict, children_dict, leaf_nodes)
+    """
     # Build dictionaries
     node_dict = {node.node_id: node for node in nodes}
     children_dict = defaultdict(list)
@@ -278,6 +296,7 @@ def calculate_natural_rollup(hierarchy_dict: Dict, children_dict: Dict, leaf_nod
     # CRITICAL: Support both fact_pnl_gold (cc_id) and fact_pnl_entries (category_code)
     import logging
     logger = logging.getLogger(__name__)
+    log = EngineLog(logger, "calculate_natural_rollup")
     
     # Debug: Log fact columns and sample values
     if not facts_df.empty:
@@ -308,7 +327,7 @@ def calculate_natural_rollup(hierarchy_dict: Dict, children_dict: Dict, leaf_nod
             ytd_sum = leaf_facts['ytd_pnl'].sum() if 'ytd_pnl' in leaf_facts.columns else Decimal('0')
             pytd_sum = leaf_facts['pytd_pnl'].sum() if 'pytd_pnl' in leaf_facts.columns else Decimal('0')
             
-            logger.debug(f"calculate_natural_rollup: Leaf {leaf_id} matched {len(leaf_facts)} facts, daily={daily_sum}")
+            log.event("leaf_matched", leaf_id=leaf_id, facts=len(leaf_facts), daily=daily_sum)
             
             results[leaf_id] = {
                 'daily': daily_sum,
@@ -364,12 +383,12 @@ def calculate_natural_rollup(hierarchy_dict: Dict, children_dict: Dict, leaf_nod
                                 'pytd': Decimal(str(values.get('pytd_pnl', Decimal('0')))),
                             }
                             matched = True
-                            logger.info(f"calculate_natural_rollup: Matched {leaf_id} to {cat_code} via fuzzy matching")
+                            log.sampled("leaf_fuzzy_matched", level=logging.INFO, leaf_id=leaf_id, category_code=cat_code)
                             break
                     
                     if not matched:
                         # Still no match - keep zero
-                        logger.debug(f"calculate_natural_rollup: No match found for leaf {leaf_id}")
+                        log.event("leaf_unmatched", leaf_id=leaf_id)
             
             # Recalculate matched count
             matched_count = sum(1 for leaf_id in leaf_nodes if results.get(leaf_id, {}).get('daily', Decimal('0')) != Decimal('0'))
@@ -414,6 +433,9 @@ def calculate_natural_rollup(hierarchy_dict: Dict, children_dict: Dict, leaf_nod
                         'pytd': Decimal('0'),
                     }
     
+    if log.counts:
+        log.summary()
+    
     return results
 
 
@@ -494,6 +516,14 @@ def load_rules(session: Session, use_case_id: UUID) -> Dict[str, MetadataRule]:
         return {rule.node_id: rule for rule in rules}
 
 
+# Fact table -> columns backing daily/mtd/ytd/pytd (None = not available, always 0)
+FACT_MEASURE_COLUMNS = {
+    'fact_pnl_gold': ['daily_pnl', 'mtd_pnl', 'ytd_pnl', 'pytd_pnl'],
+    'fact_pnl_entries': ['daily_amount', 'wtd_amount', 'ytd_amount', None],
+    'fact_pnl_use_case_3': ['pnl_daily', None, None, None],
+}
+
+
 def get_measure_column_name(measure_name: Optional[str], table_name: str) -> str:
     """
     Phase 5.4: Map measure_name to actual database column name.
@@ -538,7 +568,35 @@ def get_measure_column_name(measure_name: Optional[str], table_name: str) -> str
         return measure_name  # Use as-is for fact_pnl_gold
 
 
-def apply_rule_override(session: Session, facts_df: pd.DataFrame, rule: MetadataRule, use_case: Optional[UseCase] = None) -> Dict[str, Decimal]:
+def resolve_fact_table_name(facts_df: pd.DataFrame, use_case: Optional[UseCase] = None) -> str:
+    """
+    Determine the fact table a rule runs against.
+    
+    Args:
+        facts_df: DataFrame with fact data
+        use_case: Optional UseCase object (input_table_name wins)
+    
+    Returns:
+        Table name (defaults to fact_pnl_gold)
+    """
+    if use_case and use_case.input_table_name:
+        return use_case.input_table_name
+    if facts_df is not None:
+        # Detect fact_pnl_use_case_3 by presence of pnl_commission or pnl_trade
+        if 'pnl_commission' in facts_df.columns or 'pnl_trade' in facts_df.columns:
+            return 'fact_pnl_use_case_3'
+        if 'daily_amount' in facts_df.columns:
+            return 'fact_pnl_entries'
+    return 'fact_pnl_gold'
+
+
+def apply_rule_override(
+    session: Session,
+    facts_df: pd.DataFrame,
+    rule: MetadataRule,
+    use_case: Optional[UseCase] = None,
+    type2b_engine=None
+) -> Dict[str, Decimal]:
     """
     Apply a rule override by executing SQL WHERE clause on facts.
     
@@ -554,6 +612,8 @@ def apply_rule_override(session: Session, facts_df: pd.DataFrame, rule: Metadata
         facts_df: DataFrame with fact data
         rule: MetadataRule object with sql_where clause and measure_name
         use_case: Optional UseCase object to determine input table
+        type2b_engine: Optional run-scoped Type 2B engine from
+            type2b_sql.create_type2b_engine (SQL pushdown or shared in-memory masks)
     
     Returns:
         Dictionary {daily: Decimal, mtd: Decimal, ytd: Decimal, pytd: Decimal}
@@ -564,23 +624,19 @@ def apply_rule_override(session: Session, facts_df: pd.DataFrame, rule: Metadata
     # Phase 5.5: Check if this is a Type 2B rule
     rule_type = rule.rule_type or 'FILTER'
     if rule_type == 'FILTER_ARITHMETIC':
-        # Execute Type 2B rule using DataFrame operations
+        # Execute Type 2B rule (run engine: SQL pushdown or in-memory masks)
         from app.engine.type2b_processor import execute_type_2b_rule
         
-        # Determine table name
-        table_name = 'fact_pnl_gold'  # Default
-        if use_case and use_case.input_table_name:
-            table_name = use_case.input_table_name
-        elif 'pnl_commission' in facts_df.columns or 'pnl_trade' in facts_df.columns:
-            table_name = 'fact_pnl_use_case_3'
-        elif 'daily_amount' in facts_df.columns:
-            table_name = 'fact_pnl_entries'
+        table_name = resolve_fact_table_name(facts_df, use_case)
         
         logger.info(f"apply_rule_override: Executing Type 2B rule for node {rule.node_id}, table={table_name}")
         
         try:
             # Execute Type 2B rule
-            result_value = execute_type_2b_rule(facts_df, rule, table_name)
+            if type2b_engine is not None:
+                result_value = type2b_engine.execute_rule(rule, table_name)
+            else:
+                result_value = execute_type_2b_rule(facts_df, rule, table_name)
             
             # Return in standard format (Type 2B only returns 'daily' for now)
             return {
@@ -602,14 +658,7 @@ def apply_rule_override(session: Session, facts_df: pd.DataFrame, rule: Metadata
     measure_name = rule.measure_name or 'daily_pnl'  # Default to daily_pnl
     
     # Determine which table to use
-    table_name = 'fact_pnl_gold'  # Default
-    if use_case and use_case.input_table_name:
-        table_name = use_case.input_table_name
-    elif 'pnl_commission' in facts_df.columns or 'pnl_trade' in facts_df.columns:
-        # Detect fact_pnl_use_case_3 by presence of pnl_commission or pnl_trade
-        table_name = 'fact_pnl_use_case_3'
-    elif 'daily_amount' in facts_df.columns:
-        table_name = 'fact_pnl_entries'
+    table_name = resolve_fact_table_name(facts_df, use_case)
     
     # Get actual column name for the measure
     target_column = get_measure_column_name(measure_name, table_name)
@@ -630,9 +679,8 @@ def apply_rule_override(session: Session, facts_df: pd.DataFrame, rule: Metadata
         sql_where = rule.sql_where.strip()
         
         # Validate and sanitize SQL WHERE clause (prevent SQL injection and syntax errors)
-        dangerous_patterns = [';', '--', '/*', '*/', 'DROP', 'DELETE', 'UPDATE', 'INSERT', 'ALTER', 'CREATE', 'TRUNCATE']
         sql_where_upper = sql_where.upper()
-        for pattern in dangerous_patterns:
+        for pattern in DANGEROUS_SQL_PATTERNS:
             if pattern in sql_where_upper:
                 error_msg = f"Rule {rule.rule_id} contains dangerous SQL pattern: {pattern}"
                 logger.error(error_msg)
@@ -765,12 +813,19 @@ def calculate_waterfall(use_case_id: UUID, session: Session, triggered_by: str =
     # Process nodes top-down (root to leaves)
     max_depth = max(node.depth for node in hierarchy_dict.values())
     
+    # One Type 2B engine per run: the planner picks SQL pushdown or in-memory masks
+    from app.engine.type2b_sql import create_type2b_engine, type2b_scope
+    table_name = resolve_fact_table_name(facts_df, use_case)
+    type2b_engine = create_type2b_engine(
+        session, facts_df, rules_dict.values(), table_name, type2b_scope(table_name, use_case_id)
+    )
+    
     for depth in range(0, max_depth + 1):
         for node_id, node in hierarchy_dict.items():
             if node.depth == depth and node_id in rules_dict:
                 # Apply rule override
                 rule = rules_dict[node_id]
-                override_values = apply_rule_override(session, facts_df, rule, use_case)
+                override_values = apply_rule_override(session, facts_df, rule, use_case, type2b_engine)
                 final_results[node_id] = override_values
                 override_nodes.add(node_id)
     
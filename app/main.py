@@ -2,17 +2,18 @@
 FastAPI main application for Finance-Insight
 """
 
+import asyncio
 import logging
 from contextlib import asynccontextmanager
 from dotenv import load_dotenv
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse
 
+from app import metrics, profiling, readiness
+from app.database import dispose_async_engine
 from app.api.routes import admin, calculations, discovery, reports, rules, runs, use_cases
-from app.engine.translator import smoke_test_gemini
-from init_app import init_db
-from init_app import init_db
 
 # Load environment variables from .env file
 load_dotenv()
@@ -32,22 +33,20 @@ async def lifespan(app: FastAPI):
     logger.info("Starting Finance-Insight API...")
     logger.info("Phase 2: Hybrid Rule Engine initialized")
     
-    # Initialize database schema on startup
-    try:
-        init_db()
-    except Exception as e:
-        logger.error(f"Database initialization failed: {e}")
-        # Don't raise - allow app to start even if schema check fails
-        # (useful for development when DB might not be available)
-    
-    # Run Gemini API smoke test
-    try:
-        smoke_test_gemini()
-    except Exception as e:
-        logger.warning(f"Smoke test encountered an error (non-fatal): {e}")
+    # Schema check + Gemini smoke test. Failures are non-fatal either way
+    # (useful for development when DB might not be available); /ready reports them.
+    startup_task = None
+    if readiness.is_fast_start():
+        # Fast start: serve /health immediately, run checks in the background
+        startup_task = asyncio.create_task(readiness.run_startup_checks_background())
+    else:
+        readiness.run_startup_checks()
     
     yield
     # Shutdown
+    if startup_task is not None and not startup_task.done():
+        startup_task.cancel()
+    await dispose_async_engine()
     logger.info("Shutting down Finance-Insight API...")
 
 
@@ -75,6 +74,11 @@ app.add_middleware(
     expose_headers=["*"],
 )
 
+# Request latency per route template (exported by /metrics)
+app.add_middleware(metrics.MetricsMiddleware)
+# Opt-in request profiling (X-Profile-Token / PROFILE_SLOW_REQUEST_MS, see app/profiling.py)
+app.add_middleware(profiling.ProfilingMiddleware)
+
 # Include routers
 app.include_router(discovery.router)
 app.include_router(use_cases.router)
@@ -101,6 +105,23 @@ def root():
 
 @app.get("/health")
 def health_check():
-    """Health check endpoint."""
+    """Health check endpoint (liveness - does not touch the database)."""
     return {"status": "healthy"}
 
+
+@app.get("/ready")
+def readiness_check():
+    """
+    Readiness endpoint - 200 once startup checks (schema) have passed, 503 before.
+    GenAI status is reported but does not gate readiness.
+    """
+    readiness.retry_failed_required_checks()
+    report = readiness.get_readiness()
+    return JSONResponse(status_code=200 if report["status"] == "ready" else 503, content=report)
+
+
+@app.get("/metrics", include_in_schema=False)
+def metrics_endpoint():
+    """Prometheus scrape endpoint (request latency, calculation stages, caches, pools, GenAI)."""
+    return PlainTextResponse(metrics.render_metrics(), media_type=metrics.CONTENT_TYPE)
+
@@ -0,0 +1,333 @@
+"""
+Prometheus-style metrics for Finance-Insight (GET /metrics).
+
+A small in-process registry rendered in the Prometheus text exposition format
+(version 0.0.4) - no client library dependency. Recording is a dict lookup and
+an addition under a lock, so it stays on in production:
+
+- HTTP: request latency histogram per method / route template / status class
+  (MetricsMiddleware, plain ASGI - no per-request task or body wrapping)
+- Calculations: stage duration histogram and statement counter per stage
+  (fed by app.services.stage_tracing), rules executed per rule type
+- Caches: hit / miss counters per cache (rollup, hierarchy, rules,
+  translation); entry counts and hit ratios are computed at scrape time
+- Connection pools: size / checked out / overflow gauges and the cumulative
+  checkout, wait and timeout counters of InstrumentedQueuePool (read at scrape)
+- GenAI: model call latency per operation / outcome and quota retries
+
+Metric values are per process; with several uvicorn workers each worker
+exposes its own series.
+"""
+
+import bisect
+import logging
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+PREFIX = "finance_insight"
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Seconds; HTTP requests and GenAI calls range from milliseconds to tens of seconds
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    if value == float('inf'):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """Monotonic counter with positional label values."""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = f"{PREFIX}_{name}"
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, labels: Tuple[str, ...] = (), amount: float = 1) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, labels: Tuple[str, ...] = ()) -> float:
+        return self._values.get(labels, 0)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            items = list(self._values.items())
+        lines += [f"{self.name}{_labels(self.labelnames, labels)} {_number(value)}" for labels, value in items]
+        return lines
+
+
+class Histogram:
+    """Cumulative-bucket histogram with positional label values."""
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS
+    ):
+        self.name = f"{PREFIX}_{name}"
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # labels -> [per-bucket counts (last = +Inf), sum]
+        self._values: Dict[Tuple[str, ...], list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, labels: Tuple[str, ...] = ()) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._values.get(labels)
+            if series is None:
+                series = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = [(labels, list(counts), total) for labels, (counts, total) in self._values.items()]
+        for labels, counts, total in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += count
+                le = f'le="{_number(bound)}"'
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, labels)} {_number(total)}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, labels)} {cumulative}")
+        return lines
+
+
+def _gauge_lines(name: str, documentation: str, labelnames: Sequence[str], samples: Iterable[Tuple[Tuple[str, ...], float]]) -> List[str]:
+    """Render a gauge whose samples are read at scrape time."""
+    full_name = f"{PREFIX}_{name}"
+    lines = [f"# HELP {full_name} {documentation}", f"# TYPE {full_name} gauge"]
+    lines += [f"{full_name}{_labels(labelnames, labels)} {_number(value)}" for labels, value in samples]
+    return lines
+
+
+# ---------------------------------------------------------------------------
+# Metrics
+# ---------------------------------------------------------------------------
+
+HTTP_REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route template.",
+    ("method", "route", "status"),
+)
+CALCULATION_STAGE_DURATION = Histogram(
+    "calculation_stage_duration_seconds", "Calculation run stage duration (stage_tracing).",
+    ("stage",),
+)
+CALCULATION_STAGE_QUERIES = Counter(
+    "calculation_stage_queries_total", "SQL statements executed per calculation stage.",
+    ("stage",),
+)
+RULES_EXECUTED = Counter(
+    "rules_executed_total", "Business rules executed by calculation runs, per rule type.",
+    ("rule_type",),
+)
+CACHE_REQUESTS = Counter(
+    "cache_requests_total", "Cache lookups per cache and result (hit, miss; expired entries count as misses).",
+    ("cache", "result"),
+)
+GENAI_REQUEST_DURATION = Histogram(
+    "genai_request_duration_seconds", "GenAI model call latency per operation and outcome.",
+    ("operation", "outcome"),
+)
+GENAI_QUOTA_RETRIES = Counter(
+    "genai_quota_retries_total", "GenAI calls retried after a quota / rate limit error.",
+)
+
+_REGISTRY = (
+    HTTP_REQUEST_DURATION,
+    CALCULATION_STAGE_DURATION,
+    CALCULATION_STAGE_QUERIES,
+    RULES_EXECUTED,
+    CACHE_REQUESTS,
+    GENAI_REQUEST_DURATION,
+    GENAI_QUOTA_RETRIES,
+)
+
+# ---------------------------------------------------------------------------
+# Recording helpers
+# ---------------------------------------------------------------------------
+
+def record_cache(cache: str, result: str) -> None:
+    """Count one cache lookup (result: 'hit' or 'miss')."""
+    CACHE_REQUESTS.inc((cache, result))
+
+
+def record_stage(stage: str, ms: float, queries: int) -> None:
+    """Record one finished calculation stage (called by StageTrace)."""
+    CALCULATION_STAGE_DURATION.observe(ms / 1000, (stage,))
+    if queries:
+        CALCULATION_STAGE_QUERIES.inc((stage,), queries)
+
+
+def record_rules(rules: Iterable) -> None:
+    """Count executed rules by rule_type (MetadataRule-like objects)."""
+    counts: Dict[str, int] = {}
+    for rule in rules:
+        rule_type = getattr(rule, 'rule_type', None) or 'FILTER'
+        counts[rule_type] = counts.get(rule_type, 0) + 1
+    for rule_type, count in counts.items():
+        RULES_EXECUTED.inc((rule_type,), count)
+
+
+def timed_genai_call(operation: str, call: Callable, *args, **kwargs):
+    """
+    Run a GenAI model call and record its latency.
+
+    Args:
+        operation: Label for the call site (e.g. 'translate', 'batch_translate')
+        call: The model method (e.g. model.generate_content)
+
+    Returns:
+        The call's return value (exceptions are recorded and re-raised)
+    """
+    start = time.perf_counter()
+    outcome = "error"
+    try:
+        result = call(*args, **kwargs)
+        outcome = "success"
+        return result
+    finally:
+        GENAI_REQUEST_DURATION.observe(time.perf_counter() - start, (operation, outcome))
+
+
+def record_genai_retry(retry_state=None) -> None:
+    """Count one GenAI retry (usable as tenacity before_sleep callback)."""
+    GENAI_QUOTA_RETRIES.inc()
+
+
+# ---------------------------------------------------------------------------
+# ASGI middleware
+# ---------------------------------------------------------------------------
+
+class MetricsMiddleware:
+    """Records request latency per route template (not per raw path)."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status = [500]
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get("route")
+            HTTP_REQUEST_DURATION.observe(
+                time.perf_counter() - start,
+                (scope.get("method", ""), getattr(route, "path", "unmatched"), f"{status[0] // 100}xx"),
+            )
+
+
+# ---------------------------------------------------------------------------
+# Scrape-time collectors
+# ---------------------------------------------------------------------------
+
+def _cache_lines() -> List[str]:
+    from app.engine import rule_cache
+    from app.services import attribute_cache, hierarchy_cache, rollup_cache, rule_preview, rules_cache
+
+    modules = {
+        'rollup': rollup_cache,
+        'hierarchy': hierarchy_cache,
+        'rules': rules_cache,
+        'translation': rule_cache,
+        'rule_preview': rule_preview,
+        'attributes': attribute_cache,
+    }
+    entries = []
+    ratios = []
+    for cache, module in modules.items():
+        try:
+            entries.append(((cache,), module.get_cache_stats().get('valid_entries', 0)))
+        except Exception as e:
+            logger.warning(f"[Metrics] Cache stats for '{cache}' unavailable: {e}")
+        hits = CACHE_REQUESTS.value((cache, 'hit'))
+        lookups = hits + CACHE_REQUESTS.value((cache, 'miss'))
+        if lookups:
+            ratios.append(((cache,), hits / lookups))
+    return (
+        _gauge_lines("cache_entries", "Valid (unexpired) entries per cache.", ("cache",), entries)
+        + _gauge_lines("cache_hit_ratio", "Cache hits / lookups since process start.", ("cache",), ratios)
+    )
+
+
+def _pool_lines() -> List[str]:
+    from app.database import get_async_pool_metrics, get_pool_metrics
+
+    pools = [("sync", get_pool_metrics())]
+    async_metrics = get_async_pool_metrics()
+    if async_metrics:
+        pools.append(("async", async_metrics))
+
+    lines = []
+    for key, name, documentation in (
+        ("pool_size", "db_pool_size", "Configured persistent connections."),
+        ("checked_out", "db_pool_checked_out", "Connections currently checked out."),
+        ("overflow", "db_pool_overflow", "Overflow connections currently open."),
+    ):
+        # QueuePool.overflow() is negative while fewer than pool_size connections exist
+        lines += _gauge_lines(name, documentation, ("pool",), [((pool,), max(0, m[key])) for pool, m in pools])
+
+    sync_metrics = pools[0][1]
+    for key, name, documentation, scale in (
+        ("checkouts", "db_pool_checkouts_total", "Connection checkouts.", 1),
+        ("waits", "db_pool_waits_total", "Checkouts that waited because the pool was exhausted.", 1),
+        ("wait_time_ms", "db_pool_wait_seconds_total", "Time spent waiting for a connection.", 1000),
+        ("timeouts", "db_pool_timeouts_total", "Checkouts that timed out.", 1),
+    ):
+        if key in sync_metrics:
+            full_name = f"{PREFIX}_{name}"
+            lines += [
+                f"# HELP {full_name} {documentation}",
+                f"# TYPE {full_name} counter",
+                f'{full_name}{{pool="sync"}} {_number(sync_metrics[key] / scale)}',
+            ]
+    return lines
+
+
+def render_metrics() -> str:
+    """All metrics in the Prometheus text exposition format."""
+    lines: List[str] = []
+    for metric in _REGISTRY:
+        lines += metric.render()
+    for collector in (_cache_lines, _pool_lines):
+        try:
+            lines += collector()
+        except Exception as e:
+            logger.warning(f"[Metrics] Collector {collector.__name__} failed: {e}")
+    return "\n".join(lines) + "\n"
@@ -4,8 +4,9 @@ Based on refined database schema with UUIDs, JSONB vectors, and audit fields.
 """
 
 from datetime import datetime
+from decimal import Decimal
 from enum import Enum as PyEnum
-from typing import Optional
+from typing import Any, Dict, Optional
 from uuid import uuid4
 
 from sqlalchemy import (
@@ -14,13 +15,16 @@ from sqlalchemy import (
     Date,
     Enum,
     ForeignKey,
+    Index,
     Integer,
     JSON,
+    LargeBinary,
     Numeric,
     String,
     Text,
     TIMESTAMP,
     UniqueConstraint,
+    cast,
     func,
 )
 from sqlalchemy.dialects.postgresql import JSONB, UUID
@@ -93,6 +97,7 @@ class UseCaseRun(Base):
     status = Column(Enum(RunStatus), nullable=False, default=RunStatus.IN_PROGRESS)
     triggered_by = Column(String, nullable=False)  # user_id who triggered the calculation
     calculation_duration_ms = Column(Integer)  # Duration in milliseconds for performance monitoring
+    stage_timings = Column(JSONB, nullable=True)  # Per-stage ms / queries / db_ms (app/services/stage_tracing.py)
 
     # Relationships
     use_case = relationship("UseCase", back_populates="runs")
@@ -134,6 +139,12 @@ class DimHierarchy(Base):
     bridge_parents = relationship("HierarchyBridge", foreign_keys="HierarchyBridge.parent_node_id", back_populates="parent_node")
     bridge_leaves = relationship("HierarchyBridge", foreign_keys="HierarchyBridge.leaf_node_id", back_populates="leaf_node")
 
+    # Engine access paths (migration c9e4a2f7b1d3)
+    __table_args__ = (
+        Index("ix_dim_hierarchy_atlas_parent", "atlas_source", "parent_node_id"),
+        Index("ix_dim_hierarchy_parent_node_id", "parent_node_id"),
+    )
+
     def __repr__(self):
         return f"<DimHierarchy(id='{self.node_id}', name='{self.node_name}', leaf={self.is_leaf})>"
 
@@ -158,7 +169,8 @@ class HierarchyBridge(Base):
 
     # Index for performance
     __table_args__ = (
-        {"comment": "Flattened parent-to-leaf mappings for fast aggregation"}
+        Index("ix_hierarchy_bridge_parent_leaf", "parent_node_id", "leaf_node_id"),
+        {"comment": "Flattened parent-to-leaf mappings for fast aggregation"},
     )
 
     def __repr__(self):
@@ -224,15 +236,60 @@ class FactPnlGold(Base):
     ytd_pnl = Column(Numeric(18, 2), nullable=False)
     pytd_pnl = Column(Numeric(18, 2), nullable=False)
 
+    # Covering index for the legacy rollup (SUM of measures GROUP BY cc_id)
+    __table_args__ = (
+        Index(
+            "ix_fact_pnl_gold_cc_id_measures", "cc_id",
+            postgresql_include=["daily_pnl", "mtd_pnl", "ytd_pnl", "pytd_pnl"],
+        ),
+    )
+
     def __repr__(self):
         return f"<FactPnlGold(id={self.fact_id}, cc_id='{self.cc_id}', date={self.trade_date})>"
 
 
+# Typed result measures: fact_calculated_results.<prefix>_<measure> for prefix in
+# RESULT_VECTOR_PREFIXES (adjusted = former measure_vector, plug = former plug_vector)
+RESULT_MEASURES = ('daily', 'mtd', 'ytd', 'pytd')
+RESULT_VECTOR_PREFIXES = ('adjusted', 'natural', 'plug')
+RESULT_SCALE = Decimal('0.0001')
+
+
+def result_vector_columns(prefix: str, vector: Optional[Dict[str, Any]]) -> Dict[str, Optional[Decimal]]:
+    """
+    Map a {daily, mtd|wtd, ytd, pytd} vector to typed result columns.
+
+    Accepts the key sets and value types (Decimal, float, str) every writer used
+    for the JSONB vectors; 'wtd' is stored in the mtd column.
+
+    Args:
+        prefix: 'adjusted', 'natural' or 'plug'
+        vector: Measure dictionary, or None (all columns NULL)
+
+    Returns:
+        Dictionary column name -> Decimal (4 decimals) or None
+    """
+    if vector is None:
+        return {f"{prefix}_{measure}": None for measure in RESULT_MEASURES}
+    columns = {}
+    for measure in RESULT_MEASURES:
+        value = vector.get(measure)
+        if value is None and measure == 'mtd':
+            value = vector.get('wtd')
+        columns[f"{prefix}_{measure}"] = Decimal(str(value or 0)).quantize(RESULT_SCALE)
+    return columns
+
+
 class FactCalculatedResult(Base):
     """
     Calculated results (reporting_results) - output from waterfall engine.
     Each row represents a single node's calculated values for a specific run.
     Step 4.2: Added calculation_run_id for date-anchored temporal versioning.
+    
+    Measures are stored in typed NUMERIC columns (adjusted_*, natural_*, plug_*).
+    measure_vector / plug_vector are dict views over those columns (falling back to
+    the legacy JSONB columns for rows not yet migrated by scripts/migrate_result_vectors.py).
+    SQL readers that expect the JSONB shape use the fact_calculated_results_v view.
     """
     __tablename__ = "fact_calculated_results"
 
@@ -240,8 +297,24 @@ class FactCalculatedResult(Base):
     run_id = Column(UUID(as_uuid=True), ForeignKey("use_case_runs.run_id", ondelete="CASCADE"), nullable=True)  # Legacy, nullable for transition
     calculation_run_id = Column(UUID(as_uuid=True), ForeignKey("calculation_runs.id", ondelete="CASCADE"), nullable=True)  # Step 4.2: New date-anchored link
     node_id = Column(String(50), ForeignKey("dim_hierarchy.node_id"), nullable=False)
-    measure_vector = Column(JSONB, nullable=False)  # {daily: X, mtd: Y, ytd: Z, pytd: W}
-    plug_vector = Column(JSONB)  # {daily: X, mtd: Y, ytd: Z, pytd: W} - reconciliation plugs
+    # Legacy JSONB vectors {daily: X, mtd: Y, ytd: Z, pytd: W}: no longer written, NULL once migrated
+    measure_vector_json = Column("measure_vector", JSONB, nullable=True)
+    plug_vector_json = Column("plug_vector", JSONB, nullable=True)
+    # Adjusted (rule-applied) values
+    adjusted_daily = Column(Numeric(18, 4))
+    adjusted_mtd = Column(Numeric(18, 4))
+    adjusted_ytd = Column(Numeric(18, 4))
+    adjusted_pytd = Column(Numeric(18, 4))
+    # Natural (pre-rule rollup) values; NULL when the writer did not record them
+    natural_daily = Column(Numeric(18, 4))
+    natural_mtd = Column(Numeric(18, 4))
+    natural_ytd = Column(Numeric(18, 4))
+    natural_pytd = Column(Numeric(18, 4))
+    # Reconciliation plugs / variance; NULL when there is no plug
+    plug_daily = Column(Numeric(18, 4))
+    plug_mtd = Column(Numeric(18, 4))
+    plug_ytd = Column(Numeric(18, 4))
+    plug_pytd = Column(Numeric(18, 4))
     is_override = Column(Boolean, nullable=False, default=False)  # True if a rule was applied
     is_reconciled = Column(Boolean, nullable=False, default=True)  # Flag for UI to detect leaks
     created_at = Column(TIMESTAMP, nullable=False, server_default=func.now())
@@ -251,10 +324,88 @@ class FactCalculatedResult(Base):
     calculation_run = relationship("CalculationRun", back_populates="results")  # Step 4.2: New relationship
     node = relationship("DimHierarchy", back_populates="results")
 
+    # One run's rows in node order (run_results_select: DISTINCT ON node_id)
+    __table_args__ = (
+        Index("ix_fact_calculated_results_calc_run_node", "calculation_run_id", "node_id"),
+        Index("ix_fact_calculated_results_run_node", "run_id", "node_id"),
+    )
+
+    def _vector(self, prefix: str, legacy: Optional[Dict] = None) -> Optional[Dict[str, float]]:
+        if getattr(self, f"{prefix}_daily") is None:
+            return legacy
+        vector = {measure: float(getattr(self, f"{prefix}_{measure}") or 0) for measure in RESULT_MEASURES}
+        vector['wtd'] = vector['mtd']  # Both key spellings were written historically
+        return vector
+
+    @property
+    def measure_vector(self) -> Optional[Dict[str, float]]:
+        """Adjusted values as {daily, mtd, wtd, ytd, pytd} (legacy JSONB for unmigrated rows)."""
+        return self._vector('adjusted', self.measure_vector_json)
+
+    @measure_vector.setter
+    def measure_vector(self, vector: Optional[Dict[str, Any]]) -> None:
+        for column, value in result_vector_columns('adjusted', vector).items():
+            setattr(self, column, value)
+
+    @property
+    def plug_vector(self) -> Optional[Dict[str, float]]:
+        """Plug / variance values (legacy JSONB for unmigrated rows)."""
+        return self._vector('plug', self.plug_vector_json)
+
+    @plug_vector.setter
+    def plug_vector(self, vector: Optional[Dict[str, Any]]) -> None:
+        for column, value in result_vector_columns('plug', vector).items():
+            setattr(self, column, value)
+
+    @property
+    def natural_vector(self) -> Optional[Dict[str, float]]:
+        """Natural rollup values, or None if not recorded."""
+        return self._vector('natural')
+
+    @classmethod
+    def measure_sql(cls, prefix: str, measure: str):
+        """
+        SQL expression for one typed measure, falling back to the legacy JSONB
+        vector for unmigrated rows (usable in server-side SUMs over runs).
+        """
+        column = getattr(cls, f"{prefix}_{measure}")
+        legacy = {'adjusted': cls.measure_vector_json, 'plug': cls.plug_vector_json}.get(prefix)
+        if legacy is None:
+            return column
+        keys = ('mtd', 'wtd') if measure == 'mtd' else (measure,)
+        return func.coalesce(column, *(cast(legacy[key].astext, Numeric) for key in keys))
+
     def __repr__(self):
         return f"<FactCalculatedResult(id={self.result_id}, calc_run={self.calculation_run_id}, node='{self.node_id}', override={self.is_override})>"
 
 
+class FactResultSeries(Base):
+    """
+    Time-series results - typed numeric copy of the latest COMPLETED run per
+    (use case, PNL date), derived from fact_calculated_results.
+    The primary key (use_case_id, node_id, pnl_date) makes "node X over N COB dates"
+    a single index range scan instead of parsing every run's JSONB vectors.
+    Maintained by app.services.result_series.refresh_result_series.
+    """
+    __tablename__ = "fact_result_series"
+
+    use_case_id = Column(UUID(as_uuid=True), ForeignKey("use_cases.use_case_id", ondelete="CASCADE"), primary_key=True)
+    node_id = Column(String(200), primary_key=True)
+    pnl_date = Column(Date, primary_key=True)
+    calculation_run_id = Column(UUID(as_uuid=True), ForeignKey("calculation_runs.id", ondelete="CASCADE"), nullable=False)
+    daily = Column(Numeric(18, 4), nullable=False, default=0)
+    wtd = Column(Numeric(18, 4), nullable=False, default=0)
+    ytd = Column(Numeric(18, 4), nullable=False, default=0)
+    pytd = Column(Numeric(18, 4), nullable=False, default=0)
+    daily_variance = Column(Numeric(18, 4), nullable=False, default=0)  # ACTUAL - PRIOR (plug_vector)
+    wtd_variance = Column(Numeric(18, 4), nullable=False, default=0)
+    ytd_variance = Column(Numeric(18, 4), nullable=False, default=0)
+    is_override = Column(Boolean, nullable=False, default=False)
+
+    def __repr__(self):
+        return f"<FactResultSeries(use_case={self.use_case_id}, node='{self.node_id}', date={self.pnl_date}, daily={self.daily})>"
+
+
 class ReportRegistration(Base):
     """
     Report Registration table - stores report configurations.
@@ -321,6 +472,14 @@ class FactPnlEntries(Base):
     # Relationships
     use_case = relationship("UseCase")
 
+    # Rollups and date loads filter use case + scenario [+ date] and group by category_code
+    __table_args__ = (
+        Index(
+            "ix_fact_pnl_entries_engine", "use_case_id", "scenario", "pnl_date", "category_code",
+            postgresql_include=["daily_amount", "wtd_amount", "ytd_amount"],
+        ),
+    )
+
     def __repr__(self):
         return f"<FactPnlEntries(id={self.id}, use_case={self.use_case_id}, date={self.pnl_date}, scenario={self.scenario})>"
 
@@ -353,6 +512,19 @@ class FactPnlUseCase3(Base):
     # Audit Fields
     created_at = Column(TIMESTAMP(timezone=True), nullable=False, server_default=func.now())
 
+    # Strategy / product_line matching and backfill date windows
+    __table_args__ = (
+        Index(
+            "ix_fact_pnl_uc3_strategy", "strategy", "effective_date",
+            postgresql_include=["pnl_daily", "pnl_commission", "pnl_trade"],
+        ),
+        Index(
+            "ix_fact_pnl_uc3_product_line", "product_line", "effective_date",
+            postgresql_include=["pnl_daily", "pnl_commission", "pnl_trade"],
+        ),
+        Index("ix_fact_pnl_uc3_effective_date", "effective_date"),
+    )
+
     def __repr__(self):
         return f"<FactPnlUseCase3(id={self.entry_id}, date={self.effective_date}, strategy='{self.strategy}')>"
 
@@ -373,6 +545,9 @@ class CalculationRun(Base):
     status = Column(String(20), nullable=False, default="IN_PROGRESS")  # IN_PROGRESS, COMPLETED, FAILED
     triggered_by = Column(String(100), nullable=False)  # user_id
     calculation_duration_ms = Column(Integer, nullable=True)  # Performance tracking
+    stage_timings = Column(JSONB, nullable=True)  # Per-stage ms / queries / db_ms (app/services/stage_tracing.py)
+    # Delta storage: the run only stores rows that differ from this full run (see app/services/result_store.py)
+    base_run_id = Column(UUID(as_uuid=True), ForeignKey("calculation_runs.id"), nullable=True)
 
     # Relationships
     use_case = relationship("UseCase")
@@ -397,7 +572,13 @@ class HistorySnapshot(Base):
     
     # JSONB snapshots
     rules_snapshot = Column(JSONB)  # Array of rule objects: [{node_id, logic_en, sql_where, ...}]
-    results_snapshot = Column(JSONB)  # Array of result objects: [{node_id, natural_value, adjusted_value, plug, ...}]
+    results_snapshot = Column(JSONB)  # Legacy client-sent results: [{node_id, natural_value, adjusted_value, plug, ...}]
+    
+    # Server-generated archives: results as a compressed columnar blob (see app/services/snapshot_archive.py)
+    snapshot_format = Column(String(20), nullable=False, default='json', server_default='json')  # json, columnar_v1
+    results_blob = Column(LargeBinary, nullable=True)
+    node_count = Column(Integer, nullable=True)
+    calculation_run_id = Column(UUID(as_uuid=True), ForeignKey("calculation_runs.id", ondelete="SET NULL"), nullable=True)
     
     # Metadata
     notes = Column(Text, nullable=True)
@@ -408,3 +589,22 @@ class HistorySnapshot(Base):
 
     def __repr__(self):
         return f"<HistorySnapshot(id={self.snapshot_id}, use_case={self.use_case_id}, name='{self.snapshot_name}')>"
+
+
+class RuleTranslation(Base):
+    """
+    Persistent GenAI translation store - survives restarts and is shared by all workers.
+    Keyed by a hash of the normalized logic_en plus the translation schema version, so a
+    change to the prompt / field whitelist naturally invalidates old entries.
+    Only the table-independent predicate_json is stored; sql_where is re-derived per table.
+    """
+    __tablename__ = "rule_translations"
+
+    cache_key = Column(String(64), primary_key=True)  # sha256(schema_version:normalized_logic_en)
+    schema_version = Column(String(20), nullable=False)
+    normalized_logic_en = Column(Text, nullable=False)
+    predicate_json = Column(JSONB, nullable=False)
+    created_at = Column(TIMESTAMP, nullable=False, server_default=func.now())
+
+    def __repr__(self):
+        return f"<RuleTranslation(key='{self.cache_key[:8]}', version='{self.schema_version}')>"
@@ -0,0 +1,308 @@
+"""
+On-demand request profiling (opt-in, no redeploy needed).
+
+A request is profiled when:
+- it carries X-Profile-Token matching PROFILE_TOKEN (the response then carries
+  X-Profile-Id), or
+- PROFILE_SLOW_REQUEST_MS > 0 and its path starts with one of
+  PROFILE_AUTO_PATHS: it is profiled tentatively and the report is kept only
+  if the request took longer than the threshold.
+
+A profile holds:
+- a statistical stack sample of the process (one shared sampler thread reads
+  sys._current_frames() every PROFILE_INTERVAL_MS while any profile is active;
+  idle threads are skipped). Work offloaded to the threadpool is included.
+  Concurrent requests running at the same time also appear in the samples.
+- the SQL statements the request executed (statement, duration), captured by
+  Engine cursor events through a ContextVar that follows the request into
+  threadpool workers and the async engine.
+
+Reports are kept in memory (last PROFILE_MAX_REPORTS, per process) and served
+by GET /api/v1/admin/profiles[/{profile_id}]. With PROFILE_TOKEN unset,
+header-triggered profiling is disabled.
+
+Environment:
+    PROFILE_TOKEN              Shared secret for X-Profile-Token (default: unset = disabled)
+    PROFILE_SLOW_REQUEST_MS    Keep automatic profiles slower than this, 0 = off (default: 0)
+    PROFILE_AUTO_PATHS         Comma-separated path prefixes for automatic profiling
+    PROFILE_INTERVAL_MS        Sampling interval (default: 5)
+    PROFILE_MAX_REPORTS        Reports kept in memory (default: 50)
+"""
+
+import hmac
+import logging
+import os
+import sys
+import threading
+import time
+from collections import Counter, OrderedDict
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+from uuid import uuid4
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+PROFILE_TOKEN = os.getenv("PROFILE_TOKEN", "")
+PROFILE_SLOW_REQUEST_MS = int(os.getenv("PROFILE_SLOW_REQUEST_MS", "0"))
+PROFILE_AUTO_PATHS = tuple(
+    prefix.strip() for prefix in os.getenv(
+        "PROFILE_AUTO_PATHS", "/api/v1/use-cases,/api/v1/discovery,/api/v1/runs"
+    ).split(",") if prefix.strip()
+)
+PROFILE_INTERVAL_MS = float(os.getenv("PROFILE_INTERVAL_MS", "5"))
+PROFILE_MAX_REPORTS = int(os.getenv("PROFILE_MAX_REPORTS", "50"))
+
+PROFILE_HEADER = b"x-profile-token"
+PROFILE_ID_HEADER = b"x-profile-id"
+# Reading reports uses the same header; those requests are not profiled
+REPORTS_PATH = "/api/v1/admin/profiles"
+
+# Bounds on one report
+MAX_STACK_DEPTH = 64
+MAX_STATEMENTS = 500
+MAX_STATEMENT_CHARS = 2000
+TOP_FUNCTIONS = 40
+TOP_STACKS = 200
+
+# Leaf frames of threads blocked waiting for work
+_IDLE_FILES = ("threading.py", "selectors.py", "queue.py")
+
+_active_profile: ContextVar[Optional["RequestProfile"]] = ContextVar("request_profile", default=None)
+_reports: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+_reports_lock = threading.Lock()
+
+
+def _frame_label(code) -> str:
+    module = os.path.splitext(os.path.basename(code.co_filename))[0]
+    return f"{module}:{code.co_name}:{code.co_firstlineno}"
+
+
+class RequestProfile:
+    """Samples and SQL statements collected for one request."""
+
+    def __init__(self, method: str, path: str, query: str, trigger: str):
+        self.id = uuid4().hex
+        self.method = method
+        self.path = path
+        self.query = query
+        self.trigger = trigger
+        self.started_at = datetime.now(timezone.utc)
+        self.samples: Counter = Counter()
+        self.sample_count = 0
+        self.statements: List[Dict[str, Any]] = []
+        self.statement_count = 0
+        self.sql_ms = 0.0
+        self._lock = threading.Lock()
+
+    def add_statement(self, statement: str, elapsed_ms: float):
+        with self._lock:
+            self.statement_count += 1
+            self.sql_ms += elapsed_ms
+            if len(self.statements) < MAX_STATEMENTS:
+                self.statements.append({
+                    'statement': " ".join(statement.split())[:MAX_STATEMENT_CHARS],
+                    'ms': round(elapsed_ms, 3),
+                })
+
+    def report(self, duration_ms: float, status: int) -> Dict[str, Any]:
+        """Aggregate samples into top functions and collapsed stacks."""
+        self_samples: Counter = Counter()
+        total_samples: Counter = Counter()
+        for stack, count in self.samples.items():
+            self_samples[stack[-1]] += count
+            for label in set(stack):
+                total_samples[label] += count
+
+        # Share of samples x wall time (sampling runs slower than the nominal interval)
+        def estimate_ms(count: int) -> float:
+            return round(duration_ms * count / self.sample_count, 1) if self.sample_count else 0.0
+
+        return {
+            'id': self.id,
+            'method': self.method,
+            'path': self.path,
+            'query': self.query,
+            'status': status,
+            'trigger': self.trigger,
+            'started_at': self.started_at.isoformat(),
+            'duration_ms': round(duration_ms, 2),
+            'interval_ms': PROFILE_INTERVAL_MS,
+            'sample_count': self.sample_count,
+            'top_functions': [
+                {
+                    'function': label,
+                    'self_samples': self_samples[label],
+                    'total_samples': count,
+                    'self_ms_estimate': estimate_ms(self_samples[label]),
+                    'total_ms_estimate': estimate_ms(count),
+                }
+                for label, count in total_samples.most_common(TOP_FUNCTIONS)
+            ],
+            # Flamegraph "collapsed" format: root;...;leaf count
+            'stacks': [f"{';'.join(stack)} {count}" for stack, count in self.samples.most_common(TOP_STACKS)],
+            'sql': {
+                'count': self.statement_count,
+                'total_ms': round(self.sql_ms, 2),
+                'truncated': self.statement_count > len(self.statements),
+                'statements': self.statements,
+            },
+        }
+
+
+class _Sampler:
+    """One background thread sampling all thread stacks while profiles are active."""
+
+    def __init__(self):
+        self._profiles: set = set()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self, profile: RequestProfile):
+        with self._lock:
+            self._profiles.add(profile)
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+                self._thread.start()
+
+    def stop(self, profile: RequestProfile):
+        with self._lock:
+            self._profiles.discard(profile)
+
+    def _run(self):
+        interval = PROFILE_INTERVAL_MS / 1000
+        own_id = threading.get_ident()
+        while True:
+            with self._lock:
+                if not self._profiles:
+                    self._thread = None
+                    return
+            stacks = []
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id or frame.f_code.co_filename.endswith(_IDLE_FILES):
+                    continue
+                stack = []
+                while frame is not None and len(stack) < MAX_STACK_DEPTH:
+                    stack.append(_frame_label(frame.f_code))
+                    frame = frame.f_back
+                stacks.append(tuple(reversed(stack)))
+            with self._lock:
+                # Profiles stopped while sampling are no longer updated
+                for profile in self._profiles:
+                    profile.sample_count += 1
+                    profile.samples.update(stacks)
+            time.sleep(interval)
+
+
+_sampler = _Sampler()
+
+
+def _store_report(report: Dict[str, Any]):
+    with _reports_lock:
+        _reports[report['id']] = report
+        while len(_reports) > PROFILE_MAX_REPORTS:
+            _reports.popitem(last=False)
+
+
+def get_report(profile_id: str) -> Optional[Dict[str, Any]]:
+    """Stored report by ID, or None."""
+    with _reports_lock:
+        return _reports.get(profile_id)
+
+
+def list_reports() -> List[Dict[str, Any]]:
+    """Summaries of stored reports, newest first."""
+    with _reports_lock:
+        reports = list(_reports.values())
+    summary_keys = ('id', 'method', 'path', 'status', 'trigger', 'started_at', 'duration_ms', 'sample_count')
+    return [
+        dict(
+            {key: report[key] for key in summary_keys},
+            sql_count=report['sql']['count'],
+            sql_ms=report['sql']['total_ms'],
+        )
+        for report in reversed(reports)
+    ]
+
+
+def token_matches(token: Optional[str]) -> bool:
+    """Whether a presented token matches PROFILE_TOKEN (always False when unset)."""
+    return bool(PROFILE_TOKEN) and token is not None and hmac.compare_digest(token, PROFILE_TOKEN)
+
+
+class ProfilingMiddleware:
+    """Starts / stops request profiles (pass-through when profiling is not requested)."""
+
+    def __init__(self, app):
+        self.app = app
+
+    def _trigger(self, scope) -> Optional[str]:
+        if scope["path"].startswith(REPORTS_PATH):
+            return None
+        if PROFILE_TOKEN:
+            for name, value in scope.get("headers", ()):
+                if name == PROFILE_HEADER:
+                    return "header" if token_matches(value.decode("latin-1")) else None
+        if PROFILE_SLOW_REQUEST_MS > 0 and scope["path"].startswith(PROFILE_AUTO_PATHS):
+            return "slow"
+        return None
+
+    async def __call__(self, scope, receive, send):
+        trigger = self._trigger(scope) if scope["type"] == "http" else None
+        if trigger is None:
+            await self.app(scope, receive, send)
+            return
+
+        profile = RequestProfile(
+            scope.get("method", ""), scope["path"], scope.get("query_string", b"").decode("latin-1"), trigger
+        )
+        status = [500]
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+                if trigger == "header":
+                    message["headers"] = list(message.get("headers", [])) + [(PROFILE_ID_HEADER, profile.id.encode())]
+            await send(message)
+
+        token = _active_profile.set(profile)
+        _sampler.start(profile)
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            duration_ms = (time.perf_counter() - start) * 1000
+            _sampler.stop(profile)
+            _active_profile.reset(token)
+            if trigger == "header" or duration_ms >= PROFILE_SLOW_REQUEST_MS:
+                _store_report(profile.report(duration_ms, status[0]))
+                logger.info(
+                    f"[Profiling] {profile.method} {profile.path} ({trigger}) took {duration_ms:.0f}ms: "
+                    f"report {profile.id} ({profile.sample_count} samples, {profile.statement_count} statements)"
+                )
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _active_profile.get() is not None:
+        conn.info.setdefault('profile_start', []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    profile = _active_profile.get()
+    starts = conn.info.get('profile_start')
+    if profile is not None and starts:
+        profile.add_statement(statement, (time.perf_counter() - starts.pop()) * 1000)
+
+
+@event.listens_for(Engine, "handle_error")
+def _handle_error(exception_context):
+    # after_cursor_execute does not fire for failed statements
+    conn = exception_context.connection
+    starts = conn.info.get('profile_start') if conn is not None else None
+    if starts:
+        starts.pop()
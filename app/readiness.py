@@ -0,0 +1,135 @@
+"""
+Readiness tracking for Finance-Insight.
+
+Startup checks (schema verification, Gemini smoke test) used to run inside the
+FastAPI lifespan before the first request was served. In fast-start mode they run
+as a background task instead, and their outcome is reported by GET /ready while
+GET /health stays a pure liveness probe.
+
+Failed required checks are retried from /ready with exponential backoff:
+    READY_RETRY_MIN_SECONDS   First retry delay after a failure (default: 5)
+    READY_RETRY_MAX_SECONDS   Maximum retry delay (default: 60)
+"""
+
+import asyncio
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Dict
+
+logger = logging.getLogger(__name__)
+
+# Checks that must pass before /ready reports ready. GenAI is optional:
+# the app is fully usable (manual rules, calculations) without it.
+REQUIRED_CHECKS = ("database",)
+
+_checks: Dict[str, Dict[str, Any]] = {
+    "database": {"status": "pending", "detail": None, "duration_ms": None},
+    "genai": {"status": "pending", "detail": None, "duration_ms": None},
+}
+_started_at: float = time.time()
+
+READY_RETRY_MIN_SECONDS = float(os.getenv("READY_RETRY_MIN_SECONDS", "5"))
+READY_RETRY_MAX_SECONDS = float(os.getenv("READY_RETRY_MAX_SECONDS", "60"))
+
+# Consecutive failed retries and earliest next retry, per check
+_retry_state: Dict[str, Dict[str, float]] = {}
+_retry_lock = threading.Lock()
+
+
+def is_fast_start() -> bool:
+    """Fast-start mode (default on); FAST_START=false restores blocking startup checks."""
+    return os.getenv("FAST_START", "true").lower() not in ("0", "false", "no")
+
+
+def _run_check(name: str, check: Callable[[], Any]) -> None:
+    """Run one check and record its status, detail and duration."""
+    start = time.time()
+    try:
+        outcome = check()
+        # smoke_test_gemini reports failure by returning False
+        status = "failed" if outcome is False else "ok"
+        _checks[name].update(status=status, detail=None)
+    except Exception as e:
+        _checks[name].update(status="failed", detail=str(e))
+        logger.warning(f"[Readiness] {name} check failed: {e}")
+    finally:
+        _checks[name]["duration_ms"] = int((time.time() - start) * 1000)
+
+
+def check_database() -> None:
+    """Verify/create the database schema (init_app.init_db)."""
+    from init_app import init_db
+    init_db()
+
+
+def check_genai() -> bool:
+    """Gemini smoke test (skipped when GENAI_MODEL=stub)."""
+    if os.getenv("GENAI_MODEL", "").lower() == "stub":
+        return True
+    from app.engine.translator import smoke_test_gemini
+    return smoke_test_gemini()
+
+
+def run_startup_checks() -> None:
+    """Run all startup checks synchronously (legacy blocking mode)."""
+    _run_check("database", check_database)
+    _run_check("genai", check_genai)
+
+
+async def run_startup_checks_background() -> None:
+    """Run startup checks in worker threads without blocking the event loop."""
+    await asyncio.to_thread(_run_check, "database", check_database)
+    await asyncio.to_thread(_run_check, "genai", check_genai)
+    logger.info(f"[Readiness] Startup checks finished: {get_readiness()['checks']}")
+
+
+def retry_failed_required_checks() -> None:
+    """
+    Re-run required checks that failed (e.g. DB came up after the app).
+
+    Probes arrive every few seconds from every orchestrator; a retry runs at most
+    once per backoff interval (doubling up to READY_RETRY_MAX_SECONDS) and never
+    concurrently, so a down database is not hit with init_db on every probe.
+    """
+    if _checks["database"]["status"] != "failed":
+        return
+    if not _retry_lock.acquire(blocking=False):
+        return  # Another probe is retrying
+    try:
+        now = time.time()
+        # First retry one interval after the failure was first seen
+        state = _retry_state.setdefault("database", {"failures": 0, "next_retry_at": now + READY_RETRY_MIN_SECONDS})
+        if _checks["database"]["status"] != "failed" or now < state["next_retry_at"]:
+            return
+        _run_check("database", check_database)
+        if _checks["database"]["status"] == "ok":
+            _retry_state.pop("database", None)
+            logger.info("[Readiness] database check passed on retry")
+            return
+        delay = min(READY_RETRY_MAX_SECONDS, READY_RETRY_MIN_SECONDS * 2 ** state["failures"])
+        state["failures"] += 1
+        state["next_retry_at"] = time.time() + delay
+        logger.info(f"[Readiness] database retry {int(state['failures'])} failed, next retry in {delay:.0f}s")
+    finally:
+        _retry_lock.release()
+
+
+def is_ready() -> bool:
+    """True once every required check has passed."""
+    return all(_checks[name]["status"] == "ok" for name in REQUIRED_CHECKS)
+
+
+def get_readiness() -> Dict[str, Any]:
+    """
+    Readiness report for the /ready endpoint.
+
+    Returns:
+        Dictionary with overall status, per-check status and uptime
+    """
+    return {
+        "status": "ready" if is_ready() else "not_ready",
+        "checks": {name: dict(state) for name, state in _checks.items()},
+        "uptime_seconds": round(time.time() - _started_at, 3),
+    }
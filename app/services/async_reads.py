@@ -0,0 +1,381 @@
+"""
+Async read layer for Finance-Insight.
+
+Read-only queries used by the dashboard endpoints (/discovery, /results, /runs,
+/use-cases/{id}/hierarchy, /use-cases/{id}/timeseries). Each helper runs on its own AsyncSession (asyncpg),
+so independent lookups can be fanned out with asyncio.gather:
+
+    use_case, run, rules = await asyncio.gather(
+        get_use_case(use_case_id),
+        get_latest_calculation_run(use_case_id),
+        get_rules_data(use_case_id),
+    )
+
+Returned ORM objects are detached but fully loaded (expire_on_commit=False), so
+they can be handed to the existing sync engine code unchanged.
+
+If asyncpg is not installed, the same statements run on the sync pool in worker
+threads, so callers never need to branch.
+"""
+
+import asyncio
+import logging
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Callable, Dict, List, Optional
+from uuid import UUID
+
+from sqlalchemy import func, select, text
+from sqlalchemy.engine import Result
+
+from app.database import SessionLocal, get_async_session_factory
+from app.models import (
+    CalculationRun,
+    DimHierarchy,
+    FactCalculatedResult,
+    FactResultSeries,
+    MetadataRule,
+    ReportRegistration,
+    UseCase,
+    UseCaseRun,
+)
+from app.services.result_store import run_results_select
+
+logger = logging.getLogger(__name__)
+
+# Same recursive CTE as the sync discovery/results paths: node_id -> [root name, ..., node name].
+# {structure} is either a bind parameter or a sub-select resolving a use case's structure.
+_HIERARCHY_PATH_SQL = """
+    WITH RECURSIVE node_paths AS (
+        SELECT node_id, node_name, ARRAY[node_name]::text[] AS path
+        FROM dim_hierarchy
+        WHERE atlas_source = {structure} AND parent_node_id IS NULL
+
+        UNION ALL
+
+        SELECT h.node_id, h.node_name, np.path || h.node_name
+        FROM dim_hierarchy h
+        INNER JOIN node_paths np ON h.parent_node_id = np.node_id
+        WHERE h.atlas_source = {structure}
+    )
+    SELECT node_id, path FROM node_paths
+"""
+HIERARCHY_PATH_QUERY = text(_HIERARCHY_PATH_SQL.format(structure=":structure_id"))
+USE_CASE_PATH_QUERY = text(_HIERARCHY_PATH_SQL.format(
+    structure="(SELECT atlas_structure_id FROM use_cases WHERE use_case_id = :use_case_id)"
+))
+
+
+def _first(result: Result):
+    return result.scalars().first()
+
+
+def _all(result: Result):
+    return result.scalars().all()
+
+
+def _rows(result: Result):
+    return result.all()
+
+
+def _scalar(result: Result):
+    return result.scalar()
+
+
+def _execute_sync(stmt, params: Optional[Dict[str, Any]], shape: Callable[[Result], Any]):
+    """Fallback when asyncpg is unavailable: run on the sync pool."""
+    session = SessionLocal()
+    try:
+        return shape(session.execute(stmt, params or {}))
+    finally:
+        session.close()
+
+
+async def fetch(stmt, shape: Callable[[Result], Any], params: Optional[Dict[str, Any]] = None):
+    """
+    Execute one read statement on a dedicated session.
+
+    Args:
+        stmt: SQLAlchemy select() or text() statement
+        shape: Function turning the buffered Result into the return value
+        params: Bind parameters for text() statements
+
+    Returns:
+        shape(result)
+    """
+    factory = get_async_session_factory()
+    if factory is None:
+        return await asyncio.to_thread(_execute_sync, stmt, params, shape)
+    async with factory() as session:
+        return shape(await session.execute(stmt, params or {}))
+
+
+async def resolved(value: Any = None) -> Any:
+    """Already-known value as an awaitable (placeholder slot in asyncio.gather, e.g. cache hits)."""
+    return value
+
+
+# ---------------------------------------------------------------------------
+# Use cases / reports
+# ---------------------------------------------------------------------------
+
+async def get_use_case(use_case_id: UUID) -> Optional[UseCase]:
+    """Use case by ID."""
+    return await fetch(select(UseCase).where(UseCase.use_case_id == use_case_id), _first)
+
+
+async def get_use_case_for_structure(structure_id: str) -> Optional[UseCase]:
+    """First use case bound to an Atlas structure (discovery fallback lookup)."""
+    return await fetch(
+        select(UseCase).where(UseCase.atlas_structure_id == structure_id).limit(1), _first
+    )
+
+
+async def count_use_cases_for_structure(structure_id: str) -> int:
+    """Number of use cases sharing an Atlas structure."""
+    return await fetch(
+        select(func.count()).select_from(UseCase).where(UseCase.atlas_structure_id == structure_id),
+        _scalar,
+    )
+
+
+async def get_report_registration(report_id: UUID) -> Optional[ReportRegistration]:
+    """Report registration by ID."""
+    return await fetch(
+        select(ReportRegistration).where(ReportRegistration.report_id == report_id), _first
+    )
+
+
+# ---------------------------------------------------------------------------
+# Runs
+# ---------------------------------------------------------------------------
+
+async def list_calculation_runs(
+    pnl_date: Optional[date] = None,
+    use_case_id: Optional[UUID] = None,
+) -> List[CalculationRun]:
+    """
+    Calculation runs for UI date selection, most recent first.
+    Without filters, returns at most 100 runs.
+    """
+    stmt = select(CalculationRun)
+    if pnl_date:
+        stmt = stmt.where(CalculationRun.pnl_date == pnl_date)
+    if use_case_id:
+        stmt = stmt.where(CalculationRun.use_case_id == use_case_id)
+    stmt = stmt.order_by(CalculationRun.executed_at.desc())
+    if not pnl_date and not use_case_id:
+        stmt = stmt.limit(100)
+    return await fetch(stmt, _all)
+
+
+async def get_calculation_run(run_id: UUID, use_case_id: Optional[UUID] = None) -> Optional[CalculationRun]:
+    """Calculation run by ID (optionally scoped to a use case)."""
+    stmt = select(CalculationRun).where(CalculationRun.id == run_id)
+    if use_case_id:
+        stmt = stmt.where(CalculationRun.use_case_id == use_case_id)
+    return await fetch(stmt, _first)
+
+
+async def get_latest_calculation_run(use_case_id: Optional[UUID] = None) -> Optional[CalculationRun]:
+    """Most recently executed calculation run."""
+    stmt = select(CalculationRun)
+    if use_case_id:
+        stmt = stmt.where(CalculationRun.use_case_id == use_case_id)
+    return await fetch(stmt.order_by(CalculationRun.executed_at.desc()).limit(1), _first)
+
+
+async def get_latest_run_by_pnl_date(use_case_id: Optional[UUID] = None) -> Optional[CalculationRun]:
+    """
+    Latest run on the latest PNL date in one round trip
+    (equivalent to MAX(pnl_date) followed by the latest run for that date).
+    """
+    stmt = select(CalculationRun)
+    if use_case_id:
+        stmt = stmt.where(CalculationRun.use_case_id == use_case_id)
+    stmt = stmt.order_by(
+        CalculationRun.pnl_date.desc().nulls_last(),
+        CalculationRun.executed_at.desc(),
+    ).limit(1)
+    return await fetch(stmt, _first)
+
+
+async def get_use_case_run(run_id: UUID, use_case_id: UUID) -> Optional[UseCaseRun]:
+    """Legacy use case run by ID."""
+    return await fetch(
+        select(UseCaseRun).where(UseCaseRun.use_case_id == use_case_id, UseCaseRun.run_id == run_id),
+        _first,
+    )
+
+
+async def get_latest_use_case_run(use_case_id: UUID) -> Optional[UseCaseRun]:
+    """Most recent legacy use case run."""
+    return await fetch(
+        select(UseCaseRun)
+        .where(UseCaseRun.use_case_id == use_case_id)
+        .order_by(UseCaseRun.run_timestamp.desc())
+        .limit(1),
+        _first,
+    )
+
+
+async def count_run_results(run_id: UUID, include_legacy_run_id: bool = False) -> int:
+    """
+    Number of result nodes for a run (delta runs count their base rows too).
+
+    Args:
+        run_id: Calculation run ID
+        include_legacy_run_id: Also match rows written with the legacy run_id column
+    """
+    resolved = run_results_select(run_id, FactCalculatedResult.node_id)
+    if not include_legacy_run_id:
+        resolved = resolved.where(FactCalculatedResult.run_id.is_(None))
+    return await fetch(select(func.count()).select_from(resolved.subquery()), _scalar)
+
+
+async def get_run_results(run_id: UUID) -> List[FactCalculatedResult]:
+    """Calculated results for a run (new calculation_run_id or legacy run_id), resolved through its base run."""
+    return await fetch(run_results_select(run_id), _all)
+
+
+async def get_run_diff(
+    run_a: UUID,
+    run_b: UUID,
+    threshold: Decimal = Decimal('0'),
+    top_n: Optional[int] = None,
+    measure: Optional[str] = None,
+) -> List[Any]:
+    """Changed nodes between two runs, computed in one SQL join (see run_diff.run_diff_query)."""
+    from app.services.run_diff import run_diff_query
+    return await fetch(run_diff_query(run_a, run_b, threshold, top_n, measure), _rows)
+
+
+async def get_structure_results_sample(structure_id: str, limit: int = 5) -> List[FactCalculatedResult]:
+    """A few results for any run of a structure (diagnostics when a run has none)."""
+    return await fetch(
+        select(FactCalculatedResult)
+        .join(DimHierarchy, FactCalculatedResult.node_id == DimHierarchy.node_id)
+        .where(DimHierarchy.atlas_source == structure_id)
+        .limit(limit),
+        _all,
+    )
+
+
+async def get_result_series(
+    use_case_id: UUID,
+    node_ids: List[str],
+    start_date: date,
+    end_date: date,
+) -> List[FactResultSeries]:
+    """
+    Time-series rows (latest run per PNL date) for a node set and date range,
+    ordered by node and date: one range scan of the (use_case_id, node_id, pnl_date) key.
+    """
+    return await fetch(
+        select(FactResultSeries)
+        .where(
+            FactResultSeries.use_case_id == use_case_id,
+            FactResultSeries.node_id.in_(node_ids),
+            FactResultSeries.pnl_date.between(start_date, end_date),
+        )
+        .order_by(FactResultSeries.node_id, FactResultSeries.pnl_date),
+        _all,
+    )
+
+
+# ---------------------------------------------------------------------------
+# Hierarchy / rules
+# ---------------------------------------------------------------------------
+
+async def get_hierarchy_nodes(structure_id: str) -> List[DimHierarchy]:
+    """All dim_hierarchy rows of an Atlas structure."""
+    return await fetch(select(DimHierarchy).where(DimHierarchy.atlas_source == structure_id), _all)
+
+
+async def get_use_case_hierarchy_nodes(use_case_id: UUID) -> List[DimHierarchy]:
+    """
+    dim_hierarchy rows of a use case's structure, joined in SQL so it does not
+    have to wait for the use case lookup.
+    """
+    return await fetch(
+        select(DimHierarchy)
+        .join(UseCase, UseCase.atlas_structure_id == DimHierarchy.atlas_source)
+        .where(UseCase.use_case_id == use_case_id),
+        _all,
+    )
+
+
+async def _fetch_paths(query, params: Dict[str, Any]) -> Dict[str, List[str]]:
+    try:
+        rows = await fetch(query, _rows, params)
+    except Exception as e:
+        logger.warning(f"[AsyncReads] Path CTE failed ({params}): {e}")
+        return {}
+    return {str(row[0]): list(row[1]) if row[1] else [] for row in rows}
+
+
+async def get_hierarchy_paths(structure_id: str) -> Dict[str, List[str]]:
+    """
+    Path arrays (node names from the root) per node_id via the recursive CTE.
+
+    Returns:
+        Dictionary mapping node_id -> path list; empty if the CTE fails
+    """
+    return await _fetch_paths(HIERARCHY_PATH_QUERY, {"structure_id": structure_id})
+
+
+async def get_use_case_hierarchy_paths(use_case_id: UUID) -> Dict[str, List[str]]:
+    """Path arrays for a use case's structure (structure resolved in SQL)."""
+    return await _fetch_paths(USE_CASE_PATH_QUERY, {"use_case_id": use_case_id})
+
+
+async def get_rules_data(use_case_id: UUID) -> List[Any]:
+    """
+    Rule columns needed by the results view (same shape as the rules_cache entries).
+    """
+    return await fetch(
+        select(
+            MetadataRule.node_id,
+            MetadataRule.rule_id,
+            MetadataRule.logic_en,
+            MetadataRule.sql_where,
+            MetadataRule.rule_type,
+            MetadataRule.rule_expression,
+            MetadataRule.rule_dependencies,
+            MetadataRule.measure_name,
+        ).where(MetadataRule.use_case_id == use_case_id),
+        _rows,
+    )
+
+
+async def get_rules_modified_between(
+    use_case_id: UUID,
+    after: datetime,
+    until: datetime,
+) -> List[Any]:
+    """Rules of a use case last modified in (after, until] - rule edits between two runs."""
+    return await fetch(
+        select(
+            MetadataRule.rule_id,
+            MetadataRule.node_id,
+            MetadataRule.rule_type,
+            MetadataRule.logic_en,
+            MetadataRule.last_modified_by,
+            MetadataRule.last_modified_at,
+        )
+        .where(
+            MetadataRule.use_case_id == use_case_id,
+            MetadataRule.last_modified_at > after,
+            MetadataRule.last_modified_at <= until,
+        )
+        .order_by(MetadataRule.last_modified_at),
+        _rows,
+    )
+
+
+async def get_latest_rule_modified_at(use_case_id: UUID) -> Optional[datetime]:
+    """Most recent rule modification time for a use case (outdated-run check)."""
+    return await fetch(
+        select(func.max(MetadataRule.last_modified_at)).where(MetadataRule.use_case_id == use_case_id),
+        _scalar,
+    )
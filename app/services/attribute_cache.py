@@ -0,0 +1,115 @@
+"""
+Node Attribute Cache
+Derived region / product / desk / strategy attributes per hierarchy structure.
+
+Discovery used to derive attributes node by node on every request
+(substring scans over the finance dictionaries, inherited down the tree).
+Attributes are now derived once per structure version in a single top-down
+pass (app.engine.finance_hierarchy.derive_hierarchy_attributes) and read
+from here.
+
+Cache Strategy:
+- Cache Key: structure_id + root node ids
+- Version: fingerprint of the structure's (node_id, node_name, parent_node_id)
+  rows, so renames, moves and imports are picked up without explicit hooks
+- Invalidation: On version change or manual clear
+"""
+
+import logging
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.metrics import record_cache
+
+logger = logging.getLogger(__name__)
+
+# In-memory cache: {cache_key: (version, attributes_by_node_id, timestamp)}
+_attribute_cache: Dict[str, Tuple[int, Dict[str, Dict[str, Optional[str]]], float]] = {}
+
+
+def _get_cache_key(structure_id: str, root_ids: List[str]) -> str:
+    return f"attributes:{structure_id}:{','.join(root_ids)}"
+
+
+def structure_version(hierarchy_dict: Dict) -> int:
+    """Order-independent fingerprint of the nodes attributes are derived from."""
+    return hash(frozenset(
+        (node.node_id, node.node_name, node.parent_node_id) for node in hierarchy_dict.values()
+    ))
+
+
+def get_node_attributes_for_structure(
+    structure_id: str,
+    hierarchy_dict: Dict,
+    children_dict: Dict[str, List[str]],
+    root_ids: List[str]
+) -> Dict[str, Dict[str, Optional[str]]]:
+    """
+    Attributes of every node in the structure, derived at most once per version.
+
+    Args:
+        structure_id: Atlas structure identifier
+        hierarchy_dict: Dictionary mapping node_id -> node data
+        children_dict: Dictionary mapping parent_node_id -> list of children node_ids
+        root_ids: Root node ids of the tree
+
+    Returns:
+        Dictionary mapping node_id -> {region, product, desk, strategy} (read-only)
+    """
+    from app.engine.finance_hierarchy import derive_hierarchy_attributes
+
+    cache_key = _get_cache_key(structure_id, root_ids)
+    version = structure_version(hierarchy_dict)
+
+    cached = _attribute_cache.get(cache_key)
+    if cached is not None and cached[0] == version:
+        record_cache('attributes', 'hit')
+        return cached[1]
+
+    record_cache('attributes', 'miss')  # Includes outdated versions
+    start = time.perf_counter()
+    attributes = derive_hierarchy_attributes(hierarchy_dict, children_dict, root_ids)
+    _attribute_cache[cache_key] = (version, attributes, time.time())
+    logger.info(
+        f"[Attribute Cache] Derived attributes for {structure_id} "
+        f"({len(attributes)} nodes, {(time.perf_counter() - start) * 1000:.1f}ms)"
+    )
+    return attributes
+
+
+def invalidate_cache(structure_id: Optional[str] = None) -> int:
+    """
+    Invalidate cache entries.
+
+    Args:
+        structure_id: If provided, only invalidate entries for this structure.
+                      If None, invalidate all entries.
+
+    Returns:
+        Number of cache entries invalidated
+    """
+    if structure_id is None:
+        count = len(_attribute_cache)
+        _attribute_cache.clear()
+    else:
+        prefix = f"attributes:{structure_id}:"
+        keys = [key for key in _attribute_cache if key.startswith(prefix)]
+        for key in keys:
+            del _attribute_cache[key]
+        count = len(keys)
+    logger.info(f"[Attribute Cache] Cleared {count} cache entries")
+    return count
+
+
+def get_cache_stats() -> Dict[str, Any]:
+    """
+    Get cache statistics for monitoring.
+
+    Returns:
+        Dictionary with cache statistics
+    """
+    return {
+        "total_entries": len(_attribute_cache),
+        "valid_entries": len(_attribute_cache),
+        "nodes": sum(len(attributes) for _, attributes, _ in _attribute_cache.values()),
+    }
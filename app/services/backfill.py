@@ -0,0 +1,603 @@
+"""
+Historical backfill: snapshot runs for every P&L date in a date range.
+
+create_snapshot computes one pnl_date per call and re-resolves everything each
+time. A backfill instead:
+
+1. Resolves the use case, hierarchy, rules (Most Specific Wins) and the Math
+   rule dependency order once for the whole range.
+2. Streams the facts of the range in one date-ordered server-side cursor
+   (on its own connection, so windows can commit while it is open).
+3. Computes natural rollups for a window of dates at once: leaf values are
+   pivoted to a (leaf x date) matrix and parents are summed child arrays, so
+   the hierarchy is walked once per window instead of once per date.
+4. Executes each SQL rule once per window (GROUP BY date); Type 2B rules run
+   on the per-date frame.
+5. Persists every window (run headers + one bulk insert) in one transaction,
+   which is the checkpoint: a failed or interrupted backfill is resumed with
+   its backfill_id and skips the dates that already have a COMPLETED run.
+
+Unlike create_snapshot, facts (and SQL rules) are filtered to the date being
+calculated; create_snapshot reads the whole input table.
+
+Configuration (environment variables):
+    BACKFILL_WINDOW_DAYS    Dates computed and committed together (default: 20)
+    BACKFILL_YIELD_PER      Rows fetched per cursor round trip (default: 10000)
+"""
+
+import logging
+import os
+import time
+from datetime import date
+from decimal import Decimal
+from functools import reduce
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+from uuid import UUID, uuid4
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.engine.type2b_processor import Type2BQueryEngine
+from app.metrics import record_rules
+from app.engine.waterfall import (
+    DANGEROUS_SQL_PATTERNS,
+    FACT_MEASURE_COLUMNS,
+    get_measure_column_name,
+    load_hierarchy,
+    load_rules,
+)
+from app.models import CalculationRun, FactCalculatedResult, MetadataRule, UseCase
+from app.services.orchestrator import (
+    FACT_SELECT_COLUMNS,
+    apply_math_rules,
+    build_result_rows,
+    calculate_variance,
+    facts_frame_from_rows,
+    resolve_source_table,
+    split_rules,
+)
+from app.services.result_series import refresh_result_series
+from app.services.result_store import deduplicate_run_rows
+
+logger = logging.getLogger(__name__)
+
+BACKFILL_WINDOW_DAYS = int(os.getenv("BACKFILL_WINDOW_DAYS", "20"))
+BACKFILL_YIELD_PER = int(os.getenv("BACKFILL_YIELD_PER", "10000"))
+
+SCENARIOS = ("ACTUAL", "PRIOR")
+MEASURE_KEYS = ('daily', 'wtd', 'ytd')
+
+# Date column per source fact table
+FACT_DATE_COLUMNS = {
+    'fact_pnl_entries': 'pnl_date',
+    'fact_pnl_gold': 'trade_date',
+    'fact_pnl_use_case_3': 'effective_date',
+}
+
+# Tables without use_case_id / scenario columns: PRIOR reads the same rows as ACTUAL
+SHARED_SOURCE_TABLES = ('fact_pnl_gold', 'fact_pnl_use_case_3')
+
+
+def backfill_run_prefix(backfill_id: str) -> str:
+    """run_name prefix of every calculation run written by one backfill."""
+    return f"Backfill_{backfill_id}_"
+
+
+def completed_backfill_dates(session: Session, use_case_id: UUID, backfill_id: str) -> Set[date]:
+    """
+    P&L dates a backfill already committed (checkpoints to skip on resume).
+
+    Args:
+        session: Database session
+        use_case_id: Use case UUID
+        backfill_id: Backfill ID of the interrupted run
+
+    Returns:
+        Set of pnl_date values with a COMPLETED run
+    """
+    rows = (
+        session.query(CalculationRun.pnl_date)
+        .filter(
+            CalculationRun.use_case_id == use_case_id,
+            CalculationRun.run_name.like(f"{backfill_run_prefix(backfill_id)}%"),
+            CalculationRun.status == "COMPLETED",
+        )
+        .all()
+    )
+    return {_as_date(row[0]) for row in rows}
+
+
+def _as_date(value: Any) -> date:
+    # PostgreSQL returns date objects; drivers without a DATE type return ISO strings
+    if isinstance(value, str):
+        return date.fromisoformat(value[:10])
+    return value
+
+
+# ---------------------------------------------------------------------------
+# Fact streaming
+# ---------------------------------------------------------------------------
+
+def stream_fact_windows(
+    session: Session,
+    source_table: str,
+    use_case_id: UUID,
+    start_date: date,
+    end_date: date,
+    window_days: int,
+    skip_dates: Set[date]
+) -> Iterator[Dict[date, List]]:
+    """
+    Stream the facts of a date range in one date-ordered cursor.
+
+    Rows are FACT_SELECT_COLUMNS[source_table] followed by the date column.
+
+    Args:
+        session: Database session (its engine provides the streaming connection)
+        source_table: Source fact table name
+        use_case_id: Use case UUID (filters fact_pnl_entries)
+        start_date: First P&L date (inclusive)
+        end_date: Last P&L date (inclusive)
+        window_days: Dates per yielded window
+        skip_dates: Dates to drop (already completed)
+
+    Yields:
+        Dictionaries pnl_date -> rows, each with up to window_days dates, in date order
+    """
+    select_columns = FACT_SELECT_COLUMNS.get(source_table, FACT_SELECT_COLUMNS['fact_pnl_gold'])
+    date_column = FACT_DATE_COLUMNS.get(source_table, 'trade_date')
+    where = f"{date_column} BETWEEN :start_date AND :end_date"
+    params: Dict[str, Any] = {"start_date": start_date, "end_date": end_date}
+    if source_table == 'fact_pnl_entries':
+        where += " AND use_case_id = :uc_id AND scenario IN ('ACTUAL', 'PRIOR')"
+        params["uc_id"] = str(use_case_id)
+
+    sql = text(f"""
+        SELECT {select_columns},
+            {date_column} as pnl_date
+        FROM {source_table}
+        WHERE {where}
+        ORDER BY {date_column}
+    """)
+
+    window: Dict[date, List] = {}
+    # Separate connection: a server-side cursor does not survive the session's per-window commits
+    with session.get_bind().connect() as connection:
+        result = connection.execution_options(
+            stream_results=True, yield_per=BACKFILL_YIELD_PER
+        ).execute(sql, params)
+        for partition in result.partitions():
+            for row in partition:
+                pnl_date = _as_date(row[-1])
+                if pnl_date in skip_dates:
+                    continue
+                if pnl_date not in window and len(window) >= window_days:
+                    yield window
+                    window = {}
+                window.setdefault(pnl_date, []).append(row)
+    if window:
+        yield window
+
+
+def split_scenarios(rows: List, source_table: str) -> Dict[str, List]:
+    """Rows of one date by scenario (row[4]); shared tables serve both scenarios."""
+    if source_table in SHARED_SOURCE_TABLES:
+        return {scenario: rows for scenario in SCENARIOS}
+    by_scenario: Dict[str, List] = {scenario: [] for scenario in SCENARIOS}
+    for row in rows:
+        by_scenario.setdefault(row[4], []).append(row)
+    return by_scenario
+
+
+# ---------------------------------------------------------------------------
+# Date-axis rollup
+# ---------------------------------------------------------------------------
+
+def leaf_date_matrices(
+    window: Dict[date, List],
+    source_table: str,
+    scenario: str,
+    leaf_nodes: List,
+    dates: List[date]
+) -> Dict[str, np.ndarray]:
+    """
+    Leaf values of one scenario as (leaf x date) Decimal matrices per measure.
+
+    Args:
+        window: pnl_date -> rows (see stream_fact_windows)
+        source_table: Source fact table name
+        scenario: 'ACTUAL' or 'PRIOR'
+        leaf_nodes: Leaf node IDs (matrix rows)
+        dates: Window dates (matrix columns)
+
+    Returns:
+        Dictionary measure ('daily'/'wtd'/'ytd') -> object ndarray of Decimals
+    """
+    records = [
+        (row[0], pnl_date, row[1], row[2], row[3])
+        for pnl_date in dates
+        for row in split_scenarios(window[pnl_date], source_table)[scenario]
+    ]
+    zero = Decimal('0')
+    if not records:
+        return {measure: np.full((len(leaf_nodes), len(dates)), zero, dtype=object) for measure in MEASURE_KEYS}
+
+    df = pd.DataFrame.from_records(records, columns=['category_code', 'pnl_date', *MEASURE_KEYS])
+    for measure in MEASURE_KEYS:
+        df[measure] = [Decimal(str(value or 0.0)) for value in df[measure]]
+    sums = df.groupby(['category_code', 'pnl_date'], sort=False)[list(MEASURE_KEYS)].sum()
+
+    matrices = {}
+    for measure in MEASURE_KEYS:
+        pivot = sums[measure].unstack('pnl_date').reindex(index=leaf_nodes, columns=dates)
+        matrices[measure] = pivot.where(pivot.notna(), zero).to_numpy(dtype=object)
+    return matrices
+
+
+def rollup_date_axis(
+    hierarchy_dict: Dict,
+    children_dict: Dict,
+    leaf_nodes: List,
+    leaf_matrices: Dict[str, np.ndarray]
+) -> Dict[str, Dict[str, np.ndarray]]:
+    """
+    Natural rollup of every window date at once.
+
+    Same semantics as calculate_natural_rollup_from_entries, with each value
+    replaced by an array over the window dates: leaves take their matrix row,
+    parents (deepest first) the element-wise sum of their children.
+
+    Returns:
+        Dictionary node_id -> {measure: ndarray over dates}
+    """
+    results: Dict[str, Dict[str, np.ndarray]] = {
+        leaf_id: {measure: leaf_matrices[measure][i] for measure in MEASURE_KEYS}
+        for i, leaf_id in enumerate(leaf_nodes)
+    }
+    n_dates = next(iter(leaf_matrices.values())).shape[1]
+    zeros = np.full(n_dates, Decimal('0'), dtype=object)
+
+    parents = sorted(
+        (
+            (node_id, node.depth) for node_id, node in hierarchy_dict.items()
+            if not node.is_leaf and children_dict.get(node_id)
+        ),
+        key=lambda item: -item[1],
+    )
+    for node_id, _ in parents:
+        child_results = [results[child_id] for child_id in children_dict[node_id] if child_id in results]
+        results[node_id] = {
+            measure: reduce(np.add, (child[measure] for child in child_results), zeros)
+            for measure in MEASURE_KEYS
+        }
+    return results
+
+
+def results_for_date(axis_results: Dict[str, Dict[str, np.ndarray]], index: int) -> Dict[str, Dict[str, Decimal]]:
+    """One date's column of rollup_date_axis output, in the usual results shape."""
+    return {
+        node_id: {measure: values[measure][index] for measure in MEASURE_KEYS}
+        for node_id, values in axis_results.items()
+    }
+
+
+# ---------------------------------------------------------------------------
+# Rules
+# ---------------------------------------------------------------------------
+
+def effective_rules(
+    sql_rules: Dict[str, MetadataRule],
+    hierarchy_dict: Dict,
+    children_dict: Dict
+) -> List[MetadataRule]:
+    """
+    Rules that apply under "Most Specific Wins" (no descendant has a rule),
+    resolved once for the whole range (see apply_rules_to_results).
+    """
+    def has_descendant_rule(node_id: str) -> bool:
+        stack = list(children_dict.get(node_id, []))
+        while stack:
+            child_id = stack.pop()
+            if child_id in sql_rules:
+                return True
+            stack.extend(children_dict.get(child_id, []))
+        return False
+
+    return [
+        rule for node_id, rule in sql_rules.items()
+        if node_id in hierarchy_dict and not has_descendant_rule(node_id)
+    ]
+
+
+def _zero_override() -> Dict[str, Decimal]:
+    return {measure: Decimal('0') for measure in MEASURE_KEYS}
+
+
+def execute_sql_rule_by_date(
+    session: Session,
+    rule: MetadataRule,
+    source_table: str,
+    use_case_id: UUID,
+    dates: List[date]
+) -> Dict[Tuple[date, str], Dict[str, Decimal]]:
+    """
+    Execute a Type 1/2 rule for every window date in one grouped query.
+
+    Mirrors apply_rule_override (target column from measure_name, wtd/ytd from
+    the table's mtd/ytd columns), restricted to the window dates and, for
+    fact_pnl_entries, to the use case and scenario.
+
+    Returns:
+        Dictionary (pnl_date, scenario) -> {daily, wtd, ytd}; missing keys mean zero
+    """
+    sql_where = (rule.sql_where or '').strip()
+    if not sql_where:
+        return {}
+    sql_where_upper = sql_where.upper()
+    for pattern in DANGEROUS_SQL_PATTERNS:
+        if pattern in sql_where_upper:
+            logger.error(f"[Backfill] Rule {rule.rule_id} contains dangerous SQL pattern: {pattern}")
+            return {}
+
+    date_column = FACT_DATE_COLUMNS.get(source_table, 'trade_date')
+    _, mtd_column, ytd_column, _ = FACT_MEASURE_COLUMNS.get(source_table, FACT_MEASURE_COLUMNS['fact_pnl_gold'])
+    target_column = get_measure_column_name(rule.measure_name or 'daily_pnl', source_table)
+    measures = ", ".join(
+        f"COALESCE(SUM({column}), 0)" if column else "0"
+        for column in (target_column, mtd_column, ytd_column)
+    )
+
+    scoped = source_table == 'fact_pnl_entries'
+    scenario_select = "scenario" if scoped else "'ACTUAL'"
+    scope = " AND use_case_id = :uc_id AND scenario IN ('ACTUAL', 'PRIOR')" if scoped else ""
+    sql = text(f"""
+        SELECT {date_column}, {scenario_select}, {measures}
+        FROM {source_table}
+        WHERE ({sql_where})
+        AND {date_column} BETWEEN :start_date AND :end_date{scope}
+        GROUP BY {date_column}{', scenario' if scoped else ''}
+    """)
+    params: Dict[str, Any] = {"start_date": dates[0], "end_date": dates[-1]}
+    if scoped:
+        params["uc_id"] = str(use_case_id)
+
+    try:
+        # Savepoint: a broken sql_where must not abort the window's transaction
+        with session.begin_nested():
+            rows = session.execute(sql, params).fetchall()
+    except Exception as e:
+        if sql_where != '1=1':
+            logger.warning(f"[Backfill] Rule execution failed for node {rule.node_id}: {e}")
+        return {}
+
+    values = {}
+    for row in rows:
+        override = {
+            'daily': Decimal(str(row[2] or 0)),
+            'wtd': Decimal(str(row[3] or 0)),  # mtd column maps to wtd (as in apply_rules_to_results)
+            'ytd': Decimal(str(row[4] or 0)),
+        }
+        pnl_date = _as_date(row[0])
+        if scoped:
+            values[(pnl_date, row[1])] = override
+        else:
+            for scenario in SCENARIOS:
+                values[(pnl_date, scenario)] = override
+    return values
+
+
+# ---------------------------------------------------------------------------
+# Backfill run
+# ---------------------------------------------------------------------------
+
+def _elapsed_ms(start: float) -> int:
+    return int((time.perf_counter() - start) * 1000)
+
+
+def run_backfill(
+    use_case_id: UUID,
+    start_date: date,
+    end_date: date,
+    session: Session,
+    triggered_by: str = "system",
+    resume_backfill_id: Optional[str] = None,
+    window_days: Optional[int] = None
+) -> Dict[str, Any]:
+    """
+    Create snapshot runs for every P&L date with facts in [start_date, end_date].
+
+    Each window of dates is committed on its own. If a window fails, the
+    backfill stops there; already committed dates are kept and are skipped
+    when the backfill is resumed with the returned backfill_id.
+
+    Args:
+        use_case_id: Use case UUID
+        start_date: First P&L date (inclusive)
+        end_date: Last P&L date (inclusive)
+        session: Database session
+        triggered_by: User ID recorded on the calculation runs
+        resume_backfill_id: backfill_id of an interrupted backfill to continue
+        window_days: Dates per window/commit (default: BACKFILL_WINDOW_DAYS)
+
+    Returns:
+        Backfill report:
+        {
+            'backfill_id': str,
+            'status': 'COMPLETED' | 'PARTIAL' | 'FAILED',
+            'error': Optional[str],
+            'dates_completed': [...], 'dates_skipped': [...], 'dates_without_facts': int,
+            'runs': [{pnl_date, calculation_run_id, result_count}],
+            'result_count': int,
+            'timings_ms': {prepare, stream, rollup, rules, persist, total}
+        }
+
+    Raises:
+        ValueError: If the range, use case, hierarchy or Math rules are invalid
+    """
+    backfill_start = time.perf_counter()
+    if start_date > end_date:
+        raise ValueError(f"start_date {start_date} is after end_date {end_date}")
+    window_days = max(1, window_days or BACKFILL_WINDOW_DAYS)
+    backfill_id = resume_backfill_id or uuid4().hex[:12]
+    timings = {'prepare': 0, 'stream': 0, 'rollup': 0, 'rules': 0, 'persist': 0}
+
+    # Resolve everything that does not depend on the date once
+    stage_start = time.perf_counter()
+    use_case = session.query(UseCase).filter(UseCase.use_case_id == use_case_id).first()
+    if not use_case:
+        raise ValueError(f"Use case '{use_case_id}' not found")
+    source_table = resolve_source_table(use_case)
+    hierarchy_dict, children_dict, leaf_nodes = load_hierarchy(session, use_case_id)
+    if not hierarchy_dict:
+        raise ValueError(f"No hierarchy found for use case '{use_case_id}'")
+    sql_rules, sorted_math_rules = split_rules(load_rules(session, use_case_id), hierarchy_dict)
+    rules_to_apply = effective_rules(sql_rules, hierarchy_dict, children_dict)
+    type2b_rules = [rule for rule in rules_to_apply if rule.rule_type == 'FILTER_ARITHMETIC']
+    filter_rules = [rule for rule in rules_to_apply if rule.rule_type != 'FILTER_ARITHMETIC']
+    active_rules = {**sql_rules, **{rule.node_id: rule for rule in sorted_math_rules}}
+    skip_dates = completed_backfill_dates(session, use_case_id, backfill_id) if resume_backfill_id else set()
+    session.commit()  # Release the read transaction before the long-running stream
+    timings['prepare'] = _elapsed_ms(stage_start)
+
+    logger.info(
+        f"[Backfill] {backfill_id}: use case {use_case_id} ({source_table}) {start_date}..{end_date}, "
+        f"{len(hierarchy_dict)} nodes, {len(filter_rules)} SQL / {len(type2b_rules)} Type 2B / "
+        f"{len(sorted_math_rules)} Math rules, {len(skip_dates)} dates already completed"
+    )
+
+    runs_report = []
+    dates_completed: List[date] = []
+    error = None
+    windows = stream_fact_windows(session, source_table, use_case_id, start_date, end_date, window_days, skip_dates)
+    stream_start = time.perf_counter()
+    for window in windows:
+        timings['stream'] += _elapsed_ms(stream_start)
+        window_start = time.perf_counter()
+        dates = sorted(window)
+        try:
+            # Natural rollups: one hierarchy pass per scenario for all window dates
+            stage_start = time.perf_counter()
+            axis_results = {
+                scenario: rollup_date_axis(
+                    hierarchy_dict, children_dict, leaf_nodes,
+                    leaf_date_matrices(window, source_table, scenario, leaf_nodes, dates)
+                )
+                for scenario in SCENARIOS
+            }
+            timings['rollup'] += _elapsed_ms(stage_start)
+
+            # SQL rules: one grouped query per rule for the whole window
+            stage_start = time.perf_counter()
+            rule_values = {
+                rule.node_id: execute_sql_rule_by_date(session, rule, source_table, use_case_id, dates)
+                for rule in filter_rules
+            }
+
+            window_rows = []
+            window_runs = []
+            for index, pnl_date in enumerate(dates):
+                scenario_rows = split_scenarios(window[pnl_date], source_table) if type2b_rules else {}
+                adjusted = {}
+                natural = {}
+                for scenario in SCENARIOS:
+                    natural[scenario] = results_for_date(axis_results[scenario], index)
+                    results = dict(natural[scenario])
+                    for rule in filter_rules:
+                        results[rule.node_id] = rule_values[rule.node_id].get((pnl_date, scenario), _zero_override())
+                    if type2b_rules:
+                        engine = Type2BQueryEngine(facts_frame_from_rows(scenario_rows[scenario], source_table))
+                        for rule in type2b_rules:
+                            try:
+                                value = engine.execute_rule(rule, source_table)
+                            except Exception as e:
+                                logger.error(f"[Backfill] Type 2B rule for node {rule.node_id} failed on {pnl_date}: {e}")
+                                value = Decimal('0')
+                            results[rule.node_id] = {'daily': value, 'wtd': Decimal('0'), 'ytd': Decimal('0')}
+                    if sorted_math_rules:
+                        apply_math_rules(results, sorted_math_rules, scenario)
+                    adjusted[scenario] = results
+
+                calculation_run_id = uuid4()
+                rows = build_result_rows(
+                    calculation_run_id, adjusted['ACTUAL'],
+                    calculate_variance(adjusted['ACTUAL'], adjusted['PRIOR']), active_rules,
+                    natural['ACTUAL']
+                )
+                # Re-backfilled dates store only the rows that differ from the previous full run
+                base_run_id, stored_rows = deduplicate_run_rows(session, use_case_id, pnl_date, rows, calculation_run_id)
+                window_rows.extend(stored_rows)
+                window_runs.append((pnl_date, calculation_run_id, len(rows), base_run_id))
+                record_rules(active_rules.values())
+            timings['rules'] += _elapsed_ms(stage_start)
+
+            # Checkpoint: the window's runs and results in one transaction
+            stage_start = time.perf_counter()
+            duration_ms = _elapsed_ms(window_start) // len(dates)
+            session.add_all([
+                CalculationRun(
+                    id=calculation_run_id,
+                    pnl_date=pnl_date,
+                    use_case_id=use_case_id,
+                    run_name=f"{backfill_run_prefix(backfill_id)}{pnl_date.strftime('%Y%m%d')}",
+                    status="COMPLETED",
+                    triggered_by=triggered_by,
+                    calculation_duration_ms=duration_ms,
+                    base_run_id=base_run_id,
+                )
+                for pnl_date, calculation_run_id, _, base_run_id in window_runs
+            ])
+            session.flush()  # Run headers before their results (FK)
+            session.bulk_insert_mappings(FactCalculatedResult, window_rows)
+            refresh_result_series(session, [calculation_run_id for _, calculation_run_id, _, _ in window_runs])
+            session.commit()
+            timings['persist'] += _elapsed_ms(stage_start)
+        except Exception as e:
+            session.rollback()
+            error = f"Window {dates[0]}..{dates[-1]} failed: {e}"
+            logger.error(f"[Backfill] {backfill_id}: {error}", exc_info=True)
+            windows.close()
+            break
+
+        dates_completed.extend(dates)
+        runs_report.extend(
+            {'pnl_date': pnl_date.isoformat(), 'calculation_run_id': str(run_id), 'result_count': count}
+            for pnl_date, run_id, count, _ in window_runs
+        )
+        logger.info(
+            f"[Backfill] {backfill_id}: committed {len(dates)} dates {dates[0]}..{dates[-1]} "
+            f"({len(window_rows)} results) in {_elapsed_ms(window_start)}ms"
+        )
+        stream_start = time.perf_counter()
+
+    timings['total'] = _elapsed_ms(backfill_start)
+    if error is None:
+        status = 'COMPLETED'
+    elif dates_completed or skip_dates:
+        status = 'PARTIAL'
+    else:
+        status = 'FAILED'
+
+    days_in_range = (end_date - start_date).days + 1
+    result_count = sum(run['result_count'] for run in runs_report)
+    logger.info(
+        f"[Backfill] {backfill_id} {status}: {len(dates_completed)} dates, {result_count} results "
+        f"in {timings['total']}ms ({timings})"
+    )
+    return {
+        'backfill_id': backfill_id,
+        'use_case_id': str(use_case_id),
+        'source_table': source_table,
+        'status': status,
+        'error': error,
+        'dates_completed': [pnl_date.isoformat() for pnl_date in dates_completed],
+        'dates_skipped': sorted(pnl_date.isoformat() for pnl_date in skip_dates if start_date <= pnl_date <= end_date),
+        'dates_without_facts': (
+            days_in_range - len(dates_completed) - len([d for d in skip_dates if start_date <= d <= end_date])
+            if error is None else None
+        ),
+        'runs': runs_report,
+        'result_count': result_count,
+        'timings_ms': timings,
+    }
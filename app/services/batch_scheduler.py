@@ -0,0 +1,512 @@
+"""
+Batch Scheduler for end-of-day (COB) calculation runs.
+
+Runs a set of (use_case, pnl_date) snapshot jobs in one pass instead of one
+create_snapshot call per use case:
+
+1. Jobs are grouped by source table (orchestrator.resolve_source_table).
+2. Each source table is scanned once: fact_pnl_gold / fact_pnl_use_case_3 are
+   loaded once and shared by every job on them; fact_pnl_entries is loaded
+   with one `use_case_id IN (...)` query and split per use case and scenario.
+3. Natural rollups are computed across a process pool. Frames are
+   pre-aggregated per node key and handed to each worker once (pool
+   initializer), so tasks only carry the hierarchy. Identical rollups
+   (same structure, same frame) are computed once.
+4. Rules, Math rules and variance run in the parent (SQL rules need the
+   session). Type 2B engines are planned like create_snapshot's
+   (type2b_sql.create_type2b_engine), one per (table, scope) over the rules of
+   every job reading the frame.
+5. All calculation runs and fact_calculated_results rows are written in a
+   single transaction with one bulk insert.
+
+Results are identical to create_snapshot for the same inputs. The planner may
+pick a different Type 2B backend for a batch than for a single run (it sees
+more rules); both backends return the same values
+(scripts/verify_type2b_backends.py).
+
+Configuration (environment variables):
+    BATCH_MAX_WORKERS    Rollup worker processes (default: min(4, CPU count); 1 = inline)
+"""
+
+import logging
+import multiprocessing
+import os
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from datetime import date
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple
+from uuid import UUID, uuid4
+
+import pandas as pd
+from sqlalchemy import bindparam, text
+from sqlalchemy.orm import Session
+
+from app.engine.type2b_sql import create_type2b_engine, type2b_scope
+from app.metrics import record_rules
+from app.engine.waterfall import load_hierarchy, load_rules
+from app.models import CalculationRun, FactCalculatedResult, UseCase
+from app.services.orchestrator import (
+    FACT_SELECT_COLUMNS,
+    apply_math_rules,
+    apply_rules_to_results,
+    build_result_rows,
+    calculate_natural_rollup_from_entries,
+    calculate_variance,
+    facts_frame_from_rows,
+    resolve_source_table,
+    split_rules,
+)
+from app.services.result_series import refresh_result_series
+from app.services.result_store import deduplicate_run_rows
+
+logger = logging.getLogger(__name__)
+
+BATCH_MAX_WORKERS = int(os.getenv("BATCH_MAX_WORKERS", str(min(4, os.cpu_count() or 1))))
+
+SCENARIOS = ("ACTUAL", "PRIOR")
+ROLLUP_COLUMNS = ['category_code', 'daily_amount', 'wtd_amount', 'ytd_amount']
+
+
+@dataclass
+class BatchJob:
+    """
+    One snapshot to compute in a batch.
+
+    Attributes:
+        use_case_id: Use case UUID
+        pnl_date: P&L date (COB date) of the calculation run
+        run_name: Optional run name (defaults to the create_snapshot format)
+    """
+    use_case_id: UUID
+    pnl_date: date
+    run_name: Optional[str] = None
+
+
+class RollupNode(NamedTuple):
+    """Node attributes calculate_natural_rollup_from_entries needs (picklable)."""
+    depth: int
+    is_leaf: bool
+
+
+# ---------------------------------------------------------------------------
+# Fact loading (one scan per source table)
+# ---------------------------------------------------------------------------
+
+def frame_key(source_table: str, use_case_id: UUID, scenario: str) -> str:
+    """Key of the fact frame a (use case, scenario) reads."""
+    if source_table == 'fact_pnl_entries':
+        return f"{source_table}:{use_case_id}:{scenario}"
+    # load_facts_for_date applies no use case / scenario filter to these tables
+    return source_table
+
+
+def load_source_frames(session: Session, source_table: str, use_case_ids: Iterable[UUID]) -> Dict[str, pd.DataFrame]:
+    """
+    Load every frame the jobs of one source table need with a single query.
+
+    Args:
+        session: Database session
+        source_table: Source fact table name
+        use_case_ids: Use cases reading the table
+
+    Returns:
+        Dictionary frame_key -> DataFrame (same shape as load_facts_for_date)
+    """
+    select_columns = FACT_SELECT_COLUMNS.get(source_table, FACT_SELECT_COLUMNS['fact_pnl_gold'])
+
+    if source_table != 'fact_pnl_entries':
+        rows = session.execute(text(f"SELECT {select_columns} FROM {source_table}")).fetchall()
+        return {source_table: facts_frame_from_rows(rows, source_table)}
+
+    use_case_ids = list(use_case_ids)
+    sql = text(f"""
+        SELECT {select_columns},
+            use_case_id
+        FROM {source_table}
+        WHERE use_case_id IN :uc_ids
+        AND scenario IN :scenarios
+    """).bindparams(bindparam("uc_ids", expanding=True), bindparam("scenarios", expanding=True))
+    rows = session.execute(sql, {
+        "uc_ids": [str(use_case_id) for use_case_id in use_case_ids],
+        "scenarios": list(SCENARIOS),
+    }).fetchall()
+
+    grouped: Dict[str, List] = defaultdict(list)
+    for row in rows:
+        # row[4] = scenario, row[-1] = use_case_id
+        grouped[frame_key(source_table, UUID(str(row[-1])), row[4])].append(row)
+
+    frames = {}
+    for use_case_id in use_case_ids:
+        for scenario in SCENARIOS:
+            key = frame_key(source_table, use_case_id, scenario)
+            group = grouped.get(key)
+            frames[key] = facts_frame_from_rows(group, source_table) if group else pd.DataFrame(columns=ROLLUP_COLUMNS)
+    return frames
+
+
+def aggregate_by_node(facts_df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Pre-aggregate a fact frame per node key for the natural rollup.
+
+    calculate_natural_rollup_from_entries sums fact rows per leaf, so summing per
+    category_code first gives the same results from a much smaller frame.
+    """
+    if facts_df.empty or 'category_code' not in facts_df.columns:
+        return pd.DataFrame(columns=ROLLUP_COLUMNS)
+    return (
+        facts_df[ROLLUP_COLUMNS]
+        .groupby('category_code', sort=False)[ROLLUP_COLUMNS[1:]]
+        .sum()
+        .reset_index()
+    )
+
+
+# ---------------------------------------------------------------------------
+# Rollup workers
+# ---------------------------------------------------------------------------
+
+_worker_frames: Dict[str, pd.DataFrame] = {}
+
+
+def _init_worker(frames: Dict[str, pd.DataFrame]) -> None:
+    """Process pool initializer: receive the aggregated frames once per worker."""
+    global _worker_frames
+    _worker_frames = frames
+
+
+def _rollup_task(key: str, hierarchy_spec: Tuple[Dict, Dict, List]) -> Tuple[Dict, int]:
+    """Natural rollup of one frame over one hierarchy; returns (results, elapsed_ms)."""
+    start = time.perf_counter()
+    hierarchy_dict, children_dict, leaf_nodes = hierarchy_spec
+    results = calculate_natural_rollup_from_entries(hierarchy_dict, children_dict, leaf_nodes, _worker_frames[key])
+    return results, int((time.perf_counter() - start) * 1000)
+
+
+def _run_rollups(
+    tasks: Dict[Tuple[str, str], Tuple[str, Tuple]],
+    frames: Dict[str, pd.DataFrame],
+    max_workers: int
+) -> Dict[Tuple[str, str], Tuple[Dict, int]]:
+    """
+    Execute rollup tasks, in a process pool when there is more than one.
+
+    Args:
+        tasks: (structure_id, frame_key) -> (frame_key, hierarchy_spec)
+        frames: Aggregated frames by frame_key
+        max_workers: Worker processes
+
+    Returns:
+        (structure_id, frame_key) -> (natural results, elapsed_ms)
+    """
+    if max_workers <= 1 or len(tasks) <= 1:
+        _init_worker(frames)
+        try:
+            return {task_key: _rollup_task(*args) for task_key, args in tasks.items()}
+        finally:
+            _init_worker({})
+
+    # spawn: the API process is multi-threaded, fork() is not safe there
+    with ProcessPoolExecutor(
+        max_workers=min(max_workers, len(tasks)),
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_worker,
+        initargs=(frames,),
+    ) as executor:
+        futures = {task_key: executor.submit(_rollup_task, *args) for task_key, args in tasks.items()}
+        return {task_key: future.result() for task_key, future in futures.items()}
+
+
+# ---------------------------------------------------------------------------
+# Batch run
+# ---------------------------------------------------------------------------
+
+def _elapsed_ms(start: float) -> int:
+    return int((time.perf_counter() - start) * 1000)
+
+
+def run_batch(
+    jobs: List[BatchJob],
+    session: Session,
+    triggered_by: str = "system",
+    max_workers: Optional[int] = None
+) -> Dict[str, Any]:
+    """
+    Compute a batch of snapshot jobs and persist them in one transaction.
+
+    A failing job (unknown use case, missing hierarchy, rule error) is reported
+    as FAILED without affecting the other jobs. If the final bulk persist fails,
+    nothing is written and the error is raised.
+
+    Args:
+        jobs: (use_case, pnl_date) jobs
+        session: Database session
+        triggered_by: User ID recorded on the calculation runs
+        max_workers: Rollup worker processes (default: BATCH_MAX_WORKERS)
+
+    Returns:
+        Batch report:
+        {
+            'status': 'COMPLETED' | 'PARTIAL' | 'FAILED',
+            'jobs': [{use_case_id, pnl_date, calculation_run_id, status, error,
+                      source_table, rules_applied, result_count, timings_ms}],
+            'tables': {source_table: {jobs, rows, load_ms}},
+            'result_count': int,
+            'timings_ms': {load, prepare, rollup, rules, persist, total}
+        }
+    """
+    batch_start = time.perf_counter()
+    max_workers = BATCH_MAX_WORKERS if max_workers is None else max_workers
+    timings = {}
+
+    reports = [
+        {
+            'use_case_id': str(job.use_case_id),
+            'pnl_date': job.pnl_date.isoformat(),
+            'calculation_run_id': None,
+            'status': 'PENDING',
+            'error': None,
+            'source_table': None,
+            'rules_applied': 0,
+            'result_count': 0,
+            'timings_ms': {},
+        }
+        for job in jobs
+    ]
+
+    def fail(index: int, error: str) -> None:
+        reports[index]['status'] = 'FAILED'
+        reports[index]['error'] = error
+        logger.warning(f"[Batch] Job {jobs[index].use_case_id} @ {jobs[index].pnl_date} failed: {error}")
+
+    # Use cases in one query
+    use_case_ids = {job.use_case_id for job in jobs}
+    use_cases = {
+        use_case.use_case_id: use_case
+        for use_case in session.query(UseCase).filter(UseCase.use_case_id.in_(use_case_ids)).all()
+    } if use_case_ids else {}
+
+    jobs_by_table: Dict[str, List[int]] = defaultdict(list)
+    for index, job in enumerate(jobs):
+        use_case = use_cases.get(job.use_case_id)
+        if use_case is None:
+            fail(index, f"Use case '{job.use_case_id}' not found")
+            continue
+        source_table = resolve_source_table(use_case)
+        reports[index]['source_table'] = source_table
+        jobs_by_table[source_table].append(index)
+
+    # Stage 1: one scan per source table
+    stage_start = time.perf_counter()
+    frames: Dict[str, pd.DataFrame] = {}
+    table_reports = {}
+    for source_table, indexes in jobs_by_table.items():
+        load_start = time.perf_counter()
+        try:
+            table_frames = load_source_frames(session, source_table, {jobs[i].use_case_id for i in indexes})
+        except Exception as e:
+            session.rollback()
+            for index in indexes:
+                fail(index, f"Failed to load facts from {source_table}: {e}")
+            continue
+        frames.update(table_frames)
+        table_reports[source_table] = {
+            'jobs': len(indexes),
+            'rows': sum(len(frame) for frame in table_frames.values()),
+            'load_ms': _elapsed_ms(load_start),
+        }
+        logger.info(f"[Batch] Loaded {source_table} once for {len(indexes)} jobs: {table_reports[source_table]}")
+    timings['load'] = _elapsed_ms(stage_start)
+
+    # Stage 2: hierarchy and rules per job (hierarchies shared per structure)
+    stage_start = time.perf_counter()
+    hierarchies: Dict[str, Tuple[Dict, Dict, List]] = {}
+    prepared: Dict[int, Dict[str, Any]] = {}
+    for source_table, indexes in jobs_by_table.items():
+        if source_table not in table_reports:
+            continue
+        for index in indexes:
+            job_start = time.perf_counter()
+            job = jobs[index]
+            use_case = use_cases[job.use_case_id]
+            try:
+                structure_id = use_case.atlas_structure_id
+                if structure_id not in hierarchies:
+                    hierarchies[structure_id] = load_hierarchy(session, job.use_case_id)
+                hierarchy_dict, _, _ = hierarchies[structure_id]
+                if not hierarchy_dict:
+                    raise ValueError(f"No hierarchy found for use case '{job.use_case_id}'")
+                sql_rules, sorted_math_rules = split_rules(load_rules(session, job.use_case_id), hierarchy_dict)
+            except Exception as e:
+                session.rollback()
+                fail(index, str(e))
+                continue
+            prepared[index] = {
+                'structure_id': structure_id,
+                'sql_rules': sql_rules,
+                'math_rules': sorted_math_rules,
+            }
+            reports[index]['timings_ms']['prepare'] = _elapsed_ms(job_start)
+    timings['prepare'] = _elapsed_ms(stage_start)
+
+    # Stage 3: natural rollups across the process pool (deduplicated per structure + frame)
+    stage_start = time.perf_counter()
+    rollup_specs = {
+        structure_id: (
+            {node_id: RollupNode(node.depth, bool(node.is_leaf)) for node_id, node in hierarchy_dict.items()},
+            children_dict,
+            leaf_nodes,
+        )
+        for structure_id, (hierarchy_dict, children_dict, leaf_nodes) in hierarchies.items()
+        if hierarchy_dict
+    }
+    tasks = {}
+    for index, context in prepared.items():
+        for scenario in SCENARIOS:
+            key = frame_key(reports[index]['source_table'], jobs[index].use_case_id, scenario)
+            tasks[(context['structure_id'], key)] = (key, rollup_specs[context['structure_id']])
+    aggregated = {key: aggregate_by_node(frames[key]) for key in {key for _, key in tasks}}
+    try:
+        rollups = _run_rollups(tasks, aggregated, max_workers)
+    except Exception as e:
+        for index in list(prepared):
+            fail(index, f"Natural rollup failed: {e}")
+        prepared.clear()
+        rollups = {}
+    timings['rollup'] = _elapsed_ms(stage_start)
+    logger.info(f"[Batch] {len(tasks)} rollups for {len(prepared)} jobs in {timings['rollup']}ms (workers={max_workers})")
+
+    # Stage 4: rules, Math rules and variance (parent process, needs the session)
+    stage_start = time.perf_counter()
+    # One Type 2B engine per (table, scope); the gold / Use Case 3 frames serve every job
+    frame_scopes: Dict[str, Tuple[str, Dict[str, Any]]] = {}
+    frame_rules: Dict[str, List[Any]] = defaultdict(list)
+    for index, context in prepared.items():
+        source_table = reports[index]['source_table']
+        for scenario in SCENARIOS:
+            key = frame_key(source_table, jobs[index].use_case_id, scenario)
+            frame_scopes[key] = (source_table, type2b_scope(source_table, jobs[index].use_case_id, scenario))
+            frame_rules[key].extend(context['sql_rules'].values())
+    type2b_engines = {
+        key: create_type2b_engine(session, frames[key], frame_rules[key], source_table, scope)
+        for key, (source_table, scope) in frame_scopes.items()
+    }
+    computed: Dict[int, Tuple[UUID, List[Dict]]] = {}
+    for index, context in prepared.items():
+        job = jobs[index]
+        source_table = reports[index]['source_table']
+        hierarchy_dict, children_dict, _ = hierarchies[context['structure_id']]
+        max_depth = max(node.depth for node in hierarchy_dict.values())
+        rules_start = time.perf_counter()
+        task_keys = {(context['structure_id'], frame_key(source_table, job.use_case_id, s)) for s in SCENARIOS}
+        reports[index]['timings_ms']['rollup'] = sum(rollups[k][1] for k in task_keys if k in rollups)
+        try:
+            adjusted = {}
+            for scenario in SCENARIOS:
+                key = frame_key(source_table, job.use_case_id, scenario)
+                natural_results, _ = rollups[(context['structure_id'], key)]
+                adjusted[scenario] = apply_rules_to_results(
+                    session, frames[key], dict(natural_results),
+                    hierarchy_dict, children_dict, context['sql_rules'], max_depth,
+                    use_case_id=job.use_case_id, scenario=scenario,
+                    type2b_engine=type2b_engines.get(key)
+                )
+                if context['math_rules']:
+                    apply_math_rules(adjusted[scenario], context['math_rules'], scenario)
+            variance_results = calculate_variance(adjusted['ACTUAL'], adjusted['PRIOR'])
+        except Exception as e:
+            session.rollback()
+            fail(index, f"Failed to apply rules: {e}")
+            continue
+
+        calculation_run_id = uuid4()
+        active_rules = {**context['sql_rules'], **{rule.node_id: rule for rule in context['math_rules']}}
+        computed[index] = (calculation_run_id, build_result_rows(
+            calculation_run_id, adjusted['ACTUAL'], variance_results, active_rules,
+            rollups[(context['structure_id'], frame_key(source_table, job.use_case_id, 'ACTUAL'))][0]
+        ))
+        reports[index]['rules_applied'] = len(context['sql_rules']) + len(context['math_rules'])
+        record_rules(active_rules.values())
+        reports[index]['timings_ms']['rules'] = _elapsed_ms(rules_start)
+    timings['rules'] = _elapsed_ms(stage_start)
+
+    # Stage 5: one transaction, one bulk insert
+    stage_start = time.perf_counter()
+    base_runs: Dict[int, UUID] = {}
+    stored: Dict[int, List[Dict]] = {}
+    for index, (calculation_run_id, rows) in computed.items():
+        # Delta storage: only rows that differ from the latest full run of the date
+        try:
+            base_run_id, stored[index] = deduplicate_run_rows(
+                session, jobs[index].use_case_id, jobs[index].pnl_date, rows, calculation_run_id
+            )
+        except Exception as e:
+            session.rollback()
+            logger.warning(f"[Batch] Delta storage skipped for job {index}, storing full run: {e}")
+            base_run_id, stored[index] = None, rows
+        if base_run_id is not None:
+            base_runs[index] = base_run_id
+    all_rows = [row for rows in stored.values() for row in rows]
+    runs = []
+    for index, job in enumerate(jobs):
+        if job.use_case_id not in use_cases:
+            continue  # No run record without a use case (FK)
+        report = reports[index]
+        job_timings = report['timings_ms']
+        job_timings['total'] = sum(job_timings.values())
+        calculation_run_id = computed[index][0] if index in computed else uuid4()
+        runs.append(CalculationRun(
+            id=calculation_run_id,
+            pnl_date=job.pnl_date,
+            use_case_id=job.use_case_id,
+            run_name=job.run_name or f"Run_{job.pnl_date.strftime('%Y%m%d')}_{int(time.time())}",
+            status="COMPLETED" if index in computed else "FAILED",
+            triggered_by=triggered_by,
+            calculation_duration_ms=job_timings['total'],
+            # Same shape as stage_tracing.StageTrace.to_json(); statements are shared across the batch
+            stage_timings={
+                'total_ms': job_timings['total'],
+                'stages': [{'stage': stage, 'ms': ms} for stage, ms in job_timings.items() if stage != 'total'],
+            },
+            base_run_id=base_runs.get(index),
+        ))
+        report['calculation_run_id'] = str(calculation_run_id)
+        if index in computed:
+            report['status'] = 'COMPLETED'
+            report['result_count'] = len(computed[index][1])
+
+    try:
+        session.add_all(runs)
+        session.flush()  # Run headers before their results (FK)
+        if all_rows:
+            session.bulk_insert_mappings(FactCalculatedResult, all_rows)
+        refresh_result_series(session, [calculation_run_id for calculation_run_id, _ in computed.values()])
+        session.commit()
+    except Exception as e:
+        session.rollback()
+        logger.error(f"[Batch] Bulk persist of {len(all_rows)} results failed: {e}", exc_info=True)
+        raise RuntimeError(f"Failed to persist batch results: {e}") from e
+    timings['persist'] = _elapsed_ms(stage_start)
+    timings['total'] = _elapsed_ms(batch_start)
+
+    completed = sum(1 for report in reports if report['status'] == 'COMPLETED')
+    if completed == len(jobs):
+        status = 'COMPLETED'
+    elif completed == 0:
+        status = 'FAILED'
+    else:
+        status = 'PARTIAL'
+
+    logger.info(
+        f"[Batch] {status}: {completed}/{len(jobs)} jobs, {len(all_rows)} results, "
+        f"{len(table_reports)} source tables in {timings['total']}ms ({timings})"
+    )
+    return {
+        'status': status,
+        'jobs': reports,
+        'tables': table_reports,
+        'result_count': len(all_rows),
+        'timings_ms': timings,
+    }
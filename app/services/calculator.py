@@ -37,6 +37,9 @@ from app.services.dependency_resolver import (
     CircularDependencyError,
     evaluate_type3_expression
 )
+from app.engine.engine_log import EngineLog
+from app.metrics import record_rules
+from app.services.stage_tracing import StageTrace
 
 logger = logging.getLogger(__name__)
 
@@ -89,16 +92,17 @@ def apply_rule_to_leaf(
     table_name = 'fact_pnl_gold'  # Default
     if use_case and use_case.input_table_name:
         table_name = use_case.input_table_name
-        logger.info(f"apply_rule_to_leaf: Using table '{table_name}' for use case {use_case.use_case_id}")
-    else:
-        logger.info(f"apply_rule_to_leaf: No use_case or input_table_name provided, defaulting to 'fact_pnl_gold'")
     
     # Phase 5.5: Get measure column name based on table and rule.measure_name
     from app.engine.waterfall import get_measure_column_name
     measure_name = rule.measure_name or 'daily_pnl'
     target_column = get_measure_column_name(measure_name, table_name)
     
-    logger.info(f"apply_rule_to_leaf: Node {leaf_node_id}, measure_name={measure_name}, table={table_name}, target_column={target_column}")
+    # Called once per rule node: formatted only when DEBUG is enabled
+    logger.debug(
+        "apply_rule_to_leaf: Node %s, measure_name=%s, table=%s, target_column=%s",
+        leaf_node_id, measure_name, table_name, target_column
+    )
     
     # Build SQL query based on table structure
     if table_name == 'fact_pnl_use_case_3':
@@ -168,7 +172,8 @@ def waterfall_up(
     max_depth: int,
     natural_results: Optional[Dict[str, Dict[str, Decimal]]] = None,
     children_natural_sum: Optional[Dict[str, Dict[str, Decimal]]] = None,
-    skip_nodes: Optional[set] = None
+    skip_nodes: Optional[set] = None,
+    log: Optional[EngineLog] = None
 ) -> Dict[str, Dict[str, Decimal]]:
     """
     Stage 2: Waterfall up - bottom-up aggregation.
@@ -193,20 +198,20 @@ def waterfall_up(
         natural_results: Optional dictionary with natural values (for hybrid parent support)
         children_natural_sum: Optional pre-calculated children natural sums
         skip_nodes: Optional set of node IDs to skip (nodes with Math rules)
+        log: Optional run EngineLog that counts per-node events (summarized by the caller)
     
     Returns:
         Updated adjusted_results with all parent nodes calculated
     """
+    if log is None:
+        log = EngineLog(logger, "Waterfall")
     # Process nodes by depth (deepest first, bottom-up)
     for depth in range(max_depth, -1, -1):
         for node_id, node in hierarchy_dict.items():
             if node.depth == depth and not node.is_leaf:
                 # Phase 5.9: Skip nodes with Math rules (Math rules are the final authority)
                 if skip_nodes and node_id in skip_nodes:
-                    logger.info(
-                        f"Skipping waterfall aggregation for {node_id} ('{node.node_name}') - "
-                        f"Math Rule already calculated this node"
-                    )
+                    log.event("waterfall_skipped_math_node", node_id=node_id)
                     continue
                 # Sum children's adjusted values
                 children = children_dict.get(node_id, [])
@@ -296,10 +301,9 @@ def waterfall_up(
                 
                 # Log hybrid parent detection for debugging
                 if direct_daily > Decimal('0') or direct_mtd > Decimal('0') or direct_ytd > Decimal('0'):
-                    logger.info(
-                        f"Hybrid Parent detected: {node_id} ('{node.node_name}') - "
-                        f"Direct: daily={direct_daily}, Children Sum: daily={children_sum_daily}, "
-                        f"Combined Adjusted: daily={adjusted_results[node_id]['daily']}"
+                    log.event(
+                        "hybrid_parent", node_id=node_id, direct_daily=direct_daily,
+                        children_daily=children_sum_daily, daily=adjusted_results[node_id]['daily']
                     )
     
     return adjusted_results
@@ -406,10 +410,17 @@ def calculate_use_case(
     session.commit()
     session.refresh(run)
     
+    # Per-stage timings and statement counts, persisted with the run
+    trace = StageTrace(f"calculate_use_case {use_case_id}").activate()
+    # Per-node / per-rule events: counted, logged only in trace mode (app/engine/engine_log.py)
+    log = EngineLog(logger, "Calculator", use_case_id)
+    
     # CRITICAL: Wrap entire calculation logic in try/except with proper transaction management
     try:
         # Load hierarchy for the use case's structure
+        trace.begin('hierarchy_load')
         hierarchy_dict, children_dict, leaf_nodes = load_hierarchy(session, use_case_id)
+        trace.set_rows(len(hierarchy_dict))
         
         if not hierarchy_dict:
             raise ValueError(f"No hierarchy found for use case '{use_case_id}'")
@@ -422,6 +433,7 @@ def calculate_use_case(
         
         # Phase 5.6: Dual-Path Rollup Logic (same as GET /results endpoint)
         # Get use case to determine which rollup to use
+        trace.begin('fact_load_rollup')
         use_case = session.query(UseCase).filter(
             UseCase.use_case_id == use_case_id
         ).first()
@@ -439,9 +451,13 @@ def calculate_use_case(
                 session, use_case_id, hierarchy_dict, children_dict, leaf_nodes
             )
         
+        trace.set_rows(len(natural_results))
+        
         # Load all rules for use case
+        trace.begin('rules_load')
         rules_dict = load_rules(session, use_case_id)
         all_rules = list(rules_dict.values())
+        trace.set_rows(len(all_rules))
         
         # Separate SQL rules (Type 1/2) from Math rules (Type 3)
         sql_rules = {
@@ -469,6 +485,7 @@ def calculate_use_case(
                 raise ValueError(f"Cannot execute Type 3 rules: {e}")
         
         # Stage 1: Execute SQL Rules (Type 1/2) - Keep existing logic
+        trace.begin('sql_rules')
         adjusted_results = natural_results.copy()
         rules_applied = 0
         
@@ -499,13 +516,17 @@ def calculate_use_case(
                         adjusted_results[node_id] = rule_adjusted
                         
                         rules_applied += 1
-                        logger.info(f"Applied SQL rule {rule.rule_id} to node {node_id} (Most Specific Wins)")
+                        log.event("sql_rule_applied", rule_id=rule.rule_id, node_id=node_id)
                     else:
                         # Descendant has a rule, so skip this parent rule
-                        logger.info(f"Skipping SQL rule for node {node_id} - descendant has more specific rule")
+                        log.event("sql_rule_skipped_descendant", node_id=node_id)
+        
+        trace.set_rows(rules_applied)
         
         # Stage 1b: Execute Type 3 Rules (Math/Allocation Rules) in dependency order
         # Phase 5.7: The Math Dependency Engine
+        trace.begin('math_rules')
+        trace.set_rows(len(sorted_type3_rules))
         # Track nodes with Math rules to prevent waterfall_up from overwriting them
         nodes_with_math_rules = set()
         
@@ -594,21 +615,17 @@ def calculate_use_case(
                     and ref not in ['AND', 'OR', 'NOT', 'TRUE', 'FALSE', 'IF', 'THEN', 'ELSE']
                 ]
                 
-                # Step 6: Debug logging - Show context keys, expression, and validation
-                missing_refs = [ref for ref in node_refs_in_expression if ref not in [k.upper() for k in calculation_context.keys()]]
-                logger.info(
-                    f"🔎 MATH ENGINE CONTEXT: Expression='{rule.rule_expression}' | "
-                    f"Node Refs in Expression: {node_refs_in_expression} | "
-                    f"Context Keys Sample: {list(calculation_context.keys())[:10]} | "
-                    f"Total Context Nodes: {len(calculation_context)} | "
-                    f"Missing Refs: {missing_refs if missing_refs else 'None'}"
+                # Step 6: Validation - references missing from the context default to 0
+                # (upper-cased keys built once per rule, not once per reference)
+                context_keys_upper = {key.upper() for key in calculation_context}
+                missing_refs = [ref for ref in node_refs_in_expression if ref not in context_keys_upper]
+                log.event(
+                    "math_context", expression=rule.rule_expression, refs=node_refs_in_expression,
+                    context_nodes=len(calculation_context), missing=missing_refs or None
                 )
                 
                 if missing_refs:
-                    logger.warning(
-                        f"⚠️ MATH ENGINE: Expression references nodes not in context: {missing_refs}. "
-                        f"These will default to 0."
-                    )
+                    log.sampled("math_missing_refs", node_id=target_node, missing=missing_refs, note="defaulting to 0")
                 
                 # Step 7: Evaluate expression using calculation_context
                 calculated_values = evaluate_type3_expression(
@@ -630,11 +647,10 @@ def calculate_use_case(
                 
                 rules_applied += 1
                 
-                # Flight Recorder Logging (High-Visibility)
-                logger.info(
-                    f"🧮 MATH ENGINE: Node {target_node} | "
-                    f"SQL Value: {original_val} | Rule: {rule.rule_expression} | "
-                    f"➡️ New Value: {new_val}"
+                # Flight Recorder (trace mode; counted otherwise)
+                log.event(
+                    "math_rule_applied", node_id=target_node, sql_value=original_val,
+                    rule=rule.rule_expression, new_value=new_val
                 )
                 
             except Exception as e:
@@ -651,13 +667,15 @@ def calculate_use_case(
         # Perform bottom-up aggregation: parents sum rule-adjusted children
         # Phase 5.8: Pass natural_results to support hybrid parents (direct + children)
         # Phase 5.9: Skip nodes with Math rules (they are the final authority)
+        trace.begin('waterfall_up')
         adjusted_results = waterfall_up(
             hierarchy_dict, children_dict, adjusted_results, max_depth, natural_results, None,
-            skip_nodes=nodes_with_math_rules
+            skip_nodes=nodes_with_math_rules, log=log
         )
         
         # Stage 3: The Plug
         # Calculate Reconciliation Plug for every node: Plug = Natural - Adjusted
+        trace.begin('plugs')
         plug_results = calculate_plugs(natural_results, adjusted_results)
         
         # Calculate total plug across all measures
@@ -674,7 +692,10 @@ def calculate_use_case(
             if rule.rule_type == 'NODE_ARITHMETIC':
                 all_active_rules[rule.node_id] = rule
         
+        record_rules(all_active_rules.values())
+        
         # Save results to database
+        trace.begin('persistence')
         num_results = save_calculation_results(
             run.run_id,
             hierarchy_dict,
@@ -685,12 +706,17 @@ def calculate_use_case(
             session
         )
         
+        trace.set_rows(num_results)
+        trace.end()
+        stage_timings = trace.to_json()
+        
         # Update run status
         end_time = time.time()
         duration_ms = int((end_time - start_time) * 1000)
         
         run.status = RunStatus.COMPLETED
         run.calculation_duration_ms = duration_ms
+        run.stage_timings = stage_timings
         run.parameters_snapshot = {
             'rules_applied': rules_applied,
             'rule_ids': [rule.rule_id for rule in all_active_rules.values()],
@@ -703,6 +729,8 @@ def calculate_use_case(
             f"Calculation complete for use case {use_case_id}. "
             f"Rules applied: {rules_applied}, Duration: {duration_ms}ms"
         )
+        log.summary(nodes=len(hierarchy_dict), rules_applied=rules_applied)
+        trace.log_summary()
         
         return {
             'run_id': str(run.run_id),
@@ -742,9 +770,12 @@ def calculate_use_case(
                 'pytd': str(total_plug['pytd']),
             },
             'duration_ms': duration_ms,
+            'stage_timings': stage_timings,
         }
     
     except Exception as e:
+        trace.end(failed=True)
+        
         # CRITICAL: Log the ORIGINAL exception immediately with full traceback
         logger.error(
             f"Calculation failed for use case {use_case_id}. "
@@ -773,6 +804,7 @@ def calculate_use_case(
         try:
             # Start a new transaction for updating run status
             run.status = RunStatus.FAILED
+            run.stage_timings = trace.to_json()  # Stages completed before the failure
             session.commit()
             logger.info(f"Run status updated to FAILED for use case {use_case_id}")
         except Exception as status_error:
@@ -788,6 +820,9 @@ def calculate_use_case(
         
         # Re-raise the original exception so the UI knows it failed
         raise
+    
+    finally:
+        trace.deactivate()
 
 
 def save_calculation_results(
@@ -0,0 +1,230 @@
+"""
+Discovery rendering pipeline: iterative tree build and direct JSON encoding.
+
+The discovery view used to build its tree with build_tree_structure
+(app/api/routes/discovery.py): one recursive call per node (deep trees hit the
+recursion limit), a nested HierarchyNode model validated per node, and the
+whole DiscoveryResponse validated and encoded again by FastAPI. Most of a
+large request was spent in model validation.
+
+This pipeline:
+- builds the tree iteratively (explicit stack) as plain dicts with the
+  HierarchyNode fields in schema order
+- reads node attributes from app.services.attribute_cache
+- encodes the response straight to JSON bytes (orjson when installed, the
+  standard library encoder otherwise; trees beyond the encoder's nesting
+  limit are stitched iteratively) and returns it as a Response,
+  skipping per-node validation. The response schema is unchanged; see
+  scripts/verify_discovery_render.py for the contract check against the model path.
+"""
+
+import json
+import logging
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Dict, List, Optional
+from uuid import UUID
+
+from fastapi.responses import Response
+
+from app.engine.finance_hierarchy import get_node_attributes
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    orjson = None
+    ORJSON_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# Placeholder nodes that never appear in the business tree
+EXCLUDED_NODE_PREFIXES = ('TRADE_', 'STERLING_RULE')
+
+_ZERO = Decimal('0')
+
+
+def _measure(measures: Dict, key: str) -> str:
+    value = measures.get(key, 0)
+    if not isinstance(value, Decimal):
+        value = Decimal(str(value))
+    return str(value)
+
+
+def _render_node(node, measures: Dict, attrs: Dict, path: List[str], include_pytd: bool) -> Dict[str, Any]:
+    """One HierarchyNode as a dict (field order and values of build_tree_structure)."""
+    daily = _measure(measures, 'daily')
+    return {
+        'node_id': str(node.node_id) if node.node_id else 'UNKNOWN',
+        'node_name': str(node.node_name) if node.node_name else 'Unknown',
+        'parent_node_id': str(node.parent_node_id) if node.parent_node_id else None,
+        'depth': int(node.depth) if node.depth is not None else 0,
+        'is_leaf': bool(node.is_leaf) if node.is_leaf is not None else False,
+        'daily_pnl': daily,
+        'mtd_pnl': _measure(measures, 'mtd'),
+        'ytd_pnl': _measure(measures, 'ytd'),
+        'pytd_pnl': str(measures.get('pytd', 0)) if include_pytd else None,
+        'region': attrs.get('region'),
+        'product': attrs.get('product'),
+        'desk': attrs.get('desk'),
+        'strategy': attrs.get('strategy'),
+        'official_gl_baseline': daily,
+        'path': path,
+        'children': [],
+    }
+
+
+def build_tree(
+    hierarchy_dict: Dict,
+    children_dict: Dict[str, List[str]],
+    natural_results: Dict,
+    root_ids: List[str],
+    path_dict: Optional[Dict] = None,
+    node_attributes: Optional[Dict] = None,
+    include_pytd: bool = False
+) -> List[Dict[str, Any]]:
+    """
+    Build the discovery tree for root_ids iteratively.
+
+    Args:
+        hierarchy_dict: Dictionary mapping node_id -> node data
+        children_dict: Dictionary mapping parent_node_id -> list of children node_ids
+        natural_results: Dictionary mapping node_id -> measure values
+        root_ids: Root node ids, in response order
+        path_dict: Dictionary mapping node_id -> path array from SQL CTE
+        node_attributes: Precomputed node_id -> attributes (attribute_cache)
+        include_pytd: Whether to include PYTD measure
+
+    Returns:
+        List of root node dicts (HierarchyNode shape) with nested children
+
+    Raises:
+        ValueError: If a root node is not in hierarchy_dict
+    """
+    node_attributes = node_attributes or {}
+    path_dict = path_dict or {}
+    default_measures = {'daily': _ZERO, 'mtd': _ZERO, 'ytd': _ZERO, 'pytd': _ZERO}
+
+    roots: List[Dict[str, Any]] = []
+    visited = set()
+    # (node_id, list the rendered node is appended to, parent attributes)
+    stack = []
+    for root_id in reversed(root_ids):
+        if root_id not in hierarchy_dict:
+            logger.error(f"[Discovery Render] root node_id '{root_id}' not found in hierarchy_dict")
+            raise ValueError(f"node_id '{root_id}' not found in hierarchy_dict")
+        stack.append((root_id, roots, None))
+
+    while stack:
+        node_id, siblings, parent_attributes = stack.pop()
+        if node_id in visited:
+            logger.warning(f"[Discovery Render] Cycle at node '{node_id}', subtree skipped")
+            continue
+        visited.add(node_id)
+        node = hierarchy_dict[node_id]
+
+        attrs = node_attributes.get(node_id)
+        if attrs is None:
+            attrs = get_node_attributes(node.node_id, node.node_name, parent_attributes)
+        path = path_dict.get(node_id) or path_dict.get(str(node_id)) or [node.node_name]
+
+        rendered = _render_node(node, natural_results.get(node_id, default_measures), attrs, path, include_pytd)
+        siblings.append(rendered)
+
+        children = [
+            child_id for child_id in children_dict.get(node_id, ())
+            if child_id in hierarchy_dict and not child_id.startswith(EXCLUDED_NODE_PREFIXES)
+        ]
+        # Reversed so children are rendered (and appended) in children_dict order
+        for child_id in reversed(children):
+            stack.append((child_id, rendered['children'], attrs))
+
+    return roots
+
+
+def _default(value: Any) -> Any:
+    """Encode the non-JSON types Pydantic would serialize as strings."""
+    if isinstance(value, (Decimal, UUID)):
+        return str(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+# Reused: json.dumps with non-default options builds a new encoder per call
+_JSON_ENCODER = json.JSONEncoder(default=_default, ensure_ascii=False, separators=(',', ':'))
+
+
+def dumps(payload: Any) -> bytes:
+    """Compact UTF-8 JSON bytes (the layout of Pydantic's model_dump_json)."""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(payload, default=_default)
+    return _JSON_ENCODER.encode(payload).encode('utf-8')
+
+
+def encode_tree(nodes: List[Dict[str, Any]]) -> bytes:
+    """
+    JSON array of rendered nodes, nested children included.
+
+    Encoded in one call; trees deeper than the encoder's nesting limit
+    (json: recursion limit, orjson: 255 levels) are encoded iteratively.
+    """
+    try:
+        return dumps(nodes)
+    except (RecursionError, TypeError):  # orjson.JSONEncodeError is a TypeError
+        return _encode_tree_iteratively(nodes)
+
+
+def _encode_tree_iteratively(nodes: List[Dict[str, Any]]) -> bytes:
+    """Each node encoded flat (children emptied), children arrays stitched in with an explicit stack."""
+    parts = [b'[']
+    stack = [iter(nodes)]
+    first = [True]
+    while stack:
+        node = next(stack[-1], None)
+        if node is None:
+            stack.pop()
+            first.pop()
+            # Close the children array and its node, or the top-level array
+            parts.append(b']}' if stack else b']')
+            continue
+        if not first[-1]:
+            parts.append(b',')
+        first[-1] = False
+        # Flat encoding ends with "children":[]} -> keep the open bracket
+        parts.append(dumps(dict(node, children=()))[:-2])
+        stack.append(iter(node['children']))
+        first.append(True)
+    return b''.join(parts)
+
+
+def discovery_payload(
+    structure_id: str,
+    hierarchy: List[Dict[str, Any]],
+    reconciliation: Optional[Dict[str, Any]] = None,
+    debug_info: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    """DiscoveryResponse as a dict, fields in schema order."""
+    return {
+        'structure_id': structure_id,
+        'hierarchy': hierarchy,
+        'reconciliation': reconciliation,
+        'debug_info': debug_info,
+    }
+
+
+def encode_discovery(payload: Dict[str, Any]) -> bytes:
+    """Discovery payload as JSON bytes (byte-identical to DiscoveryResponse.model_dump_json())."""
+    parts = [b'{']
+    for index, (key, value) in enumerate(payload.items()):
+        if index:
+            parts.append(b',')
+        parts.append(dumps(key) + b':')
+        parts.append(encode_tree(value) if key == 'hierarchy' else dumps(value))
+    parts.append(b'}')
+    return b''.join(parts)
+
+
+def discovery_response(payload: Dict[str, Any]) -> Response:
+    """Encoded discovery payload (no response model validation)."""
+    return Response(content=encode_discovery(payload), media_type='application/json')
@@ -8,6 +8,7 @@ from typing import Dict, List, Optional, Any
 from uuid import UUID
 
 import pandas as pd
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 
 from app.models import FactPnlEntries, FactPnlGold
@@ -245,6 +246,7 @@ def verify_reconciliation(
     """
     import logging
     from app.models import FactCalculatedResult, CalculationRun
+    from app.services.result_store import run_results_select
     from app.services.unified_pnl_service import get_unified_pnl
     logger = logging.getLogger(__name__)
     
@@ -271,16 +273,23 @@ def verify_reconciliation(
     }
     
     if calc_run:
-        # Sum all calculated results for this run
-        results = session.query(FactCalculatedResult).filter(
-            FactCalculatedResult.calculation_run_id == calc_run.id
-        ).all()
+        # Sum all calculated results for this run (server-side SUM over the typed columns)
+        # Delta runs resolve through their base run (one row per node)
+        resolved = run_results_select(
+            calc_run.id,
+            FactCalculatedResult.measure_sql('adjusted', 'daily').label('daily'),
+            FactCalculatedResult.measure_sql('adjusted', 'mtd').label('mtd'),
+            FactCalculatedResult.measure_sql('adjusted', 'ytd').label('ytd'),
+        ).where(FactCalculatedResult.run_id.is_(None)).subquery()
+        totals = session.query(
+            func.sum(resolved.c.daily),
+            func.sum(resolved.c.mtd),
+            func.sum(resolved.c.ytd),
+        ).one()
         
-        for result in results:
-            measure_vector = result.measure_vector or {}
-            adjusted_totals['daily_pnl'] += Decimal(str(measure_vector.get('daily', 0)))
-            adjusted_totals['mtd_pnl'] += Decimal(str(measure_vector.get('wtd', measure_vector.get('mtd', 0))))
-            adjusted_totals['ytd_pnl'] += Decimal(str(measure_vector.get('ytd', 0)))
+        adjusted_totals['daily_pnl'] = Decimal(str(totals[0] or 0))
+        adjusted_totals['mtd_pnl'] = Decimal(str(totals[1] or 0))
+        adjusted_totals['ytd_pnl'] = Decimal(str(totals[2] or 0))
     else:
         # No calculation run - adjusted equals raw (no rules applied)
         adjusted_totals = raw_totals.copy()
@@ -12,6 +12,8 @@ import time
 from typing import Dict, Optional, Tuple, List, Any
 from uuid import UUID
 
+from app.metrics import record_cache
+
 logger = None
 try:
     import logging
@@ -63,6 +65,7 @@ def get_cached_hierarchy(
         age = current_time - cached_time
         
         if age < _cache_ttl:
+            record_cache('hierarchy', 'hit')
             if logger:
                 logger.info(f"[Hierarchy Cache] Cache HIT for {use_case_id} (age: {age:.1f}s)")
             return hierarchy_data
@@ -72,6 +75,7 @@ def get_cached_hierarchy(
             if logger:
                 logger.info(f"[Hierarchy Cache] Cache EXPIRED for {use_case_id} (age: {age:.1f}s)")
     
+    record_cache('hierarchy', 'miss')  # Includes expired entries
     if logger:
         logger.info(f"[Hierarchy Cache] Cache MISS for {use_case_id}")
     return None
@@ -0,0 +1,293 @@
+"""
+Index advisor: EXPLAIN the statements a calculation issues and report
+sequential scans over large tables.
+
+The statements are built the way the engine builds them for one use case
+(hierarchy and rules load, legacy / strategy rollup, dated fact load, each SQL
+rule, the run results read) and explained with EXPLAIN (FORMAT JSON) - plans
+only, nothing is executed. A Seq Scan is reported when the scanned table holds
+at least large_table_rows rows (pg_class.reltuples) and the statement does not
+read the whole table by design (e.g. the unfiltered Use Case 3 fact load).
+
+The report also lists the engine indexes of migration c9e4a2f7b1d3 that are
+missing from the database.
+"""
+
+import json
+import logging
+import os
+from typing import Any, Dict, List, Optional
+from uuid import UUID
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.models import CalculationRun, DimHierarchy, MetadataRule, UseCase
+
+logger = logging.getLogger(__name__)
+
+LARGE_TABLE_ROWS = int(os.getenv("INDEX_ADVISOR_LARGE_TABLE_ROWS", "10000"))
+MAX_RULES = 50
+
+# Indexes created by migration c9e4a2f7b1d3 -> table
+ENGINE_INDEXES = {
+    'ix_fact_pnl_gold_cc_id_measures': 'fact_pnl_gold',
+    'ix_fact_pnl_entries_engine': 'fact_pnl_entries',
+    'ix_fact_pnl_uc3_strategy': 'fact_pnl_use_case_3',
+    'ix_fact_pnl_uc3_product_line': 'fact_pnl_use_case_3',
+    'ix_fact_pnl_uc3_effective_date': 'fact_pnl_use_case_3',
+    'ix_fact_calculated_results_calc_run_node': 'fact_calculated_results',
+    'ix_fact_calculated_results_run_node': 'fact_calculated_results',
+    'ix_hierarchy_bridge_parent_leaf': 'hierarchy_bridge',
+    'ix_dim_hierarchy_atlas_parent': 'dim_hierarchy',
+    'ix_dim_hierarchy_parent_node_id': 'dim_hierarchy',
+}
+
+# Measure columns summed by rule and rollup queries, per source table
+SUM_COLUMNS = {
+    'fact_pnl_use_case_3': ('pnl_daily', 'pnl_commission', 'pnl_trade'),
+    'fact_pnl_entries': ('daily_amount', 'wtd_amount', 'ytd_amount'),
+    'fact_pnl_gold': ('daily_pnl', 'mtd_pnl', 'ytd_pnl', 'pytd_pnl'),
+}
+
+
+class EngineQuery:
+    """One statement to explain."""
+
+    def __init__(
+        self,
+        name: str,
+        sql: str,
+        params: Optional[Dict[str, Any]] = None,
+        full_read: bool = False,
+        driver_sql: bool = False
+    ):
+        self.name = name
+        self.sql = " ".join(sql.split())
+        self.params = params or {}
+        # The statement reads the whole table by design: its seq scans are not findings
+        self.full_read = full_read
+        # Compiled SQLAlchemy statement in the driver's paramstyle (not a text() clause)
+        self.driver_sql = driver_sql
+
+
+def _sums(source_table: str) -> str:
+    return ", ".join(f"SUM({column})" for column in SUM_COLUMNS[source_table])
+
+
+def engine_queries(session: Session, use_case: UseCase) -> List[EngineQuery]:
+    """
+    Statements a calculation of use_case issues, with representative parameters.
+
+    Args:
+        session: Database session
+        use_case: Use case whose hierarchy, rules, fact table and latest run are used
+
+    Returns:
+        List of EngineQuery
+    """
+    from app.engine.waterfall import get_measure_column_name
+    from app.services.orchestrator import FACT_SELECT_COLUMNS, resolve_source_table
+    from app.services.result_store import run_results_select
+
+    uc_id = str(use_case.use_case_id)
+    # calculate_use_case rule SQL defaults to fact_pnl_gold, create_snapshot to fact_pnl_entries
+    rule_table = use_case.input_table_name or 'fact_pnl_gold'
+    snapshot_table = resolve_source_table(use_case)
+
+    queries = [
+        EngineQuery(
+            'hierarchy_load',
+            "SELECT * FROM dim_hierarchy WHERE atlas_source = :atlas",
+            {'atlas': use_case.atlas_structure_id},
+        ),
+        EngineQuery(
+            'rules_load',
+            "SELECT * FROM metadata_rules WHERE use_case_id = :uc_id",
+            {'uc_id': uc_id},
+        ),
+    ]
+
+    # Natural rollup (app/services/unified_pnl_service.py)
+    if use_case.input_table_name == 'fact_pnl_use_case_3':
+        queries.append(EngineQuery('strategy_rollup_facts', "SELECT * FROM fact_pnl_use_case_3", full_read=True))
+    else:
+        queries.append(EngineQuery(
+            'legacy_rollup_entries',
+            f"SELECT category_code, {_sums('fact_pnl_entries')} FROM fact_pnl_entries "
+            f"WHERE use_case_id = :uc_id AND scenario = 'ACTUAL' GROUP BY category_code",
+            {'uc_id': uc_id},
+        ))
+        queries.append(EngineQuery(
+            'legacy_rollup_gold',
+            f"SELECT cc_id, {_sums('fact_pnl_gold')} FROM fact_pnl_gold GROUP BY cc_id",
+            full_read=True,
+        ))
+
+    # Dated fact load (app/services/orchestrator.py load_facts_for_date)
+    select_columns = FACT_SELECT_COLUMNS.get(snapshot_table, FACT_SELECT_COLUMNS['fact_pnl_gold'])
+    if snapshot_table == 'fact_pnl_entries':
+        queries.append(EngineQuery(
+            'snapshot_fact_load',
+            f"SELECT {select_columns} FROM fact_pnl_entries WHERE use_case_id = :uc_id AND scenario = :scen",
+            {'uc_id': uc_id, 'scen': 'ACTUAL'},
+        ))
+    else:
+        queries.append(EngineQuery(
+            'snapshot_fact_load', f"SELECT {select_columns} FROM {snapshot_table}", full_read=True
+        ))
+
+    # SQL rules (app/services/calculator.py apply_rule_to_leaf)
+    rules = session.query(MetadataRule).filter(
+        MetadataRule.use_case_id == use_case.use_case_id,
+        MetadataRule.sql_where.isnot(None),
+    ).order_by(MetadataRule.rule_id).limit(MAX_RULES).all()
+    for rule in rules:
+        if ';' in rule.sql_where:
+            # Rejected by the engine's SQL validation; never sent, not even to EXPLAIN
+            continue
+        target_column = get_measure_column_name(rule.measure_name or 'daily_pnl', rule_table)
+        queries.append(EngineQuery(
+            f"rule_{rule.rule_id}",
+            f"SELECT COALESCE(SUM({target_column}), 0) FROM {rule_table} WHERE {rule.sql_where}",
+        ))
+
+    # Bridge expansion from the hierarchy root
+    root = session.query(DimHierarchy.node_id).filter(
+        DimHierarchy.atlas_source == use_case.atlas_structure_id,
+        DimHierarchy.parent_node_id.is_(None),
+    ).first()
+    if root is not None:
+        queries.append(EngineQuery(
+            'bridge_expand',
+            "SELECT leaf_node_id FROM hierarchy_bridge WHERE parent_node_id = :node_id",
+            {'node_id': root.node_id},
+        ))
+
+    # Run results read (app/services/result_store.py run_results_select)
+    latest_run = session.query(CalculationRun.id).filter(
+        CalculationRun.use_case_id == use_case.use_case_id
+    ).order_by(CalculationRun.executed_at.desc()).first()
+    if latest_run is not None:
+        compiled = run_results_select(latest_run.id).compile(dialect=session.get_bind().dialect)
+        params = {key: str(value) if isinstance(value, UUID) else value for key, value in compiled.params.items()}
+        queries.append(EngineQuery('run_results', str(compiled), params, driver_sql=True))
+
+    return queries
+
+
+def _plan_nodes(plan: Dict[str, Any]):
+    yield plan
+    for child in plan.get('Plans', []):
+        yield from _plan_nodes(child)
+
+
+def _explain(session: Session, query: EngineQuery) -> Dict[str, Any]:
+    """Top plan node of EXPLAIN (FORMAT JSON)."""
+    statement = f"EXPLAIN (FORMAT JSON) {query.sql}"
+    # A failing statement (e.g. invalid rule SQL) must not abort the session's transaction
+    with session.begin_nested():
+        if query.driver_sql:
+            result = session.connection().exec_driver_sql(statement, query.params)
+        else:
+            result = session.execute(text(statement), query.params)
+        raw = result.scalar()
+    plan = raw if isinstance(raw, list) else json.loads(raw)
+    return plan[0]['Plan']
+
+
+def _table_rows(session: Session) -> Dict[str, int]:
+    rows = session.execute(text(
+        "SELECT relname, reltuples::bigint FROM pg_class "
+        "WHERE relkind = 'r' AND relnamespace = 'public'::regnamespace"
+    )).fetchall()
+    return {name: max(int(count), 0) for name, count in rows}
+
+
+def missing_engine_indexes(session: Session) -> List[Dict[str, str]]:
+    """Engine indexes (migration c9e4a2f7b1d3) absent from existing tables."""
+    existing = {
+        row[0] for row in session.execute(text("SELECT indexname FROM pg_indexes WHERE schemaname = 'public'"))
+    }
+    tables = {
+        row[0] for row in session.execute(text("SELECT tablename FROM pg_tables WHERE schemaname = 'public'"))
+    }
+    return [
+        {'index': index, 'table': table}
+        for index, table in ENGINE_INDEXES.items()
+        if table in tables and index not in existing
+    ]
+
+
+def advise(session: Session, use_case_id: UUID, large_table_rows: int = LARGE_TABLE_ROWS) -> Dict[str, Any]:
+    """
+    Explain the engine statements of a use case and report large sequential scans.
+
+    Args:
+        session: Database session (PostgreSQL)
+        use_case_id: Use case UUID
+        large_table_rows: Minimum table size (rows) for a Seq Scan to be reported
+
+    Returns:
+        Report with per-query plan summaries, findings and missing engine indexes
+
+    Raises:
+        ValueError: If the database is not PostgreSQL or the use case does not exist
+    """
+    if session.get_bind().dialect.name != 'postgresql':
+        raise ValueError("Index advisor requires PostgreSQL")
+    use_case = session.query(UseCase).filter(UseCase.use_case_id == use_case_id).first()
+    if not use_case:
+        raise ValueError(f"Use case '{use_case_id}' not found")
+
+    table_rows = _table_rows(session)
+    queries_report = []
+    findings = []
+    for query in engine_queries(session, use_case):
+        entry: Dict[str, Any] = {'query': query.name, 'statement': query.sql, 'full_read': query.full_read}
+        try:
+            plan = _explain(session, query)
+        except Exception as e:
+            logger.warning(f"[IndexAdvisor] EXPLAIN failed for {query.name}: {e}")
+            entry['error'] = str(e).splitlines()[0]
+            queries_report.append(entry)
+            continue
+
+        seq_scans = []
+        index_scans = []
+        for node in _plan_nodes(plan):
+            node_type = node.get('Node Type')
+            if node_type == 'Seq Scan':
+                table = node.get('Relation Name')
+                scan = {
+                    'table': table,
+                    'table_rows': table_rows.get(table, 0),
+                    'estimated_rows': node.get('Plan Rows'),
+                    'filter': node.get('Filter'),
+                }
+                seq_scans.append(scan)
+                if not query.full_read and scan['table_rows'] >= large_table_rows:
+                    findings.append(dict(scan, query=query.name))
+            elif node.get('Index Name'):
+                index_scans.append(f"{node_type}: {node['Index Name']}")
+
+        entry.update({
+            'total_cost': plan.get('Total Cost'),
+            'estimated_rows': plan.get('Plan Rows'),
+            'seq_scans': seq_scans,
+            'index_scans': index_scans,
+        })
+        queries_report.append(entry)
+
+    findings.sort(key=lambda finding: finding['table_rows'], reverse=True)
+    logger.info(
+        f"[IndexAdvisor] use case {use_case_id}: {len(queries_report)} statements explained, "
+        f"{len(findings)} large sequential scans"
+    )
+    return {
+        'use_case_id': str(use_case_id),
+        'large_table_rows': large_table_rows,
+        'findings': findings,
+        'missing_indexes': missing_engine_indexes(session),
+        'queries': queries_report,
+    }
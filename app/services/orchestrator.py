@@ -4,10 +4,11 @@ Implements date-anchored, version-controlled calculation runs.
 Supports "Trial Analysis" by allowing multiple runs per PNL_DATE.
 """
 
+import logging
 import time
 from datetime import date
 from decimal import Decimal
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 from uuid import UUID, uuid4
 
 import pandas as pd
@@ -20,7 +21,11 @@ from app.models import (
     MetadataRule,
     UseCase,
     DimHierarchy,
+    result_vector_columns,
 )
+from app.services.result_store import deduplicate_run_rows
+from app.metrics import record_rules
+from app.services.stage_tracing import StageTrace
 from app.engine.waterfall import (
     load_hierarchy,
     calculate_natural_rollup,
@@ -28,6 +33,47 @@ from app.engine.waterfall import (
     load_rules,
 )
 
+logger = logging.getLogger(__name__)
+
+
+# Fact columns per source table, aliased to the shape facts_frame_from_rows expects:
+# node_id, daily_amount, wtd_amount, ytd_amount, scenario, currency[, pnl_commission, pnl_trade]
+FACT_SELECT_COLUMNS = {
+    'fact_pnl_use_case_3': """
+                strategy as node_id,
+                pnl_daily as daily_amount,
+                0 as wtd_amount,
+                0 as ytd_amount,
+                'ACTUAL' as scenario,
+                'USD' as currency,
+                pnl_commission,
+                pnl_trade""",
+    'fact_pnl_entries': """
+                category_code as node_id,
+                daily_amount, 
+                wtd_amount, 
+                ytd_amount,
+                scenario,
+                COALESCE(currency, 'USD') as currency""",
+    # Default: fact_pnl_gold (Use Case 1)
+    'fact_pnl_gold': """
+                cc_id as node_id,
+                daily_pnl as daily_amount,
+                mtd_pnl as wtd_amount,
+                ytd_pnl as ytd_amount,
+                'ACTUAL' as scenario,
+                'USD' as currency""",
+}
+
+
+def resolve_source_table(use_case: UseCase) -> str:
+    """
+    Phase 5.5: Table Routing Logic.
+    1. If use_case.input_table_name is set, use that (e.g., 'fact_pnl_use_case_3')
+    2. Otherwise, fallback to 'fact_pnl_entries' for backward compatibility
+    """
+    return use_case.input_table_name if use_case.input_table_name else 'fact_pnl_entries'
+
 
 def load_facts_for_date(
     session: Session,
@@ -59,9 +105,7 @@ def load_facts_for_date(
         return pd.DataFrame()
     
     # Phase 5.5: Determine which table to query (Table Routing Logic)
-    # 1. If use_case.input_table_name is set, use that (e.g., 'fact_pnl_use_case_3')
-    # 2. Otherwise, fallback to 'fact_pnl_entries' for backward compatibility
-    source_table = use_case.input_table_name if use_case.input_table_name else 'fact_pnl_entries'
+    source_table = resolve_source_table(use_case)
     
     fact_logger.debug(f"Loading facts for Use Case ID: {use_case_id} (type: {type(use_case_id)})")
     fact_logger.info(f"load_facts_for_date: Loading facts for Use Case ID: {use_case_id}, table: {source_table}, pnl_date: {pnl_date}, scenario: {scenario}")
@@ -73,31 +117,11 @@ def load_facts_for_date(
     fact_logger.debug(f"EXECUTE RAW SQL for Use Case: {use_case_id_str}, table: {source_table}, pnl_date: {pnl_date}, scenario: {scenario}")
     
     # Phase 5.5: Build query dynamically based on source table
-    if source_table == 'fact_pnl_use_case_3':
-        # Use Case 3: fact_pnl_use_case_3 table (no use_case_id, no scenario, no pnl_date filter)
-        sql = text(f"""
-            SELECT 
-                strategy as node_id,
-                pnl_daily as daily_amount,
-                0 as wtd_amount,
-                0 as ytd_amount,
-                'ACTUAL' as scenario,
-                'USD' as currency,
-                pnl_commission,
-                pnl_trade
-            FROM {source_table}
-        """)
-        params = {}
-    elif source_table == 'fact_pnl_entries':
+    select_columns = FACT_SELECT_COLUMNS.get(source_table, FACT_SELECT_COLUMNS['fact_pnl_gold'])
+    if source_table == 'fact_pnl_entries':
         # Use Case 2: fact_pnl_entries table (has use_case_id, scenario)
         sql = text(f"""
-            SELECT 
-                category_code as node_id,
-                daily_amount, 
-                wtd_amount, 
-                ytd_amount,
-                scenario,
-                COALESCE(currency, 'USD') as currency
+            SELECT {select_columns}
             FROM {source_table} 
             WHERE use_case_id = :uc_id
             AND scenario = :scen
@@ -107,15 +131,9 @@ def load_facts_for_date(
             "scen": scenario
         }
     else:
-        # Default: fact_pnl_gold table (Use Case 1)
+        # fact_pnl_use_case_3 / fact_pnl_gold: no use_case_id, no scenario, no pnl_date filter
         sql = text(f"""
-            SELECT 
-                cc_id as node_id,
-                daily_pnl as daily_amount,
-                mtd_pnl as wtd_amount,
-                ytd_pnl as ytd_amount,
-                'ACTUAL' as scenario,
-                'USD' as currency
+            SELECT {select_columns}
             FROM {source_table}
         """)
         params = {}
@@ -132,6 +150,24 @@ def load_facts_for_date(
         fact_logger.warning(f"load_facts_for_date: No facts found for use_case_id={use_case_id_str}, table={source_table}, scenario={scenario}")
         return pd.DataFrame()
     
+    df = facts_frame_from_rows(rows, source_table)
+    
+    fact_logger.debug(f"Loaded {len(df)} Facts via Raw SQL for use_case_id={use_case_id_str}, table={source_table}")
+    
+    return df
+
+
+def facts_frame_from_rows(rows: List, source_table: str) -> pd.DataFrame:
+    """
+    Map raw fact rows (FACT_SELECT_COLUMNS order) to the calculation DataFrame.
+    
+    Args:
+        rows: Result rows of a SELECT over FACT_SELECT_COLUMNS[source_table]
+        source_table: Source fact table name
+    
+    Returns:
+        Pandas DataFrame with fact rows, using Decimal for numeric columns
+    """
     # Phase 5.5: Map rows based on input table
     data = []
     if source_table == 'fact_pnl_use_case_3':
@@ -185,11 +221,126 @@ def load_facts_for_date(
         if 'daily_pnl' in df.columns:
             df['daily_pnl'] = df['daily_pnl'].apply(lambda x: Decimal(str(x)))
     
-    fact_logger.debug(f"Loaded {len(df)} Facts via Raw SQL for use_case_id={use_case_id_str}, table={source_table}")
-    
     return df
 
 
+def split_rules(
+    rules_dict: Dict[str, MetadataRule],
+    hierarchy_dict: Dict
+) -> Tuple[Dict[str, MetadataRule], List[MetadataRule]]:
+    """
+    Phase 5.7: Separate SQL rules from Math rules and order the Math rules.
+    
+    Args:
+        rules_dict: Dictionary mapping node_id -> rule
+        hierarchy_dict: Dictionary mapping node_id -> node data
+    
+    Returns:
+        Tuple of (sql_rules by node_id, Math rules in dependency order)
+    
+    Raises:
+        ValueError: If the Math rules have a circular dependency
+    """
+    sql_rules = {
+        node_id: rule
+        for node_id, rule in rules_dict.items()
+        if rule.rule_type != 'NODE_ARITHMETIC' and rule.sql_where  # SQL rules only
+    }
+    
+    math_rules = [
+        rule for rule in rules_dict.values()
+        if rule.rule_type == 'NODE_ARITHMETIC' and rule.rule_expression
+    ]
+    
+    # Resolve execution order for Math rules
+    sorted_math_rules = []
+    if math_rules:
+        from app.services.dependency_resolver import DependencyResolver, CircularDependencyError
+        try:
+            sorted_math_rules = DependencyResolver.resolve_execution_order(
+                math_rules,
+                hierarchy_dict
+            )
+            logger.info(f"create_snapshot: Resolved execution order for {len(sorted_math_rules)} Math rules")
+        except CircularDependencyError as e:
+            logger.error(f"Circular dependency detected in Math rules: {e}")
+            raise ValueError(f"Cannot execute Math rules: {e}")
+    
+    return sql_rules, sorted_math_rules
+
+
+def apply_math_rules(
+    adjusted_results: Dict[str, Dict[str, Decimal]],
+    sorted_math_rules: List[MetadataRule],
+    scenario: str
+) -> None:
+    """
+    Phase 5.7: Apply Math rules (in dependency order) to one scenario's results, in place.
+    A failing rule sets its node to zero.
+    
+    Args:
+        adjusted_results: Results after SQL rules (updated in place)
+        sorted_math_rules: Math rules in execution order (see split_rules)
+        scenario: Scenario label for logging ('ACTUAL' or 'PRIOR')
+    """
+    from app.services.dependency_resolver import evaluate_type3_expression
+    
+    logger.info(f"create_snapshot: Applying {len(sorted_math_rules)} Math rules to {scenario} scenario")
+    
+    for rule in sorted_math_rules:
+        if rule.rule_type != 'NODE_ARITHMETIC':
+            continue
+        
+        target_node = rule.node_id
+        
+        # Capture original value for Flight Recorder logging
+        original_val = adjusted_results.get(target_node, {}).get('daily', Decimal('0'))
+        
+        # Evaluate the arithmetic expression
+        try:
+            measure_name = rule.measure_name or 'daily_pnl'
+            measure_key = 'daily'  # Default
+            if 'mtd' in measure_name.lower() or 'commission' in measure_name.lower():
+                measure_key = 'mtd'
+            elif 'ytd' in measure_name.lower() or 'trade' in measure_name.lower():
+                measure_key = 'ytd'
+            elif 'pytd' in measure_name.lower():
+                measure_key = 'pytd'
+            
+            calculated_values = evaluate_type3_expression(
+                rule.rule_expression,
+                adjusted_results,
+                measure=measure_key
+            )
+            
+            # Update adjusted_results with calculated values
+            adjusted_results[target_node] = {
+                'daily': Decimal(str(calculated_values.get('daily', Decimal('0')))),
+                'wtd': Decimal(str(calculated_values.get('mtd', Decimal('0')))),
+                'ytd': Decimal(str(calculated_values.get('ytd', Decimal('0')))),
+            }
+            
+            new_val = adjusted_results[target_node]['daily']
+            
+            # Flight Recorder Logging
+            logger.info(
+                f"🧮 MATH ENGINE [{scenario}]: Node {target_node} | "
+                f"SQL Value: {original_val} | Rule: {rule.rule_expression} | "
+                f"➡️ New Value: {new_val}"
+            )
+            
+        except Exception as e:
+            logger.error(f"Error executing Math rule {rule.rule_id} for node {target_node} in {scenario}: {e}")
+            # Set to zero on error
+            adjusted_results[target_node] = {
+                'daily': Decimal('0'),
+                'wtd': Decimal('0'),
+                'ytd': Decimal('0'),
+            }
+    
+    logger.info(f"create_snapshot: Successfully applied {len(sorted_math_rules)} Math rules to {scenario}")
+
+
 def calculate_variance(
     actual_results: Dict[str, Dict[str, Decimal]],
     prior_results: Dict[str, Dict[str, Decimal]]
@@ -271,50 +422,17 @@ def create_snapshot(
     """
     start_time = time.time()
     
-    # TRANSACTION RESET: Ensure db.session.rollback() is the first line
+    # TRANSACTION RESET: Clear any failed transaction state left on the caller's session.
+    # The session (and its pooled connection) is reused - never closed/replaced here,
+    # so the request holds exactly one connection for the whole snapshot.
+    import logging
+    reset_logger = logging.getLogger(__name__)
     try:
         session.rollback()
-        import logging
-        reset_logger = logging.getLogger(__name__)
         reset_logger.info(f"create_snapshot: Transaction reset (rollback) at function start for use_case_id={use_case_id}")
     except Exception as reset_error:
-        import logging
-        reset_logger = logging.getLogger(__name__)
         reset_logger.warning(f"create_snapshot: Transaction reset failed (may be expected): {reset_error}")
     
-    # FORCE-KILL SESSION: Physically sever the "poisoned" connection
-    # Note: We can't replace the session parameter, but we can ensure it's in a clean state
-    import logging
-    flush_logger = logging.getLogger(__name__)
-    
-    try:
-        session.rollback()
-        flush_logger.info(f"create_snapshot: Force-killed session (rollback) for use_case_id={use_case_id}")
-    except Exception as rollback_error:
-        flush_logger.warning(f"create_snapshot: Rollback failed (may be expected): {rollback_error}")
-    
-    try:
-        session.close()
-        flush_logger.info(f"create_snapshot: Force-killed session (close) for use_case_id={use_case_id}")
-    except Exception as close_error:
-        flush_logger.warning(f"create_snapshot: Close failed (may be expected): {close_error}")
-    
-    # CRITICAL: After close(), the session is invalid. We need to get a fresh one.
-    # Since session is passed as parameter and we can't modify it, we'll create a fresh session
-    # and use it for all subsequent operations. The original session will be ignored.
-    try:
-        from app.database import SessionLocal
-        fresh_session = SessionLocal()
-        flush_logger.info(f"create_snapshot: Created fresh session for use_case_id={use_case_id}")
-        # Replace session variable for all subsequent operations
-        # This is a local variable, so it won't affect the parameter
-        session = fresh_session
-    except Exception as session_error:
-        flush_logger.error(f"create_snapshot: Failed to create fresh session: {session_error}")
-        # If we can't create a fresh session, we must raise an error
-        # because the original session is closed and unusable
-        raise RuntimeError(f"CRITICAL: Cannot create fresh session after close(): {session_error}") from session_error
-    
     # Validate use case exists
     use_case = session.query(UseCase).filter(UseCase.use_case_id == use_case_id).first()
     if not use_case:
@@ -342,8 +460,12 @@ def create_snapshot(
     except Exception:
         pass  # Ignore if no transaction exists
     
+    # Per-stage timings and statement counts, persisted with the run
+    trace = StageTrace(f"create_snapshot {use_case_id} {pnl_date}").activate()
+    
     try:
         # Load hierarchy for the use case's structure
+        trace.begin('hierarchy_load')
         try:
             hierarchy_dict, children_dict, leaf_nodes = load_hierarchy(session, use_case_id)
         except Exception as hierarchy_error:
@@ -354,8 +476,10 @@ def create_snapshot(
             raise ValueError(f"No hierarchy found for use case '{use_case_id}'")
         
         max_depth = max(node.depth for node in hierarchy_dict.values())
+        trace.set_rows(len(hierarchy_dict))
         
         # Load facts for ACTUAL scenario
+        trace.begin('fact_load')
         # MEASURE MAPPING AUDIT: Ensure we're loading from fact_pnl_entries with correct use_case_id filter
         try:
             actual_facts_df = load_facts_for_date(session, use_case_id, pnl_date, scenario="ACTUAL")
@@ -384,10 +508,12 @@ def create_snapshot(
         except Exception as facts_error:
             session.rollback()
             raise ValueError(f"Failed to load PRIOR facts: {facts_error}") from facts_error
+        trace.set_rows(len(actual_facts_df) + len(prior_facts_df))
         
         # Calculate natural rollups for ACTUAL
         # Note: We need to map category_code to cc_id for hierarchy matching
         # For now, assuming category_code maps to leaf node IDs
+        trace.begin('natural_rollup')
         try:
             actual_natural_results = calculate_natural_rollup_from_entries(
                 hierarchy_dict, children_dict, leaf_nodes, actual_facts_df
@@ -406,6 +532,7 @@ def create_snapshot(
             raise ValueError(f"Failed to calculate PRIOR natural rollups: {rollup_error}") from rollup_error
         
         # Load active rules for use case
+        trace.begin('rules_load')
         try:
             rules_dict = load_rules(session, use_case_id)
         except Exception as rules_error:
@@ -413,40 +540,17 @@ def create_snapshot(
             raise ValueError(f"Failed to load rules: {rules_error}") from rules_error
         
         # Phase 5.7: Separate SQL rules from Math rules (unified calculation logic)
-        sql_rules = {
-            node_id: rule
-            for node_id, rule in rules_dict.items()
-            if rule.rule_type != 'NODE_ARITHMETIC' and rule.sql_where  # SQL rules only
-        }
-        
-        math_rules = [
-            rule for rule in rules_dict.values()
-            if rule.rule_type == 'NODE_ARITHMETIC' and rule.rule_expression
-        ]
-        
-        # Resolve execution order for Math rules
-        sorted_math_rules = []
-        if math_rules:
-            try:
-                from app.services.dependency_resolver import DependencyResolver, CircularDependencyError
-                sorted_math_rules = DependencyResolver.resolve_execution_order(
-                    math_rules,
-                    hierarchy_dict
-                )
-                import logging
-                snapshot_logger = logging.getLogger(__name__)
-                snapshot_logger.info(f"create_snapshot: Resolved execution order for {len(sorted_math_rules)} Math rules")
-            except CircularDependencyError as e:
-                import logging
-                snapshot_logger = logging.getLogger(__name__)
-                snapshot_logger.error(f"Circular dependency detected in Math rules: {e}")
-                raise ValueError(f"Cannot execute Math rules: {e}")
+        sql_rules, sorted_math_rules = split_rules(rules_dict, hierarchy_dict)
+        trace.set_rows(len(rules_dict))
         
         # Apply SQL rules to ACTUAL scenario
+        trace.begin('sql_rules')
+        trace.set_rows(len(sql_rules))
         try:
             actual_adjusted_results = apply_rules_to_results(
                 session, actual_facts_df, actual_natural_results,
-                hierarchy_dict, children_dict, sql_rules, max_depth
+                hierarchy_dict, children_dict, sql_rules, max_depth,
+                use_case_id=use_case_id, scenario="ACTUAL"
             )
         except Exception as rules_error:
             session.rollback()
@@ -456,75 +560,19 @@ def create_snapshot(
         try:
             prior_adjusted_results = apply_rules_to_results(
                 session, prior_facts_df, prior_natural_results,
-                hierarchy_dict, children_dict, sql_rules, max_depth
+                hierarchy_dict, children_dict, sql_rules, max_depth,
+                use_case_id=use_case_id, scenario="PRIOR"
             )
         except Exception as rules_error:
             session.rollback()
             raise ValueError(f"Failed to apply SQL rules to PRIOR: {rules_error}") from rules_error
         
         # Phase 5.7: Apply Math rules to ACTUAL scenario (after SQL rules)
+        trace.begin('math_rules')
+        trace.set_rows(len(sorted_math_rules))
         if sorted_math_rules:
             try:
-                from app.services.dependency_resolver import evaluate_type3_expression
-                from decimal import Decimal
-                import logging
-                snapshot_logger = logging.getLogger(__name__)
-                
-                snapshot_logger.info(f"create_snapshot: Applying {len(sorted_math_rules)} Math rules to ACTUAL scenario")
-                
-                for rule in sorted_math_rules:
-                    if rule.rule_type != 'NODE_ARITHMETIC':
-                        continue
-                    
-                    target_node = rule.node_id
-                    
-                    # Capture original value for Flight Recorder logging
-                    original_val = actual_adjusted_results.get(target_node, {}).get('daily', Decimal('0'))
-                    
-                    # Evaluate the arithmetic expression
-                    try:
-                        measure_name = rule.measure_name or 'daily_pnl'
-                        measure_key = 'daily'  # Default
-                        if 'mtd' in measure_name.lower() or 'commission' in measure_name.lower():
-                            measure_key = 'mtd'
-                        elif 'ytd' in measure_name.lower() or 'trade' in measure_name.lower():
-                            measure_key = 'ytd'
-                        elif 'pytd' in measure_name.lower():
-                            measure_key = 'pytd'
-                        
-                        calculated_values = evaluate_type3_expression(
-                            rule.rule_expression,
-                            actual_adjusted_results,
-                            measure=measure_key
-                        )
-                        
-                        # Update adjusted_results with calculated values
-                        actual_adjusted_results[target_node] = {
-                            'daily': Decimal(str(calculated_values.get('daily', Decimal('0')))),
-                            'wtd': Decimal(str(calculated_values.get('mtd', Decimal('0')))),
-                            'ytd': Decimal(str(calculated_values.get('ytd', Decimal('0')))),
-                        }
-                        
-                        new_val = actual_adjusted_results[target_node]['daily']
-                        
-                        # Flight Recorder Logging
-                        snapshot_logger.info(
-                            f"🧮 MATH ENGINE [ACTUAL]: Node {target_node} | "
-                            f"SQL Value: {original_val} | Rule: {rule.rule_expression} | "
-                            f"➡️ New Value: {new_val}"
-                        )
-                        
-                    except Exception as e:
-                        snapshot_logger.error(f"Error executing Math rule {rule.rule_id} for node {target_node} in ACTUAL: {e}")
-                        # Set to zero on error
-                        actual_adjusted_results[target_node] = {
-                            'daily': Decimal('0'),
-                            'wtd': Decimal('0'),
-                            'ytd': Decimal('0'),
-                        }
-                
-                snapshot_logger.info(f"create_snapshot: Successfully applied {len(sorted_math_rules)} Math rules to ACTUAL")
-                
+                apply_math_rules(actual_adjusted_results, sorted_math_rules, "ACTUAL")
             except Exception as math_error:
                 session.rollback()
                 raise ValueError(f"Failed to apply Math rules to ACTUAL: {math_error}") from math_error
@@ -532,71 +580,13 @@ def create_snapshot(
         # Phase 5.7: Apply Math rules to PRIOR scenario (after SQL rules)
         if sorted_math_rules:
             try:
-                from app.services.dependency_resolver import evaluate_type3_expression
-                from decimal import Decimal
-                import logging
-                snapshot_logger = logging.getLogger(__name__)
-                
-                snapshot_logger.info(f"create_snapshot: Applying {len(sorted_math_rules)} Math rules to PRIOR scenario")
-                
-                for rule in sorted_math_rules:
-                    if rule.rule_type != 'NODE_ARITHMETIC':
-                        continue
-                    
-                    target_node = rule.node_id
-                    
-                    # Capture original value for Flight Recorder logging
-                    original_val = prior_adjusted_results.get(target_node, {}).get('daily', Decimal('0'))
-                    
-                    # Evaluate the arithmetic expression
-                    try:
-                        measure_name = rule.measure_name or 'daily_pnl'
-                        measure_key = 'daily'  # Default
-                        if 'mtd' in measure_name.lower() or 'commission' in measure_name.lower():
-                            measure_key = 'mtd'
-                        elif 'ytd' in measure_name.lower() or 'trade' in measure_name.lower():
-                            measure_key = 'ytd'
-                        elif 'pytd' in measure_name.lower():
-                            measure_key = 'pytd'
-                        
-                        calculated_values = evaluate_type3_expression(
-                            rule.rule_expression,
-                            prior_adjusted_results,
-                            measure=measure_key
-                        )
-                        
-                        # Update adjusted_results with calculated values
-                        prior_adjusted_results[target_node] = {
-                            'daily': Decimal(str(calculated_values.get('daily', Decimal('0')))),
-                            'wtd': Decimal(str(calculated_values.get('mtd', Decimal('0')))),
-                            'ytd': Decimal(str(calculated_values.get('ytd', Decimal('0')))),
-                        }
-                        
-                        new_val = prior_adjusted_results[target_node]['daily']
-                        
-                        # Flight Recorder Logging
-                        snapshot_logger.info(
-                            f"🧮 MATH ENGINE [PRIOR]: Node {target_node} | "
-                            f"SQL Value: {original_val} | Rule: {rule.rule_expression} | "
-                            f"➡️ New Value: {new_val}"
-                        )
-                        
-                    except Exception as e:
-                        snapshot_logger.error(f"Error executing Math rule {rule.rule_id} for node {target_node} in PRIOR: {e}")
-                        # Set to zero on error
-                        prior_adjusted_results[target_node] = {
-                            'daily': Decimal('0'),
-                            'wtd': Decimal('0'),
-                            'ytd': Decimal('0'),
-                        }
-                
-                snapshot_logger.info(f"create_snapshot: Successfully applied {len(sorted_math_rules)} Math rules to PRIOR")
-                
+                apply_math_rules(prior_adjusted_results, sorted_math_rules, "PRIOR")
             except Exception as math_error:
                 session.rollback()
                 raise ValueError(f"Failed to apply Math rules to PRIOR: {math_error}") from math_error
         
         # Calculate variance
+        trace.begin('variance')
         try:
             variance_results = calculate_variance(actual_adjusted_results, prior_adjusted_results)
         except Exception as variance_error:
@@ -610,6 +600,7 @@ def create_snapshot(
             pass  # Ignore if no transaction exists
         
         # Bulk-insert results into fact_calculated_results
+        trace.begin('persistence')
         try:
             result_count = save_calculation_results(
                 calculation_run.id,
@@ -618,11 +609,15 @@ def create_snapshot(
                 hierarchy_dict,
                 children_dict,
                 {**sql_rules, **{rule.node_id: rule for rule in sorted_math_rules}},  # Combine SQL and Math rules
-                session
+                session,
+                natural_results=actual_natural_results
             )
         except Exception as save_error:
             session.rollback()
             raise ValueError(f"Failed to save calculation results: {save_error}") from save_error
+        trace.set_rows(result_count)
+        trace.end()
+        record_rules(list(sql_rules.values()) + list(sorted_math_rules))
         
         # Update calculation run status
         end_time = time.time()
@@ -632,6 +627,16 @@ def create_snapshot(
         calculation_run.calculation_duration_ms = duration_ms
         session.commit()
         
+        # Keep the typed time-series store on the latest run of this date
+        trace.begin('result_series')
+        from app.services.result_series import refresh_result_series
+        refresh_result_series(session, [calculation_run.id])
+        trace.end()
+        stage_timings = trace.to_json()
+        calculation_run.stage_timings = stage_timings
+        session.commit()
+        trace.log_summary()
+        
         # NOTE: Converting Decimal to float for JSON serialization (API response)
         # This is acceptable because JSON doesn't support Decimal type.
         # All calculations above use Decimal, only converting at API boundary.
@@ -649,10 +654,13 @@ def create_snapshot(
             'rules_applied': len(sql_rules) + len(sorted_math_rules),
             'result_count': result_count,
             'duration_ms': duration_ms,
+            'stage_timings': stage_timings,
             'status': 'COMPLETED'
         }
     
     except Exception as e:
+        trace.end(failed=True)
+        
         # CRITICAL: Rollback transaction on error to prevent InFailedSqlTransaction
         try:
             session.rollback()
@@ -667,6 +675,7 @@ def create_snapshot(
         # Update calculation run status to FAILED
         try:
             calculation_run.status = "FAILED"
+            calculation_run.stage_timings = trace.to_json()  # Stages completed before the failure
             session.commit()
         except Exception as commit_error:
             # If commit fails, rollback and close session
@@ -679,6 +688,9 @@ def create_snapshot(
         
         # Re-raise the original exception
         raise e
+    
+    finally:
+        trace.deactivate()
 
 
 def calculate_natural_rollup_from_entries(
@@ -735,14 +747,36 @@ def apply_rules_to_results(
     hierarchy_dict: Dict,
     children_dict: Dict,
     active_rules: Dict[str, MetadataRule],
-    max_depth: int
+    max_depth: int,
+    use_case_id: Optional[UUID] = None,
+    scenario: Optional[str] = None,
+    type2b_engine=None
 ) -> Dict[str, Dict[str, Decimal]]:
     """
     Apply business rules to natural results, following "Most Specific Wins" policy.
+    
+    use_case_id / scenario describe the row scope of facts_df, so Type 2B rules can
+    be pushed down to the fact table when the planner prefers SQL. A caller that
+    runs several use cases over the same frame can pass one shared type2b_engine.
     """
     adjusted_results = natural_results.copy()
     rules_applied = 0
     
+    # Phase 5.4: use_case drives table detection in apply_rule_override (loaded once per run)
+    use_case = None
+    if use_case_id:
+        use_case = session.query(UseCase).filter(UseCase.use_case_id == use_case_id).first()
+    
+    # One Type 2B engine per run: the planner picks SQL pushdown or in-memory masks
+    if type2b_engine is None:
+        from app.engine.type2b_sql import create_type2b_engine, type2b_scope
+        from app.engine.waterfall import resolve_fact_table_name
+        table_name = resolve_fact_table_name(facts_df, use_case)
+        type2b_engine = create_type2b_engine(
+            session, facts_df, active_rules.values(), table_name,
+            type2b_scope(table_name, use_case_id, scenario)
+        )
+    
     # Helper function to check if any descendant has a rule
     def has_descendant_rule(node_id: str) -> bool:
         children = children_dict.get(node_id, [])
@@ -761,8 +795,7 @@ def apply_rules_to_results(
                 if not has_descendant_rule(node_id):
                     rule = active_rules[node_id]
                     # Phase 5.4: Pass use_case to apply_rule_override for table detection
-                    use_case = session.query(UseCase).filter(UseCase.use_case_id == use_case_id).first()
-                    override_values = apply_rule_override(session, facts_df, rule, use_case)
+                    override_values = apply_rule_override(session, facts_df, rule, use_case, type2b_engine)
                     
                     # Map to our measure structure (daily, wtd, ytd)
                     adjusted_results[node_id] = {
@@ -775,6 +808,46 @@ def apply_rules_to_results(
     return adjusted_results
 
 
+def build_result_rows(
+    calculation_run_id: UUID,
+    adjusted_results: Dict[str, Dict[str, Decimal]],
+    variance_results: Dict[str, Dict[str, Decimal]],
+    active_rules: Dict[str, MetadataRule],
+    natural_results: Optional[Dict[str, Dict[str, Decimal]]] = None
+) -> List[Dict]:
+    """
+    fact_calculated_results rows (bulk_insert_mappings format) for one snapshot run.
+    
+    Measures go to the typed adjusted_* / natural_* / plug_* columns as Decimals
+    (4 decimals); 'wtd' results are stored in the mtd column.
+    
+    Args:
+        calculation_run_id: Calculation run ID
+        adjusted_results: Rule-adjusted results {node_id: {daily, wtd, ytd}}
+        variance_results: ACTUAL - PRIOR variance (stored as the plug)
+        active_rules: Rules applied in the run (sets is_override)
+        natural_results: Optional ACTUAL natural rollup (natural_* columns)
+    
+    Returns:
+        List of row dictionaries
+    """
+    zero_vector = {'daily': Decimal('0'), 'wtd': Decimal('0'), 'ytd': Decimal('0')}
+    rows = []
+    for node_id, measures in adjusted_results.items():
+        natural = natural_results.get(node_id, zero_vector) if natural_results is not None else None
+        rows.append({
+            'result_id': uuid4(),
+            'calculation_run_id': calculation_run_id,
+            'node_id': node_id,
+            **result_vector_columns('adjusted', measures),
+            **result_vector_columns('natural', natural),
+            **result_vector_columns('plug', variance_results.get(node_id, zero_vector)),  # Using variance as plug for now
+            'is_override': node_id in active_rules,  # Check if node has a rule applied
+            'is_reconciled': True,  # Will be validated separately
+        })
+    return rows
+
+
 def save_calculation_results(
     calculation_run_id: UUID,
     adjusted_results: Dict[str, Dict[str, Decimal]],
@@ -782,13 +855,13 @@ def save_calculation_results(
     hierarchy_dict: Dict,
     children_dict: Dict,
     active_rules: Dict[str, MetadataRule],
-    session: Session
+    session: Session,
+    natural_results: Optional[Dict[str, Dict[str, Decimal]]] = None
 ) -> int:
     """
     Bulk-insert calculation results into fact_calculated_results.
     
-    CRITICAL: All measure_vector and plug_vector values must be float/Decimal, NOT strings.
-    PostgreSQL JSONB expects numeric types for proper querying and aggregation.
+    Measures are written to the typed NUMERIC columns (see build_result_rows).
     """
     import logging
     logger = logging.getLogger(__name__)
@@ -823,45 +896,16 @@ def save_calculation_results(
                 f"daily={measures.get('daily', 0)}, wtd={measures.get('wtd', 0)}, ytd={measures.get('ytd', 0)}"
             )
         
-        for node_id, measures in adjusted_results.items():
-            # Format measure_vector (using adjusted results)
-            # CRITICAL FIX: Convert to float with rounding, not string, to prevent InFailedSqlTransaction
-            # Use round(float(val), 4) to ensure clean numeric data for PostgreSQL JSONB
-            measure_vector = {
-                'daily': round(float(measures.get('daily', Decimal('0'))), 4),
-                'wtd': round(float(measures.get('wtd', Decimal('0'))), 4),
-                'ytd': round(float(measures.get('ytd', Decimal('0'))), 4),
-                'pytd': 0.0,  # Add pytd to match expected format
-            }
-            
-            # Format variance_vector (plug_vector)
-            # CRITICAL FIX: Convert to float with rounding, not string
-            variance = variance_results.get(node_id, {})
-            variance_vector = {
-                'daily': round(float(variance.get('daily', Decimal('0'))), 4),
-                'wtd': round(float(variance.get('wtd', Decimal('0'))), 4),
-                'ytd': round(float(variance.get('ytd', Decimal('0'))), 4),
-                'pytd': 0.0,  # Add pytd to match expected format
-            }
-            
-            # Check if node has a rule applied
-            is_override = node_id in active_rules
-            
-            result_obj = FactCalculatedResult(
-                result_id=uuid4(),
-                calculation_run_id=calculation_run_id,
-                node_id=node_id,
-                measure_vector=measure_vector,
-                plug_vector=variance_vector,  # Using variance as plug for now
-                is_override=is_override,
-                is_reconciled=True  # Will be validated separately
-            )
-            result_objects.append(result_obj)
+        result_rows = build_result_rows(
+            calculation_run_id, adjusted_results, variance_results, active_rules, natural_results
+        )
+        for row in result_rows:
+            result_objects.append(FactCalculatedResult(**row))
         
         # THE "HARD" SAFETY GATE: Block zero-insert before bulk insert
         # CALCULATE TOTAL P&L TO VERIFY DATA
         # CRITICAL: Use Decimal for summation, not float (maintains precision)
-        total_daily = sum(Decimal(str(obj.measure_vector.get('daily', 0))) for obj in result_objects)
+        total_daily = sum(obj.adjusted_daily for obj in result_objects)
         logger.debug(f"Total Daily P&L to Save: {total_daily}")
         logger.info(f"save_calculation_results: Total Daily P&L to Save: {total_daily}, Object count: {len(result_objects)}")
         
@@ -893,6 +937,24 @@ def save_calculation_results(
             except Exception as close_error:
                 logger.error(f"save_calculation_results: Failed to close session: {close_error}")
         
+        # Delta storage: keep only the rows that differ from the latest full run of the date
+        base_run_id = None
+        try:
+            calculation_run = session.get(CalculationRun, calculation_run_id)
+            if calculation_run is not None:
+                base_run_id, delta_rows = deduplicate_run_rows(
+                    session, calculation_run.use_case_id, calculation_run.pnl_date,
+                    result_rows, calculation_run_id=calculation_run_id
+                )
+                if base_run_id is not None:
+                    delta_node_ids = {row['node_id'] for row in delta_rows}
+                    result_objects = [obj for obj in result_objects if obj.node_id in delta_node_ids]
+                    result_rows = delta_rows
+        except Exception as delta_error:
+            logger.warning(f"save_calculation_results: Delta storage skipped, saving full run: {delta_error}")
+            base_run_id = None
+            session.rollback()
+        
         # BULK INSERT STABILIZATION: Log first row before DB insert
         if result_objects:
             first_obj = result_objects[0]
@@ -909,19 +971,8 @@ def save_calculation_results(
         successful_inserts = 0
         failed_inserts = 0
         
-        for obj in result_objects:
+        for obj, result_dict in zip(result_objects, result_rows):
             try:
-                # Create dictionary for this row
-                result_dict = {
-                    'result_id': obj.result_id,
-                    'calculation_run_id': obj.calculation_run_id,
-                    'node_id': obj.node_id,
-                    'measure_vector': obj.measure_vector,
-                    'plug_vector': obj.plug_vector,
-                    'is_override': obj.is_override,
-                    'is_reconciled': obj.is_reconciled,
-                }
-                
                 # Insert single row
                 session.bulk_insert_mappings(FactCalculatedResult, [result_dict])
                 session.flush()  # Flush after each row to catch errors early
@@ -942,6 +993,10 @@ def save_calculation_results(
         
         # Commit all successful inserts
         try:
+            if base_run_id is not None:
+                session.query(CalculationRun).filter(CalculationRun.id == calculation_run_id).update(
+                    {CalculationRun.base_run_id: base_run_id}, synchronize_session='fetch'
+                )
             session.commit()
             logger.info(
                 f"save_calculation_results: Successfully saved {successful_inserts} calculation results "
@@ -956,6 +1011,9 @@ def save_calculation_results(
                 logger.warning(f"save_calculation_results: Rollback also failed: {rollback_error}")
             # Don't raise - return fake success instead
         
+        if base_run_id is not None and not failed_inserts:
+            return len(adjusted_results)  # Nodes in the run (delta rows + base rows)
+        
         # Return count of successful inserts (or fake success if all failed)
         if successful_inserts == 0:
             # DEMO MODE: Return fake success instead of raising error
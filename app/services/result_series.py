@@ -0,0 +1,129 @@
+"""
+Time-series results store (fact_result_series).
+
+fact_calculated_results keeps one row per node and run, so a "node X over the
+last 90 COB dates" view would have to find and read every run of the range. fact_result_series holds a typed numeric copy of the latest COMPLETED run
+per (use case, PNL date), keyed by (use_case_id, node_id, pnl_date):
+
+- Writers (create_snapshot, batch scheduler, backfill) call
+  refresh_result_series with the runs they persisted. The affected
+  (use case, PNL date) slots are recomputed in SQL from the latest run, so a
+  re-run of a date replaces the previous values (including removed nodes).
+- Readers (async_reads.get_result_series) get trend and variance-over-time
+  data from one primary key range scan.
+
+The series is derived data: rebuild_result_series recomputes it from the runs.
+"""
+
+import logging
+from typing import Iterable, Optional
+from uuid import UUID
+
+from sqlalchemy import bindparam, text
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+SERIES_MEASURES = ('daily', 'wtd', 'ytd', 'pytd')
+SERIES_VARIANCES = ('daily_variance', 'wtd_variance', 'ytd_variance')
+
+# {slots}: sub-select of (use_case_id, pnl_date) pairs to recompute
+_LATEST_RUNS_SQL = """
+    latest_runs AS (
+        SELECT DISTINCT ON (cr.use_case_id, cr.pnl_date)
+            cr.id, cr.base_run_id, cr.use_case_id, cr.pnl_date
+        FROM calculation_runs cr
+        JOIN ({slots}) slots ON slots.use_case_id = cr.use_case_id AND slots.pnl_date = cr.pnl_date
+        WHERE cr.status = 'COMPLETED'
+        ORDER BY cr.use_case_id, cr.pnl_date, cr.executed_at DESC, cr.id DESC
+    )
+"""
+
+_INSERT_SERIES_SQL = """
+    INSERT INTO fact_result_series (
+        use_case_id, node_id, pnl_date, calculation_run_id,
+        daily, wtd, ytd, pytd,
+        daily_variance, wtd_variance, ytd_variance,
+        is_override
+    )
+    SELECT DISTINCT ON (lr.use_case_id, r.node_id, lr.pnl_date)
+        lr.use_case_id, r.node_id, lr.pnl_date, lr.id,
+        COALESCE(r.adjusted_daily, (r.measure_vector->>'daily')::numeric, 0),
+        COALESCE(r.adjusted_mtd, (r.measure_vector->>'wtd')::numeric, (r.measure_vector->>'mtd')::numeric, 0),
+        COALESCE(r.adjusted_ytd, (r.measure_vector->>'ytd')::numeric, 0),
+        COALESCE(r.adjusted_pytd, (r.measure_vector->>'pytd')::numeric, 0),
+        COALESCE(r.plug_daily, (r.plug_vector->>'daily')::numeric, 0),
+        COALESCE(r.plug_mtd, (r.plug_vector->>'wtd')::numeric, (r.plug_vector->>'mtd')::numeric, 0),
+        COALESCE(r.plug_ytd, (r.plug_vector->>'ytd')::numeric, 0),
+        r.is_override
+    FROM latest_runs lr
+    JOIN fact_calculated_results r ON r.calculation_run_id IN (lr.id, lr.base_run_id)
+    -- Delta runs: the run's own row wins over its base run's row
+    ORDER BY lr.use_case_id, r.node_id, lr.pnl_date, (r.calculation_run_id = lr.id) DESC
+"""
+
+_RUN_SLOTS = "SELECT DISTINCT use_case_id, pnl_date FROM calculation_runs WHERE id IN :run_ids"
+
+REFRESH_DELETE_QUERY = text(f"""
+    DELETE FROM fact_result_series s
+    USING ({_RUN_SLOTS}) slots
+    WHERE s.use_case_id = slots.use_case_id AND s.pnl_date = slots.pnl_date
+""").bindparams(bindparam("run_ids", expanding=True))
+
+REFRESH_INSERT_QUERY = text(
+    "WITH " + _LATEST_RUNS_SQL.format(slots=_RUN_SLOTS) + _INSERT_SERIES_SQL
+).bindparams(bindparam("run_ids", expanding=True))
+
+
+def refresh_result_series(session: Session, calculation_run_ids: Iterable[UUID]) -> int:
+    """
+    Recompute the series slots touched by newly persisted runs.
+
+    Runs in a savepoint of the caller's transaction: a failure is logged and
+    leaves the caller's writes intact (the series can be rebuilt later).
+
+    Args:
+        session: Database session (caller commits)
+        calculation_run_ids: Runs just written
+
+    Returns:
+        Number of series rows written (0 on failure)
+    """
+    run_ids = [str(run_id) for run_id in calculation_run_ids]
+    if not run_ids:
+        return 0
+    try:
+        with session.begin_nested():
+            session.execute(REFRESH_DELETE_QUERY, {"run_ids": run_ids})
+            inserted = session.execute(REFRESH_INSERT_QUERY, {"run_ids": run_ids}).rowcount
+    except Exception as e:
+        logger.warning(f"[ResultSeries] Refresh failed for {len(run_ids)} runs (rebuild later): {e}")
+        return 0
+    logger.info(f"[ResultSeries] Refreshed {inserted} rows for {len(run_ids)} runs")
+    return inserted
+
+
+def rebuild_result_series(session: Session, use_case_id: Optional[UUID] = None) -> int:
+    """
+    Recompute the whole series (or one use case's) from calculation runs.
+
+    Args:
+        session: Database session (caller commits)
+        use_case_id: Optional use case to limit the rebuild to
+
+    Returns:
+        Number of series rows written
+    """
+    slots = "SELECT DISTINCT use_case_id, pnl_date FROM calculation_runs"
+    params = {}
+    if use_case_id:
+        slots += " WHERE use_case_id = :use_case_id"
+        params["use_case_id"] = str(use_case_id)
+        session.execute(text("DELETE FROM fact_result_series WHERE use_case_id = :use_case_id"), params)
+    else:
+        session.execute(text("DELETE FROM fact_result_series"))
+    inserted = session.execute(
+        text("WITH " + _LATEST_RUNS_SQL.format(slots=slots) + _INSERT_SERIES_SQL), params
+    ).rowcount
+    logger.info(f"[ResultSeries] Rebuilt {inserted} rows" + (f" for use case {use_case_id}" if use_case_id else ""))
+    return inserted
@@ -0,0 +1,254 @@
+"""
+Deduplicated result storage for repeated calculation runs.
+
+Re-running a snapshot for the same (use case, PNL date) usually changes only
+the nodes touched by an edited rule, yet every run used to store a full copy of
+all node rows. A run can now reference a base run (calculation_runs.base_run_id)
+and store only the rows that differ from it:
+
+- Writers call deduplicate_run_rows before inserting a run's rows. The base is
+  the latest COMPLETED full run for the same (use case, PNL date); rows whose
+  typed values and flags equal the base row are dropped. A full copy is kept
+  when there is no base, when the run removed nodes, or when the delta would
+  exceed RESULT_DELTA_MAX_FRACTION of the rows.
+- A base is always a full run, so an overlay is one level deep: readers resolve
+  a run with run_results_select (DISTINCT ON node_id over the run and its base,
+  the run's own row winning) and read performance for the latest run does not
+  depend on how many runs preceded it.
+- compact_results is the retention job: it keeps the newest runs per
+  (use case, PNL date), folds delta runs into full runs (materialize_run)
+  before their base is deleted, and deletes the rest.
+"""
+
+import logging
+import os
+from datetime import date
+from typing import Any, Dict, List, Optional, Tuple
+from uuid import UUID
+
+from sqlalchemy import case, desc, or_, select, text
+from sqlalchemy.orm import Session
+
+from app.models import CalculationRun, FactCalculatedResult, RESULT_MEASURES, RESULT_VECTOR_PREFIXES
+
+logger = logging.getLogger(__name__)
+
+# Store a full copy instead of a delta when more than this fraction of rows changed
+RESULT_DELTA_MAX_FRACTION = float(os.getenv("RESULT_DELTA_MAX_FRACTION", "0.5"))
+# Set to "false" to always store full runs
+RESULT_DELTA_STORAGE = os.getenv("RESULT_DELTA_STORAGE", "true").lower() == "true"
+
+COMPARED_COLUMNS = tuple(
+    f"{prefix}_{measure}" for prefix in RESULT_VECTOR_PREFIXES for measure in RESULT_MEASURES
+) + ('is_override', 'is_reconciled')
+
+# Every stored column except the row identity (used to fold a base into a delta run)
+_COPIED_COLUMNS = ('node_id', 'measure_vector', 'plug_vector') + COMPARED_COLUMNS
+
+
+def run_scope(run_id: UUID):
+    """
+    WHERE clause for the rows making up a run: its own rows (new or legacy run
+    link) and the rows of its base run.
+    """
+    base_run_id = select(CalculationRun.base_run_id).where(CalculationRun.id == run_id).scalar_subquery()
+    return or_(
+        FactCalculatedResult.calculation_run_id == run_id,
+        FactCalculatedResult.run_id == run_id,
+        FactCalculatedResult.calculation_run_id == base_run_id,
+    )
+
+
+def run_results_select(run_id: UUID, *columns):
+    """
+    Statement resolving a run's results through its base run (one row per node).
+
+    Rows stored by the run itself win over base rows (DISTINCT ON node_id,
+    base rows ordered last).
+
+    Args:
+        run_id: Calculation run ID (or legacy use_case_runs run ID)
+        *columns: Columns / expressions to select (default: FactCalculatedResult entities)
+
+    Returns:
+        SQLAlchemy select
+    """
+    own_row_first = case((FactCalculatedResult.calculation_run_id == run_id, 0), else_=1)
+    return (
+        select(*(columns or (FactCalculatedResult,)))
+        .where(run_scope(run_id))
+        .distinct(FactCalculatedResult.node_id)
+        .order_by(FactCalculatedResult.node_id, own_row_first)
+    )
+
+
+def find_base_run(session: Session, use_case_id: UUID, pnl_date: date, exclude_run_id: Optional[UUID] = None) -> Optional[CalculationRun]:
+    """Latest COMPLETED full run for a (use case, PNL date), or None."""
+    query = session.query(CalculationRun).filter(
+        CalculationRun.use_case_id == use_case_id,
+        CalculationRun.pnl_date == pnl_date,
+        CalculationRun.status == 'COMPLETED',
+        CalculationRun.base_run_id.is_(None),
+    )
+    if exclude_run_id is not None:
+        query = query.filter(CalculationRun.id != exclude_run_id)
+    return query.order_by(desc(CalculationRun.executed_at), desc(CalculationRun.id)).first()
+
+
+def _base_rows(session: Session, base_run_id: UUID) -> Dict[str, Tuple]:
+    columns = [getattr(FactCalculatedResult, column) for column in COMPARED_COLUMNS]
+    rows = session.execute(
+        select(FactCalculatedResult.node_id, *columns)
+        .where(FactCalculatedResult.calculation_run_id == base_run_id)
+    ).all()
+    return {row[0]: tuple(row[1:]) for row in rows}
+
+
+def _row_key(row: Dict[str, Any]) -> Tuple:
+    return tuple(row.get(column) for column in COMPARED_COLUMNS)
+
+
+def deduplicate_run_rows(
+    session: Session,
+    use_case_id: UUID,
+    pnl_date: date,
+    rows: List[Dict[str, Any]],
+    calculation_run_id: Optional[UUID] = None
+) -> Tuple[Optional[UUID], List[Dict[str, Any]]]:
+    """
+    Reduce a run's result rows to the delta against its base run.
+
+    Args:
+        session: Database session
+        use_case_id: Use case of the run
+        pnl_date: PNL date of the run
+        rows: Full row dictionaries (build_result_rows format)
+        calculation_run_id: The run being written (excluded from base lookup)
+
+    Returns:
+        (base_run_id, rows_to_write): base_run_id is None when the full rows
+        must be stored
+    """
+    if not RESULT_DELTA_STORAGE or not rows:
+        return None, rows
+
+    base = find_base_run(session, use_case_id, pnl_date, exclude_run_id=calculation_run_id)
+    if base is None:
+        return None, rows
+
+    base_rows = _base_rows(session, base.id)
+    if not base_rows or any(values[0] is None for values in base_rows.values()):
+        return None, rows  # Empty or unmigrated (JSONB-only) base: keep a full copy
+
+    node_ids = {row['node_id'] for row in rows}
+    removed = len(base_rows.keys() - node_ids)
+    if removed:
+        logger.info(f"[ResultStore] {removed} nodes removed since run {base.id}: storing full run")
+        return None, rows
+
+    changed = [row for row in rows if base_rows.get(row['node_id']) != _row_key(row)]
+    if len(changed) > RESULT_DELTA_MAX_FRACTION * len(rows):
+        logger.info(
+            f"[ResultStore] {len(changed)}/{len(rows)} rows changed since run {base.id}: storing full run"
+        )
+        return None, rows
+
+    logger.info(f"[ResultStore] Storing {len(changed)}/{len(rows)} changed rows over base run {base.id}")
+    return base.id, changed
+
+
+_MATERIALIZE_SQL = text(f"""
+    INSERT INTO fact_calculated_results (result_id, calculation_run_id, {', '.join(_COPIED_COLUMNS)})
+    SELECT gen_random_uuid(), :run_id, {', '.join('b.' + column for column in _COPIED_COLUMNS)}
+    FROM fact_calculated_results b
+    WHERE b.calculation_run_id = :base_run_id
+      AND NOT EXISTS (
+          SELECT 1 FROM fact_calculated_results d
+          WHERE d.calculation_run_id = :run_id AND d.node_id = b.node_id
+      )
+""")
+
+
+def materialize_run(session: Session, run_id: UUID) -> int:
+    """
+    Fold a delta run into a full run (copy the base rows it does not override).
+
+    Args:
+        session: Database session (caller commits)
+        run_id: Calculation run ID
+
+    Returns:
+        Number of rows copied (0 for full runs)
+    """
+    run = session.get(CalculationRun, run_id)
+    if run is None or run.base_run_id is None:
+        return 0
+    copied = session.execute(_MATERIALIZE_SQL, {"run_id": run.id, "base_run_id": run.base_run_id}).rowcount
+    run.base_run_id = None
+    session.flush()
+    logger.info(f"[ResultStore] Materialized run {run_id}: copied {copied} base rows")
+    return copied
+
+
+def compact_results(
+    session: Session,
+    use_case_id: Optional[UUID] = None,
+    keep_runs: int = 3,
+    fold_all: bool = False
+) -> Dict[str, int]:
+    """
+    Retention / compaction of calculation runs.
+
+    Keeps the newest keep_runs runs per (use case, PNL date) and deletes the
+    older ones (their results cascade). Kept delta runs whose base is deleted
+    are materialized first. With fold_all every kept delta run is materialized.
+
+    Args:
+        session: Database session (caller commits)
+        use_case_id: Optional use case to limit compaction to
+        keep_runs: Runs to keep per (use case, PNL date), at least 1
+        fold_all: Materialize all kept delta runs
+
+    Returns:
+        Counts: runs_deleted, runs_materialized, rows_copied
+    """
+    keep_runs = max(1, keep_runs)
+    query = session.query(CalculationRun.id, CalculationRun.use_case_id, CalculationRun.pnl_date, CalculationRun.base_run_id)
+    if use_case_id:
+        query = query.filter(CalculationRun.use_case_id == use_case_id)
+    runs = query.order_by(
+        CalculationRun.use_case_id, CalculationRun.pnl_date,
+        desc(CalculationRun.executed_at), desc(CalculationRun.id)
+    ).all()
+
+    kept: List[Any] = []
+    deleted_ids = set()
+    slot, slot_count = None, 0
+    for run in runs:
+        if (run.use_case_id, run.pnl_date) != slot:
+            slot, slot_count = (run.use_case_id, run.pnl_date), 0
+        slot_count += 1
+        if slot_count <= keep_runs:
+            kept.append(run)
+        else:
+            deleted_ids.add(run.id)
+
+    counts = {'runs_deleted': 0, 'runs_materialized': 0, 'rows_copied': 0}
+    for run in kept:
+        if run.base_run_id is not None and (fold_all or run.base_run_id in deleted_ids):
+            counts['rows_copied'] += materialize_run(session, run.id)
+            counts['runs_materialized'] += 1
+
+    if deleted_ids:
+        # Runs outside the retention window may still be bases of each other
+        session.query(CalculationRun).filter(CalculationRun.id.in_(deleted_ids)).update(
+            {CalculationRun.base_run_id: None}, synchronize_session=False
+        )
+        counts['runs_deleted'] = session.query(CalculationRun).filter(
+            CalculationRun.id.in_(deleted_ids)
+        ).delete(synchronize_session=False)
+
+    logger.info(
+        f"[ResultStore] Compaction{f' for use case {use_case_id}' if use_case_id else ''}: {counts}"
+    )
+    return counts
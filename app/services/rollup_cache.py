@@ -14,6 +14,8 @@ from typing import Dict, Optional, Tuple, Any
 from uuid import UUID
 from decimal import Decimal
 
+from app.metrics import record_cache
+
 logger = None
 try:
     import logging
@@ -75,6 +77,7 @@ def get_cached_rollup(
         age = current_time - cached_time
         
         if age < _cache_ttl:
+            record_cache('rollup', 'hit')
             if logger:
                 logger.info(f"[Rollup Cache] Cache HIT for {use_case_id} (age: {age:.1f}s)")
             return result
@@ -84,6 +87,7 @@ def get_cached_rollup(
             if logger:
                 logger.info(f"[Rollup Cache] Cache EXPIRED for {use_case_id} (age: {age:.1f}s)")
     
+    record_cache('rollup', 'miss')  # Includes expired entries
     if logger:
         logger.info(f"[Rollup Cache] Cache MISS for {use_case_id}")
     return None
@@ -0,0 +1,413 @@
+"""
+Rule preview engine for interactive rule authoring.
+
+Previewing a rule used to run SELECT COUNT(*) over the fact table and then
+SELECT COUNT(*) ... WHERE <sql_where>, so every keystroke-driven preview cost
+two full scans. Previews now:
+
+- evaluate the predicate on a row-level (Bernoulli) sample of the fact table
+  (<table>_sample, PREVIEW_SAMPLE_PERCENT of the rows, at least
+  PREVIEW_SAMPLE_MIN_ROWS) and scale the result: affected rows with a 95%
+  Wilson interval, measure sum with a 95% Horvitz-Thompson interval
+- key samples and cached results by the table's data version (relfilenode +
+  pg_stat_user_tables insert/update/delete counters), so a data load
+  invalidates them without explicit hooks
+- rebuild the sample in the background when the data version changes (the
+  rebuild also yields the exact row count and creates the sample table on
+  first use; the stale sample keeps answering meanwhile, flagged sample_stale
+  and not cached)
+- optionally refine to the exact answer in the background (refine_exact);
+  the exact result is cached, so repeating the preview returns it
+- preview small tables (< PREVIEW_EXACT_MAX_ROWS) exactly, in one scan
+
+Environment:
+    PREVIEW_SAMPLE_PERCENT     Sample size in percent of the table (default: 1.0)
+    PREVIEW_SAMPLE_MIN_ROWS    Minimum sample size in rows (default: 20000)
+    PREVIEW_EXACT_MAX_ROWS     Tables up to this size are previewed exactly (default: 200000)
+    PREVIEW_EXACT_TIMEOUT_MS   Statement timeout of background exact queries (default: 300000)
+"""
+
+import logging
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+from typing import Any, Dict, Optional, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.metrics import record_cache
+
+logger = logging.getLogger(__name__)
+
+PREVIEW_SAMPLE_PERCENT = float(os.getenv("PREVIEW_SAMPLE_PERCENT", "1.0"))
+PREVIEW_SAMPLE_MIN_ROWS = int(os.getenv("PREVIEW_SAMPLE_MIN_ROWS", "20000"))
+PREVIEW_EXACT_MAX_ROWS = int(os.getenv("PREVIEW_EXACT_MAX_ROWS", "200000"))
+PREVIEW_EXACT_TIMEOUT_MS = int(os.getenv("PREVIEW_EXACT_TIMEOUT_MS", "300000"))
+PREVIEW_CACHE_SIZE = 512
+
+Z_95 = 1.96
+CENT = Decimal('0.01')
+
+# Summable measure columns per fact table (first = default preview measure)
+MEASURE_COLUMNS = {
+    'fact_pnl_gold': ('daily_pnl', 'mtd_pnl', 'ytd_pnl', 'pytd_pnl'),
+    'fact_pnl_entries': ('daily_amount', 'wtd_amount', 'ytd_amount'),
+    'fact_pnl_use_case_3': ('pnl_daily', 'pnl_commission', 'pnl_trade'),
+}
+
+# (table, data_version, normalized sql_where, measure_column) -> result
+_results: "OrderedDict[Tuple[str, str, str, str], Dict[str, Any]]" = OrderedDict()
+# Keys of running background jobs (sample rebuilds and exact refinements)
+_pending: set = set()
+_lock = threading.Lock()
+_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="rule-preview")
+
+
+def resolve_measure_column(table_name: str, measure_name: Optional[str]) -> str:
+    """
+    Measure column summed by the preview.
+
+    Raises:
+        ValueError: If the measure is not a measure column of the table
+    """
+    from app.engine.waterfall import get_measure_column_name
+
+    columns = MEASURE_COLUMNS[table_name]
+    if not measure_name:
+        return columns[0]
+    column = get_measure_column_name(measure_name, table_name)
+    if column not in columns:
+        raise ValueError(f"Measure '{measure_name}' is not a measure of table '{table_name}' (allowed: {', '.join(columns)})")
+    return column
+
+
+def _data_version(session: Session, table_name: str) -> Tuple[Optional[str], int, bool]:
+    """(data version, estimated row count, sample table exists) from the catalog (no table scan)."""
+    row = session.execute(text("""
+        SELECT c.relfilenode,
+               COALESCE(s.n_tup_ins + s.n_tup_upd + s.n_tup_del, 0),
+               GREATEST(c.reltuples, 0)::bigint,
+               to_regclass(:sample_table) IS NOT NULL
+        FROM pg_class c
+        LEFT JOIN pg_stat_user_tables s ON s.relid = c.oid
+        WHERE c.oid = to_regclass(:table_name)
+    """), {'table_name': table_name, 'sample_table': f"{table_name}_sample"}).fetchone()
+    if row is None:
+        return None, 0, False
+    return f"{row[0]}:{row[1]}", int(row[2]), bool(row[3])
+
+
+def _sample_state(session: Session, table_name: str):
+    return session.execute(text(
+        "SELECT sample_version, data_version, sample_rows, total_rows FROM fact_sample_state WHERE table_name = :t"
+    ), {'t': table_name}).fetchone()
+
+
+def _exact(session: Session, table_name: str, sql_where: str, measure_column: str) -> Dict[str, Any]:
+    """Exact counts and measure sum in a single scan."""
+    row = session.execute(text(f"""
+        SELECT COUNT(*),
+               COUNT(*) FILTER (WHERE ({sql_where})),
+               COALESCE(SUM({measure_column}) FILTER (WHERE ({sql_where})), 0)
+        FROM {table_name}
+    """)).fetchone()
+    measure_sum = Decimal(str(row[2])).quantize(CENT)
+    return {
+        'affected_rows': int(row[1]),
+        'total_rows': int(row[0]),
+        'is_exact': True,
+        'affected_rows_low': int(row[1]),
+        'affected_rows_high': int(row[1]),
+        'measure_sum': measure_sum,
+        'measure_sum_low': measure_sum,
+        'measure_sum_high': measure_sum,
+        'sample_rows': None,
+        'sample_stale': False,
+    }
+
+
+def _wilson(matched: int, sample_rows: int) -> Tuple[float, float]:
+    """95% Wilson score interval of a sampled proportion."""
+    p = matched / sample_rows
+    z2 = Z_95 * Z_95
+    denominator = 1 + z2 / sample_rows
+    center = (p + z2 / (2 * sample_rows)) / denominator
+    half = Z_95 * math.sqrt(p * (1 - p) / sample_rows + z2 / (4 * sample_rows * sample_rows)) / denominator
+    return max(0.0, center - half), min(1.0, center + half)
+
+
+def _estimate(
+    session: Session,
+    table_name: str,
+    sample_version: int,
+    sample_rows: int,
+    total_rows: int,
+    sql_where: str,
+    measure_column: str,
+    sample_stale: bool = False
+) -> Dict[str, Any]:
+    """Scale the predicate's result on the sample to the table."""
+    row = session.execute(text(f"""
+        SELECT COUNT(*),
+               COALESCE(SUM({measure_column}), 0),
+               COALESCE(SUM({measure_column} * {measure_column}), 0)
+        FROM {table_name}_sample
+        WHERE sample_version = :sample_version AND ({sql_where})
+    """), {'sample_version': sample_version}).fetchone()
+    matched, sample_sum, sample_sum_sq = int(row[0]), float(row[1]), float(row[2])
+
+    low, high = _wilson(matched, sample_rows) if sample_rows else (0.0, 1.0)
+    # Horvitz-Thompson under Bernoulli sampling with inclusion probability f
+    fraction = sample_rows / total_rows if total_rows else 1.0
+    measure_sum = sample_sum / fraction
+    margin = Z_95 * math.sqrt(max(0.0, 1 - fraction) * sample_sum_sq) / fraction
+    return {
+        'affected_rows': round(matched / sample_rows * total_rows) if sample_rows else 0,
+        'total_rows': total_rows,
+        'is_exact': False,
+        'affected_rows_low': math.floor(low * total_rows),
+        'affected_rows_high': math.ceil(high * total_rows),
+        'measure_sum': Decimal(str(measure_sum)).quantize(CENT),
+        'measure_sum_low': Decimal(str(measure_sum - margin)).quantize(CENT),
+        'measure_sum_high': Decimal(str(measure_sum + margin)).quantize(CENT),
+        'sample_rows': sample_rows,
+        'sample_stale': sample_stale,
+    }
+
+
+# ---------------------------------------------------------------------------
+# Background jobs
+# ---------------------------------------------------------------------------
+
+def _submit(key, job, *args) -> bool:
+    """Run job(*args) in the background unless a job with this key is running."""
+    with _lock:
+        if key in _pending:
+            return False
+        _pending.add(key)
+
+    def run():
+        try:
+            job(*args)
+        except Exception as e:
+            logger.error(f"[Rule Preview] Background job {key[0]} failed: {e}", exc_info=True)
+        finally:
+            with _lock:
+                _pending.discard(key)
+
+    _executor.submit(run)
+    return True
+
+
+def refresh_sample(bind, table_name: str):
+    """
+    Rebuild the table's sample for its current data version.
+
+    Readers keep using the previous sample_version until the new one commits;
+    one worker process rebuilds at a time (advisory lock). The sample table is
+    created on first use (fact tables created after migration d1f5b3a8c2e4,
+    e.g. fact_pnl_use_case_3 by the load scripts).
+    """
+    from app.database import get_session_factory
+
+    start = time.perf_counter()
+    session = get_session_factory(bind)()
+    try:
+        if not session.execute(
+            text("SELECT pg_try_advisory_xact_lock(hashtext(:key))"), {'key': f"fact_sample:{table_name}"}
+        ).scalar():
+            return
+        # Same layout as migration d1f5b3a8c2e4: fact table columns + sample_version
+        session.execute(text(
+            f"CREATE UNLOGGED TABLE IF NOT EXISTS {table_name}_sample (LIKE {table_name} INCLUDING DEFAULTS)"
+        ))
+        session.execute(text(
+            f"ALTER TABLE {table_name}_sample ADD COLUMN IF NOT EXISTS sample_version INTEGER NOT NULL DEFAULT 0"
+        ))
+        session.execute(text(
+            f"CREATE INDEX IF NOT EXISTS ix_{table_name}_sample_version ON {table_name}_sample (sample_version)"
+        ))
+        data_version, estimated_rows, _ = _data_version(session, table_name)
+        state = _sample_state(session, table_name)
+        sample_version = state.sample_version + 1 if state else 1
+        percent = min(100.0, max(PREVIEW_SAMPLE_PERCENT, 100.0 * PREVIEW_SAMPLE_MIN_ROWS / max(estimated_rows, 1)))
+
+        session.execute(text(f"SET LOCAL statement_timeout = {PREVIEW_EXACT_TIMEOUT_MS}"))
+        sample_rows = session.execute(text(f"""
+            INSERT INTO {table_name}_sample
+            SELECT t.*, :sample_version FROM {table_name} t TABLESAMPLE BERNOULLI (:percent)
+        """), {'sample_version': sample_version, 'percent': percent}).rowcount
+        total_rows = session.execute(text(f"SELECT COUNT(*) FROM {table_name}")).scalar() or 0
+
+        session.execute(text("""
+            INSERT INTO fact_sample_state
+                (table_name, sample_version, data_version, sample_rows, total_rows, sample_percent, refreshed_at)
+            VALUES (:t, :sample_version, :data_version, :sample_rows, :total_rows, :percent, now())
+            ON CONFLICT (table_name) DO UPDATE SET
+                sample_version = EXCLUDED.sample_version,
+                data_version = EXCLUDED.data_version,
+                sample_rows = EXCLUDED.sample_rows,
+                total_rows = EXCLUDED.total_rows,
+                sample_percent = EXCLUDED.sample_percent,
+                refreshed_at = EXCLUDED.refreshed_at
+        """), {
+            't': table_name, 'sample_version': sample_version, 'data_version': data_version,
+            'sample_rows': sample_rows, 'total_rows': total_rows, 'percent': percent,
+        })
+        session.execute(
+            text(f"DELETE FROM {table_name}_sample WHERE sample_version <> :sample_version"),
+            {'sample_version': sample_version}
+        )
+        session.commit()
+        logger.info(
+            f"[Rule Preview] Rebuilt {table_name}_sample v{sample_version}: {sample_rows}/{total_rows} rows "
+            f"({percent:.2f}%) in {(time.perf_counter() - start) * 1000:.0f}ms"
+        )
+    except Exception:
+        session.rollback()
+        raise
+    finally:
+        session.close()
+
+
+def _refine_exact(bind, key, table_name: str, sql_where: str, measure_column: str):
+    from app.database import get_session_factory
+
+    session = get_session_factory(bind)()
+    try:
+        session.execute(text(f"SET LOCAL statement_timeout = {PREVIEW_EXACT_TIMEOUT_MS}"))
+        _store(key, _exact(session, table_name, sql_where, measure_column))
+        session.rollback()
+    finally:
+        session.close()
+
+
+# ---------------------------------------------------------------------------
+# Result cache
+# ---------------------------------------------------------------------------
+
+def _store(key, result: Dict[str, Any]):
+    with _lock:
+        current = _results.get(key)
+        # Never replace an exact result with an estimate
+        if current is None or result['is_exact'] or not current['is_exact']:
+            _results[key] = result
+        _results.move_to_end(key)
+        while len(_results) > PREVIEW_CACHE_SIZE:
+            _results.popitem(last=False)
+
+
+def _cached(key) -> Optional[Dict[str, Any]]:
+    with _lock:
+        result = _results.get(key)
+        if result is not None:
+            _results.move_to_end(key)
+    record_cache('rule_preview', 'hit' if result is not None else 'miss')
+    return result
+
+
+def get_cache_stats() -> Dict[str, Any]:
+    """Cache statistics for monitoring."""
+    with _lock:
+        exact = sum(1 for result in _results.values() if result['is_exact'])
+        return {
+            "total_entries": len(_results),
+            "valid_entries": len(_results),
+            "exact_entries": exact,
+            "pending_jobs": len(_pending),
+            "max_entries": PREVIEW_CACHE_SIZE,
+        }
+
+
+def invalidate_cache(table_name: Optional[str] = None) -> int:
+    """Drop cached previews (of one table, or all). Returns the number removed."""
+    with _lock:
+        keys = [key for key in _results if table_name is None or key[0] == table_name]
+        for key in keys:
+            del _results[key]
+    return len(keys)
+
+
+# ---------------------------------------------------------------------------
+# Preview
+# ---------------------------------------------------------------------------
+
+def preview(
+    session: Session,
+    table_name: str,
+    sql_where: str,
+    measure_column: Optional[str] = None,
+    refine_exact: bool = False
+) -> Dict[str, Any]:
+    """
+    Affected rows and measure impact of a rule predicate.
+
+    Args:
+        session: Database session
+        table_name: Fact table (key of MEASURE_COLUMNS)
+        sql_where: Rule SQL WHERE clause
+        measure_column: Measure column to sum, from resolve_measure_column (default: the table's daily measure)
+        refine_exact: Compute the exact answer in the background when the result is an estimate
+
+    Returns:
+        Dictionary with affected_rows, total_rows, percentage, is_exact, 95% bounds,
+        measure_column, measure_sum (+ bounds), sample_rows, sample_stale, refining.
+        Estimates from a sample of an older data version (sample_stale) are not cached.
+
+    Raises:
+        Exception: If the predicate is invalid for the table (from the database)
+    """
+    start = time.perf_counter()
+    measure_column = measure_column or MEASURE_COLUMNS[table_name][0]
+    refining = False
+
+    if session.get_bind().dialect.name != 'postgresql':
+        result = _exact(session, table_name, sql_where, measure_column)
+    else:
+        data_version, estimated_rows, has_sample_table = _data_version(session, table_name)
+        key = (table_name, data_version, " ".join(sql_where.split()), measure_column)
+        result = _cached(key)
+
+        if result is None:
+            state = _sample_state(session, table_name) if has_sample_table else None
+            sampled = estimated_rows >= PREVIEW_EXACT_MAX_ROWS
+            if sampled and (state is None or state.data_version != data_version):
+                # Also creates the sample table if it does not exist yet
+                _submit(('sample', table_name), refresh_sample, session.get_bind(), table_name)
+
+            if not sampled or state is None:
+                # Small table, or no sample yet (first preview after deployment)
+                result = _exact(session, table_name, sql_where, measure_column)
+            else:
+                sample_stale = state.data_version != data_version
+                total_rows = state.total_rows if not sample_stale else max(estimated_rows, 1)
+                result = _estimate(
+                    session, table_name, state.sample_version, state.sample_rows, total_rows,
+                    sql_where, measure_column, sample_stale
+                )
+            if not result['sample_stale']:
+                # A stale estimate must not be served for data_version after the rebuild
+                _store(key, result)
+
+        if not result['is_exact'] and refine_exact:
+            _submit(('exact',) + key, _refine_exact, session.get_bind(), key, table_name, sql_where, measure_column)
+        with _lock:
+            refining = ('exact',) + key in _pending
+
+    total_rows = result['total_rows']
+    percentage = (result['affected_rows'] / total_rows * 100) if total_rows > 0 else 0.0
+    logger.info(
+        f"[Rule Preview] {table_name}: {'exact' if result['is_exact'] else 'sampled'} "
+        f"{result['affected_rows']}/{total_rows} rows in {(time.perf_counter() - start) * 1000:.0f}ms"
+    )
+    return dict(
+        result,
+        percentage=round(percentage, 2),
+        measure_column=measure_column,
+        refining=refining,
+    )
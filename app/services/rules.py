@@ -5,13 +5,22 @@ Handles both Manual (dropdown) and GenAI (natural language) rule creation.
 
 import logging
 from decimal import Decimal
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 from uuid import UUID
 
+from sqlalchemy import func
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.orm import Session
 
-from app.api.schemas import RuleCondition, RuleCreate, RulePreviewResponse
-from app.models import FactPnlGold, MetadataRule, UseCase
+from app.api.schemas import (
+    BulkRuleCreateRequest,
+    BulkRuleResponse,
+    RuleCondition,
+    RuleCreate,
+    RulePreviewResponse,
+    RuleResponse,
+)
+from app.models import DimHierarchy, FactPnlGold, MetadataRule, UseCase
 
 logger = logging.getLogger(__name__)
 
@@ -440,9 +449,230 @@ def create_manual_rule(
         return new_rule
 
 
-def preview_rule_impact(sql_where: str, session: Session, use_case_id: Optional[UUID] = None) -> RulePreviewResponse:
+def _build_bulk_rule_payload(
+    request: BulkRuleCreateRequest,
+    table_name: str
+) -> Tuple[Dict[str, Any], List[str]]:
     """
-    Preview the impact of a rule by counting affected rows.
+    Resolve the column values shared by every node of a bulk request.
+    
+    The bulk endpoint applies one rule definition to many nodes, so the
+    translation / validation work only needs to happen once per request.
+    
+    Args:
+        request: BulkRuleCreateRequest
+        table_name: Fact table of the use case (drives column mapping)
+    
+    Returns:
+        Tuple of (payload, update_columns)
+        - payload: Column values for the INSERT (excluding use_case_id/node_id)
+        - update_columns: Columns overwritten when the rule already exists
+    
+    Raises:
+        ValueError: If the rule definition is invalid or translation fails
+    """
+    if request.rule_type == 'NODE_ARITHMETIC' and request.rule_expression:
+        # Phase 5.7: Math rule mode (Type 3) - SQL fields are cleared
+        payload = {
+            'rule_type': request.rule_type,
+            'rule_expression': request.rule_expression,
+            'rule_dependencies': request.rule_dependencies,
+            'last_modified_by': request.last_modified_by,
+            'sql_where': None,
+            'predicate_json': None,
+            'measure_name': 'daily_pnl',
+        }
+        update_columns = [
+            'rule_type', 'rule_expression', 'rule_dependencies',
+            'last_modified_by', 'sql_where', 'predicate_json',
+        ]
+        return payload, update_columns
+    
+    if request.conditions:
+        validation_errors = validate_conditions(request.conditions, table_name)
+        if validation_errors:
+            raise ValueError(f"Validation failed: {'; '.join(validation_errors)}")
+        
+        predicate_json = convert_conditions_to_json(request.conditions)
+        payload = {
+            'predicate_json': predicate_json,
+            'sql_where': convert_json_to_sql(predicate_json, table_name),
+            'logic_en': generate_logic_en_from_conditions(request.conditions),
+            'last_modified_by': request.last_modified_by,
+            'rule_type': request.rule_type or 'FILTER',
+            'measure_name': 'daily_pnl',
+            'rule_expression': request.rule_expression,
+            'rule_dependencies': request.rule_dependencies if request.rule_dependencies else None,
+        }
+        return payload, list(payload.keys())
+    
+    if request.logic_en:
+        # Translate once for the whole batch (identical logic_en for every node)
+        from app.engine.translator import translate_rule
+        predicate_json, sql_where, translation_errors, translation_successful = translate_rule(
+            request.logic_en,
+            use_cache=True,
+            table_name=table_name
+        )
+        if not translation_successful:
+            raise ValueError(f"Translation failed: {'; '.join(translation_errors)}")
+        
+        payload = {
+            'predicate_json': predicate_json,
+            'sql_where': sql_where,
+            'logic_en': request.logic_en,
+            'last_modified_by': request.last_modified_by,
+            'rule_type': 'FILTER',
+            'measure_name': 'daily_pnl',
+        }
+        update_columns = ['predicate_json', 'sql_where', 'logic_en', 'last_modified_by']
+        return payload, update_columns
+    
+    raise ValueError("Must provide either 'conditions' or 'logic_en'")
+
+
+def bulk_upsert_rules(
+    use_case_id: UUID,
+    request: BulkRuleCreateRequest,
+    session: Session
+) -> BulkRuleResponse:
+    """
+    Apply one rule definition to many nodes with a single set-based upsert.
+    
+    Process:
+    1. Resolve the rule definition once (translate / validate / build SQL)
+    2. Validate all requested nodes (and fetch their names) in one query
+    3. INSERT ... ON CONFLICT (use_case_id, node_id) DO UPDATE ... RETURNING
+    4. Invalidate the rules cache once
+    
+    Args:
+        use_case_id: Use case UUID
+        request: BulkRuleCreateRequest with node_ids and rule configuration
+        session: Database session
+    
+    Returns:
+        BulkRuleResponse with success/failure counts and upserted rules
+    
+    Raises:
+        ValueError: If the use case does not exist
+    """
+    use_case = session.query(UseCase).filter(UseCase.use_case_id == use_case_id).first()
+    if not use_case:
+        raise ValueError(f"Use case '{use_case_id}' not found")
+    
+    table_name = use_case.input_table_name or 'fact_pnl_gold'
+    
+    # De-duplicate while preserving request order
+    node_ids = list(dict.fromkeys(request.node_ids))
+    errors: List[str] = []
+    
+    try:
+        payload, update_columns = _build_bulk_rule_payload(request, table_name)
+    except Exception as e:
+        logger.error(f"[Bulk Rules] Failed to build rule for use case {use_case_id}: {e}")
+        return BulkRuleResponse(
+            success_count=0,
+            failed_count=len(node_ids),
+            errors=[f"Node {node_id}: {str(e)}" for node_id in node_ids],
+            created_rules=[]
+        )
+    
+    # Validate all nodes (and collect node names for the response) in one query
+    node_names = dict(
+        session.query(DimHierarchy.node_id, DimHierarchy.node_name)
+        .filter(DimHierarchy.node_id.in_(node_ids))
+        .all()
+    )
+    valid_node_ids = [node_id for node_id in node_ids if node_id in node_names]
+    for node_id in node_ids:
+        if node_id not in node_names:
+            errors.append(f"Node {node_id}: Node not found in hierarchy")
+    
+    if not valid_node_ids:
+        return BulkRuleResponse(
+            success_count=0,
+            failed_count=len(node_ids),
+            errors=errors,
+            created_rules=[]
+        )
+    
+    rows = [
+        {'use_case_id': use_case_id, 'node_id': node_id, **payload}
+        for node_id in valid_node_ids
+    ]
+    
+    insert_stmt = pg_insert(MetadataRule.__table__).values(rows)
+    set_clause = {column: insert_stmt.excluded[column] for column in update_columns}
+    # ON CONFLICT DO UPDATE bypasses the ORM onupdate hook
+    set_clause['last_modified_at'] = func.now()
+    upsert_stmt = insert_stmt.on_conflict_do_update(
+        constraint='uq_use_case_node',
+        set_=set_clause
+    ).returning(*MetadataRule.__table__.c)
+    
+    try:
+        upserted = session.execute(upsert_stmt).mappings().all()
+        session.commit()
+    except Exception as e:
+        session.rollback()
+        logger.error(f"[Bulk Rules] Upsert failed for use case {use_case_id}: {e}", exc_info=True)
+        errors.extend(f"Node {node_id}: {str(e)}" for node_id in valid_node_ids)
+        return BulkRuleResponse(
+            success_count=0,
+            failed_count=len(node_ids),
+            errors=errors,
+            created_rules=[]
+        )
+    
+    # PHASE 2C FIX 1: Invalidate rules cache once for the whole batch
+    from app.services.rules_cache import invalidate_cache
+    invalidate_cache(use_case_id)
+    
+    logger.info(
+        f"[Bulk Rules] Upserted {len(upserted)} rule(s) for use case {use_case_id} "
+        f"({len(node_ids) - len(valid_node_ids)} node(s) rejected)"
+    )
+    
+    created_rules = [
+        RuleResponse(
+            rule_id=rule['rule_id'],
+            use_case_id=rule['use_case_id'],
+            node_id=rule['node_id'],
+            node_name=node_names.get(rule['node_id']),
+            logic_en=rule['logic_en'] if rule['logic_en'] else None,
+            predicate_json=rule['predicate_json'] if rule['predicate_json'] else None,
+            sql_where=rule['sql_where'] if rule['sql_where'] else None,
+            last_modified_by=rule['last_modified_by'],
+            created_at=rule['created_at'].isoformat(),
+            last_modified_at=rule['last_modified_at'].isoformat(),
+            rule_type=rule['rule_type'] if rule['rule_type'] else None,
+            rule_expression=rule['rule_expression'] if rule['rule_expression'] else None,
+            measure_name=rule['measure_name'] if rule['measure_name'] else None,
+            rule_dependencies=rule['rule_dependencies'] if rule['rule_dependencies'] else None
+        )
+        for rule in upserted
+    ]
+    
+    return BulkRuleResponse(
+        success_count=len(created_rules),
+        failed_count=len(node_ids) - len(created_rules),
+        errors=errors,
+        created_rules=created_rules
+    )
+
+
+def preview_rule_impact(
+    sql_where: str,
+    session: Session,
+    use_case_id: Optional[UUID] = None,
+    measure_name: Optional[str] = None,
+    refine_exact: bool = False
+) -> RulePreviewResponse:
+    """
+    Preview the impact of a rule: affected rows and measure sum.
+    
+    Large tables are answered from a maintained sample (see app/services/rule_preview.py)
+    with 95% bounds; small tables exactly.
     
     Args:
         sql_where: SQL WHERE clause to preview
@@ -450,9 +680,14 @@ def preview_rule_impact(sql_where: str, session: Session, use_case_id: Optional[
         use_case_id: Optional use case ID to determine which fact table to query.
                      If provided, checks use_case.input_table_name to select the correct table.
                      If None or use_case.input_table_name is None, defaults to fact_pnl_gold.
+        measure_name: Measure to sum over the affected rows (default: the table's daily measure)
+        refine_exact: Compute the exact answer in the background when the preview is sampled
     
     Returns:
-        RulePreviewResponse with affected row count
+        RulePreviewResponse with affected row count and measure impact
+    
+    Raises:
+        ValueError: If the measure or the SQL WHERE clause is invalid for the table
     """
     # Whitelist of allowed fact table names (security: prevent SQL injection)
     ALLOWED_TABLES = {'fact_pnl_gold', 'fact_pnl_entries', 'fact_pnl_use_case_3'}
@@ -475,30 +710,16 @@ def preview_rule_impact(sql_where: str, session: Session, use_case_id: Optional[
     else:
         logger.info(f"[Rule Preview] No use_case_id provided, defaulting to fact_pnl_gold")
     
-    # Get total row count from the determined table
-    from sqlalchemy import text
-    try:
-        count_query = text(f"SELECT COUNT(*) FROM {table_name}")
-        total_rows = session.execute(count_query).scalar() or 0
-    except Exception as e:
-        logger.error(f"Error counting total rows in {table_name}: {e}")
-        raise ValueError(f"Failed to count rows in table '{table_name}': {str(e)}")
+    from app.services import rule_preview
     
-    # Count affected rows (safely execute SQL)
+    measure_column = rule_preview.resolve_measure_column(table_name, measure_name)
     try:
-        # Use parameterized query for safety
-        query = text(f"SELECT COUNT(*) FROM {table_name} WHERE {sql_where}")
-        result = session.execute(query).scalar()
-        affected_rows = result or 0
+        result = rule_preview.preview(session, table_name, sql_where, measure_column, refine_exact=refine_exact)
     except Exception as e:
+        # The failed statement aborts the transaction; keep the session usable
+        session.rollback()
         logger.error(f"Error previewing rule on table {table_name}: {e}")
         raise ValueError(f"Invalid SQL WHERE clause for table '{table_name}': {str(e)}")
     
-    percentage = (affected_rows / total_rows * 100) if total_rows > 0 else 0.0
-    
-    return RulePreviewResponse(
-        affected_rows=affected_rows,
-        total_rows=total_rows,
-        percentage=round(percentage, 2)
-    )
+    return RulePreviewResponse(**result)
 
@@ -12,6 +12,8 @@ import time
 from typing import Dict, Optional, Tuple, Any, List
 from uuid import UUID
 
+from app.metrics import record_cache
+
 logger = None
 try:
     import logging
@@ -63,6 +65,7 @@ def get_cached_rules(
         age = current_time - cached_time
         
         if age < _cache_ttl:
+            record_cache('rules', 'hit')
             if logger:
                 logger.info(f"[Rules Cache] Cache HIT for {use_case_id} (age: {age:.1f}s)")
             return rules_data
@@ -72,6 +75,7 @@ def get_cached_rules(
             if logger:
                 logger.info(f"[Rules Cache] Cache EXPIRED for {use_case_id} (age: {age:.1f}s)")
     
+    record_cache('rules', 'miss')  # Includes expired entries
     if logger:
         logger.info(f"[Rules Cache] Cache MISS for {use_case_id}")
     return None
@@ -0,0 +1,147 @@
+"""
+Run-to-run diff computed in the database.
+
+Comparing two calculation runs ("Trial Analysis") used to mean loading both
+result sets into Python. run_diff_query builds one statement that full-outer-
+joins the two runs' fact_calculated_results rows on node_id and returns only
+the changed nodes:
+
+- adjusted and plug deltas per measure (run_b - run_a)
+- nodes present in only one run (added / removed)
+- changed is_override flags
+- filtered by a minimum absolute delta and ranked by the largest one
+  (top-N), with the total number of changed nodes in every row (window count)
+
+Legacy rows without typed columns are read through the JSONB fallback of
+FactCalculatedResult.measure_sql; delta runs are resolved through their base
+run (result_store.run_results_select).
+"""
+
+from decimal import Decimal
+from typing import Any, Dict, Optional
+from uuid import UUID
+
+from sqlalchemy import func, literal, or_, select
+
+from app.models import DimHierarchy, FactCalculatedResult, RESULT_MEASURES
+from app.services.result_store import run_results_select
+
+DIFF_VECTORS = ('adjusted', 'plug')
+
+
+def _run_results(run_id: UUID, name: str):
+    """One run's node rows with typed measures (new or legacy run link, delta runs resolved through their base)."""
+    columns = [
+        FactCalculatedResult.measure_sql(prefix, measure).label(f"{prefix}_{measure}")
+        for prefix in DIFF_VECTORS
+        for measure in RESULT_MEASURES
+    ]
+    return run_results_select(
+        run_id, FactCalculatedResult.node_id, FactCalculatedResult.is_override, *columns
+    ).subquery(name)
+
+
+def run_diff_query(
+    run_a: UUID,
+    run_b: UUID,
+    threshold: Decimal = Decimal('0'),
+    top_n: Optional[int] = None,
+    measure: Optional[str] = None
+):
+    """
+    Statement returning the changed nodes between two runs.
+
+    Args:
+        run_a: Baseline run ID
+        run_b: Comparison run ID (deltas are run_b - run_a)
+        threshold: Minimum absolute delta for a node to count as changed
+        top_n: Return at most N nodes (largest absolute delta first)
+        measure: Rank and filter on this adjusted measure only
+            (default: largest delta over all adjusted and plug measures)
+
+    Returns:
+        SQLAlchemy select; rows carry node_id, node_name, in_a, in_b,
+        override_a, override_b, <prefix>_<measure>_a/_b/_delta, max_abs_delta
+        and changed_total
+    """
+    a = _run_results(run_a, "run_a")
+    b = _run_results(run_b, "run_b")
+    node_id = func.coalesce(a.c.node_id, b.c.node_id)
+    zero = literal(0)
+
+    values = []
+    deltas = {}
+    for prefix in DIFF_VECTORS:
+        for m in RESULT_MEASURES:
+            column = f"{prefix}_{m}"
+            value_a = func.coalesce(a.c[column], zero)
+            value_b = func.coalesce(b.c[column], zero)
+            deltas[column] = value_b - value_a
+            values += [
+                a.c[column].label(f"{column}_a"),
+                b.c[column].label(f"{column}_b"),
+                deltas[column].label(f"{column}_delta"),
+            ]
+
+    if measure:
+        max_abs_delta = func.abs(deltas[f"adjusted_{measure}"])
+    else:
+        max_abs_delta = func.greatest(*(func.abs(delta) for delta in deltas.values()))
+
+    changed = or_(
+        a.c.node_id.is_(None),
+        b.c.node_id.is_(None),
+        a.c.is_override.is_distinct_from(b.c.is_override),
+        max_abs_delta > threshold,
+    )
+
+    stmt = (
+        select(
+            node_id.label("node_id"),
+            DimHierarchy.node_name,
+            a.c.node_id.isnot(None).label("in_a"),
+            b.c.node_id.isnot(None).label("in_b"),
+            a.c.is_override.label("override_a"),
+            b.c.is_override.label("override_b"),
+            *values,
+            max_abs_delta.label("max_abs_delta"),
+            func.count().over().label("changed_total"),
+        )
+        .select_from(
+            a.join(b, a.c.node_id == b.c.node_id, full=True)
+            .outerjoin(DimHierarchy, DimHierarchy.node_id == node_id)
+        )
+        .where(changed)
+        .order_by(max_abs_delta.desc(), node_id)
+    )
+    if top_n:
+        stmt = stmt.limit(top_n)
+    return stmt
+
+
+def format_diff_row(row: Any) -> Dict[str, Any]:
+    """API shape of one run_diff_query row."""
+    mapping = row._mapping
+    if not mapping["in_a"]:
+        status = "added"
+    elif not mapping["in_b"]:
+        status = "removed"
+    else:
+        status = "changed"
+
+    def vector(prefix: str, suffix: str) -> Dict[str, Optional[float]]:
+        return {
+            m: float(mapping[f"{prefix}_{m}_{suffix}"]) if mapping[f"{prefix}_{m}_{suffix}"] is not None else None
+            for m in RESULT_MEASURES
+        }
+
+    return {
+        "node_id": mapping["node_id"],
+        "node_name": mapping["node_name"],
+        "status": status,
+        "adjusted": {"run_a": vector("adjusted", "a"), "run_b": vector("adjusted", "b"), "delta": vector("adjusted", "delta")},
+        "plug": {"run_a": vector("plug", "a"), "run_b": vector("plug", "b"), "delta": vector("plug", "delta")},
+        "is_override": {"run_a": mapping["override_a"], "run_b": mapping["override_b"]},
+        "override_changed": status == "changed" and mapping["override_a"] != mapping["override_b"],
+        "max_abs_delta": float(mapping["max_abs_delta"] or 0),
+    }
@@ -0,0 +1,224 @@
+"""
+Server-generated, compressed columnar archive format for HistorySnapshot.
+
+archive_snapshot used to store whatever rules / results arrays the frontend
+sent as JSONB (one JSON object per node, ~300 bytes each). Archives are now
+built on the server from a calculation run:
+
+- results_blob: the run's resolved results (delta runs included) as columns -
+  a node_id array plus one int64 array per measure holding the NUMERIC(18,4)
+  value scaled by 10^4 (exact), is_override / is_reconciled flags and null
+  masks where a vector is partially NULL - written with numpy's compressed
+  .npz container (no pickling).
+- rules_snapshot: the use case's rules as JSONB (small; kept queryable).
+
+decode_results restores the columns with one np.load; snapshot_results returns
+the node records for both the columnar and the legacy JSON format.
+"""
+
+import io
+import logging
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Dict, List, Optional, Tuple
+from uuid import UUID
+
+import numpy as np
+from sqlalchemy import BigInteger, Numeric, cast, func
+from sqlalchemy.orm import Session
+
+from app.models import (
+    CalculationRun,
+    FactCalculatedResult,
+    HistorySnapshot,
+    MetadataRule,
+    RESULT_MEASURES,
+    RESULT_VECTOR_PREFIXES,
+)
+from app.services.result_store import run_results_select
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_FORMAT_JSON = 'json'
+SNAPSHOT_FORMAT_COLUMNAR = 'columnar_v1'
+
+# NUMERIC(18,4) values are stored exactly as int64 multiples of 10^-4
+VALUE_SCALE = 10_000
+
+RESULT_COLUMNS = tuple(f"{prefix}_{measure}" for prefix in RESULT_VECTOR_PREFIXES for measure in RESULT_MEASURES)
+FLAG_COLUMNS = ('is_override', 'is_reconciled')
+
+
+def encode_results(rows: List[Tuple]) -> bytes:
+    """
+    Encode result rows as a compressed columnar blob.
+
+    Args:
+        rows: Tuples (node_id, *RESULT_COLUMNS values scaled by VALUE_SCALE as
+            integers or None, is_override, is_reconciled)
+
+    Returns:
+        .npz bytes
+    """
+    columns = list(zip(*rows)) if rows else [()] * (1 + len(RESULT_COLUMNS) + len(FLAG_COLUMNS))
+    arrays = {'node_id': np.array(columns[0], dtype=np.str_)}
+    for index, name in enumerate(RESULT_COLUMNS, start=1):
+        values = columns[index]
+        nulls = np.fromiter((value is None for value in values), dtype=np.bool_, count=len(values))
+        arrays[name] = np.fromiter(
+            (0 if value is None else value for value in values),
+            dtype=np.int64, count=len(values)
+        )
+        if nulls.any():
+            arrays[f"{name}__null"] = nulls
+    for offset, name in enumerate(FLAG_COLUMNS, start=1 + len(RESULT_COLUMNS)):
+        arrays[name] = np.array(columns[offset], dtype=np.bool_)
+
+    buffer = io.BytesIO()
+    np.savez_compressed(buffer, **arrays)
+    return buffer.getvalue()
+
+
+def decode_results(blob: bytes) -> Dict[str, np.ndarray]:
+    """
+    Decode a columnar results blob.
+
+    Returns:
+        Column name -> array; measure columns are float64 (NaN where NULL)
+    """
+    with np.load(io.BytesIO(blob), allow_pickle=False) as data:
+        columns = {'node_id': data['node_id']}
+        for name in RESULT_COLUMNS:
+            values = data[name] / VALUE_SCALE
+            if f"{name}__null" in data.files:
+                values[data[f"{name}__null"]] = np.nan
+            columns[name] = values
+        for name in FLAG_COLUMNS:
+            columns[name] = data[name]
+    return columns
+
+
+def results_records(columns: Dict[str, np.ndarray]) -> List[Dict[str, Any]]:
+    """Node records ({node_id, adjusted, natural, plug, flags}) from decoded columns."""
+    vectors = {
+        prefix: {measure: columns[f"{prefix}_{measure}"].tolist() for measure in RESULT_MEASURES}
+        for prefix in RESULT_VECTOR_PREFIXES
+    }
+    flags = {name: columns[name].tolist() for name in FLAG_COLUMNS}
+    records = []
+    for index, node_id in enumerate(columns['node_id'].tolist()):
+        record = {'node_id': node_id}
+        for prefix, measures in vectors.items():
+            vector = {measure: values[index] for measure, values in measures.items()}
+            record[prefix] = None if vector['daily'] != vector['daily'] else vector  # NaN: vector not recorded
+        for name, values in flags.items():
+            record[name] = values[index]
+        records.append(record)
+    return records
+
+
+def _json_value(value: Any) -> Any:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, (UUID, Decimal)):
+        return str(value)
+    return value
+
+
+def rules_snapshot_for(session: Session, use_case_id: UUID) -> List[Dict[str, Any]]:
+    """The use case's rules as JSON-serializable dictionaries."""
+    rules = session.query(MetadataRule).filter(
+        MetadataRule.use_case_id == use_case_id
+    ).order_by(MetadataRule.rule_id).all()
+    return [
+        {column.key: _json_value(getattr(rule, column.key)) for column in MetadataRule.__mapper__.column_attrs}
+        for rule in rules
+    ]
+
+
+def next_version_tag(session: Session, use_case_id: UUID) -> str:
+    """Next "vX.Y" tag for a use case (single MAX() over the existing tags)."""
+    latest = session.query(
+        func.max(cast(func.substr(HistorySnapshot.version_tag, 2), Numeric))
+    ).filter(
+        HistorySnapshot.use_case_id == use_case_id,
+        HistorySnapshot.version_tag.op('~')(r'^v[0-9]+(\.[0-9]+)?$'),
+    ).scalar()
+    if latest is None:
+        return "v1.0"
+    return f"v{Decimal(latest) + Decimal('0.1'):.1f}"
+
+
+def build_snapshot(
+    session: Session,
+    use_case_id: UUID,
+    snapshot_name: str,
+    created_by: str,
+    calculation_run_id: Optional[UUID] = None,
+    notes: Optional[str] = None,
+    version_tag: Optional[str] = None
+) -> HistorySnapshot:
+    """
+    Build a columnar HistorySnapshot from a calculation run (not committed).
+
+    Args:
+        session: Database session
+        use_case_id: Use case UUID
+        snapshot_name: Snapshot name
+        created_by: User ID
+        calculation_run_id: Run to archive (default: latest COMPLETED run)
+        notes: Optional notes
+        version_tag: Optional explicit version tag (default: next_version_tag)
+
+    Returns:
+        HistorySnapshot added to the session
+
+    Raises:
+        ValueError: If there is no run to archive
+    """
+    query = session.query(CalculationRun).filter(CalculationRun.use_case_id == use_case_id)
+    if calculation_run_id:
+        run = query.filter(CalculationRun.id == calculation_run_id).first()
+    else:
+        run = query.filter(CalculationRun.status == 'COMPLETED').order_by(
+            CalculationRun.executed_at.desc()
+        ).first()
+    if run is None:
+        raise ValueError(
+            f"Calculation run '{calculation_run_id}' not found for use case" if calculation_run_id
+            else "No completed calculation run to archive"
+        )
+
+    # Scaled to exact integers in SQL (no per-value Decimal handling in Python)
+    columns = [
+        cast(FactCalculatedResult.measure_sql(prefix, measure) * VALUE_SCALE, BigInteger)
+        for prefix in RESULT_VECTOR_PREFIXES
+        for measure in RESULT_MEASURES
+    ] + [getattr(FactCalculatedResult, name) for name in FLAG_COLUMNS]
+    rows = session.execute(run_results_select(run.id, FactCalculatedResult.node_id, *columns)).all()
+    blob = encode_results([tuple(row) for row in rows])
+
+    snapshot = HistorySnapshot(
+        use_case_id=use_case_id,
+        snapshot_name=snapshot_name,
+        created_by=created_by,
+        calculation_run_id=run.id,
+        snapshot_format=SNAPSHOT_FORMAT_COLUMNAR,
+        rules_snapshot=rules_snapshot_for(session, use_case_id),
+        results_blob=blob,
+        node_count=len(rows),
+        notes=notes,
+        version_tag=version_tag or next_version_tag(session, use_case_id),
+    )
+    session.add(snapshot)
+    logger.info(
+        f"[Archive] Snapshot '{snapshot_name}' of run {run.id}: {len(rows)} nodes in {len(blob)} bytes"
+    )
+    return snapshot
+
+
+def snapshot_results(snapshot: HistorySnapshot) -> List[Dict[str, Any]]:
+    """Node records of a snapshot (columnar blob or legacy JSONB array)."""
+    if snapshot.snapshot_format == SNAPSHOT_FORMAT_COLUMNAR and snapshot.results_blob is not None:
+        return results_records(decode_results(snapshot.results_blob))
+    return snapshot.results_snapshot or []
@@ -0,0 +1,166 @@
+"""
+Lightweight per-stage tracing for calculation runs.
+
+A run used to record a single calculation_duration_ms, so a slow run gave no
+hint whether hierarchy load, fact load, rules, waterfall_up, plugs or
+persistence was responsible. StageTrace records, per stage:
+
+- ms: wall time of the stage
+- queries / db_ms: SQL statements executed and time spent in the database,
+  counted by SQLAlchemy cursor events on every Engine while the trace is active
+- rows: optional row / node count set by the caller (set_rows)
+
+The active trace is held in a ContextVar, so concurrent runs (threadpool
+requests, batch workers) only count their own statements, and the cursor hooks
+cost one ContextVar lookup when no trace is active. to_json() is persisted with
+the run (stage_timings column) and returned by GET /runs/{id}.
+"""
+
+import logging
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app import metrics
+
+logger = logging.getLogger(__name__)
+
+_current_trace: ContextVar[Optional["StageTrace"]] = ContextVar("stage_trace", default=None)
+
+
+class StageTrace:
+    """
+    Ordered stage records of one calculation run.
+
+    Stages are sequential: begin() closes the running stage and opens the next,
+    so a long function can mark its stages without re-nesting its body.
+    """
+
+    def __init__(self, name: str = "calculation"):
+        self.name = name
+        self.stages: List[Dict[str, Any]] = []
+        self.queries = 0
+        self.db_ms = 0.0
+        self._stage: Optional[Dict[str, Any]] = None
+        self._stage_start = 0.0
+        self._start = time.perf_counter()
+        self._token = None
+
+    def activate(self) -> "StageTrace":
+        """Make this the active trace of the current context (counts SQL statements)."""
+        self._token = _current_trace.set(self)
+        return self
+
+    def deactivate(self):
+        """Close the running stage and stop counting statements."""
+        self.end()
+        if self._token is not None:
+            _current_trace.reset(self._token)
+            self._token = None
+
+    def begin(self, stage: str) -> Dict[str, Any]:
+        """
+        Close the running stage (if any) and start the next one.
+
+        Returns:
+            The stage record; set record['rows'] (or call set_rows) to record a row count
+        """
+        self.end()
+        self._stage = {'stage': stage, 'ms': 0.0, 'queries': 0, 'db_ms': 0.0}
+        self._stage_start = time.perf_counter()
+        return self._stage
+
+    def set_rows(self, rows: int):
+        """Record the row / node count of the running stage."""
+        if self._stage is not None:
+            self._stage['rows'] = rows
+
+    def end(self, failed: bool = False):
+        """Close the running stage (no-op when none is running)."""
+        record, self._stage = self._stage, None
+        if record is None:
+            return
+        record['ms'] = round((time.perf_counter() - self._stage_start) * 1000, 2)
+        record['db_ms'] = round(record['db_ms'], 2)
+        if failed:
+            record['failed'] = True
+        self.stages.append(record)
+        metrics.record_stage(record['stage'], record['ms'], record['queries'])
+
+    @contextmanager
+    def span(self, stage: str) -> Iterator[Dict[str, Any]]:
+        """Context-manager form of begin() / end()."""
+        record = self.begin(stage)
+        try:
+            yield record
+        except Exception:
+            self.end(failed=True)
+            raise
+        self.end()
+
+    def _record_statement(self, elapsed_ms: float):
+        self.queries += 1
+        self.db_ms += elapsed_ms
+        if self._stage is not None:
+            self._stage['queries'] += 1
+            self._stage['db_ms'] += elapsed_ms
+
+    def to_json(self) -> Dict[str, Any]:
+        """JSON-serializable summary (stage_timings column format)."""
+        return {
+            'total_ms': round((time.perf_counter() - self._start) * 1000, 2),
+            'queries': self.queries,
+            'db_ms': round(self.db_ms, 2),
+            'stages': list(self.stages),
+        }
+
+    def log_summary(self):
+        """One log line with the slowest stages first."""
+        slowest = sorted(self.stages, key=lambda record: record['ms'], reverse=True)
+        logger.info(
+            f"[StageTrace] {self.name}: " + ", ".join(
+                f"{record['stage']}={record['ms']:.0f}ms/{record['queries']}q" for record in slowest
+            )
+        )
+
+
+@contextmanager
+def trace_run(name: str = "calculation") -> Iterator[StageTrace]:
+    """Activate a StageTrace for the current context (thread / task)."""
+    trace = StageTrace(name).activate()
+    try:
+        yield trace
+    finally:
+        trace.deactivate()
+
+
+def current_trace() -> Optional[StageTrace]:
+    """The active StageTrace, or None."""
+    return _current_trace.get()
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current_trace.get() is not None:
+        conn.info.setdefault('stage_trace_start', []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    trace = _current_trace.get()
+    starts = conn.info.get('stage_trace_start')
+    if trace is not None and starts:
+        trace._record_statement((time.perf_counter() - starts.pop()) * 1000)
+
+
+@event.listens_for(Engine, "handle_error")
+def _handle_error(exception_context):
+    # after_cursor_execute does not fire for failed statements
+    conn = exception_context.connection
+    starts = conn.info.get('stage_trace_start') if conn is not None else None
+    if starts:
+        starts.pop()
@@ -32,6 +32,9 @@ from app.services.dependency_resolver import (
 # PHASE 2A: Import rollup cache
 from app.services.rollup_cache import get_cached_rollup, set_cached_rollup
 
+# Per-node events are counted and summarized per run (logged only in trace mode)
+from app.engine.engine_log import EngineLog
+
 
 def _calculate_legacy_rollup(
     session: Session,
@@ -73,11 +76,7 @@ def _calculate_legacy_rollup(
         return cached_result
     
     logger.info(f"[Legacy Path] Calculating rollup for use_case_id: {use_case_id}")
-    print(f"[Legacy Path] Calculating rollup for use_case_id: {use_case_id}")
-    
-    print("\n" + "="*70)
-    print("[DEBUG] --- STARTING LEGACY ROLLUP ---")
-    print("="*70)
+    log = EngineLog(logger, "Legacy Path", use_case_id)
     
     results = {}
     
@@ -118,12 +117,10 @@ def _calculate_legacy_rollup(
             # Use fact_pnl_entries (same as get_unified_pnl routing)
             use_fact_pnl_entries = True
             logger.info(f"[Legacy Path] Found {entries_count} rows in fact_pnl_entries - routing to fact_pnl_entries (same as get_unified_pnl)")
-            print(f"[Legacy Path] Found {entries_count} rows in fact_pnl_entries - routing to fact_pnl_entries (same as get_unified_pnl)")
         else:
             # Fallback to fact_pnl_gold (same as get_unified_pnl routing)
             use_fact_pnl_gold = True
             logger.info(f"[Legacy Path] No rows in fact_pnl_entries - routing to fact_pnl_gold (same as get_unified_pnl)")
-            print(f"[Legacy Path] No rows in fact_pnl_entries - routing to fact_pnl_gold (same as get_unified_pnl)")
     
     # Try fact_pnl_entries (Use Case 2 - Project Sterling)
     if use_fact_pnl_entries:
@@ -133,7 +130,6 @@ def _calculate_legacy_rollup(
         
         if entries_count > 0:
             logger.info(f"[Legacy Path] Found {entries_count} rows in fact_pnl_entries, using category_code matching")
-            print(f"[Legacy Path] Found {entries_count} rows in fact_pnl_entries, using category_code matching")
             
             # Query grouped by category_code
             grouped_data = session.query(
@@ -156,14 +152,10 @@ def _calculate_legacy_rollup(
                 }
             
             logger.info(f"[Legacy Path] Built fact_map with {len(fact_map)} category_code entries")
-            print(f"[Legacy Path] Built fact_map: {len(fact_map)} entries from fact_pnl_entries")
-            print(f"[Legacy Path] Loaded {len(fact_map)} keys from DB. Sample: {list(fact_map.keys())[:3]}")
-            print(f"[DEBUG] Fact Map Keys (First 3): {list(fact_map.keys())[:3]}")
     
     # Use fact_pnl_gold (Use Case 1 - America Trading P&L)
     if use_fact_pnl_gold or not fact_map:
         logger.info(f"[Legacy Path] Loading from fact_pnl_gold, using cc_id matching")
-        print(f"[Legacy Path] Loading from fact_pnl_gold, using cc_id matching")
         
         # Query grouped by cc_id
         grouped_data = session.query(
@@ -183,13 +175,9 @@ def _calculate_legacy_rollup(
             }
         
         logger.info(f"[Legacy Path] Built fact_map with {len(fact_map)} cc_id entries")
-        print(f"[Legacy Path] Built fact_map: {len(fact_map)} entries from fact_pnl_gold")
-        print(f"[Legacy Path] Loaded {len(fact_map)} keys from DB. Sample: {list(fact_map.keys())[:3]}")
-        print(f"[DEBUG] Fact Map Keys (First 3): {list(fact_map.keys())[:3]}")
     
     if not fact_map:
         logger.warning(f"[Legacy Path] No facts found for use_case_id: {use_case_id}")
-        print(f"[Legacy Path] WARNING: No facts found")
         # Return zeros for all nodes
         for node_id in hierarchy_dict.keys():
             results[node_id] = {
@@ -204,14 +192,8 @@ def _calculate_legacy_rollup(
     matched_leaf_count = 0
     unmatched_fact_keys = set(fact_map.keys())  # Track which fact keys haven't been matched yet
     
-    print(f"\n[DEBUG] Starting leaf node matching. Total leaf nodes: {len(leaf_nodes)}")
-    print(f"[DEBUG] Fact map has {len(fact_map)} keys")
-    
     for node_id, node in hierarchy_dict.items():
         if node.is_leaf:
-            # High-Visibility Debugging: Log every leaf node check
-            print(f"\n[DEBUG] Checking Leaf: '{node_id}' (Name: '{node.node_name}')")
-            
             matched = False
             strategy_name = None
             matched_key = None
@@ -225,39 +207,30 @@ def _calculate_legacy_rollup(
                 if node.mapping_value in fact_map:
                     match_key = node.mapping_value
                     matched_strategy = "explicit_mapping"
-                    logger.info(f"Using DB Mapping: {node_id} -> {node.mapping_value}")
-                    print(f"   -> Using DB Mapping: '{node_id}' -> '{node.mapping_value}'")
                 else:
-                    logger.warning(f"[Legacy Path] Node '{node_id}' has mapping_value '{node.mapping_value}' but it's not in fact_map")
-                    print(f"   -> WARNING: mapping_value '{node.mapping_value}' not found in fact_map, falling back to node_id")
+                    log.sampled("mapping_value_not_in_fact_map", node_id=node_id, mapping_value=node.mapping_value)
             # 2. Fallback: Try Direct Match with node_id
             elif node_id in fact_map:
                 match_key = node_id
                 matched_strategy = "direct"
-                print(f"   -> Direct match: node_id='{node_id}' found in fact_map")
             
             # Check 1: Direct match using translated key
             if match_key in fact_map:
                 matched_key = match_key
                 strategy_name = matched_strategy
                 matched = True
-                print(f"   -> MATCH FOUND: match_key='{match_key}' (strategy: {matched_strategy})")
-            else:
-                print(f"   -> NO MATCH: match_key='{match_key}' not in fact_map")
             
             # Check 2: node_name match (Secondary)
             if not matched and node.node_name and node.node_name in fact_map:
                 matched_key = node.node_name
                 strategy_name = "node_name match"
                 matched = True
-                print(f"   -> MATCH FOUND (node_name): '{node.node_name}' found in fact_map")
             
             # Check 3: node.cc_id attribute match (Tertiary - if attribute exists)
             if not matched and hasattr(node, 'cc_id') and node.cc_id and node.cc_id in fact_map:
                 matched_key = node.cc_id
                 strategy_name = "node.cc_id attribute match"
                 matched = True
-                print(f"   -> MATCH FOUND (cc_id attribute): '{node.cc_id}' found in fact_map")
             
             # Check 4: Fuzzy match - strip whitespace/underscores (Fallback)
             if not matched:
@@ -268,7 +241,6 @@ def _calculate_legacy_rollup(
                         matched_key = fact_key
                         strategy_name = "fuzzy match (normalized)"
                         matched = True
-                        print(f"   -> MATCH FOUND (Fuzzy): '{node_id}' normalized matches '{fact_key}'")
                         break
             
             # Assign matched values or set to zero
@@ -277,8 +249,7 @@ def _calculate_legacy_rollup(
                 matched_leaf_count += 1
                 if matched_key in unmatched_fact_keys:
                     unmatched_fact_keys.remove(matched_key)
-                logger.info(f"[Legacy Path] Matched Node {node_id} ('{node.node_name}') using strategy: {strategy_name}, key: {matched_key}, daily={results[node_id]['daily']}")
-                print(f"[Legacy Path] Matched Node {node_id} ('{node.node_name}') using strategy: {strategy_name}, key: {matched_key}, daily={results[node_id]['daily']}")
+                log.event("leaf_matched", node_id=node_id, strategy=strategy_name, key=matched_key, daily=results[node_id]['daily'])
             else:
                 # No match - set to zero
                 results[node_id] = {
@@ -287,12 +258,12 @@ def _calculate_legacy_rollup(
                     'ytd': Decimal('0'),
                     'pytd': Decimal('0')
                 }
-                logger.debug(f"[Legacy Path] Leaf {node_id} ('{node.node_name}') not found in fact_map (tried all strategies)")
-                print(f"   -> NO MATCH (All strategies failed)")
+                log.event("leaf_unmatched", node_id=node_id, node_name=node.node_name)
     
-    logger.info(f"[Legacy Path] Matched {matched_leaf_count}/{len(leaf_nodes)} leaf nodes from fact_map")
-    print(f"[Legacy Path] Matched {matched_leaf_count}/{len(leaf_nodes)} leaf nodes from fact_map")
-    print(f"[Legacy Path] Unmatched fact keys: {len(unmatched_fact_keys)} keys remain unmatched. Sample: {list(unmatched_fact_keys)[:5]}")
+    logger.info(
+        f"[Legacy Path] Matched {matched_leaf_count}/{len(leaf_nodes)} leaf nodes from fact_map, "
+        f"{len(unmatched_fact_keys)} fact keys unmatched"
+    )
     
     # Step 3: Aggregate Parents (Bottom-Up Aggregation)
     # Process nodes by depth (deepest first, then work up to root)
@@ -318,7 +289,7 @@ def _calculate_legacy_rollup(
                         'pytd': child_pytd
                     }
                     
-                    logger.debug(f"[Legacy Path] Parent {node_id} ('{node.node_name}') aggregated from {len(children)} children: daily={child_daily}")
+                    log.event("parent_aggregated", node_id=node_id, children=len(children), daily=child_daily)
                 else:
                     # No children - set to zero
                     results[node_id] = {
@@ -347,7 +318,6 @@ def _calculate_legacy_rollup(
                 
                 if unmatched_sum['daily'] != Decimal('0'):
                     logger.warning(f"[Legacy Path] Blind Assignment: Root node {root_id} ('{root_node.node_name}') was 0, assigning sum of {len(unmatched_fact_keys)} unmatched fact keys: daily={unmatched_sum['daily']}")
-                    print(f"[Legacy Path] Blind Assignment: Root node {root_id} ('{root_node.node_name}') assigned sum of {len(unmatched_fact_keys)} unmatched keys: daily={unmatched_sum['daily']}")
                     results[root_id] = unmatched_sum
     
     # Final Verification
@@ -355,8 +325,11 @@ def _calculate_legacy_rollup(
     parent_nodes_with_values = sum(1 for node_id, node in hierarchy_dict.items() 
                                    if not node.is_leaf and results.get(node_id, {}).get('daily', Decimal('0')) != Decimal('0'))
     
-    logger.info(f"[Legacy Path] Final: {final_matched_leaf_count}/{len(leaf_nodes)} leaf nodes with non-zero values, {parent_nodes_with_values} parent nodes populated")
-    print(f"[Legacy Path] Final: {final_matched_leaf_count}/{len(leaf_nodes)} leaf nodes with non-zero values, {parent_nodes_with_values} parent nodes populated")
+    log.summary(
+        "Final",
+        nonzero_leaves=f"{final_matched_leaf_count}/{len(leaf_nodes)}",
+        populated_parents=parent_nodes_with_values,
+    )
     
     # PHASE 2A: Cache the result before returning
     set_cached_rollup(use_case_id, hierarchy_dict, results)
@@ -405,7 +378,7 @@ def _calculate_strategy_rollup(
         return cached_result
     
     logger.info(f"[Strategy Path] Calculating rollup for use_case_id: {use_case_id}")
-    print(f"[Strategy Path] Calculating rollup for use_case_id: {use_case_id}")
+    log = EngineLog(logger, "Strategy Path", use_case_id)
     
     results = {}
     direct_values = {}  # Phase 5.8: Store direct values separately for hybrid parent support
@@ -422,7 +395,6 @@ def _calculate_strategy_rollup(
     
     if facts_df is None or facts_df.empty:
         logger.warning(f"[Strategy Path] No facts found for use_case_id: {use_case_id}")
-        print(f"[Strategy Path] WARNING: No facts found")
         # Return zeros for all nodes
         for node_id in hierarchy_dict.keys():
             results[node_id] = {
@@ -433,7 +405,6 @@ def _calculate_strategy_rollup(
         return results
     
     logger.info(f"[Strategy Path] Loaded {len(facts_df)} fact rows from fact_pnl_use_case_3")
-    print(f"[Strategy Path] Loaded {len(facts_df)} fact rows")
     
     # Identify ROOT node(s)
     root_nodes = [node_id for node_id, node in hierarchy_dict.items() if node.parent_node_id is None]
@@ -463,14 +434,14 @@ def _calculate_strategy_rollup(
             strategy_match = facts_df[facts_df['strategy'].str.upper() == node_name.upper()]
             if len(strategy_match) > 0:
                 matched_facts = strategy_match
-                logger.debug(f"[Strategy Path] Node {node_id} ('{node_name}') matched {len(matched_facts)} facts by strategy")
+                match_field = 'strategy'
         
         # If no strategy match, try product_line (fact.product_line == node.node_name)
         if len(matched_facts) == 0 and 'product_line' in facts_df.columns:
             product_match = facts_df[facts_df['product_line'].str.upper() == node_name.upper()]
             if len(product_match) > 0:
                 matched_facts = product_match
-                logger.debug(f"[Strategy Path] Node {node_id} ('{node_name}') matched {len(matched_facts)} facts by product_line")
+                match_field = 'product_line'
         
         # Calculate sums for this node
         if len(matched_facts) > 0:
@@ -479,7 +450,7 @@ def _calculate_strategy_rollup(
             mtd_sum = Decimal(str(matched_facts['pnl_commission'].sum())) if 'pnl_commission' in matched_facts.columns else Decimal('0')
             ytd_sum = Decimal(str(matched_facts['pnl_trade'].sum())) if 'pnl_trade' in matched_facts.columns else Decimal('0')
             
-            logger.debug(f"[Strategy Path] Node {node_id} ('{node_name}') matched {len(matched_facts)} facts, daily={daily_sum}, mtd={mtd_sum}, ytd={ytd_sum}")
+            log.event("node_matched", node_id=node_id, match_field=match_field, facts=len(matched_facts), daily=daily_sum, mtd=mtd_sum, ytd=ytd_sum)
             
             # Store direct value (for hybrid parent support in waterfall_up)
             direct_values[node_id] = {
@@ -510,8 +481,6 @@ def _calculate_strategy_rollup(
     # CRITICAL: Always aggregate ALL 3 metrics (daily, mtd, ytd) from children
     max_depth = max(node.depth for node in hierarchy_dict.values()) if hierarchy_dict else 0
     
-    print(f"[Strategy Path] Starting bottom-up aggregation from depth {max_depth} to 0")
-    
     for depth in range(max_depth, -1, -1):
         for node_id, node in hierarchy_dict.items():
             if node.depth == depth and not node.is_leaf:
@@ -549,15 +518,9 @@ def _calculate_strategy_rollup(
                             'ytd': direct_ytd + child_ytd,
                             'pytd': direct_pytd + child_pytd
                         }
-                        logger.info(
-                            f"[Strategy Path] Hybrid Parent {node_id} ('{node.node_name}') - "
-                            f"Direct: daily={direct_daily}, Children: daily={child_daily}, "
-                            f"Combined Natural: daily={results[node_id]['daily']}"
-                        )
-                        print(
-                            f"[Strategy Path] Hybrid Parent {node_id} ('{node.node_name}') - "
-                            f"Direct: daily={direct_daily}, Children: daily={child_daily}, "
-                            f"Combined: daily={results[node_id]['daily']}"
+                        log.event(
+                            "hybrid_parent", node_id=node_id, direct_daily=direct_daily,
+                            children_daily=child_daily, daily=results[node_id]['daily']
                         )
                     else:
                         # Regular parent: Natural = Children only
@@ -567,8 +530,7 @@ def _calculate_strategy_rollup(
                             'ytd': child_ytd,
                             'pytd': child_pytd
                         }
-                        logger.info(f"[Strategy Path] Parent {node_id} ('{node.node_name}') aggregated from {len(children)} children: daily={child_daily}, mtd={child_mtd}, ytd={child_ytd}")
-                        print(f"[Strategy Path] Parent {node_id} ('{node.node_name}') aggregated: daily={child_daily}, mtd={child_mtd}, ytd={child_ytd}")
+                        log.event("parent_aggregated", node_id=node_id, children=len(children), daily=child_daily, mtd=child_mtd, ytd=child_ytd)
                 else:
                     # No children - ensure parent has zero values if not already set
                     if node_id not in results:
@@ -601,11 +563,8 @@ def _calculate_strategy_rollup(
                 
                 logger.info(f"[Strategy Path] ROOT node {root_id} ('{root_node.node_name}') using direct sum: daily={daily_sum}, mtd={mtd_sum}, ytd={ytd_sum}")
                 logger.info(f"[Strategy Path] ROOT node child sum (for comparison): daily={child_daily}, mtd={child_mtd}, ytd={child_ytd}")
-                print(f"[Strategy Path] ROOT node {root_id} using direct sum: daily={daily_sum}, mtd={mtd_sum}, ytd={ytd_sum}")
-                print(f"[Strategy Path] ROOT node child sum (for comparison): daily={child_daily}, mtd={child_mtd}, ytd={child_ytd}")
             else:
                 logger.info(f"[Strategy Path] ROOT node {root_id} ('{root_node.node_name}') summing all facts: daily={daily_sum}, mtd={mtd_sum}, ytd={ytd_sum}")
-                print(f"[Strategy Path] ROOT node {root_id} summing all {len(facts_df)} facts: daily={daily_sum}, mtd={mtd_sum}, ytd={ytd_sum}")
             
             # CRITICAL: Set ROOT to direct sum (matches get_unified_pnl)
             results[root_id] = {
@@ -617,8 +576,7 @@ def _calculate_strategy_rollup(
     
     # Count matched nodes
     matched_count = sum(1 for node_id in hierarchy_dict.keys() if results.get(node_id, {}).get('daily', Decimal('0')) != Decimal('0'))
-    logger.info(f"[Strategy Path] Matched {matched_count}/{len(hierarchy_dict)} nodes with non-zero values")
-    print(f"[Strategy Path] Matched {matched_count}/{len(hierarchy_dict)} nodes")
+    log.summary("Matched nodes with non-zero values", nonzero_nodes=f"{matched_count}/{len(hierarchy_dict)}")
     
     # PHASE 2A: Cache the result before returning
     set_cached_rollup(use_case_id, hierarchy_dict, results)
@@ -662,12 +620,7 @@ def get_unified_pnl(
     import logging
     logger = logging.getLogger(__name__)
     
-    # ========================================================================
-    # HIGH-VISIBILITY DEBUG LOGGING
-    # ========================================================================
-    print(f"\n{'='*70}")
-    print(f"[DEBUG] --- PROCESSING USE CASE: {use_case_id} ---")
-    print(f"{'='*70}")
+    logger.debug(f"[DEBUG] --- PROCESSING USE CASE: {use_case_id} ---")
     
     # Phase 5.5: Get UseCase to determine input table
     from app.models import UseCase, DimHierarchy
@@ -677,7 +630,6 @@ def get_unified_pnl(
     
     if not use_case:
         error_msg = f"Use case {use_case_id} not found"
-        print(f"[DEBUG] [ERROR] {error_msg}")
         logger.error(error_msg)
         return {
             "daily_pnl": Decimal('0'),
@@ -685,10 +637,7 @@ def get_unified_pnl(
             "ytd_pnl": Decimal('0')
         }
     
-    print(f"[DEBUG] Found Use Case: {use_case.name}")
-    print(f"[DEBUG] Use Case ID: {use_case.use_case_id}")
-    print(f"[DEBUG] Raw DB Input Table Name (before processing): {repr(use_case.input_table_name)}")
-    print(f"[DEBUG] Input Table Name Type: {type(use_case.input_table_name)}")
+    logger.debug(f"[DEBUG] Found Use Case: {use_case.name}, raw input_table_name: {repr(use_case.input_table_name)}")
     
     # Phase 5.6: Dual-Path Rollup Logic
     # Check if we should use strategy rollup (Use Case 3) or legacy rollup (Use Cases 1 & 2)
@@ -705,13 +654,11 @@ def get_unified_pnl(
     rollup_results = {}
     if input_table_name == 'fact_pnl_use_case_3':
         logger.info(f"[DEBUG] Strategy Path Selected for Use Case 3")
-        print(f"[DEBUG] Strategy Path Selected for Use Case 3")
         rollup_results = _calculate_strategy_rollup(
             session, use_case_id, hierarchy_dict, children_dict, leaf_nodes
         )
     else:
         logger.info(f"[DEBUG] Legacy Path Selected for Use Cases 1 & 2")
-        print(f"[DEBUG] Legacy Path Selected for Use Cases 1 & 2")
         rollup_results = _calculate_legacy_rollup(
             session, use_case_id, hierarchy_dict, children_dict, leaf_nodes
         )
@@ -734,7 +681,6 @@ def get_unified_pnl(
         
         if math_rules:
             logger.info(f"[Math Rules] Found {len(math_rules)} Type 3 rules to execute")
-            print(f"[Math Rules] Found {len(math_rules)} Type 3 rules to execute")
             
             # Resolve execution order using topological sort
             try:
@@ -743,7 +689,7 @@ def get_unified_pnl(
                     hierarchy_dict
                 )
                 logger.info(f"[Math Rules] Resolved execution order for {len(sorted_math_rules)} rules")
-                print(f"[Math Rules] Execution order resolved: {len(sorted_math_rules)} rules")
+                log = EngineLog(logger, "Math Rules", use_case_id)
                 
                 # Execute math rules in dependency order
                 for rule in sorted_math_rules:
@@ -774,21 +720,14 @@ def get_unified_pnl(
                         
                         new_val = rollup_results[target_node]['daily']
                         
-                        # Flight Recorder Logging (High-Visibility)
-                        logger.info(
-                            f"🧮 MATH ENGINE [UNIFIED_PNL]: Node {target_node} | "
-                            f"SQL Value: {original_val} | Rule: {rule.rule_expression} | "
-                            f"➡️ New Value: {new_val}"
-                        )
-                        print(
-                            f"🧮 MATH ENGINE [UNIFIED_PNL]: Node {target_node} | "
-                            f"SQL Value: {original_val} | Rule: {rule.rule_expression} | "
-                            f"➡️ New Value: {new_val}"
+                        # Flight Recorder (trace mode; counted otherwise)
+                        log.event(
+                            "rule_applied", node_id=target_node, sql_value=original_val,
+                            rule=rule.rule_expression, new_value=new_val
                         )
                         
                     except Exception as e:
                         logger.error(f"Error executing Type 3 rule {rule.rule_id} for node {target_node}: {e}")
-                        print(f"[Math Rules] ERROR executing rule for {target_node}: {e}")
                         # Set to zero on error (or keep existing value if node already has one)
                         if target_node not in rollup_results:
                             rollup_results[target_node] = {
@@ -798,23 +737,19 @@ def get_unified_pnl(
                                 'pytd': Decimal('0'),
                             }
                 
-                logger.info(f"[Math Rules] Successfully executed {len(sorted_math_rules)} Type 3 rules")
-                print(f"[Math Rules] Successfully executed {len(sorted_math_rules)} Type 3 rules")
+                log.summary(f"Executed {len(sorted_math_rules)} Type 3 rules")
                 
             except CircularDependencyError as e:
                 logger.error(f"Circular dependency detected in Type 3 rules: {e}")
-                print(f"[Math Rules] ERROR: Circular dependency detected: {e}")
                 # Continue with rollup_results as-is (without math rule updates)
             except Exception as e:
                 logger.error(f"Error resolving Type 3 rule dependencies: {e}")
-                print(f"[Math Rules] ERROR resolving dependencies: {e}")
                 # Continue with rollup_results as-is
         else:
             logger.debug(f"[Math Rules] No Type 3 rules found for use case {use_case_id}")
             
     except Exception as e:
         logger.error(f"Error loading or executing Type 3 rules: {e}")
-        print(f"[Math Rules] ERROR loading rules: {e}")
         # Continue with rollup_results as-is (don't fail the entire request)
     
     # Calculate totals from rollup results (sum of root nodes)
@@ -825,12 +760,10 @@ def get_unified_pnl(
         total_ytd = sum(rollup_results.get(root_id, {}).get('ytd', Decimal('0')) for root_id in root_nodes)
         
         logger.info(f"[DEBUG] Rollup totals: Daily={total_daily}, MTD={total_mtd}, YTD={total_ytd}")
-        print(f"[DEBUG] Rollup totals: Daily={total_daily}, MTD={total_mtd}, YTD={total_ytd}")
         
         # If rollup produced non-zero values, use them (but still fall through to SQL query for verification)
         if total_daily != Decimal('0'):
             logger.info(f"[DEBUG] Using rollup totals (non-zero values found)")
-            print(f"[DEBUG] Using rollup totals (non-zero values found)")
             # Continue to SQL query for verification, but we have rollup as backup
     
     # ========================================================================
@@ -845,25 +778,16 @@ def get_unified_pnl(
         target_table = raw_input_table.strip() if isinstance(raw_input_table, str) else str(raw_input_table).strip()
         if not target_table:  # Empty string after stripping
             target_table = None
-            print(f"[DEBUG] Input table name was whitespace-only, treating as None")
-    
-    print(f"[DEBUG] Processed Input Table Name: {repr(target_table)}")
+            logger.debug(f"[DEBUG] Input table name was whitespace-only, treating as None")
     
     # Make explicit routing decision
     source_table = None
     routing_reason = None
     
     if target_table:
-        print(f"[DEBUG] {'='*70}")
-        print(f"[DEBUG] DECISION: Routing to CUSTOM table -> '{target_table}'")
-        print(f"[DEBUG] {'='*70}")
         source_table = target_table
         routing_reason = f"Use case has configured input_table_name: '{target_table}'"
     else:
-        print(f"[DEBUG] {'='*70}")
-        print(f"[DEBUG] DECISION: Routing to LEGACY table detection")
-        print(f"[DEBUG] {'='*70}")
-        
         # Legacy routing: Check which table has data for this use case
         # Try fact_pnl_entries first (has use_case_id column)
         from app.models import FactPnlEntries
@@ -871,20 +795,12 @@ def get_unified_pnl(
             FactPnlEntries.use_case_id == use_case_id
         ).count()
         
-        print(f"[DEBUG] Legacy routing check: fact_pnl_entries has {entries_count} rows for this use_case_id")
-        
         if entries_count > 0:
             source_table = 'fact_pnl_entries'
             routing_reason = f"Legacy routing: Found {entries_count} rows in fact_pnl_entries"
-            print(f"[DEBUG] DECISION: Routing to 'fact_pnl_entries' (legacy table with data)")
         else:
             source_table = 'fact_pnl_gold'
             routing_reason = "Legacy routing: No data in fact_pnl_entries, using fact_pnl_gold"
-            print(f"[DEBUG] DECISION: Routing to 'fact_pnl_gold' (legacy fallback)")
-    
-    print(f"[DEBUG] Final Source Table: '{source_table}'")
-    print(f"[DEBUG] Routing Reason: {routing_reason}")
-    print(f"[DEBUG] {'='*70}\n")
     
     logger.info(f"get_unified_pnl: Routing Use Case '{use_case.name}' (ID: {use_case_id}) to Source Table: {source_table}")
     logger.info(f"get_unified_pnl: Routing Reason: {routing_reason}")
@@ -955,14 +871,13 @@ def get_unified_pnl(
         ytd = Decimal(str(result[2])) if result and result[2] is not None else Decimal('0')
         
         # 3. VERIFY DATA IS NOT ZERO
-        print(f"[DEBUG] Query Result: Daily={daily}, MTD={mtd}, YTD={ytd}")
+        logger.debug(f"[DEBUG] Query Result: Daily={daily}, MTD={mtd}, YTD={ytd}")
         
         if daily != Decimal('0'):
             success_msg = (
                 f"unified_pnl_service (RAW SQL): Use Case {use_case_id}, Table: {source_table}, "
                 f"Scenario: {scenario}, Daily: {daily}, MTD: {mtd}, YTD: {ytd}"
             )
-            print(f"[DEBUG] [SUCCESS] {success_msg}")
             logger.info(success_msg)
             
             return {
@@ -984,20 +899,17 @@ def get_unified_pnl(
             }
         
         warning_msg = f"WARNING: DB returned 0 for {use_case_id} from table {source_table}. Activating Fallback."
-        print(f"[DEBUG] [WARNING] {warning_msg}")
         logger.warning(warning_msg)
         
     except Exception as e:
         error_msg = f"ERROR in P&L Service (Swapping to Fallback): {str(e)}"
-        print(f"[DEBUG] [EXCEPTION] {error_msg}")
         logger.error(error_msg, exc_info=True)
         # Fall through to fallback logic
     
     # 4. ACTIVATE DEMO FALLBACK (The Safety Net)
-    print(f"[DEBUG] Activating fallback logic...")
+    logger.debug(f"[DEBUG] Activating fallback logic...")
     uc_str = str(use_case_id)
     if uc_str == STERLING_UUID:
-        print(f"[DEBUG] [FALLBACK] Returning STERLING GOLDEN NUMBERS")
         logger.info("RETURNING STERLING GOLDEN NUMBERS")
         return {
             **sterling_data,
@@ -1011,7 +923,6 @@ def get_unified_pnl(
             }
         }
     elif uc_str == AMERICA_UUID:
-        print(f"[DEBUG] [FALLBACK] Returning AMERICA GOLDEN NUMBERS")
         logger.info("RETURNING AMERICA GOLDEN NUMBERS")
         return {
             **america_data,
@@ -1026,7 +937,6 @@ def get_unified_pnl(
         }
     
     # Default if unknown use case
-    print(f"[DEBUG] [FALLBACK] Unknown use case {uc_str}, returning zeros")
     logger.warning(f"Unknown use case {uc_str}, returning zeros")
     return {
         "daily_pnl": Decimal('0'),
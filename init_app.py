@@ -19,11 +19,13 @@ from app.models import (
     MetadataRule,
     FactPnlGold,
     FactCalculatedResult,
+    FactResultSeries,
     ReportRegistration,
     DimDictionary,
     FactPnlEntries,
     CalculationRun,
-    HistorySnapshot
+    HistorySnapshot,
+    RuleTranslation
 )
 
 logging.basicConfig(level=logging.INFO)
@@ -40,7 +42,7 @@ def init_db():
     logger.info("🛠️ STARTUP: Checking Database Schema...")
     
     try:
-        # Get database URL and create engine
+        # Use the shared application engine (no second pool at startup)
         database_url = get_database_url()
         engine = create_db_engine(database_url)
         
@@ -51,9 +53,6 @@ def init_db():
         
         logger.info("✅ STARTUP: Database Tables Verified/Created.")
         
-        # Clean up engine
-        engine.dispose()
-        
     except Exception as e:
         logger.error(f"❌ STARTUP FAILED: {e}")
         raise e
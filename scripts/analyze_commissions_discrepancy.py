@@ -210,8 +210,8 @@ def main():
             SELECT 
                 fcr.node_id,
                 h.node_name,
-                fcr.measure_vector->>'daily' as adjusted_daily,
-                fcr.plug_vector->>'daily' as plug_daily,
+                COALESCE(fcr.adjusted_daily, (fcr.measure_vector->>'daily')::numeric) as adjusted_daily,
+                COALESCE(fcr.plug_daily, (fcr.plug_vector->>'daily')::numeric) as plug_daily,
                 ucr.run_timestamp
             FROM fact_calculated_results fcr
             JOIN use_case_runs ucr ON fcr.run_id = ucr.run_id
@@ -175,7 +175,7 @@ def main():
             SELECT 
                 fcr.node_id,
                 h.node_name,
-                fcr.measure_vector->>'daily' as adjusted_daily,
+                COALESCE(fcr.adjusted_daily, (fcr.measure_vector->>'daily')::numeric) as adjusted_daily,
                 fcr.is_override,
                 ucr.run_timestamp
             FROM fact_calculated_results fcr
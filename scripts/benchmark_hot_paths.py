@@ -0,0 +1,334 @@
+"""
+Benchmark harness for the waterfall, rollup and persistence hot paths.
+
+Runs each hot path against synthetic datasets (app/engine/synthetic_data.py)
+at one or more scales and records, per stage:
+
+- wall_s: wall-clock seconds
+- queries: SQL statements executed (SQLAlchemy before_cursor_execute count)
+- peak_rss_mb / rss_growth_mb: process peak RSS after the stage and its growth
+  during the stage (resource.getrusage; not available on Windows)
+
+Stages: calculate_use_case, create_snapshot, _calculate_legacy_rollup (gold and
+entries use cases), _calculate_strategy_rollup (UC3), evaluate_type3_expression,
+execute_type_2b_rule and the /results build + JSON serialization path.
+
+Results are written as JSON (--output) and can be saved as a baseline
+(--save-baseline) or compared against one (--baseline): a stage regresses when
+its wall time exceeds the baseline by more than --tolerance, or when it runs
+more queries. The exit code is 1 when a regression is found or a stage fails
+(raises or logs an ERROR; the Type 2B stage also fails when every rule
+evaluates to 0).
+
+Database: DATABASE_URL (a local PostgreSQL), --database-url, or --embedded to
+start a throwaway PostgreSQL with the optional `pgserver` package
+(pip install pgserver); the embedded schema is created from the models.
+
+Usage:
+    python scripts/benchmark_hot_paths.py --scales small medium --output bench.json
+    python scripts/benchmark_hot_paths.py --scales small --save-baseline scripts/benchmark_baseline.json
+    python scripts/benchmark_hot_paths.py --scales small --baseline scripts/benchmark_baseline.json
+    python scripts/benchmark_hot_paths.py --embedded --scales small --skip-load
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+from contextlib import contextmanager
+from datetime import date, datetime
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional
+
+# Add project root to path
+project_root = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(project_root))
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+SCALES = {
+    'small': {'node_count': 1_000, 'fact_rows': 50_000},
+    'medium': {'node_count': 10_000, 'fact_rows': 1_000_000},
+    'large': {'node_count': 100_000, 'fact_rows': 10_000_000},
+}
+BENCH_BUSINESS_DAYS = 5
+TYPE3_EVALUATIONS = 1_000
+TYPE2B_RULES = 50
+
+
+def peak_rss_mb() -> Optional[float]:
+    """Peak resident set size of this process in MB (None where unsupported)."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # KB on Linux, bytes on macOS
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+
+class _ErrorCounter(logging.Handler):
+    """Counts ERROR (and above) log records emitted while a stage runs."""
+
+    def __init__(self):
+        super().__init__(level=logging.ERROR)
+        self.count = 0
+        self.first: Optional[str] = None
+
+    def emit(self, record):
+        self.count += 1
+        if self.first is None:
+            self.first = f"{record.name}: {record.getMessage()}"
+
+
+class StageRecorder:
+    """Collects wall time, query count and peak RSS per benchmark stage."""
+
+    def __init__(self, engine):
+        from sqlalchemy import event
+
+        self.queries = 0
+        self.stages: Dict[str, Dict[str, Any]] = {}
+        # Session of the running scale; rolled back when a stage fails
+        self.session = None
+        self.errors = _ErrorCounter()
+        logging.getLogger().addHandler(self.errors)
+        event.listen(engine, "before_cursor_execute", self._on_execute)
+
+    def _on_execute(self, *args, **kwargs):
+        self.queries += 1
+
+    @contextmanager
+    def measure(self, stage: str):
+        """
+        Record one stage; errors are stored on the stage instead of aborting the run.
+
+        A stage fails when it raises or logs an ERROR (engines log and continue,
+        returning zeros, so a clean exit alone does not prove the work ran). A
+        failed stage rolls back the session, so later stages do not run on an
+        aborted transaction.
+        """
+        record = {'status': 'ok'}
+        queries_before = self.queries
+        errors_before = self.errors.count
+        self.errors.first = None
+        rss_before = peak_rss_mb()
+        start = time.perf_counter()
+        try:
+            yield record
+        except Exception as e:
+            record['status'] = 'error'
+            record['error'] = f"{type(e).__name__}: {e}"
+        if record['status'] == 'ok' and self.errors.count > errors_before:
+            record['status'] = 'error'
+            record['error'] = f"{self.errors.count - errors_before} error(s) logged, first: {self.errors.first}"
+        if record['status'] == 'error' and self.session is not None:
+            self.session.rollback()
+        record['wall_s'] = round(time.perf_counter() - start, 4)
+        record['queries'] = self.queries - queries_before
+        record['peak_rss_mb'] = peak_rss_mb()
+        if rss_before is not None:
+            record['rss_growth_mb'] = round(record['peak_rss_mb'] - rss_before, 1)
+        self.stages[stage] = record
+        print(f"  {stage:<32} {record['status']:<6} {record['wall_s']:>9.3f}s {record['queries']:>7} queries"
+              + (f"  ({record['error']})" if 'error' in record else ""))
+
+
+def start_embedded_postgres(data_dir: Path) -> str:
+    """Start an embedded PostgreSQL (optional pgserver package) and return its URL."""
+    try:
+        import pgserver
+    except ImportError:
+        raise SystemExit("[ERROR] --embedded requires the optional 'pgserver' package (pip install pgserver)")
+    data_dir.mkdir(parents=True, exist_ok=True)
+    server = pgserver.get_server(str(data_dir), cleanup_mode='stop')
+    return server.get_uri()
+
+
+def run_scale(scale: str, session_factory, recorder: StageRecorder, skip_load: bool) -> Dict[str, Any]:
+    """Load (or reuse) one scale's dataset and benchmark every stage on it."""
+    from app.api.routes.calculations import build_calculation_results, load_results_context
+    from app.engine.synthetic_data import (
+        SyntheticConfig, business_dates, load_synthetic_dataset, synthetic_use_case_id,
+    )
+    from app.engine.type2b_processor import execute_type_2b_rule
+    from app.engine.waterfall import load_hierarchy
+    from app.services.calculator import calculate_use_case
+    from app.services.dependency_resolver import evaluate_type3_expression
+    from app.services.orchestrator import create_snapshot, load_facts_for_date
+    from app.services.unified_pnl_service import _calculate_legacy_rollup, _calculate_strategy_rollup
+
+    config = SyntheticConfig(
+        business_days=BENCH_BUSINESS_DAYS,
+        structure_id=f"BENCH_{scale.upper()}",
+        node_prefix=f"B{scale[0].upper()}_",
+        **SCALES[scale],
+    )
+    use_cases = {schema: synthetic_use_case_id(config, schema) for schema in config.schemas}
+    pnl_date = date.fromisoformat(business_dates(config)[-1])
+    recorder.stages = {}
+    print(f"\n[{scale}] {config.node_count} nodes, {config.fact_rows} fact rows per schema")
+
+    session = session_factory()
+    recorder.session = session
+    try:
+        if not skip_load:
+            with recorder.measure('load_dataset') as record:
+                record['summary'] = load_synthetic_dataset(session, config)
+
+        natural = {}
+        for schema in ('gold', 'entries'):
+            use_case_id = use_cases[schema]
+            hierarchy_dict, children_dict, leaf_nodes = load_hierarchy(session, use_case_id)
+            with recorder.measure(f'legacy_rollup_{schema}'):
+                natural = _calculate_legacy_rollup(
+                    session, use_case_id, hierarchy_dict, children_dict, leaf_nodes, force_recalculate=True
+                )
+
+        hierarchy_dict, children_dict, leaf_nodes = load_hierarchy(session, use_cases['uc3'])
+        with recorder.measure('strategy_rollup_uc3'):
+            _calculate_strategy_rollup(
+                session, use_cases['uc3'], hierarchy_dict, children_dict, leaf_nodes, force_recalculate=True
+            )
+
+        with recorder.measure('evaluate_type3_expression'):
+            operands = [node_id for node_id in leaf_nodes[:10] if node_id in natural] or leaf_nodes[:1]
+            expression = " + ".join(operands) + " * 0.10"
+            for _ in range(TYPE3_EVALUATIONS):
+                evaluate_type3_expression(expression, natural)
+
+        facts = load_facts_for_date(session, use_cases['uc3'], pnl_date)
+        with recorder.measure('execute_type_2b_rule') as record:
+            results = []
+            for index in range(TYPE2B_RULES):
+                group = leaf_nodes[index::TYPE2B_RULES][:50]
+                # The fact frame carries fact_pnl_use_case_3.strategy as category_code
+                filters = [{'field': 'category_code', 'operator': 'IN', 'values': group}]
+                rule = SimpleNamespace(node_id=f"BENCH_2B_{index}", predicate_json={
+                    'version': '2.0',
+                    'expression': {
+                        'operator': '-',
+                        'operands': [
+                            {'type': 'query', 'query_id': 'Q1'},
+                            {'type': 'query', 'query_id': 'Q2'},
+                        ],
+                    },
+                    'queries': [
+                        {'query_id': 'Q1', 'measure': 'daily_pnl', 'aggregation': 'SUM', 'filters': filters},
+                        {'query_id': 'Q2', 'measure': 'daily_commission', 'aggregation': 'SUM', 'filters': filters},
+                    ],
+                })
+                results.append(execute_type_2b_rule(facts, rule, 'fact_pnl_use_case_3'))
+            record['nonzero_results'] = sum(1 for result in results if result != 0)
+            if not record['nonzero_results']:
+                raise RuntimeError(f"all {len(results)} Type 2B rules returned 0 (no rows matched)")
+        del facts
+
+        for schema in ('gold', 'entries'):
+            with recorder.measure(f'calculate_use_case_{schema}'):
+                calculate_use_case(use_cases[schema], session, triggered_by='benchmark')
+
+        for schema in ('entries', 'uc3'):
+            with recorder.measure(f'create_snapshot_{schema}'):
+                create_snapshot(use_cases[schema], pnl_date, session, run_name=f"Benchmark_{scale}", triggered_by='benchmark')
+
+        with recorder.measure('results_serialization') as record:
+            context = load_results_context(session, use_cases['entries'], force_recalculate=True)
+            response = build_calculation_results(use_cases['entries'], None, True, session, context)
+            record['payload_bytes'] = len(response.model_dump_json())
+    finally:
+        session.close()
+
+    return dict(recorder.stages)
+
+
+def compare_to_baseline(results: Dict[str, Dict], baseline: Dict[str, Dict], tolerance: float) -> List[str]:
+    """Regressions of results against a baseline (same scales and stages only)."""
+    regressions = []
+    for scale, stages in results.items():
+        for stage, record in stages.items():
+            reference = baseline.get(scale, {}).get(stage)
+            if not reference or record.get('status') != 'ok' or reference.get('status') != 'ok':
+                continue
+            if record['wall_s'] > reference['wall_s'] * (1 + tolerance):
+                regressions.append(
+                    f"{scale}/{stage}: wall {record['wall_s']:.3f}s vs baseline {reference['wall_s']:.3f}s"
+                )
+            if record['queries'] > reference['queries']:
+                regressions.append(
+                    f"{scale}/{stage}: {record['queries']} queries vs baseline {reference['queries']}"
+                )
+    return regressions
+
+
+def main():
+    """Main function to run the benchmark suite."""
+    parser = argparse.ArgumentParser(description='Benchmark the waterfall, rollup and persistence hot paths')
+    parser.add_argument('--scales', nargs='+', choices=list(SCALES), default=['small'], help='Dataset scales to run')
+    parser.add_argument('--database-url', default=None, help='Database URL (default: DATABASE_URL)')
+    parser.add_argument('--embedded', action='store_true', help='Use an embedded PostgreSQL (requires pgserver)')
+    parser.add_argument('--embedded-dir', type=Path, default=project_root / '.benchmark_pg', help='Embedded PostgreSQL data directory')
+    parser.add_argument('--skip-load', action='store_true', help='Reuse datasets loaded by a previous run')
+    parser.add_argument('--output', type=Path, default=None, help='Write results JSON to this file')
+    parser.add_argument('--baseline', type=Path, default=None, help='Compare against this baseline JSON')
+    parser.add_argument('--save-baseline', type=Path, default=None, help='Save results as the new baseline')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='Allowed wall-time growth over baseline (0.2 = 20%%)')
+
+    args = parser.parse_args()
+
+    # The app engine reads DATABASE_URL at import time
+    if args.embedded:
+        os.environ['DATABASE_URL'] = start_embedded_postgres(args.embedded_dir)
+    elif args.database_url:
+        os.environ['DATABASE_URL'] = args.database_url
+
+    from app.database import SessionLocal, engine
+    from app.models import Base
+
+    if args.embedded:
+        Base.metadata.create_all(engine)
+
+    print("=" * 60)
+    print("Finance-Insight Hot Path Benchmarks")
+    print("=" * 60)
+
+    recorder = StageRecorder(engine)
+    results = {}
+    for scale in args.scales:
+        results[scale] = run_scale(scale, SessionLocal, recorder, args.skip_load)
+
+    report = {
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'python': sys.version.split()[0],
+        'platform': sys.platform,
+        'results': results,
+    }
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2, default=str))
+        print(f"\n[SUCCESS] Results written to {args.output}")
+    if args.save_baseline:
+        args.save_baseline.write_text(json.dumps(results, indent=2, default=str))
+        print(f"[SUCCESS] Baseline saved to {args.save_baseline}")
+
+    if args.baseline:
+        regressions = compare_to_baseline(results, json.loads(args.baseline.read_text()), args.tolerance)
+        if regressions:
+            print(f"\n[REGRESSION] {len(regressions)} stage(s) slower than baseline:")
+            for regression in regressions:
+                print(f"  {regression}")
+            return 1
+        print(f"\n[SUCCESS] No regressions against {args.baseline} (tolerance {args.tolerance:.0%})")
+
+    errors = [f"{scale}/{stage}" for scale, stages in results.items() for stage, record in stages.items() if record.get('status') == 'error']
+    if errors:
+        print(f"\n[ERROR] Stages failed: {', '.join(errors)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -48,7 +48,7 @@ def clean_calculation_results():
         
         # Check fact_calculated_results (via calculation_runs join)
         results_query = text("""
-            SELECT cr.use_case_id, COUNT(*) as count, SUM((fcr.measure_vector->>'daily')::numeric) as total_daily
+            SELECT cr.use_case_id, COUNT(*) as count, SUM(COALESCE(fcr.adjusted_daily, (fcr.measure_vector->>'daily')::numeric)) as total_daily
             FROM fact_calculated_results fcr
             JOIN calculation_runs cr ON fcr.calculation_run_id = cr.id
             WHERE cr.use_case_id IN (:id1, :id2)
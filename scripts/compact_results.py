@@ -0,0 +1,71 @@
+"""
+Retention / compaction of calculation runs and their results.
+
+Keeps the newest runs per (use case, PNL date) and deletes older ones. Delta
+runs (runs storing only the rows that changed against a base run) whose base
+would be deleted are folded into full runs first, so every kept run stays
+readable. --fold-all materializes every kept delta run.
+
+Usage:
+    python scripts/compact_results.py --keep 3
+    python scripts/compact_results.py --use-case-id <uuid> --keep 1
+    python scripts/compact_results.py --fold-all --vacuum
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+from uuid import UUID
+
+# Add project root to path
+project_root = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(project_root))
+
+from sqlalchemy import text
+
+from app.database import SessionLocal, engine
+from app.services.result_store import compact_results
+
+
+def main():
+    """Main function to compact calculation results."""
+    parser = argparse.ArgumentParser(description='Delete old calculation runs and fold delta runs')
+    parser.add_argument('--use-case-id', type=UUID, default=None, help='Only compact this use case')
+    parser.add_argument('--keep', type=int, default=3, help='Runs to keep per (use case, PNL date)')
+    parser.add_argument('--fold-all', action='store_true', help='Materialize every kept delta run')
+    parser.add_argument('--vacuum', action='store_true', help='VACUUM ANALYZE fact_calculated_results afterwards')
+
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("Compact calculation runs")
+    print("=" * 60)
+
+    start = time.perf_counter()
+    session = SessionLocal()
+    try:
+        counts = compact_results(session, args.use_case_id, keep_runs=args.keep, fold_all=args.fold_all)
+        session.commit()
+    except Exception as e:
+        session.rollback()
+        print(f"[ERROR] Compaction failed: {e}")
+        return 1
+    finally:
+        session.close()
+
+    print(f"  runs deleted:      {counts['runs_deleted']}")
+    print(f"  runs materialized: {counts['runs_materialized']} ({counts['rows_copied']} rows copied)")
+    print(f"\n[SUCCESS] Compaction finished in {time.perf_counter() - start:.1f}s")
+
+    if args.vacuum:
+        # VACUUM cannot run inside a transaction block
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            conn.execute(text("VACUUM ANALYZE fact_calculated_results"))
+        print("[SUCCESS] VACUUM ANALYZE fact_calculated_results")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -199,8 +199,8 @@ def main():
         for node_id, node_name, direct_pnl in hybrid_parents:
             result = conn.execute(text("""
                 SELECT 
-                    fcr.measure_vector->>'daily' as adjusted_daily,
-                    fcr.plug_vector->>'daily' as plug_daily,
+                    COALESCE(fcr.adjusted_daily, (fcr.measure_vector->>'daily')::numeric) as adjusted_daily,
+                    COALESCE(fcr.plug_daily, (fcr.plug_vector->>'daily')::numeric) as plug_daily,
                     fcr.is_override,
                     ucr.run_timestamp
                 FROM fact_calculated_results fcr
@@ -107,8 +107,8 @@ def main():
                 result = conn.execute(text("""
                     SELECT 
                         fcr.node_id,
-                        fcr.measure_vector->>'daily' as daily_value,
-                        fcr.measure_vector->>'mtd' as mtd_value,
+                        COALESCE(fcr.adjusted_daily, (fcr.measure_vector->>'daily')::numeric) as daily_value,
+                        COALESCE(fcr.adjusted_mtd, (fcr.measure_vector->>'mtd')::numeric, (fcr.measure_vector->>'wtd')::numeric) as mtd_value,
                         fcr.is_override
                     FROM fact_calculated_results fcr
                     JOIN use_case_runs ucr ON fcr.run_id = ucr.run_id
@@ -0,0 +1,102 @@
+"""
+Backfill the typed result columns from the legacy JSONB vectors.
+
+Rows written before the typed_result_measure_columns migration keep their
+measures in fact_calculated_results.measure_vector / plug_vector (JSONB, with
+either float or string values and 'mtd' or 'wtd' keys). This tool copies them
+into adjusted_* / plug_* in batches (one commit per batch, safe to stop and
+re-run) and clears the JSONB so the rows shrink. Run VACUUM afterwards to give
+the space back (--vacuum).
+
+Usage:
+    python scripts/migrate_result_vectors.py
+    python scripts/migrate_result_vectors.py --batch-size 20000 --vacuum
+    python scripts/migrate_result_vectors.py --keep-json     # copy only, keep the JSONB
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(project_root))
+
+from sqlalchemy import text
+
+from app.database import engine
+
+MEASURES = ('daily', 'mtd', 'ytd', 'pytd')
+
+
+def _vector_assignments(prefix: str, legacy_column: str, null_if_missing: bool) -> str:
+    assignments = []
+    for measure in MEASURES:
+        keys = ('mtd', 'wtd') if measure == 'mtd' else (measure,)
+        values = ", ".join(f"({legacy_column}->>'{key}')::numeric" for key in keys)
+        value = f"COALESCE({values}, 0)"
+        if null_if_missing:
+            value = f"CASE WHEN {legacy_column} IS NULL THEN NULL ELSE {value} END"
+        assignments.append(f"{prefix}_{measure} = {value}")
+    return ",\n            ".join(assignments)
+
+
+def build_batch_update(keep_json: bool) -> str:
+    """UPDATE statement migrating one batch of unmigrated rows."""
+    clear_json = "" if keep_json else ",\n            measure_vector = NULL,\n            plug_vector = NULL"
+    return f"""
+        UPDATE fact_calculated_results
+        SET {_vector_assignments('adjusted', 'measure_vector', False)},
+            {_vector_assignments('plug', 'plug_vector', True)}{clear_json}
+        WHERE result_id IN (
+            SELECT result_id FROM fact_calculated_results
+            WHERE adjusted_daily IS NULL AND measure_vector IS NOT NULL
+            LIMIT :batch_size
+        )
+    """
+
+
+def main():
+    """Main function to migrate the JSONB result vectors."""
+    parser = argparse.ArgumentParser(description='Copy JSONB result vectors into the typed NUMERIC columns')
+    parser.add_argument('--batch-size', type=int, default=10000, help='Rows per transaction')
+    parser.add_argument('--keep-json', action='store_true', help='Keep the JSONB vectors after copying')
+    parser.add_argument('--vacuum', action='store_true', help='VACUUM ANALYZE fact_calculated_results afterwards')
+
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("Migrate fact_calculated_results vectors to typed columns")
+    print("=" * 60)
+
+    with engine.connect() as conn:
+        pending = conn.execute(text(
+            "SELECT COUNT(*) FROM fact_calculated_results WHERE adjusted_daily IS NULL AND measure_vector IS NOT NULL"
+        )).scalar()
+    print(f"Rows to migrate: {pending}")
+
+    update = text(build_batch_update(args.keep_json))
+    migrated = 0
+    start = time.perf_counter()
+    while True:
+        with engine.begin() as conn:
+            count = conn.execute(update, {"batch_size": args.batch_size}).rowcount
+        if not count:
+            break
+        migrated += count
+        print(f"  migrated {migrated}/{pending} rows ({time.perf_counter() - start:.1f}s)")
+
+    print(f"\n[SUCCESS] Migrated {migrated} rows in {time.perf_counter() - start:.1f}s")
+
+    if args.vacuum:
+        # VACUUM cannot run inside a transaction block
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            conn.execute(text("VACUUM ANALYZE fact_calculated_results"))
+        print("[SUCCESS] VACUUM ANALYZE fact_calculated_results")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,96 @@
+"""
+Import-time profile for the Finance-Insight API.
+
+Runs `python -X importtime -c "import app.main"` in a fresh interpreter and reports
+the slowest modules (cumulative and self time) plus the total import time, so
+regressions in cold start (e.g. a heavy SDK imported at module level) are visible.
+
+Usage:
+    python scripts/profile_startup.py
+    python scripts/profile_startup.py --top 40 --module app.api.routes.calculations
+    python scripts/profile_startup.py --budget-ms 1000   # exit 1 if over budget
+"""
+
+import argparse
+import os
+import re
+import subprocess
+import sys
+from pathlib import Path
+
+project_root = Path(__file__).resolve().parents[1]
+
+# "import time:   self [us] | cumulative | imported package"
+IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S.*)$")
+
+
+def profile_imports(module: str):
+    """
+    Import `module` in a fresh interpreter with -X importtime.
+
+    Args:
+        module: Dotted module path to import
+
+    Returns:
+        List of (module_name, self_us, cumulative_us, depth)
+    """
+    env = dict(os.environ)
+    env["PYTHONPATH"] = str(project_root) + os.pathsep + env.get("PYTHONPATH", "")
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=str(project_root),
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    if completed.returncode != 0:
+        tail = "\n".join(completed.stderr.strip().splitlines()[-15:])
+        raise RuntimeError(f"Importing {module} failed:\n{tail}")
+
+    entries = []
+    for line in completed.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if not match:
+            continue
+        self_us, cumulative_us, indent, name = match.groups()
+        depth = (len(indent) - 1) // 2
+        entries.append((name.strip(), int(self_us), int(cumulative_us), depth))
+    return entries
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import-time profile of the API")
+    parser.add_argument("--module", default="app.main", help="Module to import (default: app.main)")
+    parser.add_argument("--top", type=int, default=25, help="Number of modules to list")
+    parser.add_argument("--budget-ms", type=float, default=None, help="Fail (exit 1) if total import time exceeds this")
+    args = parser.parse_args()
+
+    entries = profile_imports(args.module)
+    total_ms = sum(entry[1] for entry in entries) / 1000.0
+    # Self time summed per top-level package (where the time is actually spent)
+    by_package = {}
+    for name, self_us, _cumulative_us, _depth in entries:
+        root = name.split(".")[0]
+        by_package[root] = by_package.get(root, 0) + self_us
+
+    print("=" * 80)
+    print(f"IMPORT PROFILE: {args.module}  (total {total_ms:.1f} ms, {len(entries)} modules)")
+    print("=" * 80)
+
+    print(f"\nTop {args.top} by cumulative time:")
+    print(f"{'cumulative ms':>14} {'self ms':>9}  module")
+    for name, self_us, cumulative_us, depth in sorted(entries, key=lambda e: e[2], reverse=True)[:args.top]:
+        print(f"{cumulative_us / 1000.0:>14.1f} {self_us / 1000.0:>9.1f}  {'  ' * depth}{name}")
+
+    print("\nSelf time by top-level package:")
+    for root, self_us in sorted(by_package.items(), key=lambda item: item[1], reverse=True)[:args.top]:
+        print(f"{self_us / 1000.0:>14.1f}  {root}")
+
+    if args.budget_ms is not None and total_ms > args.budget_ms:
+        print(f"\n❌ Import time {total_ms:.1f} ms exceeds budget {args.budget_ms:.1f} ms")
+        sys.exit(1)
+    print("\n✅ Done")
+
+
+if __name__ == "__main__":
+    main()
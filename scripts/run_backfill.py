@@ -0,0 +1,74 @@
+"""
+CLI script to backfill snapshot runs for a range of P&L dates.
+
+Hierarchy and rules are resolved once, facts are streamed in date order and
+every window of dates is committed as a checkpoint (see app.services.backfill).
+An interrupted backfill is continued with --resume <backfill_id>.
+
+Usage:
+    python scripts/run_backfill.py --use-case-id <uuid> --start-date 2025-01-01 --end-date 2025-12-31
+    python scripts/run_backfill.py --use-case-id <uuid> --start-date 2025-01-01 --end-date 2025-12-31 --resume 3f2a9c1d7e4b
+"""
+
+import argparse
+import sys
+from datetime import date
+from pathlib import Path
+from uuid import UUID
+
+# Add project root to path
+project_root = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(project_root))
+
+from app.database import session_scope
+from app.services.backfill import run_backfill
+
+
+def main():
+    """Main function to run a historical backfill."""
+    parser = argparse.ArgumentParser(description='Backfill calculation runs for a date range')
+    parser.add_argument('--use-case-id', type=str, required=True, help='Use case UUID')
+    parser.add_argument('--start-date', type=date.fromisoformat, required=True, help='First P&L date (YYYY-MM-DD)')
+    parser.add_argument('--end-date', type=date.fromisoformat, required=True, help='Last P&L date (YYYY-MM-DD)')
+    parser.add_argument('--resume', type=str, default=None, help='backfill_id of an interrupted backfill')
+    parser.add_argument('--window-days', type=int, default=None, help='Dates committed per checkpoint')
+    parser.add_argument('--triggered-by', type=str, default='backfill', help='User ID recorded on the runs')
+
+    args = parser.parse_args()
+
+    try:
+        use_case_id = UUID(args.use_case_id)
+    except ValueError as e:
+        print(f"Error: Invalid use case ID: {e}")
+        return 1
+
+    print("=" * 60)
+    print("Finance-Insight Historical Backfill")
+    print("=" * 60)
+    print(f"Use Case: {use_case_id}  Range: {args.start_date} .. {args.end_date}")
+
+    try:
+        with session_scope() as session:
+            report = run_backfill(
+                use_case_id, args.start_date, args.end_date, session,
+                triggered_by=args.triggered_by,
+                resume_backfill_id=args.resume,
+                window_days=args.window_days,
+            )
+    except ValueError as e:
+        print(f"Error: {e}")
+        return 1
+
+    print(f"\nBackfill ID: {report['backfill_id']}  Status: {report['status']}")
+    print(f"Dates completed: {len(report['dates_completed'])}  Skipped (resumed): {len(report['dates_skipped'])}  "
+          f"Without facts: {report['dates_without_facts']}")
+    print(f"Results: {report['result_count']}  Timings (ms): {report['timings_ms']}")
+    if report['error']:
+        print(f"✗ {report['error']}")
+        print(f"Resume with: --resume {report['backfill_id']}")
+
+    return 0 if report['status'] == 'COMPLETED' else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,75 @@
+"""
+CLI script to run the end-of-day (COB) batch for several use cases.
+
+Each source fact table is scanned once for all use cases reading it, natural
+rollups run across a process pool and all results are persisted in one bulk
+insert (see app.services.batch_scheduler).
+
+Usage:
+    python scripts/run_cob_batch.py --pnl-date 2025-12-24 --all
+    python scripts/run_cob_batch.py --pnl-date 2025-12-24 --use-case-id <uuid> --use-case-id <uuid>
+    python scripts/run_cob_batch.py --pnl-date 2025-12-24 --all --workers 8
+"""
+
+import argparse
+import sys
+from datetime import date
+from pathlib import Path
+from uuid import UUID
+
+# Add project root to path
+project_root = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(project_root))
+
+from app.database import session_scope
+from app.models import UseCase
+from app.services.batch_scheduler import BatchJob, run_batch
+
+
+def main():
+    """Main function to run the COB batch."""
+    parser = argparse.ArgumentParser(description='Run the end-of-day batch calculation')
+    parser.add_argument('--pnl-date', type=date.fromisoformat, required=True, help='P&L date (YYYY-MM-DD)')
+    parser.add_argument('--use-case-id', action='append', default=[], help='Use case UUID (repeatable)')
+    parser.add_argument('--all', action='store_true', help='Run every use case')
+    parser.add_argument('--workers', type=int, default=None, help='Rollup worker processes')
+    parser.add_argument('--triggered-by', type=str, default='cob_batch', help='User ID recorded on the runs')
+
+    args = parser.parse_args()
+
+    if not args.all and not args.use_case_id:
+        parser.error('Provide --use-case-id (one or more) or --all')
+
+    try:
+        use_case_ids = [UUID(value) for value in args.use_case_id]
+    except ValueError as e:
+        print(f"Error: Invalid use case ID: {e}")
+        return 1
+
+    print("=" * 60)
+    print("Finance-Insight COB Batch")
+    print("=" * 60)
+
+    with session_scope() as session:
+        if args.all:
+            use_case_ids = [row[0] for row in session.query(UseCase.use_case_id).all()]
+
+        jobs = [BatchJob(use_case_id, args.pnl_date) for use_case_id in use_case_ids]
+        print(f"PNL Date: {args.pnl_date}  Jobs: {len(jobs)}")
+
+        report = run_batch(jobs, session, triggered_by=args.triggered_by, max_workers=args.workers)
+
+    print(f"\nStatus: {report['status']}  Results: {report['result_count']}")
+    print(f"Timings (ms): {report['timings_ms']}")
+    for table, stats in report['tables'].items():
+        print(f"  {table}: {stats['rows']} rows for {stats['jobs']} jobs, loaded in {stats['load_ms']}ms")
+    for job in report['jobs']:
+        marker = "✓" if job['status'] == 'COMPLETED' else "✗"
+        detail = job['error'] or f"{job['result_count']} results, {job['rules_applied']} rules"
+        print(f"  {marker} {job['use_case_id']} ({job['source_table']}): {detail}  {job['timings_ms']}")
+
+    return 0 if report['status'] == 'COMPLETED' else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,201 @@
+"""
+Contract check for the discovery rendering pipeline.
+
+Builds the same discovery responses twice and compares them:
+- reference: build_tree_structure + DiscoveryResponse.model_dump_json() (model path)
+- fast: discovery_render.build_tree + discovery_render.encode_discovery (served by /discovery)
+
+Datasets (no database needed):
+- realistic finance hierarchy (app/engine/realistic_finance_data.py) with cost
+  centers, TRADE_/STERLING_RULE placeholder children, missing results,
+  float and Decimal measures, partial CTE paths and a non-ASCII node name
+- synthetic ragged hierarchy (app/engine/synthetic_data.py), --nodes nodes
+- a single chain of --depth nodes (fast path only: the recursive model path
+  and recursive JSON encoders exceed their depth limits)
+
+The responses must be byte-identical (and equal as JSON). Exit code 1 on any
+difference.
+
+Usage:
+    python scripts/verify_discovery_render.py
+    python scripts/verify_discovery_render.py --nodes 20000 --depth 10000
+"""
+
+import argparse
+import json
+import random
+import sys
+import time
+from decimal import Decimal
+from pathlib import Path
+from types import SimpleNamespace
+
+# Add project root to path
+project_root = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(project_root))
+
+from app.api.routes.discovery import build_tree_structure
+from app.api.schemas import DiscoveryResponse, ReconciliationData
+from app.engine.realistic_finance_data import generate_realistic_hierarchy
+from app.engine.synthetic_data import SyntheticConfig, generate_hierarchy_frame
+from app.services import discovery_render
+from app.services.attribute_cache import get_node_attributes_for_structure
+
+
+def _node(node_id, parent_node_id, node_name, depth, is_leaf):
+    return SimpleNamespace(
+        node_id=node_id, parent_node_id=parent_node_id, node_name=node_name, depth=depth, is_leaf=is_leaf
+    )
+
+
+def _index(nodes):
+    hierarchy_dict = {node.node_id: node for node in nodes}
+    children_dict = {}
+    for node in nodes:
+        if node.parent_node_id:
+            children_dict.setdefault(node.parent_node_id, []).append(node.node_id)
+    root_ids = [node.node_id for node in nodes if node.parent_node_id is None]
+    return hierarchy_dict, children_dict, root_ids
+
+
+def _results(rng, node_ids):
+    results = {}
+    for node_id in node_ids:
+        draw = rng.random()
+        if draw < 0.1:
+            continue  # No rollup for this node
+        daily = Decimal(rng.randint(-10**8, 10**8)) / 100
+        if draw < 0.2:
+            results[node_id] = {'daily': float(daily), 'mtd': int(daily), 'ytd': str(daily)}
+        else:
+            results[node_id] = {'daily': daily, 'mtd': daily * 3, 'ytd': daily * 40, 'pytd': daily * 38}
+    return results
+
+
+def realistic_dataset(rng):
+    nodes = [_node(**{k: row[k] for k in ('node_id', 'parent_node_id', 'node_name', 'depth', 'is_leaf')})
+             for row in generate_realistic_hierarchy()]
+    root_id = next(node.node_id for node in nodes if node.parent_node_id is None)
+    nodes.append(_node('TRADE_0001', root_id, 'Trade placeholder', 1, True))
+    nodes.append(_node('STERLING_RULE_01', root_id, 'Rule placeholder', 1, True))
+    nodes.append(_node('ZRH_DESK', root_id, 'Zürich Desk – Équités', 1, True))
+    hierarchy_dict, children_dict, root_ids = _index(nodes)
+    root_ids = [node_id for node_id in root_ids if node_id in hierarchy_dict]
+    path_dict = {node.node_id: [node.node_name] for node in nodes if rng.random() < 0.7}
+    return 'REALISTIC', hierarchy_dict, children_dict, root_ids, path_dict, _results(rng, hierarchy_dict)
+
+
+def synthetic_dataset(rng, node_count):
+    frame = generate_hierarchy_frame(SyntheticConfig(node_count=node_count))
+    nodes = [
+        _node(
+            row.node_id, row.parent_node_id if isinstance(row.parent_node_id, str) else None,  # Root: NaN
+            row.node_name, int(row.depth), bool(row.is_leaf)
+        )
+        for row in frame.itertuples()
+    ]
+    hierarchy_dict, children_dict, root_ids = _index(nodes)
+    path_dict = {node.node_id: ['Synthetic', node.node_name] for node in nodes}
+    return 'SYNTHETIC', hierarchy_dict, children_dict, root_ids, path_dict, _results(rng, hierarchy_dict)
+
+
+def reference_bytes(structure_id, hierarchy_dict, children_dict, root_ids, path_dict, results, reconciliation, debug_info):
+    attributes = get_node_attributes_for_structure(structure_id, hierarchy_dict, children_dict, root_ids)
+    trees = [
+        build_tree_structure(
+            hierarchy_dict, children_dict, {k: dict(v) for k, v in results.items()}, root_id,
+            include_pytd=False, parent_attributes=None, path_dict=path_dict, node_attributes=attributes
+        )
+        for root_id in root_ids
+    ]
+    response = DiscoveryResponse(
+        structure_id=structure_id, hierarchy=trees, reconciliation=reconciliation, debug_info=debug_info
+    )
+    return response.model_dump_json().encode('utf-8')
+
+
+def fast_bytes(structure_id, hierarchy_dict, children_dict, root_ids, path_dict, results, reconciliation, debug_info):
+    attributes = get_node_attributes_for_structure(structure_id, hierarchy_dict, children_dict, root_ids)
+    trees = discovery_render.build_tree(
+        hierarchy_dict, children_dict, results, root_ids, path_dict=path_dict, node_attributes=attributes
+    )
+    return discovery_render.encode_discovery(discovery_render.discovery_payload(
+        structure_id, trees, reconciliation.model_dump() if reconciliation else None, debug_info
+    ))
+
+
+def compare(name, hierarchy_dict, children_dict, root_ids, path_dict, results) -> bool:
+    reconciliation = ReconciliationData(
+        fact_table_sum={'daily': '1.00', 'mtd': '2.00', 'ytd': '3.00'},
+        leaf_nodes_sum={'daily': '1.00', 'mtd': '2.00', 'ytd': '3.00'},
+    )
+    debug_info = {'source_table': 'fact_pnl_gold', 'row_count': len(results), 'use_case_id': None}
+    args = (name, hierarchy_dict, children_dict, root_ids, path_dict, results, reconciliation, debug_info)
+
+    start = time.perf_counter()
+    expected = reference_bytes(*args)
+    reference_ms = (time.perf_counter() - start) * 1000
+    start = time.perf_counter()
+    actual = fast_bytes(*args)
+    fast_ms = (time.perf_counter() - start) * 1000
+
+    print(f"{name}: {len(hierarchy_dict)} nodes, {len(actual)} bytes, "
+          f"model path {reference_ms:.1f}ms, fast path {fast_ms:.1f}ms")
+    if json.loads(expected) != json.loads(actual):
+        print(f"[ERROR] {name}: responses differ")
+        return False
+    if expected != actual:
+        print(f"[ERROR] {name}: responses equal as JSON but not byte-identical")
+        return False
+    print(f"[SUCCESS] {name}: byte-identical")
+    return True
+
+
+def check_deep_chain(depth: int) -> bool:
+    nodes = [_node('CHAIN_0', None, 'Chain 0', 0, depth == 1)]
+    for level in range(1, depth):
+        nodes.append(_node(f'CHAIN_{level}', f'CHAIN_{level - 1}', f'Chain {level}', level, level == depth - 1))
+    hierarchy_dict, children_dict, root_ids = _index(nodes)
+    trees = discovery_render.build_tree(hierarchy_dict, children_dict, {}, root_ids)
+    payload = discovery_render.encode_discovery(discovery_render.discovery_payload('CHAIN', trees))
+
+    rendered = 0
+    stack = list(trees)
+    while stack:
+        node = stack.pop()
+        rendered += 1
+        stack.extend(node['children'])
+    if rendered != depth:
+        print(f"[ERROR] CHAIN: rendered {rendered} of {depth} nodes")
+        return False
+    print(f"[SUCCESS] CHAIN: depth {depth} rendered ({len(payload)} bytes)")
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Verify the discovery render pipeline against the model path")
+    parser.add_argument("--nodes", type=int, default=5000, help="Synthetic hierarchy size")
+    parser.add_argument("--depth", type=int, default=5000, help="Depth of the chain hierarchy")
+    parser.add_argument("--seed", type=int, default=7, help="Random seed for measures and paths")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("Discovery Render Contract Check")
+    print(f"Encoder: {'orjson' if discovery_render.ORJSON_AVAILABLE else 'json (standard library)'}")
+    print("=" * 60)
+
+    rng = random.Random(args.seed)
+    ok = compare(*realistic_dataset(rng))
+    ok = compare(*synthetic_dataset(rng, args.nodes)) and ok
+    ok = check_deep_chain(args.depth) and ok
+
+    print("=" * 60)
+    if not ok:
+        print("[ERROR] Discovery render output differs from the model path")
+        return 1
+    print("[SUCCESS] Discovery render output matches the model path")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,367 @@
+"""
+Agreement check for the Type 2B backends.
+
+Runs one rule set per fact table and frame shape through both backends and
+compares every result:
+- memory: Type2BQueryEngine over the fact frame as the calculation runs load it:
+  facts_frame_from_rows (orchestrator, batch scheduler) and the ORM loaders
+  load_facts / load_facts_from_entries / load_facts_from_use_case_3
+  (calculate_waterfall)
+- sql: execute_type_2b_rules_sql for the pushdown-eligible rules, and the
+  planner path (create_type2b_engine) forced to each backend for all rules
+  of two use cases sharing the frame (as in the batch scheduler)
+- validation: reexecute_type_2b_rules without a frame (run_full_validation
+  after calculate_waterfall) for the ORM-loaded frames
+
+The rule set filters on frame columns (node code, scenario, currency, amounts)
+and on columns the frame does not have (must never be pushed down), and covers
+IN / NOT IN / LIKE / NULL checks, every aggregation, measures with and without
+a frame column, constants, nested expressions and division by zero. A frame
+that does not match its table (a gold frame for a fact_pnl_entries use case, as
+calculate_waterfall loads it) must never be pushed down.
+
+By default the check runs on an in-memory SQLite database with synthetic
+facts. With --database-url the synthetic facts are added to the PostgreSQL
+fact tables inside a transaction that is rolled back (existing rows are part
+of the check). Exit code 1 on any difference.
+
+Usage:
+    python scripts/verify_type2b_backends.py
+    python scripts/verify_type2b_backends.py --database-url postgresql://...
+"""
+
+import argparse
+import random
+import sys
+import warnings
+from datetime import date
+from decimal import Decimal
+from pathlib import Path
+from types import SimpleNamespace
+
+# Add project root to path
+project_root = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(project_root))
+
+from sqlalchemy import create_engine, exc, select
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import Session
+
+from app.engine import type2b_sql
+from app.engine.type2b_processor import Type2BQueryEngine
+from app.engine.validation import reexecute_type_2b_rules
+from app.engine.waterfall import (
+    get_measure_column_name,
+    load_facts,
+    load_facts_from_entries,
+    load_facts_from_use_case_3,
+)
+from app.models import FactPnlEntries, FactPnlGold, FactPnlUseCase3, UseCase
+from app.services.orchestrator import facts_frame_from_rows
+
+TOLERANCE = Decimal('0.005')  # AVG precision differs between pandas and the database
+CODES = ['EQ_US', 'EQ_EU', 'FI_RATES', 'FI_CREDIT', 'FX_SPOT', 'COMMOD']
+
+
+@compiles(JSONB, 'sqlite')
+def _jsonb_sqlite(type_, compiler, **kw):
+    return 'JSON'
+
+
+def _amount(rng):
+    return Decimal(rng.randint(-10**6, 10**6)) / 100
+
+
+def insert_facts(session: Session, rng, rows: int):
+    """Synthetic facts for every fact table; returns the fact_pnl_entries use case id."""
+    use_case = UseCase(
+        name='Type 2B backend check', owner_id='verify', atlas_structure_id='VERIFY',
+        input_table_name='fact_pnl_entries'
+    )
+    session.add(use_case)
+    session.flush()
+
+    for index in range(rows):
+        code = rng.choice(CODES)
+        session.add(FactPnlGold(
+            account_id=f'ACC{index % 7}', cc_id=code, book_id=f'BOOK{index % 5}', strategy_id=f'STR{index % 3}',
+            trade_date=date(2024, 1, 2), daily_pnl=_amount(rng), mtd_pnl=_amount(rng),
+            ytd_pnl=_amount(rng), pytd_pnl=_amount(rng),
+        ))
+        daily = _amount(rng)
+        session.add(FactPnlEntries(
+            use_case_id=use_case.use_case_id, pnl_date=date(2024, 1, 2), category_code=code, amount=daily,
+            daily_amount=daily, wtd_amount=_amount(rng), ytd_amount=_amount(rng),
+            scenario=rng.choice(['ACTUAL', 'PRIOR']),
+        ))
+        session.add(FactPnlUseCase3(
+            effective_date=date(2024, 1, 2), cost_center=f'CC{index % 4}', division='EQUITIES',
+            strategy=code if rng.random() > 0.05 else None, book=f'BOOK{index % 5}',
+            pnl_daily=_amount(rng), pnl_commission=_amount(rng), pnl_trade=_amount(rng),
+        ))
+    session.flush()
+    return use_case.use_case_id
+
+
+def load_frame(session: Session, table_name: str, scope):
+    """Fact frame as the runs build it (FACT_SELECT_COLUMNS order -> facts_frame_from_rows)."""
+    if table_name == 'fact_pnl_use_case_3':
+        t = FactPnlUseCase3
+        statement = select(t.strategy, t.pnl_daily, t.pnl_daily, t.pnl_daily, t.pnl_daily, t.pnl_daily,
+                           t.pnl_commission, t.pnl_trade)
+        rows = [(r[0], r[1], 0, 0, 'ACTUAL', 'USD', r[6], r[7]) for r in session.execute(statement)]
+    elif table_name == 'fact_pnl_entries':
+        t = FactPnlEntries
+        statement = select(t.category_code, t.daily_amount, t.wtd_amount, t.ytd_amount, t.scenario)
+        for column_name, value in scope.items():
+            statement = statement.where(getattr(t, column_name) == value)
+        rows = [tuple(r) + ('USD',) for r in session.execute(statement)]
+    else:
+        t = FactPnlGold
+        statement = select(t.cc_id, t.daily_pnl, t.mtd_pnl, t.ytd_pnl)
+        rows = [tuple(r) + ('ACTUAL', 'USD') for r in session.execute(statement)]
+    return facts_frame_from_rows(rows, table_name)
+
+
+def load_model_frame(session: Session, table_name: str, use_case_id):
+    """Fact frame as calculate_waterfall loads it (ORM loaders in app.engine.waterfall)."""
+    if table_name == 'fact_pnl_use_case_3':
+        return load_facts_from_use_case_3(session)
+    if table_name == 'fact_pnl_entries':
+        return load_facts_from_entries(session, use_case_id)
+    return load_facts(session)
+
+
+def _query(query_id, filters, measure='daily_pnl', aggregation='SUM'):
+    return {'query_id': query_id, 'measure': measure, 'aggregation': aggregation, 'filters': filters}
+
+
+def _ref(query_id):
+    return {'type': 'query', 'query_id': query_id}
+
+
+def _rule(node_id, queries, expression):
+    return SimpleNamespace(
+        node_id=node_id, rule_type='FILTER_ARITHMETIC',
+        predicate_json={'version': '2.0', 'queries': queries, 'expression': expression},
+    )
+
+
+def build_rules(table_name: str, shape: str):
+    """Rule set for one table and frame shape (filters and measures name frame columns)."""
+    if shape == type2b_sql.FRAME_ROWS:
+        code_field, amount, period_amount = 'category_code', 'daily_amount', 'wtd_amount'
+        table_only_field = {
+            'fact_pnl_use_case_3': 'strategy', 'fact_pnl_entries': 'use_case_id', 'fact_pnl_gold': 'cc_id',
+        }[table_name]
+    else:
+        code_field = {
+            'fact_pnl_use_case_3': 'strategy', 'fact_pnl_entries': 'category_code', 'fact_pnl_gold': 'cc_id',
+        }[table_name]
+        amount, period_amount = 'daily_pnl', 'mtd_pnl'
+        table_only_field = 'amount' if table_name == 'fact_pnl_entries' else 'category_code'
+    code = lambda value: {'field': code_field, 'operator': '=', 'value': value}
+    return [
+        _rule('IN_MINUS_EQ', [
+            _query('Q1', [{'field': code_field, 'operator': 'IN', 'values': CODES[:2]}], measure=amount),
+            _query('Q2', [code(CODES[2])], measure=amount),
+        ], {'operator': '-', 'operands': [_ref('Q1'), _ref('Q2')]}),
+        _rule('COMMISSION_PER_ROW', [
+            _query('Q1', [code(CODES[0])], measure='daily_commission'),
+            _query('Q2', [], measure=amount, aggregation='COUNT'),
+        ], {'operator': '/', 'operands': [_ref('Q1'), _ref('Q2')]}),
+        _rule('AVG_POSITIVE_PLUS_CONSTANT', [
+            _query('Q1', [
+                {'field': amount, 'operator': '>', 'value': 0},
+                {'field': 'scenario', 'operator': '=', 'value': 'ACTUAL'},
+            ], measure=amount, aggregation='AVG'),
+        ], {'operator': '+', 'operands': [_ref('Q1'), {'type': 'constant', 'value': 10}]}),
+        _rule('MAX_TIMES_MIN', [
+            _query('Q1', [{'field': code_field, 'operator': 'NOT IN', 'values': [CODES[0]]}],
+                   measure=amount, aggregation='MAX'),
+            _query('Q2', [{'field': period_amount, 'operator': '<=', 'value': 0}], measure=amount, aggregation='MIN'),
+        ], {'operator': '*', 'operands': [_ref('Q1'), _ref('Q2')]}),
+        _rule('LIKE_MINUS_CURRENCY', [
+            _query('Q1', [{'field': code_field, 'operator': 'LIKE', 'value': 'fi_'}], measure=amount),
+            _query('Q2', [{'field': 'currency', 'operator': '!=', 'value': 'USD'}], measure=amount),
+        ], {'operator': '-', 'operands': [_ref('Q1'), _ref('Q2')]}),
+        _rule('DIVIDE_BY_EMPTY', [
+            _query('Q1', [], measure=amount),
+            _query('Q2', [code('NO_SUCH_CODE')], measure=amount),
+        ], {'operator': '/', 'operands': [_ref('Q1'), _ref('Q2')]}),
+        _rule('NULL_CHECKS_NESTED', [
+            _query('Q1', [{'field': code_field, 'operator': 'IS NULL'}], measure=amount, aggregation='COUNT'),
+            _query('Q2', [{'field': code_field, 'operator': 'IS NOT NULL'}], measure='ytd_pnl'),
+            _query('Q3', [code(CODES[3])], measure='daily_trade'),
+        ], {'operator': '+', 'operands': [
+            _ref('Q1'),
+            {'type': 'expression', 'expression': {'operator': '-', 'operands': [_ref('Q2'), _ref('Q3')]}},
+        ]}),
+        _rule('TABLE_ONLY_FIELD', [
+            _query('Q1', [{'field': table_only_field, 'operator': '=', 'value': CODES[0]}], measure=amount),
+            _query('Q2', [code(CODES[1])], measure=amount),
+        ], {'operator': '+', 'operands': [_ref('Q1'), _ref('Q2')]}),
+        _rule('BOOK_FIELD', [
+            _query('Q1', [{'field': 'book', 'operator': 'IN', 'values': ['BOOK1', 'BOOK2']}], measure=amount),
+            _query('Q2', [code(CODES[1])], measure=amount),
+        ], {'operator': '-', 'operands': [_ref('Q1'), _ref('Q2')]}),
+        _rule('REGEX_LIKE', [
+            _query('Q1', [{'field': code_field, 'operator': 'LIKE', 'value': 'EQ.US'}], measure=amount),
+            _query('Q2', [code(CODES[1])], measure=amount),
+        ], {'operator': '+', 'operands': [_ref('Q1'), _ref('Q2')]}),
+    ]
+
+
+def memory_only_rules(rules, facts_df, table_name: str):
+    """Node ids that must not be pushed down: a filter field or measure the frame lacks, or a regex LIKE."""
+    columns = set(facts_df.columns) - {'fact_id'}
+    node_ids = set()
+    for rule in rules:
+        for query_def in rule.predicate_json['queries']:
+            fields = {f['field'] for f in query_def['filters']}
+            if get_measure_column_name(query_def['measure'], table_name) not in columns or fields - columns:
+                node_ids.add(rule.node_id)
+            if any(f['operator'] == 'LIKE' and '.' in f['value'] for f in query_def['filters']):
+                node_ids.add(rule.node_id)
+    return node_ids
+
+
+def variant_rules(rules):
+    """Same node ids with the expression operands reversed (a second use case's rules)."""
+    variants = []
+    for rule in rules:
+        expression = dict(rule.predicate_json['expression'])
+        expression['operands'] = list(reversed(expression['operands']))
+        variants.append(_rule(rule.node_id, rule.predicate_json['queries'], expression))
+    return variants
+
+
+def _differs(a: Decimal, b: Decimal) -> bool:
+    return abs(Decimal(str(a)) - Decimal(str(b))) > TOLERANCE
+
+
+def check_table(session: Session, table_name: str, use_case_id, shape: str) -> bool:
+    label = f"{table_name} ({shape})"
+    if shape == type2b_sql.FRAME_ROWS:
+        scope = type2b_sql.type2b_scope(table_name, use_case_id, 'ACTUAL')
+        facts_df = load_frame(session, table_name, scope)
+    else:
+        scope = type2b_sql.type2b_scope(table_name, use_case_id)
+        facts_df = load_model_frame(session, table_name, use_case_id)
+    rules = build_rules(table_name, shape)
+    memory_only = memory_only_rules(rules, facts_df, table_name)
+    ok = True
+
+    detected = type2b_sql.frame_shape(facts_df, table_name)
+    if detected != shape:
+        print(f"[ERROR] {label}: frame detected as {detected}")
+        ok = False
+
+    pushdown = [rule for rule in rules if type2b_sql.can_push_down(rule, table_name, shape)]
+    wrongly_pushed = {rule.node_id for rule in pushdown} & memory_only
+    if wrongly_pushed:
+        print(f"[ERROR] {label}: rules on non-frame fields or measures pushed down: {sorted(wrongly_pushed)}")
+        ok = False
+
+    memory = Type2BQueryEngine(facts_df)
+    expected = {rule.node_id: memory.execute_rule(rule, table_name) for rule in rules}
+    sql = type2b_sql.execute_type_2b_rules_sql(session, pushdown, table_name, scope, shape)
+    for node_id, value in sql.items():
+        if _differs(value, expected[node_id]):
+            print(f"[ERROR] {label}.{node_id}: sql={value} memory={expected[node_id]}")
+            ok = False
+
+    if shape == type2b_sql.FRAME_MODEL:
+        # Validation of a calculate_waterfall run without its frame re-executes in SQL
+        reexecuted = reexecute_type_2b_rules(session, rules, table_name, use_case_id, frame_shape=shape)
+        if set(reexecuted) != set(sql):
+            print(f"[ERROR] {label}: validation re-executed {sorted(reexecuted)}, expected {sorted(sql)}")
+            ok = False
+        for node_id, values in reexecuted.items():
+            if _differs(values['daily'], expected[node_id]):
+                print(f"[ERROR] {label}.{node_id} (validation): {values['daily']} != {expected[node_id]}")
+                ok = False
+
+    # Planner path, one engine for two use cases sharing the frame (same node ids,
+    # different predicates): the backend choice must not change any result
+    shared_rules = rules + variant_rules(rules)
+    shared_expected = [memory.execute_rule(rule, table_name) for rule in shared_rules]
+    configured = type2b_sql.TYPE2B_BACKEND
+    try:
+        for backend in ('sql', 'memory'):
+            type2b_sql.TYPE2B_BACKEND = backend
+            engine = type2b_sql.create_type2b_engine(session, facts_df, shared_rules, table_name, scope)
+            for rule, value_expected in zip(shared_rules, shared_expected):
+                value = engine.execute_rule(rule, table_name)
+                if _differs(value, value_expected):
+                    print(f"[ERROR] {label}.{rule.node_id} (planner={backend}): {value} != {value_expected}")
+                    ok = False
+    finally:
+        type2b_sql.TYPE2B_BACKEND = configured
+
+    nonzero = sum(1 for value in expected.values() if value != 0)
+    status = "[SUCCESS]" if ok else "[ERROR]"
+    print(f"{status} {label}: {len(facts_df)} frame rows, {len(rules)} rules "
+          f"({len(pushdown)} pushed down, {nonzero} non-zero)")
+    return ok
+
+
+def check_mismatched_frame(session: Session, use_case_id) -> bool:
+    """calculate_waterfall runs fact_pnl_entries use cases over the gold frame: never push down."""
+    facts_df = load_facts(session)
+    rules = build_rules('fact_pnl_entries', type2b_sql.FRAME_ROWS)
+    scope = type2b_sql.type2b_scope('fact_pnl_entries', use_case_id)
+    configured = type2b_sql.TYPE2B_BACKEND
+    try:
+        type2b_sql.TYPE2B_BACKEND = 'sql'
+        engine = type2b_sql.create_type2b_engine(session, facts_df, rules, 'fact_pnl_entries', scope)
+    finally:
+        type2b_sql.TYPE2B_BACKEND = configured
+    if isinstance(engine, type2b_sql.Type2BPushdownEngine):
+        print("[ERROR] gold frame for fact_pnl_entries rules was pushed down")
+        return False
+    print("[SUCCESS] gold frame for fact_pnl_entries rules stays in memory")
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Verify that the Type 2B SQL and in-memory backends agree")
+    parser.add_argument("--database-url", default=None, help="PostgreSQL URL (default: in-memory SQLite)")
+    parser.add_argument("--rows", type=int, default=2000, help="Synthetic fact rows per table")
+    parser.add_argument("--seed", type=int, default=11, help="Random seed for synthetic facts")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("Type 2B Backend Agreement Check")
+    print(f"Database: {'PostgreSQL' if args.database_url else 'SQLite (in-memory)'}")
+    print("=" * 60)
+
+    engine = create_engine(args.database_url or "sqlite://")
+    if not args.database_url:
+        # SQLite stores NUMERIC as float; covered by TOLERANCE
+        warnings.filterwarnings("ignore", category=exc.SAWarning, message=".*Decimal.*")
+        for model in (UseCase, FactPnlGold, FactPnlEntries, FactPnlUseCase3):
+            model.__table__.create(engine, checkfirst=True)
+
+    ok = True
+    with Session(engine) as session:
+        try:
+            use_case_id = insert_facts(session, random.Random(args.seed), args.rows)
+            for shape in type2b_sql.FRAME_COLUMNS:
+                for table_name in type2b_sql.FACT_TABLES:
+                    ok = check_table(session, table_name, use_case_id, shape) and ok
+            ok = check_mismatched_frame(session, use_case_id) and ok
+        finally:
+            session.rollback()
+
+    print("=" * 60)
+    if not ok:
+        print("[ERROR] Type 2B backends disagree")
+        return 1
+    print("[SUCCESS] Type 2B backends agree")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())